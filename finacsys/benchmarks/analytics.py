@@ -0,0 +1,136 @@
+"""
+Бенчмарк аналитики расходов: фильтрация с подсчетом суммы, сортировка по
+итоговой цене, суммы по дням и построение агрегатов, выполняемые над
+объектами Expense и над колоночным представлением в массивах NumPy (см.
+database.arrays). Время построения массивов выводится отдельно.
+
+Запуск: python -m benchmarks.analytics [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import time
+from typing import Callable, Dict, List
+
+from finacsys.database.aggregates import Aggregates
+from finacsys.database.arrays import ArrayExpenseQuery, ExpenseArrays
+from finacsys.database.queries import ExpenseQuery
+from finacsys.filters import TimeFilter
+from finacsys.models import Category, Expense, Product
+from finacsys.money import Money
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PRODUCTS_COUNT = 1_000
+CATEGORIES_COUNT = 20
+
+
+def generate(expenses_count: int) -> List[Expense]:
+    """Создание синтетических расходов"""
+    categories = [Category(f"Категория {i}") for i in range(CATEGORIES_COUNT)]
+    products = [
+        Product(
+            f"Товар {i}",
+            1 + i % 100,
+            [categories[i % CATEGORIES_COUNT]],
+        )
+        for i in range(PRODUCTS_COUNT)
+    ]
+
+    start = dt.datetime(2020, 1, 1)
+    return [
+        Expense(
+            products[i % PRODUCTS_COUNT],
+            1 + i % 5,
+            start + dt.timedelta(minutes=7 * i),
+        )
+        for i in range(expenses_count)
+    ]
+
+
+def timed(func: Callable[[], object]) -> float:
+    """Время выполнения функции в секундах"""
+    begin = time.perf_counter()
+    func()
+    return time.perf_counter() - begin
+
+
+def filter_objects(expenses: List[Expense], category: Category) -> Money:
+    """Фильтр по времени и категории с подсчетом суммы по объектам"""
+    query = ExpenseQuery(expenses)
+    query.set_time_filter(TimeFilter.GE, dt.time(12))
+    query.exclude_categories([category])
+    return query.total_price()
+
+
+def filter_arrays(arrays: ExpenseArrays, category: Category) -> Money:
+    """Тот же фильтр, вычисленный булевыми масками"""
+    query = ArrayExpenseQuery(arrays)
+    query.set_time_filter(TimeFilter.GE, dt.time(12))
+    query.exclude_categories([category])
+    return query.total_price()
+
+
+def group_objects(expenses: List[Expense]) -> Dict[dt.date, int]:
+    """Суммарная стоимость расходов по дням, вычисленная по объектам"""
+    totals: Dict[dt.date, int] = {}
+    for expense in expenses:
+        day = expense.get_date()
+        totals[day] = totals.get(day, 0) + expense.get_total_units()
+    return totals
+
+
+def measure(expenses_count: int):
+    """Замер операций для одного количества расходов"""
+    expenses = generate(expenses_count)
+    category = next(iter(expenses[0].get_categories()))
+
+    build_time = timed(lambda: ExpenseArrays(expenses))
+    arrays = ExpenseArrays(expenses)
+
+    results = [
+        (
+            "фильтр и сумма",
+            timed(lambda: filter_objects(expenses, category)),
+            timed(lambda: filter_arrays(arrays, category)),
+        ),
+        (
+            "сортировка",
+            timed(
+                lambda: sorted(
+                    expenses, key=lambda expense: expense.get_total_units()
+                )
+            ),
+            timed(lambda: arrays.argsort(arrays.totals(), reverse=True)),
+        ),
+        (
+            "суммы по дням",
+            timed(lambda: group_objects(expenses)),
+            timed(arrays.by_day),
+        ),
+        (
+            "агрегаты",
+            timed(lambda: Aggregates.build(expenses)),
+            timed(lambda: Aggregates.from_arrays(arrays)),
+        ),
+    ]
+
+    print(
+        f"{expenses_count} расходов, "
+        f"построение массивов: {build_time:.3f} с"
+    )
+    for name, objects_time, arrays_time in results:
+        print(
+            f"  {name:<15} | объекты: {objects_time:>8.3f} с | "
+            f"NumPy: {arrays_time:>8.3f} с | "
+            f"ускорение: {objects_time / arrays_time:>6.1f}x"
+        )
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Бенчмарк массовых изменений: время изменения половины статей расходов и
+всех товаров по одному объекту через сеттеры (как изменяли
+CLI-фронтенды) и одной пачкой (см. Database.update_expenses и
+retag_products). База данных ведет журнал, а индексы, агрегаты и версии
+для представлений строятся до замеров, чтобы изменения обновляли и их.
+
+Запуск: python -m benchmarks.bulk [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from finacsys.database import Database
+from finacsys.models import Category, Expense, Product
+
+DEFAULT_SIZES = [10_000, 100_000]
+PRODUCTS_COUNT = 1_000
+CATEGORIES_COUNT = 20
+SHIFT = dt.timedelta(days=1)
+
+
+def fill(database: Database, expenses_count: int) -> List[Category]:
+    """Заполнение базы данных синтетическими расходами"""
+    categories = [Category(f"Категория {i}") for i in range(CATEGORIES_COUNT)]
+    for category in categories:
+        database.add_category(category)
+
+    products = []
+    for i in range(PRODUCTS_COUNT):
+        product = Product(
+            f"Товар {i}", 1 + i % 100, [categories[i % CATEGORIES_COUNT]]
+        )
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(
+                products[i % PRODUCTS_COUNT],
+                1 + i % 5,
+                start + dt.timedelta(minutes=i),
+            )
+            for i in range(expenses_count)
+        ]
+    )
+    return categories
+
+
+def timed(action: Callable[[], object]) -> float:
+    """Время выполнения действия в мс"""
+    begin = time.perf_counter()
+    action()
+    return (time.perf_counter() - begin) * 1000
+
+
+def one_by_one(database: Database, categories: List[Category]):
+    """Изменение объектов по одному через сеттеры"""
+    expenses = database.get_expenses_list()
+    for expense in expenses[: len(expenses) // 2]:
+        expense.set_count(7)
+        expense.set_datetime(expense.get_datetime() + SHIFT)
+    for product in database.get_products_list():
+        product.add_categories(categories[:1])
+
+
+def in_bulk(database: Database, categories: List[Category]):
+    """Изменение объектов пачками"""
+    expenses = database.get_expenses_list()
+    database.update_expenses(
+        expenses[: len(expenses) // 2], count=7, shift=SHIFT
+    )
+    database.retag_products(database.get_products_list(), add=categories[:1])
+
+
+def measure(expenses_count: int):
+    """Замер изменений для одного размера базы данных"""
+    results = []
+    for name, change in (("по одному", one_by_one), ("пачкой", in_bulk)):
+        with tempfile.TemporaryDirectory() as path:
+            database = Database.open(path, snapshot_threshold=sys.maxsize)
+            categories = fill(database, expenses_count)
+            database.expenses_with_categories(categories[:1])
+            database.get_aggregates()
+            database.view()
+
+            elapsed = timed(lambda: change(database, categories))
+            database.close()
+        results.append((name, elapsed))
+
+    print(
+        f"{expenses_count} расходов, изменяется {expenses_count // 2} "
+        f"и {PRODUCTS_COUNT} товаров"
+    )
+    for name, elapsed in results:
+        print(f"  {name:<10} | {elapsed:>9.1f} мс")
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Бенчмарк удаления товаров: время удаления половины товаров со статьями
+расходов по одному товару (delete_product) и одной пачкой по каждой
+политике (см. Database.delete). Утечки памяти при удалении проверяет
+бенчмарк benchmarks.leaks.
+
+Индексы, агрегаты и версии для представлений строятся до замеров, чтобы
+удаление обновляло и их.
+
+Запуск: python -m benchmarks.deletes [количество товаров ...]
+"""
+import datetime as dt
+import sys
+import time
+from typing import Callable, List
+
+from finacsys.database import Database, DeletePolicy
+from finacsys.models import Category, Expense, Product
+
+DEFAULT_SIZES = [1_000, 10_000]
+EXPENSES_PER_PRODUCT = 5
+CATEGORIES_COUNT = 20
+
+
+def fill(database: Database, categories: List[Category], count: int):
+    """Добавление товаров и их статей расходов. Возвращает товары"""
+    products = []
+    for i in range(count):
+        product = Product(
+            f"Товар {i}", 1 + i % 100, [categories[i % CATEGORIES_COUNT]]
+        )
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(product, 1 + i % 5, start + dt.timedelta(minutes=i))
+            for i, product in enumerate(products)
+            for _ in range(EXPENSES_PER_PRODUCT)
+        ]
+    )
+    return products
+
+
+def make_database(count: int):
+    """Создание базы данных с построенными индексами, агрегатами и версиями"""
+    database = Database()
+    categories = [Category(f"Категория {i}") for i in range(CATEGORIES_COUNT)]
+    for category in categories:
+        database.add_category(category)
+    products = fill(database, categories, count)
+
+    database.expenses_with_categories(categories[:1])
+    database.get_aggregates()
+    database.view()
+    return database, categories, products
+
+
+def timed(action: Callable[[], object]) -> float:
+    """Время выполнения действия в мс"""
+    begin = time.perf_counter()
+    action()
+    return (time.perf_counter() - begin) * 1000
+
+
+def delete_one_by_one(database: Database, products: List[Product]):
+    """Удаление товаров по одному (надгробия, как до пакетного удаления)"""
+    for product in products:
+        database.delete_product(product)
+
+
+def measure_deletes(count: int):
+    """Замер времени удаления половины товаров"""
+    results = []
+    variants = [
+        ("по одному", lambda db, products: delete_one_by_one(db, products)),
+        (
+            "пачкой, tombstone",
+            lambda db, products: db.delete_products(
+                products, DeletePolicy.TOMBSTONE
+            ),
+        ),
+        (
+            "пачкой, cascade",
+            lambda db, products: db.delete_products(
+                products, DeletePolicy.CASCADE
+            ),
+        ),
+    ]
+    for name, delete in variants:
+        database, _, products = make_database(count)
+        half = products[: count // 2]
+        elapsed = timed(lambda: delete(database, half))
+        results.append((name, elapsed))
+
+    print(f"{count} товаров, удаляется {count // 2}")
+    for name, elapsed in results:
+        print(f"  {name:<20} | {elapsed:>9.1f} мс")
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure_deletes(size)
+
+
+if __name__ == "__main__":
+    main()
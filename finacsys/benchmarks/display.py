@@ -0,0 +1,84 @@
+"""
+Бенчмарк строк представления: время построения строк (str) всех статей
+расходов при повторном показе списка, как при открытии подсказки выбора
+несколько раз подряд. Сравнивается построение строк заново при каждом
+показе и кэш строк в моделях (см. ObjectMeta.__str__). После переименования
+части товаров строки их статей расходов строятся заново, а доля попаданий
+кэша выводится по счетчикам DISPLAY_STATS.
+
+Запуск: python -m benchmarks.display [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import time
+from typing import Callable, List
+
+from finacsys.models import DISPLAY_STATS, Expense, Product
+
+DEFAULT_SIZES = [10_000, 100_000]
+PRODUCTS_COUNT = 1_000
+# Сколько раз показывается список
+SHOWS = 5
+# Доля переименованных товаров перед последним показом
+RENAMED_SHARE = 10
+
+
+def make_expenses(expenses_count: int) -> List[Expense]:
+    """Создание статей расходов по PRODUCTS_COUNT товарам"""
+    products = [
+        Product(f"Товар {i}", 1 + i % 100, []) for i in range(PRODUCTS_COUNT)
+    ]
+    start = dt.datetime(2020, 1, 1)
+    return [
+        Expense(
+            products[i % PRODUCTS_COUNT],
+            1 + i % 5,
+            start + dt.timedelta(minutes=i),
+        )
+        for i in range(expenses_count)
+    ]
+
+
+def show(expenses: List[Expense], render: Callable[[Expense], str]) -> float:
+    """Время в мс построения строк всех статей расходов"""
+    begin = time.perf_counter()
+    for expense in expenses:
+        render(expense)
+    return (time.perf_counter() - begin) * 1000
+
+
+def rename(expenses: List[Expense]):
+    """Переименование каждого RENAMED_SHARE-го товара"""
+    products = {expense.get_product() for expense in expenses}
+    for product in sorted(products, key=Product.get_name)[::RENAMED_SHARE]:
+        product.set_name(product.get_name() + " (новое)")
+
+
+def measure(expenses_count: int):
+    """Замер для одного количества расходов"""
+    expenses = make_expenses(expenses_count)
+    plain = [show(expenses, Expense._format) for _ in range(SHOWS)]
+
+    DISPLAY_STATS.reset()
+    cached = [show(expenses, str) for _ in range(SHOWS)]
+    rename(expenses)
+    renamed = show(expenses, str)
+
+    print(
+        f"{expenses_count:>8} | без кэша: {sum(plain):>8.1f} мс | "
+        f"с кэшем: {sum(cached):>8.1f} мс "
+        f"(первый показ {cached[0]:.1f} мс) | "
+        f"после переименования: {renamed:>6.1f} мс"
+    )
+    print(f"         | {DISPLAY_STATS}")
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк генераторов ID: скорость создания ID, добавления статей расходов в
+базу данных в памяти и массовой вставки в SQLite для целых ID, упорядоченных
+по времени, и для случайных UUID.
+
+Запуск: python -m benchmarks.ids [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from finacsys.database import Database, SqliteDatabase
+from finacsys.models import (
+    IDS,
+    Category,
+    Expense,
+    IdGenerator,
+    Product,
+    TimeOrderedIds,
+    random_uuid,
+)
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+GENERATORS = [("время", TimeOrderedIds), ("UUID", lambda: random_uuid)]
+
+
+def make_expenses(product: Product, expenses_count: int) -> List[Expense]:
+    """Создание статей расходов одного товара"""
+    start = dt.datetime(2020, 1, 1)
+    return [
+        Expense(product, 1 + i % 5, start + dt.timedelta(minutes=i))
+        for i in range(expenses_count)
+    ]
+
+
+def fill(database: Database, expenses_count: int) -> float:
+    """Добавление статей расходов в базу данных. Возвращает время в с"""
+    category = Category("Синтетика")
+    product = Product("Товар", 10, [category])
+    database.add_category(category)
+    database.add_product(product)
+    expenses = make_expenses(product, expenses_count)
+
+    begin = time.perf_counter()
+    database.add_expenses(expenses)
+    database.close()
+    return time.perf_counter() - begin
+
+
+def measure(name: str, generator: IdGenerator, expenses_count: int):
+    """Замер для одного генератора и количества расходов"""
+    IDS.set_generator(generator)
+
+    begin = time.perf_counter()
+    for _ in range(expenses_count):
+        IDS.new_id()
+    generate_time = time.perf_counter() - begin
+
+    memory_time = fill(Database(), expenses_count)
+    with tempfile.TemporaryDirectory() as path:
+        sqlite_time = fill(
+            SqliteDatabase(Path(path) / "bench.sqlite3"), expenses_count
+        )
+
+    print(
+        f"{expenses_count:>9} | {name:<6} | "
+        f"ID: {expenses_count / generate_time:>10.0f} шт/с | "
+        f"в памяти: {expenses_count / memory_time:>9.0f} зап/с | "
+        f"SQLite: {expenses_count / sqlite_time:>9.0f} зап/с"
+    )
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        for name, make_generator in GENERATORS:
+            measure(name, make_generator(), size)
+
+
+if __name__ == "__main__":
+    main()
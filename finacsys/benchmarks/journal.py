@@ -0,0 +1,76 @@
+"""
+Бенчмарк журнала базы данных: скорость добавления записей и время холодного
+запуска (восстановления из журнала и снимка).
+
+Запуск: python -m benchmarks.journal [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import tempfile
+import time
+from typing import List
+
+from finacsys.database import Database
+from finacsys.models import Category, Expense, Product
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+PRODUCTS_COUNT = 1_000
+
+
+def fill(database: Database, expenses_count: int):
+    """Заполнение базы данных синтетическими расходами"""
+    category = Category("Синтетика")
+    database.add_category(category)
+
+    products: List[Product] = []
+    for i in range(PRODUCTS_COUNT):
+        product = Product(f"Товар {i}", 1 + i % 100, [category])
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    for i in range(expenses_count):
+        created_at = start + dt.timedelta(minutes=i)
+        expense = Expense(products[i % PRODUCTS_COUNT], 1 + i % 5, created_at)
+        database.add_expense(expense)
+
+
+def measure(expenses_count: int, snapshot: bool):
+    """Замер добавления и восстановления для одного размера базы данных"""
+    with tempfile.TemporaryDirectory() as path:
+        database = Database.open(path, snapshot_threshold=sys.maxsize)
+
+        begin = time.perf_counter()
+        fill(database, expenses_count)
+        database.close()
+        append_time = time.perf_counter() - begin
+
+        if snapshot:
+            database = Database.open(path)
+            database.snapshot()
+            database.close()
+
+        begin = time.perf_counter()
+        database = Database.open(path)
+        replay_time = time.perf_counter() - begin
+        assert len(database.expenses) == expenses_count
+        database.close()
+
+    source = "снимок" if snapshot else "журнал"
+    print(
+        f"{expenses_count:>9} расходов | "
+        f"запись: {expenses_count / append_time:>10.0f} зап/с | "
+        f"запуск ({source}): {replay_time:.2f} с"
+    )
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size, snapshot=False)
+        measure(size, snapshot=True)
+
+
+if __name__ == "__main__":
+    main()
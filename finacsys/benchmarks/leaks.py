@@ -0,0 +1,161 @@
+"""
+Бенчмарк утечек памяти при удалении. База данных проходит CYCLES циклов
+«добавить категорию, товары и расходы — удалить их» по всем политикам
+удаления (см. finacsys.database.integrity), после каждого из которых
+выводятся прирост памяти по данным tracemalloc, число надгробий и число
+удаленных объектов, оставшихся в памяти. Замеряются база данных в памяти,
+база данных с журналом и SQLite.
+
+Если удаленные объекты освобождаются, последние два числа равны нулю, а
+память не растет от цикла к циклу, кроме разовых скачков при увеличении
+хеш-таблиц словарей. Индексы, агрегаты и версии для представлений
+строятся до замеров, чтобы удаление обновляло и их.
+
+Запуск: python -m benchmarks.leaks [--check] [количество товаров ...]
+
+С --check бенчмарк завершается с кодом 1, если удаленные объекты остались
+в памяти, остались надгробия или медианный прирост памяти за цикл больше
+LEAK_LIMIT байт на товар. Утечка увеличивает память в каждом цикле, а
+увеличение хеш-таблицы — в одном, поэтому проверяется медиана
+"""
+import datetime as dt
+import gc
+import statistics
+import sys
+import tempfile
+import tracemalloc
+import weakref
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from finacsys.database import Database, DeletePolicy, SqliteDatabase
+from finacsys.models import Category, Expense, Product
+
+DEFAULT_SIZES = [1_000, 10_000]
+EXPENSES_PER_PRODUCT = 5
+CYCLES = 5
+# Допустимый медианный прирост памяти за цикл в байтах на товар цикла
+LEAK_LIMIT = 16
+
+
+def fill(database: Database, category: Category, count: int) -> List[Product]:
+    """Добавление товаров категории и их статей расходов"""
+    products = [
+        Product(f"Товар {i}", 1 + i % 100, [category]) for i in range(count)
+    ]
+    for product in products:
+        database.add_product(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(product, 1 + i % 5, start + dt.timedelta(minutes=i))
+            for i, product in enumerate(products)
+            for _ in range(EXPENSES_PER_PRODUCT)
+        ]
+    )
+    return products
+
+
+def prepare(database: Database):
+    """Построение индексов, агрегатов и версий для представлений"""
+    category = Category("Прогрев")
+    database.add_category(category)
+    fill(database, category, 1)
+    database.expenses_with_categories([category])
+    database.get_aggregates()
+    database.view()
+    database.delete_categories([category], DeletePolicy.DETACH)
+    database.delete_expenses(database.get_expenses_list())
+    database.delete_products(database.get_products_list())
+
+
+def cycle(database: Database, count: int) -> List[weakref.ref]:
+    """
+    Цикл: половина товаров удаляется каскадно, другая остается
+    надгробиями, пока не удалены их статьи расходов, затем удаляется
+    категория. Возвращает слабые ссылки на удаленные объекты
+    """
+    category = Category("Категория")
+    database.add_category(category)
+    products = fill(database, category, count)
+    expenses = database.expenses_with_products(products)
+
+    half = count // 2
+    database.delete_products(products[:half], DeletePolicy.CASCADE)
+    database.delete_products(products[half:], DeletePolicy.TOMBSTONE)
+    database.delete_expenses(database.get_expenses_list())
+    database.delete_categories([category], DeletePolicy.DETACH)
+    return [weakref.ref(obj) for obj in [category, *products, *expenses]]
+
+
+def measure(name: str, database: Database, count: int) -> List[str]:
+    """
+    Замер памяти после циклов добавления и удаления. Возвращает описания
+    обнаруженных утечек
+    """
+    prepare(database)
+    tracemalloc.start()
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    print(f"{name}: {count} товаров за цикл, {CYCLES} циклов")
+    leaks = []
+    memory = 0
+    deltas = []
+    for number in range(1, CYCLES + 1):
+        deleted = cycle(database, count)
+        gc.collect()
+        alive = sum(1 for ref in deleted if ref() is not None)
+        del deleted
+        tombstones = len(database.get_tombstones())
+        previous, memory = memory, tracemalloc.get_traced_memory()[0]
+        memory -= baseline
+        if number > 1:
+            deltas.append(memory - previous)
+        print(
+            f"  цикл {number} | прирост памяти: {memory / 1024:>9.1f} КиБ | "
+            f"надгробий: {tombstones} | "
+            f"удаленных объектов в памяти: {alive}"
+        )
+        if alive or tombstones:
+            leaks.append(f"{name}, цикл {number}: объекты не освобождены")
+    tracemalloc.stop()
+
+    growth = statistics.median(deltas) / count
+    if growth > LEAK_LIMIT:
+        leaks.append(f"{name}: рост памяти {growth:.0f} байт на товар за цикл")
+    database.close()
+    return leaks
+
+
+def backends(path: Path) -> List[Tuple[str, Callable[[], Database]]]:
+    """Проверяемые базы данных: в памяти, с журналом и SQLite"""
+    return [
+        ("в памяти", Database),
+        ("журнал", lambda: Database.open(path / "journal")),
+        ("SQLite", lambda: SqliteDatabase(path / "bench.sqlite3")),
+    ]
+
+
+def main():
+    """Запуск бенчмарка"""
+    args = sys.argv[1:]
+    check = "--check" in args
+    sizes = [int(arg) for arg in args if arg != "--check"] or DEFAULT_SIZES
+
+    leaks = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            for name, make_database in backends(Path(path)):
+                leaks += measure(name, make_database(), size)
+
+    if check and leaks:
+        print("Проверка не пройдена:")
+        for leak in leaks:
+            print(f"  {leak}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк памяти моделей: число байт на одну статью расхода, один товар и
+одну категорию, измеренное tracemalloc, а также на одну статью расхода,
+добавленную в базу данных (с таблицей и слушателями).
+
+Названия товаров создаются заново для каждого товара, как при чтении из
+файла, поэтому в замер входит и хранение повторяющихся строк.
+
+Запуск: python -m benchmarks.memory [количество строк ...]
+"""
+import datetime as dt
+import sys
+import tracemalloc
+from typing import Callable, List
+
+from finacsys.database import Database
+from finacsys.models import Category, Expense, Product
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+NAMES_COUNT = 100
+
+
+def bytes_per_row(create: Callable[[], object], rows: int) -> float:
+    """Объем памяти, выделенной функцией create, в расчете на одну строку"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = create()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return (after - before) / rows
+
+
+def read_name(i: int) -> str:
+    """Название, созданное заново, как при разборе строки файла"""
+    return "".join(["Товар ", str(i % NAMES_COUNT)])
+
+
+def make_expenses(product: Product, rows: int) -> List[Expense]:
+    """Статьи расходов одного товара"""
+    start = dt.datetime(2020, 1, 1)
+    return [
+        Expense(product, 1 + i % 5, start + dt.timedelta(minutes=i))
+        for i in range(rows)
+    ]
+
+
+def fill(database: Database, product: Product, rows: int) -> Database:
+    """Добавление статей расходов в базу данных"""
+    for expense in make_expenses(product, rows):
+        database.add_expense(expense)
+    return database
+
+
+def measure(rows: int):
+    """Замер для одного количества строк"""
+    category = Category("Синтетика")
+    product = Product("Товар", 10, [category])
+
+    database = Database()
+    database.add_category(category)
+    database.add_product(product)
+
+    results = [
+        (
+            "категория",
+            bytes_per_row(
+                lambda: [Category(read_name(i)) for i in range(rows)], rows
+            ),
+        ),
+        (
+            "товар",
+            bytes_per_row(
+                lambda: [
+                    Product(read_name(i), 10, [category]) for i in range(rows)
+                ],
+                rows,
+            ),
+        ),
+        (
+            "статья расхода",
+            bytes_per_row(lambda: make_expenses(product, rows), rows),
+        ),
+        (
+            "статья расхода в БД",
+            bytes_per_row(lambda: fill(database, product, rows), rows),
+        ),
+    ]
+
+    print(f"{rows} строк")
+    for name, size in results:
+        print(f"  {name:<20} | {size:>7.1f} байт/строка")
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
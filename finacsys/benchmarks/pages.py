@@ -0,0 +1,98 @@
+"""
+Бенчмарк открытия списка выбора: время до показа списка статей расходов,
+если строки вариантов строятся для всей таблицы сразу (как делала подсказка
+InquirerPy по списку get_expenses_list) и если читается только первая
+страница (см. Database.pages). База данных SQLite открывается заново перед
+замером, поэтому объекты читаются из файла.
+
+Запуск: python -m benchmarks.pages [количество расходов ...]
+"""
+import datetime as dt
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from finacsys.database import Database, SqliteDatabase
+from finacsys.models import Expense, Product
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PRODUCTS_COUNT = 1_000
+
+
+def fill(database: Database, expenses_count: int):
+    """Заполнение базы данных синтетическими расходами"""
+    products = []
+    for i in range(PRODUCTS_COUNT):
+        product = Product(f"Товар {i}", 1 + i % 100, [])
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(
+                products[i % PRODUCTS_COUNT],
+                1 + i % 5,
+                start + dt.timedelta(minutes=i),
+            )
+            for i in range(expenses_count)
+        ]
+    )
+
+
+def whole(database: Database):
+    """Строки вариантов для всей таблицы"""
+    return [str(expense) for expense in database.get_expenses_list()]
+
+
+def first_page(database: Database):
+    """Строки вариантов для первой страницы"""
+    return [str(expense) for expense in database.pages("expense").next()]
+
+
+def timed(func: Callable[[Database], object], database: Database) -> float:
+    """Время вызова func в мс"""
+    begin = time.perf_counter()
+    func(database)
+    return (time.perf_counter() - begin) * 1000
+
+
+def report(name: str, database: Database):
+    """Вывод времени открытия списка для базы данных"""
+    page_time = timed(first_page, database)
+    whole_time = timed(whole, database)
+    print(
+        f"  {name:<9} | вся таблица: {whole_time:>10.1f} мс | "
+        f"первая страница: {page_time:>7.2f} мс"
+    )
+
+
+def measure(expenses_count: int):
+    """Замер для одного количества расходов"""
+    print(f"{expenses_count} расходов")
+    database = Database()
+    fill(database, expenses_count)
+    report("в памяти", database)
+
+    with tempfile.TemporaryDirectory() as path:
+        path = Path(path) / "bench.sqlite3"
+        database = SqliteDatabase(path)
+        fill(database, expenses_count)
+        database.close()
+
+        database = SqliteDatabase(path)
+        report("SQLite", database)
+        database.close()
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
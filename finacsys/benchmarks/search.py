@@ -0,0 +1,98 @@
+"""
+Бенчмарк поиска по названию: время отклика на каждое нажатие клавиши при
+вводе запроса в подсказку выбора. Сравниваются просмотр всех товаров с
+приведением каждого к строке, как делала подсказка InquirerPy, и сессия
+поиска по триграммному индексу (см. finacsys.database.search), которая
+сужает совпадения предыдущего запроса. Для статей расходов замеряется
+сессия поиска по названию товара.
+
+Запуск: python -m benchmarks.search [количество товаров ...]
+"""
+import datetime as dt
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from finacsys.database import Database
+from finacsys.database.search import SEARCH_LIMIT
+from finacsys.models import Expense, Product
+
+DEFAULT_SIZES = [10_000, 100_000]
+EXPENSES_PER_PRODUCT = 10
+WORDS = ["молоко", "хлеб", "сыр", "кефир", "масло", "яблоки", "чай", "кофе"]
+QUERY = "молоко 12"
+
+
+def fill(database: Database, count: int):
+    """Заполнение базы данных товарами и их статьями расходов"""
+    products = []
+    for i in range(count):
+        product = Product(f"{WORDS[i % len(WORDS)]} {i}", 1 + i % 100, [])
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(product, 1, start + dt.timedelta(minutes=i))
+            for i, product in enumerate(products)
+            for _ in range(EXPENSES_PER_PRODUCT)
+        ]
+    )
+
+
+def keystrokes(find: Callable[[str], List]) -> List[float]:
+    """Время в мс на каждое нажатие клавиши при вводе QUERY"""
+    result = []
+    for end in range(1, len(QUERY) + 1):
+        begin = time.perf_counter()
+        find(QUERY[:end])
+        result.append((time.perf_counter() - begin) * 1000)
+    return result
+
+
+def scan(database: Database) -> Callable[[str], List]:
+    """Просмотр всех товаров, как в подсказке без индекса"""
+    products = database.get_products_list()
+
+    def find(query: str) -> List:
+        query = query.casefold()
+        found = [p for p in products if query in str(p).casefold()]
+        return found[:SEARCH_LIMIT]
+
+    return find
+
+
+def report(name: str, times: List[float]):
+    """Вывод времени отклика"""
+    print(
+        f"  {name:<22} | медиана: {statistics.median(times):>8.3f} мс | "
+        f"максимум: {max(times):>8.3f} мс"
+    )
+
+
+def measure(count: int):
+    """Замер поиска для одного размера базы данных"""
+    database = Database()
+    fill(database, count)
+    database.search("product").find("прогрев")
+    database.expenses_with_products([])
+
+    print(f"{count} товаров, {count * EXPENSES_PER_PRODUCT} расходов")
+    products = database.search("product")
+    expenses = database.search("expense")
+    report("просмотр всех товаров", keystrokes(scan(database)))
+    report("сессия поиска товаров", keystrokes(products.find))
+    report("сессия поиска расходов", keystrokes(expenses.find))
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Нагрузочный тест сервера JSON API: число запросов в секунду и задержки
+(медиана и 99-й перцентиль) при одновременной работе многих клиентов с
+постоянными соединениями и конвейером запросов. Сервер запускается в
+отдельном процессе с синтетической базой данных в памяти.
+
+Запуск: python -m benchmarks.server [количество расходов ...]
+"""
+import asyncio
+import datetime as dt
+import json
+import multiprocessing
+import random
+import sys
+import time
+from typing import Any, List, Tuple
+
+from finacsys.database import Database
+from finacsys.models import Category, Expense, Product
+from finacsys.server import Api, start_server
+
+DEFAULT_SIZES = [10_000, 100_000]
+PRODUCTS_COUNT = 1_000
+CATEGORIES_COUNT = 20
+CONNECTIONS = 32
+REQUESTS_PER_CONNECTION = 200
+# Число запросов, отправляемых без ожидания ответов
+PIPELINE_DEPTH = 4
+
+
+def make_database(expenses_count: int) -> Database:
+    """Создание синтетической базы данных"""
+    database = Database()
+    categories = [Category(f"Категория {i}") for i in range(CATEGORIES_COUNT)]
+    for category in categories:
+        database.add_category(category)
+
+    products = []
+    for i in range(PRODUCTS_COUNT):
+        product = Product(
+            f"Товар {i}", 1 + i % 100, [categories[i % CATEGORIES_COUNT]]
+        )
+        database.add_product(product)
+        products.append(product)
+
+    start = dt.datetime(2020, 1, 1)
+    database.add_expenses(
+        [
+            Expense(
+                products[i % PRODUCTS_COUNT],
+                1 + i % 5,
+                start + dt.timedelta(minutes=i),
+            )
+            for i in range(expenses_count)
+        ]
+    )
+    return database
+
+
+def serve(expenses_count: int, ports: Any):
+    """Запуск сервера в дочернем процессе. Порт передается в очередь ports"""
+
+    async def run():
+        database = make_database(expenses_count)
+        server = await start_server(Api(database), "127.0.0.1", 0)
+        ports.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, Any]:
+    """Чтение ответа сервера: код и тело"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    body = await reader.readexactly(length)
+    return int(lines[0].split(" ")[1]), json.loads(body) if body else None
+
+
+def encode_request(method: str, path: str, body: Any = None) -> bytes:
+    """Запрос HTTP/1.1 с телом в формате JSON"""
+    data = b"" if body is None else json.dumps(body).encode()
+    head = f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n"
+    return head.encode("latin-1") + data
+
+
+def make_requests(
+    expense_ids: List[str], product_ids: List[str], category_ids: List[str]
+) -> List[bytes]:
+    """Смесь запросов одного клиента: в основном чтения, 5% — добавления"""
+    generator = random.Random(len(expense_ids))
+    requests = []
+    for _ in range(REQUESTS_PER_CONNECTION):
+        kind = generator.random()
+        if kind < 0.5:
+            path = f"/expenses/{generator.choice(expense_ids)}"
+            requests.append(encode_request("GET", path))
+        elif kind < 0.7:
+            path = f"/expenses?category={generator.choice(category_ids)}"
+            requests.append(encode_request("GET", path + "&limit=20"))
+        elif kind < 0.85:
+            path = "/products?sort=-price&limit=20"
+            requests.append(encode_request("GET", path))
+        elif kind < 0.95:
+            requests.append(encode_request("GET", "/aggregates?by=category"))
+        else:
+            body = {"product": generator.choice(product_ids), "count": "1"}
+            requests.append(encode_request("POST", "/expenses", body))
+    return requests
+
+
+async def client(port: int, requests: List[bytes], latencies: List[float]):
+    """Отправка запросов по одному соединению конвейером"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for start in range(0, len(requests), PIPELINE_DEPTH):
+        batch = requests[start : start + PIPELINE_DEPTH]
+        sent = time.perf_counter()
+        writer.write(b"".join(batch))
+        for _ in batch:
+            status, _ = await read_response(reader)
+            if status >= 400:
+                raise RuntimeError(f"Unexpected status {status}")
+            latencies.append(time.perf_counter() - sent)
+    writer.close()
+
+
+async def fetch_ids(port: int, path: str) -> List[str]:
+    """Получение ID первой страницы списка"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode_request("GET", path))
+    _, body = await read_response(reader)
+    writer.close()
+    return [item["id"] for item in body["items"]]
+
+
+async def load(port: int) -> Tuple[float, List[float]]:
+    """Нагрузка сервера. Возвращает время в с и задержки запросов"""
+    expense_ids = await fetch_ids(port, "/expenses?limit=1000")
+    product_ids = await fetch_ids(port, "/products?limit=1000")
+    category_ids = await fetch_ids(port, "/categories")
+
+    latencies: List[float] = []
+    begin = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(
+                port,
+                make_requests(expense_ids, product_ids, category_ids),
+                latencies,
+            )
+            for _ in range(CONNECTIONS)
+        )
+    )
+    return time.perf_counter() - begin, latencies
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Перцентиль отсортированного списка"""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def measure(expenses_count: int):
+    """Замер для одного размера базы данных"""
+    ports: Any = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve, args=(expenses_count, ports), daemon=True
+    )
+    process.start()
+    try:
+        port = ports.get(timeout=600)
+        elapsed, latencies = asyncio.run(load(port))
+    finally:
+        process.terminate()
+        process.join()
+
+    latencies.sort()
+    print(
+        f"{expenses_count:>9} | {len(latencies) / elapsed:>8.0f} зап/с | "
+        f"p50: {percentile(latencies, 0.5) * 1000:>7.2f} мс | "
+        f"p99: {percentile(latencies, 0.99) * 1000:>7.2f} мс"
+    )
+
+
+def main():
+    """Запуск бенчмарка"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(
+        f"Соединений: {CONNECTIONS}, запросов на соединение: "
+        f"{REQUESTS_PER_CONNECTION}, глубина конвейера: {PIPELINE_DEPTH}"
+    )
+    for size in sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Бенчмарк времени запуска: время импорта модулей finacsys по данным
+python -X importtime и проверка бюджета запуска. Каждый модуль
+импортируется в новом процессе REPEATS раз, выводится медиана суммарного
+времени импорта и самые долгие модули. Кроме времени проверяется, что
+модуль не загружает библиотеки, которые ему не нужны: интерактивный
+интерфейс, NumPy, sqlite3, asyncio и пул процессов.
+
+Запуск: python -m benchmarks.startup [--check] [модуль ...]
+
+По умолчанию замеряются модули с бюджетом (см. BUDGETS).
+
+С --check бенчмарк завершается с кодом 1, если модуль превысил бюджет или
+загрузил лишнюю библиотеку, поэтому его можно использовать как проверку
+регрессий
+"""
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+REPEATS = 7
+TOP_COUNT = 5
+
+# Библиотеки интерактивного интерфейса
+UI_MODULES = ("InquirerPy", "prompt_toolkit", "finacsys.viewers")
+# Библиотеки, нужные только части команд: аналитика, хранение в SQLite,
+# сервер и пул процессов импорта
+OPTIONAL_MODULES = ("numpy", "sqlite3", "asyncio", "multiprocessing")
+# Модуль -> бюджет времени импорта в мс (с накладными расходами
+# -X importtime) и библиотеки, которые он не должен загружать
+BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "finacsys.database": (75, UI_MODULES + OPTIONAL_MODULES),
+    "finacsys.cli": (80, UI_MODULES + OPTIONAL_MODULES),
+    "finacsys.importer": (85, UI_MODULES + OPTIONAL_MODULES),
+    "finacsys.server": (130, UI_MODULES + ("numpy", "sqlite3")),
+}
+
+# Модуль, собственное время импорта и время с учетом вложенных модулей в
+# мкс, глубина вложенности
+Entry = Tuple[str, int, int, int]
+
+
+def parse_importtime(output: str) -> List[Entry]:
+    """Разбор вывода python -X importtime"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, raw_name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue  # заголовок
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        entries.append((name, int(own), int(cumulative), depth))
+    return entries
+
+
+def run_importtime(code: str) -> List[Entry]:
+    """Запуск кода в новом процессе с -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def is_loaded(names: Set[str], module: str) -> bool:
+    """Проверка, загружен ли модуль или один из его подмодулей"""
+    return any(
+        name == module or name.startswith(module + ".") for name in names
+    )
+
+
+def measure(
+    module: str, preloaded: Set[str]
+) -> Tuple[float, List[Entry], Set[str]]:
+    """
+    Замер импорта модуля. Возвращает медиану времени в мс, записи
+    последнего запуска и загруженные модули. Модули, загруженные самим
+    интерпретатором при запуске (preloaded), не учитываются
+    """
+    times = []
+    for _ in range(REPEATS):
+        entries = [
+            entry
+            for entry in run_importtime(f"import {module}")
+            if entry[0] not in preloaded
+        ]
+        top_level = (
+            cumulative for _, _, cumulative, depth in entries if depth == 0
+        )
+        times.append(sum(top_level) / 1000)
+    return statistics.median(times), entries, {entry[0] for entry in entries}
+
+
+def slowest(entries: List[Entry]) -> str:
+    """Модули с наибольшим собственным временем импорта"""
+    entries = sorted(entries, key=lambda entry: -entry[1])
+    return ", ".join(
+        f"{name} {own / 1000:.1f}" for name, own, _, _ in entries[:TOP_COUNT]
+    )
+
+
+def main():
+    """Запуск бенчмарка"""
+    args = sys.argv[1:]
+    check = "--check" in args
+    modules = [arg for arg in args if arg != "--check"] or list(BUDGETS)
+
+    preloaded = {entry[0] for entry in run_importtime("pass")}
+    failures = []
+    print(f"Повторов: {REPEATS}, время — медиана в мс")
+    for module in modules:
+        elapsed, entries, loaded = measure(module, preloaded)
+        # Для модулей без бюджета время только выводится
+        budget, forbidden = BUDGETS.get(module, (float("inf"), ()))
+        extra = [name for name in forbidden if is_loaded(loaded, name)]
+
+        status = "ok"
+        if elapsed > budget:
+            status = f"превышен бюджет {budget:.0f} мс"
+        if extra:
+            status = f"загружены лишние модули: {', '.join(extra)}"
+        if status != "ok":
+            failures.append(module)
+
+        print(f"{module:<20} | {elapsed:>6.1f} мс | {status}")
+        print(f"{'':<20} | {slowest(entries)}")
+
+    if check and failures:
+        print(f"Проверка не пройдена: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
-"""Основной модуль, объединяющий все остальные"""
+"""
+Основной модуль, объединяющий все остальные. CLI-фронтенды импортируются
+при первом обращении (см. finacsys.lazy), поэтому импорт базы данных и
+моделей не загружает библиотеки интерактивного интерфейса
+"""
 from .database import Database
-from .viewers import (
-    CategoryViewer,
-    DatabaseViewer,
-    ExpenseViewer,
-    ProductViewer,
-)
+from .lazy import lazy_names
 from .models import Product, Category, Expense
+
+__getattr__ = lazy_names(
+    __name__,
+    {
+        "CategoryViewer": ".viewers",
+        "DatabaseViewer": ".viewers",
+        "ExpenseViewer": ".viewers",
+        "ProductViewer": ".viewers",
+    },
+)
@@ -0,0 +1,6 @@
+"""Запуск командной строки: python -m finacsys (см. finacsys.cli)"""
+import sys
+
+from finacsys.cli import main
+
+sys.exit(main())
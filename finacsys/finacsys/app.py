@@ -0,0 +1,36 @@
+"""
+Модуль, содержащий общий запуск приложения для всех фронтендов: открытие
+базы данных и выбор генератора ID в соответствии с настройками
+"""
+from pathlib import Path
+
+import finacsys.config as cfg
+from finacsys.database import Database
+from finacsys.models import IDS, random_uuid
+
+
+def open_database() -> Database:
+    """
+    Открытие базы данных в соответствии с настройкой DATABASE_BACKEND:
+    "journal" — журнал изменений, "sqlite" — файл SQLite
+    """
+    path = Path(cfg.DATABASE_PATH).expanduser()
+
+    if cfg.DATABASE_BACKEND == "sqlite":
+        # pylint: disable=import-outside-toplevel
+        from finacsys.database import SqliteDatabase
+
+        path.mkdir(parents=True, exist_ok=True)
+        return SqliteDatabase(path / cfg.SQLITE_FILENAME)
+
+    return Database.open(path)
+
+
+def configure_ids():
+    """
+    Выбор генератора ID новых объектов в соответствии с настройкой
+    ID_GENERATOR: "time" — целые ID, упорядоченные по времени создания,
+    "uuid" — случайные UUID
+    """
+    if cfg.ID_GENERATOR == "uuid":
+        IDS.set_generator(random_uuid)
@@ -0,0 +1,607 @@
+"""
+Модуль, содержащий неинтерактивный интерфейс командной строки:
+
+- finacsys category list|add — категории;
+- finacsys product list|add — товары;
+- finacsys expense add — добавление статьи расхода из аргументов или пачки
+  статей расходов из стандартного ввода (см. finacsys.importer);
+- finacsys expense find|sort|export — поиск, сортировка и выгрузка статей
+  расходов с фильтрами по товарам, категориям, дате и времени;
+- finacsys report — отчеты по агрегатам расходов.
+
+Команды выполняют те же поиск (ExpenseFinder, ProductFinder), сортировки и
+выгрузку, что и интерактивный интерфейс и JSON API. Модули импортируются
+внутри команд, поэтому разовая команда не загружает интерактивный
+интерфейс, пул процессов импорта и NumPy, если они ей не нужны
+"""
+import argparse
+import datetime as dt
+import sys
+from typing import Any, Callable, List, Optional, Sequence, TextIO
+
+import finacsys.config as cfg
+from finacsys.database import Database
+from finacsys.database.records import decode_id
+from finacsys.models import Category, Expense, Product
+from finacsys.money import Money, Quantity
+from finacsys.timestamps import parse_date, parse_time
+
+FORMATS = ("table", "csv", "jsonl")
+FILTERS = ("lt", "le", "eq", "ge", "gt")
+
+
+class CliError(Exception):
+    """Ошибка в аргументах команды: сообщение выводится пользователю"""
+
+
+def parse_datetime(text: str) -> dt.datetime:
+    """
+    Разбор даты или даты и времени через пробел в форматах, указанных в
+    finacsys.config. Выбрасывает ValueError
+    """
+    date, _, time = text.strip().partition(" ")
+    return dt.datetime.combine(
+        parse_date(date), parse_time(time) if time else dt.time()
+    )
+
+
+def argument_type(parse: Callable[[str], Any], kind: str) -> Callable:
+    """Тип аргумента argparse, сообщающий об ошибке разбора"""
+
+    def convert(text: str) -> Any:
+        try:
+            return parse(text)
+        except ValueError as error:
+            raise argparse.ArgumentTypeError(
+                f"invalid {kind}: {text!r}"
+            ) from error
+
+    convert.__name__ = kind
+    return convert
+
+
+def positive(kind: Any) -> Callable[[str], Any]:
+    """Разбор положительной цены (kind=Money) или количества (Quantity)"""
+
+    def parse(text: str) -> Any:
+        number = kind.parse(text)
+        if number.get_units() <= 0:
+            raise ValueError(text)
+        return number
+
+    return parse
+
+
+DATE = argument_type(parse_date, "date")
+TIME = argument_type(parse_time, "time")
+DATETIME = argument_type(parse_datetime, "datetime")
+POSITIVE_MONEY = argument_type(positive(Money), "price")
+POSITIVE_QUANTITY = argument_type(positive(Quantity), "count")
+
+
+def find_category(database: Database, value: str) -> Category:
+    """Поиск категории по названию или ID. Выбрасывает CliError"""
+    for category in database.get_categories_list():
+        if category.get_name() == value:
+            return category
+
+    category = database.categories.get(parse_id(value))
+    if category is None:
+        raise CliError(f"category not found: {value}")
+    return category
+
+
+def find_product(database: Database, value: str) -> Product:
+    """
+    Поиск товара по названию или ID. Товары с одинаковым названием
+    различаются ценой, поэтому для них требуется ID. Выбрасывает CliError
+    """
+    products = [
+        product
+        for product in database.get_products_list()
+        if product.get_name() == value
+    ]
+    if len(products) > 1:
+        raise CliError(f"several products are named {value!r}, use an ID")
+    if products:
+        return products[0]
+
+    product = database.products.get(parse_id(value))
+    if product is None:
+        raise CliError(f"product not found: {value}")
+    return product
+
+
+def parse_id(value: str) -> Any:
+    """ID из строки или None, если строка не является ID"""
+    try:
+        return decode_id(value)
+    except ValueError:
+        return None
+
+
+def write(args: argparse.Namespace, columns: List, objects: Any) -> int:
+    """Выгрузка объектов в формате и файл из аргументов команды"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.export import ExportFormat, export
+
+    export_format = {
+        "table": ExportFormat.TABLE,
+        "csv": ExportFormat.CSV,
+        "jsonl": ExportFormat.JSON_LINES,
+    }[args.format]
+
+    if args.output is None:
+        return export(sys.stdout, columns, objects, export_format)
+
+    newline = "" if export_format == ExportFormat.CSV else None
+    with open(
+        args.output, mode="w", encoding="utf-8", newline=newline
+    ) as file:
+        return export(file, columns, objects, export_format)
+
+
+def limited(objects: Sequence, limit: Optional[int]) -> Sequence:
+    """Первые limit объектов списка"""
+    return objects if limit is None else objects[:limit]
+
+
+# Команды
+
+
+def category_list(database: Database, args: argparse.Namespace):
+    """Вывод списка категорий"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.columns import CATEGORY_COLUMNS
+    from finacsys.sorting import CATEGORY_SORT_KEYS, parse_sort, sort_objects
+
+    categories = database.get_categories_list()
+    sort_objects(categories, parse_sort(args.sort, CATEGORY_SORT_KEYS))
+    write(args, CATEGORY_COLUMNS, limited(categories, args.limit))
+
+
+def category_add(database: Database, args: argparse.Namespace):
+    """Добавление категорий. Выводит ID добавленных категорий"""
+    with database.transaction():
+        categories = [Category(name) for name in args.names]
+        for category in categories:
+            database.add_category(category)
+
+    for category in categories:
+        print(category.get_id())
+
+
+def product_list(database: Database, args: argparse.Namespace):
+    """Вывод списка товаров с фильтрами по категориям"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.columns import PRODUCT_COLUMNS
+    from finacsys.database import ProductFinder
+    from finacsys.sorting import PRODUCT_SORT_KEYS, parse_sort, sort_objects
+
+    finder = ProductFinder(database)
+    if args.category:
+        finder.only_included_categories(
+            [find_category(database, name) for name in args.category]
+        )
+    if args.exclude_category:
+        finder.exclude_categories(
+            [find_category(database, name) for name in args.exclude_category]
+        )
+
+    products = list(finder.filtered_products)
+    sort_objects(products, parse_sort(args.sort, PRODUCT_SORT_KEYS))
+    write(args, PRODUCT_COLUMNS, limited(products, args.limit))
+
+
+def product_add(database: Database, args: argparse.Namespace):
+    """Добавление товара. Выводит ID добавленного товара"""
+    with database.transaction():
+        product = Product(
+            args.name,
+            args.price,
+            [find_category(database, name) for name in args.category],
+        )
+        database.add_product(product)
+    print(product.get_id())
+
+
+def expense_add(database: Database, args: argparse.Namespace):
+    """
+    Добавление статьи расхода из аргументов или, если товар не указан,
+    пачки статей расходов из стандартного ввода или файла --input
+    """
+    if args.product is None:
+        expense_import(database, args)
+        return
+    if args.count is None:
+        raise CliError("the count of the expense is required")
+
+    now = dt.datetime.now()
+    created_at = dt.datetime.combine(
+        args.date or now.date(), args.time or now.time()
+    )
+    with database.transaction():
+        expense = Expense(
+            find_product(database, args.product), args.count, created_at
+        )
+        database.add_expense(expense)
+    print(expense.get_id())
+
+
+def expense_import(database: Database, args: argparse.Namespace):
+    """Импорт пачки статей расходов в формате finacsys.importer"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.importer import ExpenseImporter, csv_rows, json_lines_rows
+
+    read_rows = csv_rows if args.input_format == "csv" else json_lines_rows
+    importer = ExpenseImporter(database, workers=args.workers)
+
+    def run(file: TextIO):
+        report = importer.import_rows(read_rows(file))
+        print(report, file=sys.stderr)
+        for line_num, reason, _ in report.rejected:
+            print(f"line {line_num}: {reason}", file=sys.stderr)
+        if report.rejected:
+            raise CliError(f"{len(report.rejected)} rows were rejected")
+
+    if args.input is None:
+        run(sys.stdin)
+        return
+    newline = "" if args.input_format == "csv" else None
+    with open(args.input, mode="r", encoding="utf-8", newline=newline) as file:
+        run(file)
+
+
+def has_filters(args: argparse.Namespace) -> bool:
+    """Проверка, заданы ли фильтры статей расходов"""
+    return bool(
+        args.product
+        or args.category
+        or args.exclude_category
+        or args.date
+        or args.time
+        or args.start
+        or args.end
+    )
+
+
+def find_expenses(database: Database, args: argparse.Namespace) -> Any:
+    """Поиск статей расходов по фильтрам из аргументов (см. ExpenseFinder)"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.database import ExpenseFinder
+    from finacsys.filters import DateFilter, TimeFilter
+
+    finder = ExpenseFinder(database)
+    if args.product:
+        finder.filtered_expenses = database.expenses_with_products(
+            [find_product(database, name) for name in args.product]
+        )
+    if args.category:
+        finder.only_included_categories(
+            [find_category(database, name) for name in args.category]
+        )
+    if args.exclude_category:
+        finder.exclude_categories(
+            [find_category(database, name) for name in args.exclude_category]
+        )
+    if args.date:
+        finder.set_date_filter(DateFilter[args.date_filter.upper()], args.date)
+    if args.time:
+        finder.set_time_filter(TimeFilter[args.time_filter.upper()], args.time)
+    if args.start or args.end:
+        finder.set_datetime_range(args.start, args.end)
+    return finder
+
+
+def expense_find(database: Database, args: argparse.Namespace):
+    """
+    Вывод найденных статей расходов. В текстовой таблице после расходов
+    выводится их суммарная стоимость
+    """
+    # pylint: disable=import-outside-toplevel
+    from finacsys.columns import EXPENSE_COLUMNS
+    from finacsys.sorting import EXPENSE_SORT_KEYS, parse_sort, sort_objects
+
+    order = parse_sort(args.sort, EXPENSE_SORT_KEYS)
+    finder = find_expenses(database, args)
+    expenses = list(finder.filtered_expenses)
+    sort_objects(expenses, order)
+    write(args, EXPENSE_COLUMNS, limited(expenses, args.limit))
+    if args.format == "table" and args.output is None:
+        print(f"Итого: {finder.total_price()}")
+
+
+def expense_export(database: Database, args: argparse.Namespace):
+    """
+    Потоковая выгрузка статей расходов. Без фильтров и сортировки расходы
+    выгружаются по представлению базы данных по одному, не создавая
+    списка всех расходов
+    """
+    # pylint: disable=import-outside-toplevel
+    from finacsys.columns import EXPENSE_COLUMNS
+    from finacsys.sorting import EXPENSE_SORT_KEYS, parse_sort, sort_objects
+
+    order = parse_sort(args.sort, EXPENSE_SORT_KEYS)
+    if has_filters(args) or order or args.limit is not None:
+        expenses = list(find_expenses(database, args).filtered_expenses)
+        sort_objects(expenses, order)
+        count = write(args, EXPENSE_COLUMNS, limited(expenses, args.limit))
+    else:
+        count = write(args, EXPENSE_COLUMNS, database.view().iter_expenses())
+
+    if args.output is not None:
+        print(f"Выгружено статей расходов: {count}", file=sys.stderr)
+
+
+def report(database: Database, args: argparse.Namespace):
+    """Вывод отчета по агрегатам расходов (см. finacsys.reports)"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.columns import REPORT_COLUMNS
+    from finacsys.reports import Grouping, report_rows
+
+    rows = report_rows(database, Grouping(args.by))
+    write(args, REPORT_COLUMNS, limited(rows, args.limit))
+
+
+# Разбор аргументов
+
+
+def add_output_arguments(
+    parser: argparse.ArgumentParser, default_format: str = "table"
+):
+    """Аргументы формата и файла выгрузки"""
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default=default_format,
+        help=f"output format (default: {default_format})",
+    )
+    parser.add_argument(
+        "-o", "--output", help="write to a file instead of stdout"
+    )
+    parser.add_argument(
+        "-n", "--limit", type=int, help="output at most N objects"
+    )
+
+
+def add_category_filters(parser: argparse.ArgumentParser):
+    """Аргументы фильтров по категориям"""
+    parser.add_argument(
+        "-c",
+        "--category",
+        action="append",
+        default=[],
+        help="keep objects in any of these categories (name or ID)",
+    )
+    parser.add_argument(
+        "-x",
+        "--exclude-category",
+        action="append",
+        default=[],
+        help="drop objects in any of these categories (name or ID)",
+    )
+
+
+def add_expense_filters(parser: argparse.ArgumentParser):
+    """Аргументы фильтров статей расходов"""
+    parser.add_argument(
+        "-p",
+        "--product",
+        action="append",
+        default=[],
+        help="keep expenses of these products (name or ID)",
+    )
+    add_category_filters(parser)
+    parser.add_argument(
+        "--date",
+        type=DATE,
+        help=f"filter by date ({cfg.CONSOLE_DATE_FORMAT})",
+    )
+    parser.add_argument(
+        "--date-filter",
+        choices=FILTERS,
+        default="eq",
+        help="comparison for --date (default: eq)",
+    )
+    parser.add_argument(
+        "--time",
+        type=TIME,
+        help=f"filter by time of day ({cfg.CONSOLE_TIME_FORMAT})",
+    )
+    parser.add_argument(
+        "--time-filter",
+        choices=FILTERS,
+        default="eq",
+        help="comparison for --time (default: eq)",
+    )
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=DATETIME,
+        help="keep expenses made at or after this date and time",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=DATETIME,
+        help="keep expenses made before this date and time",
+    )
+
+
+def add_sort_argument(parser: argparse.ArgumentParser, keys: Sequence[str]):
+    """Аргумент сортировки (см. finacsys.sorting)"""
+    parser.add_argument(
+        "-s",
+        "--sort",
+        help=(
+            f"comma-separated sort keys, minus for descending, e.g. "
+            f"--sort=-{keys[0]},{keys[-1]} ({', '.join(keys)})"
+        ),
+    )
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """Создание разбора аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog="finacsys", description="Simple financial system"
+    )
+    parser.add_argument(
+        "--path",
+        help=f"database directory (default: {cfg.DATABASE_PATH})",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("journal", "sqlite"),
+        help=f"database backend (default: {cfg.DATABASE_BACKEND})",
+    )
+    parser.add_argument(
+        "--analytics",
+        choices=("numpy", "python"),
+        help=f"query engine (default: {cfg.ANALYTICS_BACKEND})",
+    )
+    tables = parser.add_subparsers(dest="table", required=True)
+
+    category = tables.add_parser("category", help="categories")
+    commands = category.add_subparsers(dest="action", required=True)
+    command = commands.add_parser("list", help="list categories")
+    add_sort_argument(command, ["name"])
+    add_output_arguments(command)
+    command.set_defaults(handler=category_list)
+    command = commands.add_parser("add", help="add categories")
+    command.add_argument("names", nargs="+", metavar="NAME")
+    command.set_defaults(handler=category_add)
+
+    product = tables.add_parser("product", help="products")
+    commands = product.add_subparsers(dest="action", required=True)
+    command = commands.add_parser("list", help="list products")
+    add_category_filters(command)
+    add_sort_argument(command, ["price", "name"])
+    add_output_arguments(command)
+    command.set_defaults(handler=product_list)
+    command = commands.add_parser("add", help="add a product")
+    command.add_argument("name")
+    command.add_argument("price", type=POSITIVE_MONEY)
+    command.add_argument(
+        "-c",
+        "--category",
+        action="append",
+        default=[],
+        help="category of the product (name or ID)",
+    )
+    command.set_defaults(handler=product_add)
+
+    expense = tables.add_parser("expense", help="expenses")
+    commands = expense.add_subparsers(dest="action", required=True)
+    command = commands.add_parser(
+        "add",
+        help="add an expense, or a batch of expenses from stdin",
+        description=(
+            "Add an expense of PRODUCT. Without PRODUCT, read a batch of "
+            "expenses with date, time, product, price, count and "
+            "categories fields from stdin or --input"
+        ),
+    )
+    command.add_argument("product", nargs="?", help="product name or ID")
+    command.add_argument("count", nargs="?", type=POSITIVE_QUANTITY)
+    command.add_argument(
+        "--date",
+        type=DATE,
+        help=(
+            f"date of the expense ({cfg.CONSOLE_DATE_FORMAT}, "
+            "default: today)"
+        ),
+    )
+    command.add_argument(
+        "--time",
+        type=TIME,
+        help=f"time of the expense ({cfg.CONSOLE_TIME_FORMAT}, default: now)",
+    )
+    command.add_argument("-i", "--input", help="read the batch from a file")
+    command.add_argument(
+        "--input-format",
+        choices=("csv", "jsonl"),
+        default="jsonl",
+        help="batch format (default: jsonl)",
+    )
+    command.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="processes parsing the batch (default: 0, parse in place)",
+    )
+    command.set_defaults(handler=expense_add)
+
+    expense_keys = ["total", "date", "time", "datetime", "price", "count"]
+    for name, handler, text, default_format in (
+        ("find", expense_find, "find expenses", "table"),
+        ("sort", expense_find, "sort found expenses", "table"),
+        ("export", expense_export, "export expenses", "csv"),
+    ):
+        command = commands.add_parser(name, help=text)
+        if name == "sort":
+            command.add_argument(
+                "sort",
+                metavar="KEYS",
+                help=(
+                    "comma-separated sort keys, minus for descending; put "
+                    "-- before keys starting with a minus, e.g. "
+                    f"-- -total,name ({', '.join(expense_keys)}, name)"
+                ),
+            )
+        else:
+            add_sort_argument(command, expense_keys + ["name"])
+        add_expense_filters(command)
+        add_output_arguments(command, default_format)
+        command.set_defaults(handler=handler)
+
+    command = tables.add_parser("report", help="expense reports")
+    command.add_argument(
+        "-b",
+        "--by",
+        choices=("overall", "category", "product", "day", "month"),
+        default="overall",
+        help="grouping of expenses (default: overall)",
+    )
+    add_output_arguments(command)
+    command.set_defaults(handler=report)
+
+    return parser
+
+
+def configure(args: argparse.Namespace):
+    """Изменение настроек finacsys.config по общим аргументам"""
+    if args.path is not None:
+        cfg.DATABASE_PATH = args.path
+    if args.backend is not None:
+        cfg.DATABASE_BACKEND = args.backend
+    if args.analytics is not None:
+        cfg.ANALYTICS_BACKEND = args.analytics
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Запуск команды. Возвращает код завершения"""
+    # pylint: disable=import-outside-toplevel
+    from finacsys.app import configure_ids, open_database
+
+    args = make_parser().parse_args(argv)
+    configure(args)
+    configure_ids()
+
+    database = open_database()
+    try:
+        args.handler(database, args)
+    except (CliError, ValueError) as error:
+        print(f"finacsys: error: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Вывод оборван, например, командой head
+        sys.stderr.close()
+        return 1
+    finally:
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Модуль, содержащий столбцы выгрузки категорий, товаров, статей расходов и
+строк отчетов (см. finacsys.export). Столбцы используются и интерактивным
+интерфейсом, и командной строкой, поэтому модуль не зависит от библиотек
+интерактивного интерфейса
+"""
+import finacsys.config as cfg
+from finacsys.export import Column
+from finacsys.money import round_total
+
+CATEGORY_COLUMNS = [
+    Column("id", "ID", 36, lambda c: str(c.get_id())),
+    Column("name", "Название", 20, lambda c: c.get_name()),
+]
+
+PRODUCT_COLUMNS = [
+    Column("id", "ID", 36, lambda p: str(p.get_id())),
+    Column("name", "Название", 20, lambda p: p.get_name()),
+    Column("price", "Цена", 10, lambda p: p.get_price()),
+    Column(
+        "categories",
+        "Категории",
+        20,
+        lambda p: "; ".join(c.get_name() for c in p.get_categories()),
+    ),
+]
+
+EXPENSE_COLUMNS = [
+    Column("id", "ID", 36, lambda e: str(e.get_id())),
+    Column("product", "Название", 20, lambda e: e.get_name()),
+    Column("count", "Количество", 10, lambda e: e.get_count()),
+    Column("price", "Цена", 10, lambda e: e.get_price()),
+    Column("total", "Общая цена", 10, lambda e: e.get_total_price()),
+    Column(
+        "date", "Дата", 10, lambda e: e.get_date().strftime(cfg.DATE_FORMAT)
+    ),
+    Column(
+        "time", "Время", 8, lambda e: e.get_time().strftime(cfg.TIME_FORMAT)
+    ),
+    Column(
+        "categories",
+        "Категории",
+        20,
+        lambda e: "; ".join(c.get_name() for c in e.get_categories()),
+    ),
+]
+
+# Строка отчета: название группы и агрегат по ней (см. Totals)
+REPORT_COLUMNS = [
+    Column("name", "Группа", 30, lambda row: row[0]),
+    Column("count", "Число расходов", 14, lambda row: row[1].count),
+    Column("total", "Сумма", 14, lambda row: round_total(row[1].total)),
+]
@@ -6,3 +6,10 @@ DATE_FORMAT = "%d.%m.%Y"
 CONSOLE_DATE_FORMAT = "DD.MM.YYYY"
 TIME_FORMAT = "%H:%M:%S"
 CONSOLE_TIME_FORMAT = "HH:MM:SS"
+DATABASE_PATH = "~/.finacsys"
+DATABASE_BACKEND = "journal"
+SQLITE_FILENAME = "finacsys.sqlite3"
+ANALYTICS_BACKEND = "python"
+ID_GENERATOR = "time"
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
@@ -1,3 +1,14 @@
-"""Модуль, содержащий в себе реализацию базы данных"""
+"""
+Модуль, содержащий в себе реализацию базы данных. База данных SQLite
+импортируется при первом обращении (см. finacsys.lazy), поэтому база
+данных в памяти не загружает sqlite3
+"""
+from finacsys.lazy import lazy_names
+
 from .database import Database
 from .finders import ProductFinder, ExpenseFinder
+from .integrity import DeletePlan, DeletePolicy, IntegrityError, Relation
+from .journal import Journal
+from .versions import DatabaseView
+
+__getattr__ = lazy_names(__name__, {"SqliteDatabase": ".sqlite_database"})
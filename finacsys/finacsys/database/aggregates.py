@@ -0,0 +1,241 @@
+"""
+Модуль, содержащий агрегаты расходов: число статей расходов и их суммарную
+стоимость в целом, по категориям, товарам, дням и месяцам.
+
+Агрегаты обновляются при каждом добавлении, изменении и удалении статьи
+расхода, а также при изменении цены и категорий товара, поэтому получение
+отчета не зависит от длины истории расходов. Чтобы изменение цены товара
+обновляло суммы по дням и месяцам без просмотра расходов, для каждого товара
+хранится суммарное количество по дням.
+
+Стоимости хранятся точными целыми числами стотысячных долей рубля, а
+количества — тысячных долей (см. finacsys.money), поэтому агрегаты не
+накапливают ошибку округления при любом числе изменений
+"""
+import datetime as dt
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+from finacsys.models import Expense, Ident, ObjectMeta, Product
+from finacsys.money import total_units
+
+from .arrays import ExpenseArrays
+
+Month = Tuple[int, int]
+# Товар, день и количество статьи расхода — все, что агрегаты знают о ней
+Group = Tuple[Product, dt.date, int]
+
+
+def expense_group(expense: Expense) -> Group:
+    """Группа, в которую статья расхода входит в агрегатах"""
+    return expense.get_product(), expense.get_date(), expense.get_count_units()
+
+
+class Totals:
+    """Число статей расходов и их суммарная стоимость"""
+
+    def __init__(self, count: int = 0, total: int = 0):
+        self.count = count
+        self.total = total
+
+    def add(self, count: int, total: int):
+        """Прибавление числа статей расходов и стоимости"""
+        self.count += count
+        self.total += total
+
+    def __repr__(self) -> str:
+        return f"Totals(count={self.count}, total={self.total})"
+
+
+def bump(rollup: Dict[Any, Totals], key: Hashable, count: int, total: int):
+    """
+    Изменение агрегата по ключу. Ключи, по которым не осталось статей
+    расходов, удаляются
+    """
+    totals = rollup.get(key)
+    if totals is None:
+        totals = rollup[key] = Totals()
+
+    totals.add(count, total)
+    if totals.count == 0:
+        del rollup[key]
+
+
+class Aggregates:
+    """Агрегаты расходов, обновляемые при каждом изменении базы данных"""
+
+    def __init__(self):
+        self.overall = Totals()
+        self.categories: Dict[Ident, Totals] = {}
+        self.products: Dict[Ident, Totals] = {}
+        self.days: Dict[dt.date, Totals] = {}
+        self.months: Dict[Month, Totals] = {}
+        # Число статей расходов и суммарное количество товара по дням:
+        # ID товара -> день -> Totals(число статей, количество)
+        self.__quantities: Dict[Ident, Dict[dt.date, Totals]] = {}
+        # Товары, по которым есть статьи расходов (в том числе удаленные
+        # из таблицы товаров), для вывода их названий в отчетах
+        self.__products: Dict[Ident, Product] = {}
+
+    @classmethod
+    def build(cls, expenses: Iterable[Expense]) -> "Aggregates":
+        """Вычисление агрегатов по всем статьям расходов"""
+        aggregates = cls()
+        for expense in expenses:
+            aggregates.add_expense(expense)
+        return aggregates
+
+    @classmethod
+    def from_arrays(cls, arrays: ExpenseArrays) -> "Aggregates":
+        """
+        Вычисление агрегатов группировками колоночного представления статей
+        расходов (см. ExpenseArrays.group)
+        """
+        aggregates = cls()
+        products, rows, totals = arrays.by_product()
+        aggregates.overall = Totals(len(arrays), int(totals.sum()))
+
+        for product, count, total in zip(
+            products, rows.tolist(), totals.tolist()
+        ):
+            ident = product.get_id()
+            aggregates.products[ident] = Totals(count, total)
+            aggregates.__products[ident] = product
+            for category in product.get_categories():
+                bump(aggregates.categories, category.get_id(), count, total)
+
+        for rollup, (keys, rows, totals) in (
+            (aggregates.days, arrays.by_day()),
+            (aggregates.months, arrays.by_month()),
+        ):
+            for key, count, total in zip(keys, rows.tolist(), totals.tolist()):
+                rollup[key] = Totals(count, total)
+
+        for product, day, count, quantity in arrays.by_product_and_day():
+            quantities = aggregates.__quantities.setdefault(
+                product.get_id(), {}
+            )
+            quantities[day] = Totals(count, quantity)
+
+        return aggregates
+
+    def get_product(self, ident: Ident) -> Product:
+        """Получение товара, по которому есть статьи расходов"""
+        return self.__products[ident]
+
+    def add_expense(self, expense: Expense):
+        """Учет добавленной статьи расхода"""
+        self.add_group(
+            expense.get_product(),
+            expense.get_date(),
+            1,
+            expense.get_count_units(),
+        )
+
+    def remove_expense(self, expense: Expense):
+        """Учет удаленной статьи расхода"""
+        self.add_group(
+            expense.get_product(),
+            expense.get_date(),
+            -1,
+            -expense.get_count_units(),
+        )
+
+    def move_expenses(self, before: Iterable[Group], after: Iterable[Group]):
+        """
+        Учет изменения пачки статей расходов: группы статей до изменения
+        (before) исключаются, после изменения (after) — добавляются.
+        Изменения одного товара за один день суммируются, поэтому агрегаты
+        обновляются один раз на группу, а не на каждое изменение поля
+        """
+        deltas: Dict[Tuple[Ident, dt.date], List[Any]] = {}
+        for groups, sign in ((before, -1), (after, 1)):
+            for product, day, quantity in groups:
+                delta = deltas.get((product.get_id(), day))
+                if delta is None:
+                    delta = deltas[(product.get_id(), day)] = [product, 0, 0]
+                delta[1] += sign
+                delta[2] += sign * quantity
+
+        for (_, day), (product, rows, quantity) in deltas.items():
+            if rows != 0 or quantity != 0:
+                self.add_group(product, day, rows, quantity)
+
+    def add_group(
+        self, product: Product, day: dt.date, rows: int, quantity: int
+    ):
+        """
+        Учет группы статей расходов одного товара за один день: rows статей
+        с суммарным количеством quantity тысячных долей. Отрицательные
+        значения исключают статьи из агрегатов
+        """
+        ident = product.get_id()
+        total = total_units(quantity, product.get_price_units())
+
+        self.overall.add(rows, total)
+        bump(self.products, ident, rows, total)
+        for category in product.get_categories():
+            bump(self.categories, category.get_id(), rows, total)
+        bump(self.days, day, rows, total)
+        bump(self.months, (day.year, day.month), rows, total)
+
+        quantities = self.__quantities.setdefault(ident, {})
+        bump(quantities, day, rows, quantity)
+        if ident in self.products:
+            self.__products[ident] = product
+        else:
+            self.__quantities.pop(ident, None)
+            self.__products.pop(ident, None)
+
+    def on_change(self, obj: ObjectMeta, field: str, old: Any, new: Any):
+        """Учет изменения поля объекта (см. ObjectMeta.add_listener)"""
+        if isinstance(obj, Expense):
+            self.__on_expense_change(obj, field, old, new)
+        elif isinstance(obj, Product) and field == "price":
+            self.__on_price_change(obj, new.get_units() - old.get_units())
+        elif isinstance(obj, Product) and field == "categories":
+            self.__on_categories_change(obj, old, new)
+
+    def __on_expense_change(
+        self, expense: Expense, field: str, old: Any, new: Any
+    ):
+        product = expense.get_product()
+        count = expense.get_count_units()
+        day = expense.get_date()
+
+        if field == "count":
+            self.add_group(product, day, -1, -old.get_units())
+            self.add_group(product, day, 1, new.get_units())
+        elif field == "created_at":
+            self.add_group(product, old.date(), -1, -count)
+            self.add_group(product, new.date(), 1, count)
+        elif field == "product":
+            self.add_group(old, day, -1, -count)
+            self.add_group(new, day, 1, count)
+
+    def __on_price_change(self, product: Product, delta: int):
+        ident = product.get_id()
+        quantities = self.__quantities.get(ident, {})
+        quantity = 0
+
+        for day, totals in quantities.items():
+            quantity += totals.total
+            self.days[day].add(0, delta * totals.total)
+            self.months[(day.year, day.month)].add(0, delta * totals.total)
+
+        total = delta * quantity
+        self.overall.add(0, total)
+        if ident in self.products:
+            self.products[ident].add(0, total)
+        for category in product.get_categories():
+            if category.get_id() in self.categories:
+                self.categories[category.get_id()].add(0, total)
+
+    def __on_categories_change(self, product: Product, old: Any, new: Any):
+        totals = self.products.get(product.get_id())
+        if totals is None:
+            return
+
+        if old is not None:
+            bump(self.categories, old.get_id(), -totals.count, -totals.total)
+        if new is not None:
+            bump(self.categories, new.get_id(), totals.count, totals.total)
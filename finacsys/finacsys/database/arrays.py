@@ -0,0 +1,486 @@
+"""
+Модуль, содержащий колоночное представление статей расходов в массивах
+NumPy. Отметки времени, количества и номера товаров хранятся в массивах,
+а цены и маски категорий берутся из товаров при каждом обращении, поэтому
+изменение товара не требует перестроения массивов. Фильтры вычисляются
+булевыми масками, сортировки — argsort, группировки — bincount и
+ufunc.reduceat, без обращения к объектам Expense.
+
+Количества и цены хранятся целыми числами (см. finacsys.money), поэтому
+суммы стоимостей вычисляются точно. Если стоимости могут не поместиться в
+int64, столбец стоимостей хранит целые числа Python
+
+NumPy является необязательной зависимостью и включается настройкой
+ANALYTICS_BACKEND = "numpy". По умолчанию, а также если NumPy не
+установлен, enabled() возвращает False и таблицы используют запросы к
+объектам с упорядоченными индексами (см. queries.ExpenseQuery)
+"""
+import datetime as dt
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import finacsys.config as cfg
+from finacsys.models import (
+    Category,
+    Expense,
+    Ident,
+    Product,
+    category_mask,
+)
+from finacsys.filters import DateFilter, TimeFilter, make_bounds
+from finacsys.money import Money, round_total
+from finacsys.timestamps import (
+    DAY,
+    date_to_timestamp,
+    day_to_date,
+    time_to_micros,
+    to_timestamp,
+)
+
+from .queries import category_names
+
+# NumPy импортируется при первой проверке enabled(): импорт NumPy дольше
+# запуска остального приложения, а разовым командам он не нужен
+np: Any = None
+numpy_loaded: Optional[bool] = None
+
+# Маски категорий, не помещающиеся в uint64, хранятся как объекты Python
+MAX_UINT64_MASK = 1 << 64
+MAX_INT64 = (1 << 63) - 1
+
+Array = Any
+
+
+def load_numpy() -> bool:
+    """
+    Импорт NumPy при первом обращении. Возвращает False, если NumPy не
+    установлен. Результат запоминается
+    """
+    global np, numpy_loaded  # pylint: disable=global-statement
+    if numpy_loaded is None:
+        try:
+            import numpy  # pylint: disable=import-outside-toplevel
+        except ImportError:  # pragma: no cover
+            numpy_loaded = False
+        else:
+            np, numpy_loaded = numpy, True
+    return numpy_loaded
+
+
+def enabled() -> bool:
+    """Проверка, установлен ли NumPy и выбран ли он для аналитики"""
+    return cfg.ANALYTICS_BACKEND == "numpy" and load_numpy()
+
+
+class ExpenseArrays:
+    """
+    Колоночное представление списка статей расходов. Строка i массивов
+    соответствует статье расхода expenses[i]. Статьи расходов можно
+    добавлять, изменять и удалять без перестроения массивов (см. append,
+    update и remove): удаленная строка исключается из запросов и
+    группировок маской live, а когда удалено больше половины строк, массивы
+    уплотняются
+    """
+
+    def __init__(self, expenses: Sequence[Expense]):
+        if not load_numpy():
+            raise ImportError("NumPy is not installed")
+        self.expenses: List[Optional[Expense]] = []
+        self.products: List[Product] = []
+        self.__positions: Dict[Ident, int] = {}
+        self.__rows: Dict[Ident, int] = {}
+        self.__removed = 0
+        self.__load(list(expenses))
+
+    def __load(self, expenses: List[Expense]):
+        self.expenses = list(expenses)
+        self.products = []
+        self.__positions = {}
+        self.__rows = {}
+        self.__removed = 0
+
+        product_index = []
+        for row, expense in enumerate(expenses):
+            self.__rows[expense.get_id()] = row
+            product_index.append(self.__position(expense.get_product()))
+
+        size = len(expenses)
+        self.__timestamps = np.fromiter(
+            (expense.get_timestamp() for expense in expenses),
+            dtype=np.int64,
+            count=size,
+        )
+        self.__counts = np.fromiter(
+            (expense.get_count_units() for expense in expenses),
+            dtype=np.int64,
+            count=size,
+        )
+        self.__product_index = np.array(product_index, dtype=np.intp)
+        self.__live = np.ones(size, dtype=np.bool_)
+
+    def __position(self, product: Product) -> int:
+        """Номер товара в списке products. Новый товар добавляется в конец"""
+        position = self.__positions.get(product.get_id())
+        if position is None:
+            position = self.__positions[product.get_id()] = len(self.products)
+            self.products.append(product)
+        return position
+
+    def __write(self, row: int, expense: Expense):
+        self.__timestamps[row] = expense.get_timestamp()
+        self.__counts[row] = expense.get_count_units()
+        self.__product_index[row] = self.__position(expense.get_product())
+
+    def __grow(self):
+        """Увеличение емкости массивов вдвое"""
+        capacity = max(16, 2 * len(self.__live))
+        for name in ("timestamps", "counts", "product_index", "live"):
+            attribute = f"_ExpenseArrays__{name}"
+            old = getattr(self, attribute)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, attribute, new)
+
+    def append(self, expense: Expense):
+        """Добавление строки статьи расхода в конец массивов"""
+        row = len(self.expenses)
+        if row == len(self.__live):
+            self.__grow()
+        self.expenses.append(expense)
+        self.__rows[expense.get_id()] = row
+        self.__live[row] = True
+        self.__write(row, expense)
+
+    def update(self, expense: Expense):
+        """
+        Перезапись строки статьи расхода с тем же ID после изменения ее
+        полей или замены объекта
+        """
+        row = self.__rows[expense.get_id()]
+        self.expenses[row] = expense
+        self.__write(row, expense)
+
+    def remove(self, expense: Expense):
+        """Удаление строки статьи расхода"""
+        row = self.__rows.pop(expense.get_id())
+        self.expenses[row] = None
+        self.__live[row] = False
+        self.__removed += 1
+        if 2 * self.__removed > len(self.expenses):
+            self.__load([exp for exp in self.expenses if exp is not None])
+
+    @property
+    def timestamps(self) -> Array:
+        """Отметки времени статей расходов (см. timestamps.to_timestamp)"""
+        return self.__timestamps[: len(self.expenses)]
+
+    @property
+    def counts(self) -> Array:
+        """Количества в тысячных долях (см. finacsys.money.Quantity)"""
+        return self.__counts[: len(self.expenses)]
+
+    @property
+    def product_index(self) -> Array:
+        """Номера товаров строк в списке products"""
+        return self.__product_index[: len(self.expenses)]
+
+    @property
+    def live(self) -> Array:
+        """Маска неудаленных строк"""
+        return self.__live[: len(self.expenses)]
+
+    def __len__(self) -> int:
+        return len(self.expenses) - self.__removed
+
+    def rows(self) -> Array:
+        """Номера всех неудаленных строк по порядку"""
+        if self.__removed:
+            return np.flatnonzero(self.live)
+        return np.arange(len(self.expenses))
+
+    def take(self, rows: Array) -> List[Expense]:
+        """Статьи расходов из строк rows в переданном порядке"""
+        expenses = self.expenses
+        return [expenses[row] for row in rows.tolist()]
+
+    def dates(self) -> Array:
+        """Номера дней с 01.01.1970"""
+        return self.timestamps // DAY
+
+    def times(self) -> Array:
+        """Время суток в микросекундах"""
+        return self.timestamps % DAY
+
+    def unit_prices(self) -> Array:
+        """Цены товаров статей расходов в копейках"""
+        prices = [product.get_price_units() for product in self.products]
+        return np.array(prices, dtype=np.int64)[self.product_index]
+
+    def totals(self) -> Array:
+        """
+        Точные итоговые стоимости статей расходов (см.
+        finacsys.money.total_units)
+        """
+        prices = self.unit_prices()
+        if len(prices) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Сумма любых стоимостей не превышает этой границы
+        bound = int(prices.max()) * int(self.counts.max()) * len(prices)
+        if bound > MAX_INT64:
+            return self.counts.astype(object) * prices.astype(object)
+        return self.counts * prices
+
+    def names(self) -> Array:
+        """Названия товаров статей расходов"""
+        names = [product.get_name() for product in self.products]
+        return np.array(names, dtype=np.str_)[self.product_index]
+
+    def in_range(
+        self, column: Array, lower: Optional[int], upper: Optional[int]
+    ) -> Array:
+        """
+        Маска строк, значение столбца которых лежит в полуинтервале
+        [lower, upper). None означает отсутствие границы
+        """
+        selected = np.ones(len(column), dtype=np.bool_)
+        if lower is not None:
+            selected &= column >= lower
+        if upper is not None:
+            selected &= column < upper
+        return selected
+
+    def with_categories(self, categories: List[Category]) -> Array:
+        """Маска строк, принадлежащих хотя бы к одной из категорий"""
+        mask = category_mask(categories)
+        masks = [product.get_category_mask() for product in self.products]
+
+        if max(masks + [mask]) < MAX_UINT64_MASK:
+            column = np.array(masks, dtype=np.uint64)
+            matched = column & np.uint64(mask) != 0
+        else:
+            column = np.array(masks, dtype=object)
+            matched = (column & mask != 0).astype(np.bool_)
+
+        return matched[self.product_index]
+
+    def with_products(self, product_ids: Set[Ident]) -> Array:
+        """Маска строк, основанных на одном из товаров"""
+        allowed = np.array(
+            [product.get_id() in product_ids for product in self.products],
+            dtype=np.bool_,
+        )
+        return allowed[self.product_index]
+
+    def argsort(self, keys: Array, reverse: bool = False) -> Array:
+        """
+        Порядок строк по возрастанию (reverse=False) или убыванию ключей.
+        Сортировка устойчива в обоих направлениях, как list.sort
+        """
+        if not reverse:
+            return np.argsort(keys, kind="stable")
+
+        order = np.argsort(keys[::-1], kind="stable")[::-1]
+        return len(keys) - 1 - order
+
+    def group(
+        self, keys: Array, *columns: Array
+    ) -> Tuple[Array, Array, List[Array]]:
+        """
+        Группировка строк по ключам. Возвращает уникальные ключи в порядке
+        возрастания, число строк в каждой группе и суммы столбцов columns
+        по группам
+        """
+        if len(keys) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return keys, np.zeros(0, dtype=np.intp), [empty for _ in columns]
+
+        order = np.argsort(keys, kind="stable")
+        ordered = keys[order]
+        starts = np.flatnonzero(
+            np.concatenate(([True], ordered[1:] != ordered[:-1]))
+        )
+        rows = np.diff(np.append(starts, len(keys)))
+        sums = [np.add.reduceat(column[order], starts) for column in columns]
+        return ordered[starts], rows, sums
+
+    def __select(self, column: Array) -> Array:
+        """Значения столбца в неудаленных строках"""
+        if self.__removed:
+            return column[self.live]
+        return column
+
+    def by_product(self) -> Tuple[List[Product], Array, Array]:
+        """Число статей расходов и их суммарная стоимость по товарам"""
+        positions, rows, (totals,) = self.group(
+            self.__select(self.product_index), self.__select(self.totals())
+        )
+        products = [self.products[key] for key in positions.tolist()]
+        return products, rows, totals
+
+    def by_day(self) -> Tuple[List[dt.date], Array, Array]:
+        """Число статей расходов и их суммарная стоимость по дням"""
+        days, rows, (totals,) = self.group(
+            self.__select(self.dates()), self.__select(self.totals())
+        )
+        return [day_to_date(day) for day in days.tolist()], rows, totals
+
+    def by_month(self) -> Tuple[List[Tuple[int, int]], Array, Array]:
+        """
+        Число статей расходов и их суммарная стоимость по месяцам (год,
+        месяц)
+        """
+        dates = self.__select(self.dates())
+        months = dates.astype("datetime64[D]").astype("datetime64[M]")
+        keys, rows, (totals,) = self.group(
+            months.astype(np.int64), self.__select(self.totals())
+        )
+        return (
+            [(1970 + key // 12, key % 12 + 1) for key in keys.tolist()],
+            rows,
+            totals,
+        )
+
+    def by_product_and_day(self) -> List[Tuple[Product, dt.date, int, int]]:
+        """
+        Группы статей расходов одного товара за один день: товар, день,
+        число статей и суммарное количество (см. Aggregates.add_group)
+        """
+        dates = self.__select(self.dates())
+        if len(dates) == 0:
+            return []
+
+        first = int(dates.min())
+        span = int(dates.max()) - first + 1
+        keys = self.__select(self.product_index) * span + (dates - first)
+        keys, rows, (quantities,) = self.group(
+            keys, self.__select(self.counts)
+        )
+
+        days = [day_to_date(first + offset) for offset in range(span)]
+        return [
+            (self.products[key // span], days[key % span], count, quantity)
+            for key, count, quantity in zip(
+                keys.tolist(), rows.tolist(), quantities.tolist()
+            )
+        ]
+
+
+class ArrayExpenseQuery:
+    """
+    Запрос к статьям расходов, представленным массивами NumPy. Фильтры
+    накапливаются и вычисляются булевыми масками по всем строкам при первом
+    получении результата, поэтому запрос видит состояние массивов на момент
+    выполнения, а не создания
+    """
+
+    def __init__(self, arrays: ExpenseArrays):
+        self.arrays = arrays
+        self.__filters: List[Tuple[str, Callable[[], Array]]] = []
+        self.__selected: Optional[Array] = None
+        self.__log: List[Tuple[str, int]] = []
+        self.__result: Optional[List[Expense]] = None
+
+    def __apply(self, description: str, mask: Callable[[], Array]):
+        self.__filters.append((description, mask))
+        self.__selected = None
+        self.__result = None
+
+    def __evaluate(self) -> Array:
+        """Маска строк, удовлетворяющих всем фильтрам"""
+        if self.__selected is None:
+            selected = self.arrays.live.copy()
+            self.__log = []
+            for description, mask in self.__filters:
+                selected &= mask()
+                self.__log.append((description, int(selected.sum())))
+            self.__selected = selected
+        return self.__selected
+
+    def only_products(self, product_ids: Set[Ident]):
+        """Оставить расходы, основанные на переданных товарах"""
+        self.__apply(
+            f"Товары: {len(product_ids)} шт.",
+            lambda: self.arrays.with_products(product_ids),
+        )
+
+    def only_included_categories(self, categories: List[Category]):
+        """Оставить расходы, принадлежащие хотя бы к одной из категорий"""
+        self.__apply(
+            f"Категории: только {category_names(categories)}",
+            lambda: self.arrays.with_categories(categories),
+        )
+
+    def exclude_categories(self, categories: List[Category]):
+        """Убрать расходы, принадлежащие хотя бы к одной из категорий"""
+        self.__apply(
+            f"Категории: кроме {category_names(categories)}",
+            lambda: ~self.arrays.with_categories(categories),
+        )
+
+    def set_date_filter(self, filter_type: DateFilter, date: dt.date):
+        """Отфильтровать расходы по дате. См. DateFilter"""
+        start = date_to_timestamp(date)
+        lower, upper = make_bounds(filter_type, start, start + DAY)
+        self.__apply(
+            f"Дата: {filter_type} {date.strftime(cfg.DATE_FORMAT)}",
+            lambda: self.arrays.in_range(self.arrays.timestamps, lower, upper),
+        )
+
+    def set_time_filter(self, filter_type: TimeFilter, time: dt.time):
+        """Отфильтровать расходы по времени. См. TimeFilter"""
+        start = time_to_micros(time)
+        lower, upper = make_bounds(filter_type, start, start + 1)
+        self.__apply(
+            f"Время: {filter_type} {time.strftime(cfg.TIME_FORMAT)}",
+            lambda: self.arrays.in_range(self.arrays.times(), lower, upper),
+        )
+
+    def set_datetime_range(
+        self, start: Optional[dt.datetime], end: Optional[dt.datetime]
+    ):
+        """
+        Оставить расходы, дата и время которых лежат в полуинтервале
+        [start, end). None означает отсутствие границы
+        """
+        lower = None if start is None else to_timestamp(start)
+        upper = None if end is None else to_timestamp(end)
+        self.__apply(
+            f"Дата и время: [{start}, {end})",
+            lambda: self.arrays.in_range(self.arrays.timestamps, lower, upper),
+        )
+
+    def get_rows(self) -> Array:
+        """Номера строк массивов, удовлетворяющих запросу"""
+        return np.flatnonzero(self.__evaluate())
+
+    def total_price(self) -> Money:
+        """Суммарная стоимость расходов, удовлетворяющих запросу"""
+        selected = self.__evaluate()
+        return round_total(int(self.arrays.totals()[selected].sum()))
+
+    def empty(self) -> bool:
+        """Проверка результата запроса на пустоту"""
+        return not self.__evaluate().any()
+
+    def fetch(self) -> List[Expense]:
+        """Получение результата запроса"""
+        if self.__result is None:
+            self.__result = self.arrays.take(self.get_rows())
+        return self.__result
+
+    def explain(self) -> str:
+        """Описание примененных масок и числа оставшихся строк"""
+        self.__evaluate()
+        lines = [f"Источник: массивы NumPy (строк: {len(self.arrays)})"]
+        for number, (description, found) in enumerate(self.__log, start=1):
+            lines.append(f"{number}. {description} (осталось строк: {found})")
+        return "\n".join(lines)
@@ -0,0 +1,111 @@
+"""
+Модуль, содержащий массовые изменения объектов базы данных (см.
+Database.update_expenses, update_products и retag_products). Изменение
+проверяется один раз при создании, до применения к объектам, поэтому
+ошибка в аргументах не изменяет ни одного объекта пачки
+"""
+import datetime as dt
+from typing import Any, Iterable, List, Optional
+
+from finacsys.models import Category, Expense, Product
+from finacsys.money import Money, Quantity
+
+
+class ExpenseUpdate:
+    """
+    Изменение статей расходов: товар, количество, дата, время и сдвиг даты
+    и времени создания. Поля, равные None, не изменяются. Поля применяются
+    в порядке перечисления, поэтому сдвиг отсчитывается от новых даты и
+    времени
+    """
+
+    def __init__(
+        self,
+        product: Optional[Product] = None,
+        count: Any = None,
+        date: Optional[dt.date] = None,
+        time: Optional[dt.time] = None,
+        shift: Optional[dt.timedelta] = None,
+    ):
+        self.product = product
+        self.count = None if count is None else Quantity.of(count)
+        if self.count is not None and self.count.get_units() <= 0:
+            raise ValueError("Count cannot be less than or equal to zero")
+        if shift is not None and not isinstance(shift, dt.timedelta):
+            raise ValueError(f"Shift must be a timedelta: {shift!r}")
+
+        self.date = date
+        self.time = time
+        self.shift = shift or None
+
+    def empty(self) -> bool:
+        """Проверка, что изменение не изменяет ни одного поля"""
+        return all(
+            value is None
+            for value in (
+                self.product,
+                self.count,
+                self.date,
+                self.time,
+                self.shift,
+            )
+        )
+
+    def apply(self, expense: Expense):
+        """Применение изменения к статье расхода"""
+        if self.product is not None:
+            expense.set_product(self.product)
+        if self.count is not None:
+            expense.set_count(self.count)
+        if self.date is not None:
+            expense.set_date(self.date)
+        if self.time is not None:
+            expense.set_time(self.time)
+        if self.shift is not None:
+            expense.set_datetime(expense.get_datetime() + self.shift)
+
+
+class ProductUpdate:
+    """Изменение товаров: название и цена. Поля, равные None, не изменяются"""
+
+    def __init__(self, name: Optional[str] = None, price: Any = None):
+        if name is not None and len(name) == 0:
+            raise ValueError("Name cannot be an empty string")
+        self.name = name
+        self.price = None if price is None else Money.of(price)
+        if self.price is not None and self.price.get_units() <= 0:
+            raise ValueError("Price cannot be less than or equal to zero")
+
+    def empty(self) -> bool:
+        """Проверка, что изменение не изменяет ни одного поля"""
+        return self.name is None and self.price is None
+
+    def apply(self, product: Product):
+        """Применение изменения к товару"""
+        if self.name is not None:
+            product.set_name(self.name)
+        if self.price is not None:
+            product.set_price(self.price)
+
+
+class Retag:
+    """Изменение категорий товаров: добавление add и удаление remove"""
+
+    def __init__(
+        self, add: Iterable[Category] = (), remove: Iterable[Category] = ()
+    ):
+        self.add: List[Category] = list(add)
+        self.remove: List[Category] = list(remove)
+        both = set(self.add) & set(self.remove)
+        if both:
+            names = ", ".join(sorted(c.get_name() for c in both))
+            raise ValueError(f"Categories are both added and removed: {names}")
+
+    def empty(self) -> bool:
+        """Проверка, что изменение не изменяет ни одного товара"""
+        return len(self.add) == 0 and len(self.remove) == 0
+
+    def apply(self, product: Product):
+        """Применение изменения к товару"""
+        product.add_categories(self.add)
+        product.remove_categories(self.remove)
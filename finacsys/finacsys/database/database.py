@@ -1,68 +1,973 @@
 """Модуль, содержащий базу данных приложения"""
-from typing import List
-from uuid import UUID
+import datetime as dt
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
 
-from finacsys.models import Product, Category, Expense
+from finacsys.models import Product, Category, Expense, Ident, ObjectMeta
 
-from .tables import ProductTable, ExpenseTable, Table
+from .tables import (
+    ColumnarExpenseTable,
+    ProductTable,
+    ExpenseTable,
+    Table,
+    write_expenses,
+)
+from . import arrays
+from .aggregates import Aggregates, expense_group
+from .bulk import ExpenseUpdate, ProductUpdate, Retag
+from .indexes import ReverseIndex
+from .integrity import (
+    DEFAULT_POLICIES,
+    DeletePlan,
+    DeletePolicy,
+    Policies,
+    Relation,
+    check_policy,
+    merge_policies,
+    plan_delete,
+)
+from .journal import Journal, Record
+from .locks import ReadWriteLock, reads, writes
+from .pages import PAGE_SIZE, Pages
+from .search import ExpenseSearchSession, SearchSession, TrigramIndex
+from .transaction import Change, Transaction, revert_change, revert_changes
+from .versions import DatabaseView, Versions
+from . import records
 
 CategoryTable = Table
 
+LEDGER_FILENAME = "expenses.{}.ledger"
+
 
 class Database:
     """
     База данных приложения. Включает в себя таблицу категорий, товаров и
-    расходов
+    расходов.
+
+    Методы базы данных выполняются под блокировкой lock: читающие —
+    параллельно, изменяющие — монопольно. Объекты, изменяемые из разных
+    потоков напрямую (например, Product.set_price), следует изменять внутри
+    блока with database.transaction(). Долгое чтение следует выполнять по
+    представлению (см. view), которое не удерживает блокировку.
+
+    Индексы, агрегаты и версии для представлений, которые строятся при
+    первом чтении, могут быть построены двумя читателями
+    одновременно; результат при этом одинаков, так как изменения в это
+    время невозможны.
+
+    Удаление товаров и категорий вместе с зависимыми объектами выполняется
+    по политикам policies (см. delete и finacsys.database.integrity).
+    Пачки объектов следует изменять массовыми методами (update_expenses,
+    update_products, retag_products, delete_many): они обновляют индексы,
+    агрегаты и версии один раз на пачку и записывают в журнал одну запись
     """
 
-    def __init__(self):
-        self.expenses = ExpenseTable()
-        self.products = ProductTable()
+    def __init__(self, journal: Optional[Journal] = None):
+        self.lock = ReadWriteLock()
+        self.__transaction: Optional[Transaction] = None
+        # Обратные индексы строятся при первом обращении и далее
+        # поддерживаются при каждом изменении (см. ReverseIndex)
+        self.__category_index: Optional[ReverseIndex] = None
+        self.__product_index: Optional[ReverseIndex] = None
+        # Триграммные индексы названий категорий и товаров для поиска (см.
+        # search) строятся так же, при первом поиске по таблице
+        self.__name_indexes: Dict[str, TrigramIndex] = {}
+        # Агрегаты расходов также вычисляются при первом обращении
+        self.__aggregates: Optional[Aggregates] = None
+        # Версии для представлений строятся при первом вызове view
+        self.__versions: Optional[Versions] = None
+        # Надгробия: удаленные товары, на которые еще ссылаются статьи
+        # расходов (см. delete_product)
+        self.__tombstones: Dict[Ident, Product] = {}
+        self.policies: Policies = dict(DEFAULT_POLICIES)
+        # Изменения, накапливаемые массовым изменением (см. __apply_bulk)
+        self.__changes: Optional[List[Change]] = None
+
+        self.expenses = ExpenseTable(self.expenses_with_categories)
+        self.products = ProductTable(self.products_with_categories)
         self.categories = CategoryTable()
+        self.journal = journal
+
+    @classmethod
+    def open(cls, path: Path, **journal_options) -> "Database":
+        """
+        Открытие базы данных, сохраненной в директории path. Состояние
+        восстанавливается из снимка и журнала, после чего все последующие
+        изменения записываются в журнал. Параметры journal_options
+        передаются в конструктор Journal
+        """
+        journal = Journal(path, **journal_options)
+        database = cls()
+
+        for record in journal.replay():
+            if record["op"] == "load_expenses":
+                table = ColumnarExpenseTable.open(
+                    journal.path / record["file"], database.products
+                )
+                database.set_expense_table(table)
+            else:
+                records.apply_record(database, record)
+
+        database.journal = journal
+        return database
+
+    @writes
+    def set_expense_table(self, table: ColumnarExpenseTable):
+        """
+        Замена таблицы расходов таблицей колоночного формата. Статьи
+        расходов, создаваемые таблицей, отслеживаются так же, как
+        добавленные через add_expense
+        """
+        self.expenses = table
+        self.__product_index = None
+        self.__aggregates = None
+        self.__versions = None
+        self._watch(table)
+
+    def _watch(self, table: Any):
+        """
+        Подписка на изменения объектов, которые таблица создает сама при
+        чтении из файла. Таблица должна предоставлять метод add_listener
+        """
+        table.add_listener(self.__on_change)
+
+    def _on_reset_category(self, category: Category):
+        """
+        Учет удаления категории из товаров, которые не оповещают об этом
+        слушателей, так как не загружены в память (см.
+        SqliteDatabase.reset_category)
+        """
+        if self.__versions is not None:
+            self.__versions.reset_category(category)
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """
+        Транзакция: изменения базы данных и ее объектов внутри блока with
+        выполняются под блокировкой на запись, а записи журнала сохраняются
+        одной группой при выходе из блока. Если блок завершается
+        исключением, все изменения отменяются в обратном порядке, журнал не
+        изменяется, а исключение выбрасывается дальше. Вложенные транзакции
+        становятся частью внешней
+        """
+        with self.lock.write():
+            if self.__transaction is not None:
+                yield self
+                return
+
+            transaction = self.__transaction = Transaction()
+            try:
+                yield self
+            except BaseException:
+                transaction.rollback()
+                raise
+            finally:
+                self.__transaction = None
+
+            logged = transaction.records
+            if len(logged) > 1:
+                # Строка журнала записывается целиком или обрывается, поэтому
+                # транзакция восстанавливается после сбоя полностью или никак
+                logged = [records.batch_to_record(logged)]
+            self.__write_journal(logged)
+
+    @writes
+    def close(self):
+        """Сброс журнала на диск и его закрытие"""
+        if self.journal is not None:
+            self.journal.close()
+
+    @writes
+    def snapshot(self):
+        """
+        Запись снимка базы данных и сжатие журнала. Категории и товары
+        записываются в снимок журнала, а статьи расходов — в отдельный файл
+        колоночного формата (см. ColumnarExpenseTable), который при
+        следующем открытии отображается в память без разбора записей
+        """
+        if self.journal is None:
+            return
+
+        # Надгробия тоже попадают в снимок, чтобы расходы восстановились
+        # полностью
+        orphans = list(self.__tombstones.values())
+        products = self.get_products_list() + orphans
+
+        filename = LEDGER_FILENAME.format(self.journal.seq)
+        write_expenses(self.journal.path / filename, products, self.expenses)
+        self.journal.write_snapshot(self.__dump(products, orphans, filename))
+
+        for path in self.journal.path.glob(LEDGER_FILENAME.format("*")):
+            if path.name != filename:
+                path.unlink(missing_ok=True)
+
+    def __dump(
+        self, products: List[Product], orphans: List[Product], filename: str
+    ) -> Iterator[Record]:
+        for category in self.categories.values():
+            yield records.category_to_record(category)
+        for product in products:
+            yield records.product_to_record(product)
+
+        yield {"op": "load_expenses", "file": filename}
+
+        for product in orphans:
+            yield records.delete_to_record(product)
+
+    def __log(self, record: Record):
+        self.__log_all([record])
+
+    def __log_all(self, logged: List[Record]):
+        if self.__transaction is not None:
+            for record in logged:
+                self.__transaction.log(record)
+        else:
+            self.__write_journal(logged)
+
+    def __write_journal(self, logged: List[Record]):
+        if self.journal is None:
+            return
+
+        for record in logged:
+            self.journal.append(record)
+        if self.journal.needs_snapshot():
+            self.snapshot()
+
+    def __on_undo(self, action: Callable[[], None]):
+        if self.__transaction is not None:
+            self.__transaction.on_undo(action)
+
+    @writes
+    def __on_change(self, obj: ObjectMeta, field: str, old: Any, new: Any):
+        if self.__changes is not None:
+            self.__changes.append((obj, field, old, new))
+            return
+
+        self.__update_indexes(obj, field, old, new)
+        if self.__aggregates is not None:
+            self.__aggregates.on_change(obj, field, old, new)
+        if self.__versions is not None:
+            self.__versions.on_change(obj, field, old, new)
+        self.__on_undo(lambda: revert_change(obj, field, old, new))
+        self.__log(records.change_to_record(obj, field, old, new))
+        if field == "product" and isinstance(obj, Expense):
+            self.__collect([old])
+
+    def __category_ids(self, product: Product) -> List[Ident]:
+        return [category.get_id() for category in product.get_categories()]
+
+    def __get_category_index(self) -> ReverseIndex:
+        if self.__category_index is None:
+            # Надгробия остаются в индексе, чтобы фильтры по категориям
+            # находили основанные на них расходы
+            products = self.get_products_list()
+            products += self.__tombstones.values()
+            self.__category_index = ReverseIndex.build(
+                products, self.__category_ids
+            )
+        return self.__category_index
+
+    def __get_product_index(self) -> ReverseIndex:
+        if self.__product_index is None:
+            self.__product_index = ReverseIndex.build(
+                self.expenses.values(),
+                lambda expense: [expense.get_product_id()],
+            )
+        return self.__product_index
+
+    def __get_name_index(self, kind: str) -> TrigramIndex:
+        index = self.__name_indexes.get(kind)
+        if index is None:
+            objects = self.get_products_list()
+            if kind == "category":
+                objects = self.get_categories_list()
+            index = self.__name_indexes[kind] = TrigramIndex.build(
+                objects, lambda obj: obj.get_name()
+            )
+        return index
+
+    def __index_name(self, obj: ObjectMeta):
+        index = self.__name_indexes.get(records.kind_of(obj))
+        if index is not None:
+            index.add(obj.get_id(), obj.get_name())
+
+    def __unindex_name(self, obj: ObjectMeta):
+        index = self.__name_indexes.get(records.kind_of(obj))
+        if index is not None:
+            index.remove(obj.get_id())
+
+    def __update_indexes(self, obj: ObjectMeta, field: str, old, new):
+        kind = records.kind_of(obj)
+        if field == "name":
+            self.__index_name(obj)
+
+        index = self.__category_index
+        if kind == "product" and field == "categories" and index is not None:
+            if old is not None:
+                index.remove(old.get_id(), obj.get_id())
+            if new is not None:
+                index.add(new.get_id(), obj.get_id())
+
+        index = self.__product_index
+        if kind == "expense" and field == "product" and index is not None:
+            index.remove(old.get_id(), obj.get_id())
+            index.add(new.get_id(), obj.get_id())
+
+    def __index_product(self, product: Product):
+        if self.__category_index is not None:
+            for ident in self.__category_ids(product):
+                self.__category_index.add(ident, product.get_id())
+
+    def __unindex_product(self, product: Product):
+        if self.__category_index is not None:
+            for ident in self.__category_ids(product):
+                self.__category_index.remove(ident, product.get_id())
+
+    def __index_expense(self, expense: Expense):
+        if self.__aggregates is not None:
+            self.__aggregates.add_expense(expense)
+        if self.__product_index is not None:
+            self.__product_index.add(
+                expense.get_product_id(), expense.get_id()
+            )
+
+    def __unindex_expense(self, expense: Expense):
+        if self.__aggregates is not None:
+            self.__aggregates.remove_expense(expense)
+        if self.__product_index is not None:
+            self.__product_index.remove(
+                expense.get_product_id(), expense.get_id()
+            )
+
+    @reads
+    def view(self) -> DatabaseView:
+        """
+        Представление базы данных для чтения (см. DatabaseView): состояние
+        на момент вызова, которое не изменяется при последующих изменениях
+        базы данных. Представление создается за O(1) и читается без
+        блокировки, поэтому долгое чтение (отчет, выгрузка) не задерживает
+        изменения. Представление не видит изменений незавершенной
+        транзакции другого потока.
+
+        При первом вызове по всем объектам строятся версии состояния,
+        которые далее обновляются при каждом изменении за O(log n)
+        """
+        if self.__versions is None:
+            self.__versions = Versions.build(
+                self.categories.values(),
+                self.products.values(),
+                self.expenses.values(),
+            )
+        return self.__versions.view()
+
+    @reads
+    def get_aggregates(self) -> Aggregates:
+        """
+        Получение агрегатов расходов по категориям, товарам, дням и месяцам.
+        При первом обращении агрегаты вычисляются по всем статьям расходов,
+        после чего обновляются при каждом изменении базы данных
+        """
+        if self.__aggregates is not None:
+            return self.__aggregates
 
-    def add_product(self, product: Product) -> UUID:
+        if arrays.enabled() and isinstance(self.expenses, ExpenseTable):
+            self.__aggregates = Aggregates.from_arrays(
+                self.expenses.get_arrays()
+            )
+        else:
+            self.__aggregates = Aggregates.build(self.expenses.values())
+        return self.__aggregates
+
+    @reads
+    def products_with_categories(
+        self, categories: Iterable[Category]
+    ) -> List[Product]:
+        """Товары, принадлежащие хотя бы к одной из категорий"""
+        idents = self.__get_category_index().get_any(
+            category.get_id() for category in categories
+        )
+        return [
+            self.products[ident] for ident in idents if ident in self.products
+        ]
+
+    @reads
+    def expenses_with_products(
+        self, products: Iterable[Product]
+    ) -> List[Expense]:
+        """Статьи расходов, основанные на одном из товаров"""
+        idents = self.__get_product_index().get_any(
+            product.get_id() for product in products
+        )
+        return [
+            self.expenses[ident] for ident in idents if ident in self.expenses
+        ]
+
+    @reads
+    def referenced_products(self, idents: Iterable[Ident]) -> Set[Ident]:
+        """ID товаров из idents, на которые ссылаются статьи расходов"""
+        idents = list(idents)
+        table = self.expenses
+        if self.__product_index is None and isinstance(
+            table, ColumnarExpenseTable
+        ):
+            # Ради проверки ссылок индекс по файлу колоночного формата не
+            # строится: столбец товаров читается без создания объектов
+            used = {product.get_id() for product in table.products_in_use()}
+            return {ident for ident in idents if ident in used}
+
+        index = self.__get_product_index()
+        return {ident for ident in idents if ident in index}
+
+    @reads
+    def get_tombstones(self) -> List[Product]:
+        """Надгробия: удаленные товары, на которые ссылаются расходы"""
+        return list(self.__tombstones.values())
+
+    @reads
+    def expenses_with_categories(
+        self, categories: Iterable[Category]
+    ) -> List[Expense]:
+        """Статьи расходов, принадлежащие хотя бы к одной из категорий"""
+        product_ids = self.__get_category_index().get_any(
+            category.get_id() for category in categories
+        )
+        idents = self.__get_product_index().get_any(product_ids)
+        return [
+            self.expenses[ident] for ident in idents if ident in self.expenses
+        ]
+
+    def pages(self, kind: str, size: int = PAGE_SIZE) -> Pages:
+        """
+        Постраничный обход объектов таблицы kind ("category", "product"
+        или "expense") для списков выбора (см. finacsys.database.pages).
+        Ключи таблицы запоминаются при создании обхода, а объекты читаются
+        по ним по мере запроса страниц. Объекты, удаленные до чтения их
+        страницы, пропускаются, а добавленные после создания обхода не
+        показываются
+        """
+        tables: Dict[str, Any] = {
+            "category": self.categories,
+            "product": self.products,
+            "expense": self.expenses,
+        }
+        table = tables[kind]
+        with self.lock.read():
+            idents = list(table)
+        found = map(table.get, idents)
+        return Pages(
+            (obj for obj in found if obj is not None), size, self.lock
+        )
+
+    def search(
+        self, kind: str, scope: Optional[Iterable[ObjectMeta]] = None
+    ) -> SearchSession:
+        """
+        Сессия поиска по названию объектов таблицы kind ("category",
+        "product" или "expense") для подсказок выбора (см.
+        finacsys.database.search). Если задан scope, поиск ведется только
+        среди объектов scope
+        """
+        if kind == "expense":
+            return ExpenseSearchSession(self, scope)
+        idents = None
+        if scope is not None:
+            idents = [obj.get_id() for obj in scope]
+        return SearchSession(self, kind, idents)
+
+    @reads
+    def match_names(
+        self,
+        kind: str,
+        query: str,
+        within: Optional[Iterable[Ident]] = None,
+    ) -> List[Ident]:
+        """
+        ID категорий или товаров (kind), название которых содержит запрос.
+        Если задан within, проверяются только объекты с ID из within
+        """
+        return self.__get_name_index(kind).match(query, within)
+
+    @reads
+    def prefixed_names(self, kind: str, query: str, limit: int) -> List[Ident]:
+        """
+        ID не более limit категорий или товаров (kind), название которых
+        начинается с запроса, в порядке ранжирования (см. rank_names)
+        """
+        return self.__get_name_index(kind).prefixed(query, limit)
+
+    @reads
+    def rank_names(
+        self,
+        kind: str,
+        idents: List[Ident],
+        query: str,
+        limit: Optional[int] = None,
+    ) -> List[Ident]:
+        """
+        Упорядочивание найденных по запросу категорий или товаров (kind) по
+        близости названия к запросу. Если задан limit, возвращаются только
+        limit лучших
+        """
+        return self.__get_name_index(kind).rank(idents, query, limit)
+
+    @writes
+    def add_product(self, product: Product) -> Ident:
         """Добавление товара в базу данных"""
         self.products[product.get_id()] = product
+        self.__tombstones.pop(product.get_id(), None)
+        self.__index_product(product)
+        self.__index_name(product)
+        if self.__versions is not None:
+            self.__versions.restore_product(product)
+        product.add_listener(self.__on_change)
+        self.__on_undo(lambda: self.delete_product(product))
+        self.__log(records.product_to_record(product))
         return product.get_id()
 
-    def add_category(self, category: Category) -> UUID:
+    @writes
+    def add_category(self, category: Category) -> Ident:
         """Добавление категории в базу данных"""
         self.categories[category.get_id()] = category
+        self.__index_name(category)
+        if self.__versions is not None:
+            self.__versions.put_category(category)
+        category.add_listener(self.__on_change)
+        self.__on_undo(lambda: self.delete_category(category))
+        self.__log(records.category_to_record(category))
         return category.get_id()
 
-    def add_expense(self, product_item: Expense) -> UUID:
+    @writes
+    def add_expense(self, product_item: Expense) -> Ident:
         """Добавление статьи расхода в базу данных"""
         self.expenses[product_item.get_id()] = product_item
+        self.__index_expense(product_item)
+        if self.__versions is not None:
+            self.__versions.put_expense(product_item)
+        product_item.add_listener(self.__on_change)
+        self.__on_undo(lambda: self.delete_expense(product_item))
+        self.__log(records.expense_to_record(product_item))
         return product_item.get_id()
 
+    @writes
+    def add_expenses(self, expenses: List[Expense]):
+        """
+        Добавление пачки статей расходов. Записи попадают в журнал одной
+        группой, а необходимость снимка проверяется один раз после пачки
+        """
+        for expense in expenses:
+            self.expenses[expense.get_id()] = expense
+            self.__index_expense(expense)
+            expense.add_listener(self.__on_change)
+
+        if self.__versions is not None:
+            self.__versions.put_expenses(expenses)
+        self.__on_undo(lambda: self.__remove_expenses(expenses))
+        self.__log_all(
+            [records.expense_to_record(expense) for expense in expenses]
+        )
+
+    def __remove_expenses(self, expenses: List[Expense]):
+        for expense in reversed(expenses):
+            self.delete_expense(expense)
+
+    @writes
+    def set_policy(self, relation: Relation, policy: DeletePolicy):
+        """
+        Задание политики удаления для связи. Выбрасывает ValueError, если
+        политика для связи недопустима (см. finacsys.database.integrity)
+        """
+        check_policy(relation, policy)
+        self.policies[relation] = policy
+
+    @writes
+    def delete(
+        self,
+        categories: Iterable[Category] = (),
+        products: Iterable[Product] = (),
+        policies: Optional[Policies] = None,
+    ) -> DeletePlan:
+        """
+        Удаление категорий и товаров вместе с зависимыми объектами по
+        политикам базы данных, замененным политиками policies. Затронутые
+        объекты находятся за один проход по индексам (см. plan_delete), а
+        план выполняется одной транзакцией: пачкой удаляются статьи
+        расходов, из товаров убираются категории, затем удаляются товары и
+        категории. Выбрасывает IntegrityError, если удаление запрещено
+        политикой RESTRICT, — база данных при этом не изменяется.
+        Возвращает выполненный план
+        """
+        plan = plan_delete(
+            self,
+            categories,
+            products,
+            merge_policies(self.policies, policies),
+        )
+        tombstones = {product.get_id() for product in plan.tombstones}
+        unreferenced = [
+            product.get_id()
+            for product in plan.products
+            if product.get_id() not in tombstones
+        ]
+        with self.transaction():
+            if plan.expenses:
+                self.delete_expenses(plan.expenses)
+            if plan.detached:
+                detached = {product for product, _ in plan.detached}
+                self.retag_products(list(detached), remove=plan.categories)
+            for product in plan.products:
+                self.__delete_product(product)
+            if unreferenced:
+                self._reclaim(unreferenced)
+            for category in plan.categories:
+                self.delete_category(category)
+        return plan
+
+    @reads
     def get_products_list(self) -> List[Product]:
         """Получение списка товаров"""
         return list(self.products.values())
 
+    @reads
     def get_categories_list(self) -> List[Category]:
         """Получение списка категорий"""
         return list(self.categories.values())
 
+    @reads
     def get_expenses_list(self) -> List[Expense]:
         """Получение списка расходов"""
         return list(self.expenses.values())
 
+    @writes
     def reset_category(self, category: Category):
         """Удалить категорию из всех товаров"""
-        for product in self.products.values():
-            product.get_categories().discard(category)
+        for product in self.products_with_categories([category]):
+            product.remove_category(category)
 
-    def reset_categories(self, categories: list[Category]):
-        """Удалить список категорий из всех товаров"""
-        for category in categories:
-            self.reset_category(category)
+    @writes
+    def reset_categories(self, categories: List[Category]):
+        """Удалить список категорий из всех товаров (см. retag_products)"""
+        products = self.products_with_categories(categories)
+        self.retag_products(products, remove=categories)
 
+    @writes
     def delete_category(self, category: Category):
         """Удалить одну категорию"""
         self.reset_category(category)
+        if self.__category_index is not None:
+            self.__category_index.pop(category.get_id())
+        if self.__versions is not None:
+            self.__versions.remove_category(category)
         self.categories.pop(category.get_id())
+        self.__unindex_name(category)
+        category.remove_listener(self.__on_change)
+        self.__on_undo(lambda: self.add_category(category))
+        self.__log(records.delete_to_record(category))
+
+    @writes
+    def delete_categories(
+        self,
+        categories: List[Category],
+        policy: Optional[DeletePolicy] = None,
+    ) -> DeletePlan:
+        """
+        Удалить список категорий. Товары категорий обрабатываются по
+        политике policy, по умолчанию — по политике базы данных (см. delete)
+        """
+        policies = None
+        if policy is not None:
+            policies = {Relation.PRODUCT_CATEGORY: policy}
+        return self.delete(categories=categories, policies=policies)
+
+    @writes
+    def delete_product(self, product: Product):
+        """
+        Удалить один товар. Если на товар ссылаются статьи расходов, он
+        остается надгробием до удаления последней из них
+        """
+        ident = product.get_id()
+        referenced = self.referenced_products([ident])
+        self.__delete_product(product)
+        if ident not in referenced:
+            self._reclaim([ident])
+
+    @writes
+    def delete_products(
+        self,
+        products: List[Product],
+        policy: Optional[DeletePolicy] = None,
+    ) -> DeletePlan:
+        """
+        Удалить список товаров. Статьи расходов товаров обрабатываются по
+        политике policy, по умолчанию — по политике базы данных (см. delete)
+        """
+        policies = None
+        if policy is not None:
+            policies = {Relation.EXPENSE_PRODUCT: policy}
+        return self.delete(products=products, policies=policies)
+
+    def __delete_product(self, product: Product):
+        self.products.pop(product.get_id())
+        self.__unindex_name(product)
+        self._bury(product)
+        if self.__versions is not None:
+            self.__versions.retire_product(product)
+        product.remove_listener(self.__on_change)
+        self.__on_undo(lambda: self.add_product(product))
+        self.__log(records.delete_to_record(product))
+
+    def _bury(self, product: Product):
+        """Превращение удаленного товара в надгробие"""
+        self.__tombstones[product.get_id()] = product
+
+    def _unreferenced_tombstones(
+        self, idents: Optional[Iterable[Ident]] = None
+    ) -> List[Ident]:
+        """
+        ID надгробий из idents (по умолчанию — всех надгробий), на которые
+        больше не ссылаются статьи расходов
+        """
+        if idents is None:
+            candidates = list(self.__tombstones)
+        else:
+            candidates = [i for i in idents if i in self.__tombstones]
+        if not candidates:
+            return []
+
+        referenced = self.referenced_products(candidates)
+        return [ident for ident in candidates if ident not in referenced]
+
+    def _reclaim(self, idents: List[Ident]):
+        """
+        Удаление надгробий idents вместе с их строками в версиях и
+        индексе категорий. Удаление надгробия выводится из удаления ссылок
+        на него, поэтому в журнал не записывается
+        """
+        products = []
+        for ident in idents:
+            product = self.__tombstones.pop(ident, None)
+            if product is not None:
+                self.__unindex_product(product)
+                products.append(product)
+        if self.__versions is not None:
+            self.__versions.reclaim_products(idents)
+        self.__on_undo(lambda: self.__restore_tombstones(products))
+
+    def __restore_tombstones(self, products: List[Product]):
+        for product in products:
+            self._bury(product)
+            self.__index_product(product)
+
+    def __collect(self, products: Iterable[Product]):
+        # Надгробие удаляется вместе с последней ссылающейся на него
+        # статьей расхода
+        unreferenced = self._unreferenced_tombstones(
+            {product.get_id() for product in products}
+        )
+        if unreferenced:
+            self._reclaim(unreferenced)
+
+    @writes
+    def collect_garbage(self) -> int:
+        """
+        Удаление всех надгробий, на которые больше не ссылаются статьи
+        расходов. Обычно надгробие удаляется вместе с последней ссылкой на
+        него, а сборка находит надгробия, оставшиеся от прежних версий
+        приложения (в журнале или файле SQLite). Возвращает число
+        удаленных надгробий
+        """
+        unreferenced = self._unreferenced_tombstones()
+        if unreferenced:
+            self._reclaim(unreferenced)
+        return len(unreferenced)
+
+    @writes
+    def delete_expense(self, expense: Expense):
+        """Удалить одну статью расхода"""
+        self.expenses.pop(expense.get_id())
+        self.__unindex_expense(expense)
+        if self.__versions is not None:
+            self.__versions.remove_expense(expense)
+        expense.remove_listener(self.__on_change)
+        self.__on_undo(lambda: self.add_expense(expense))
+        self.__log(records.delete_to_record(expense))
+        self.__collect([expense.get_product()])
+
+    @writes
+    def delete_expenses(self, expenses: List[Expense]):
+        """
+        Удаление пачки статей расходов. Записи попадают в журнал одной
+        группой, а надгробия товаров, на которые больше нет ссылок,
+        удаляются одной проверкой на всю пачку
+        """
+        for expense in expenses:
+            self.expenses.pop(expense.get_id())
+            self.__unindex_expense(expense)
+            expense.remove_listener(self.__on_change)
+
+        if self.__versions is not None:
+            self.__versions.remove_expenses(expenses)
+        self.__on_undo(lambda: self.add_expenses(expenses))
+        self.__log(records.delete_expenses_to_record(expenses))
+        self.__collect(expense.get_product() for expense in expenses)
+
+    @writes
+    def update_expenses(
+        self,
+        expenses: List[Expense],
+        product: Optional[Product] = None,
+        count: Any = None,
+        date: Optional[dt.date] = None,
+        time: Optional[dt.time] = None,
+        shift: Optional[dt.timedelta] = None,
+    ):
+        """
+        Изменение пачки статей расходов: замена товара, количества, даты и
+        времени и сдвиг даты и времени создания на shift (см.
+        ExpenseUpdate). Аргументы проверяются один раз до изменения
+        объектов; выбрасывается ValueError, если они недопустимы или товар
+        удален из базы данных
+        """
+        update = ExpenseUpdate(product, count, date, time, shift)
+        if product is not None and product.get_id() not in self.products:
+            raise ValueError(f"Product is not in the database: {product}")
+        if update.empty() or len(expenses) == 0:
+            return
+
+        with self.transaction():
+            self.__apply_bulk(expenses, update.apply)
+            self.__log(records.expense_update_to_record(expenses, update))
+
+    @writes
+    def update_products(
+        self,
+        products: List[Product],
+        name: Optional[str] = None,
+        price: Any = None,
+    ):
+        """
+        Изменение названия и цены пачки товаров (см. ProductUpdate).
+        Выбрасывает ValueError, если аргументы недопустимы
+        """
+        update = ProductUpdate(name, price)
+        if update.empty() or len(products) == 0:
+            return
+
+        with self.transaction():
+            self.__apply_bulk(products, update.apply)
+            self.__log(records.product_update_to_record(products, update))
+
+    @writes
+    def retag_products(
+        self,
+        products: List[Product],
+        add: Iterable[Category] = (),
+        remove: Iterable[Category] = (),
+    ):
+        """
+        Добавление категорий add и удаление категорий remove у пачки
+        товаров (см. Retag). Выбрасывает ValueError, если категория есть и
+        в add, и в remove или добавляемая категория отсутствует в базе
+        данных. Удаленные из базы данных категории уже убраны из всех
+        товаров, поэтому в remove пропускаются
+        """
+        remove = [c for c in remove if c.get_id() in self.categories]
+        retag = Retag(add, remove)
+        for category in retag.add:
+            if category.get_id() not in self.categories:
+                raise ValueError(
+                    f"Category is not in the database: {category}"
+                )
+        if retag.empty() or len(products) == 0:
+            return
+
+        with self.transaction():
+            self.__apply_bulk(products, retag.apply)
+            self.__log(records.retag_to_record(products, retag))
+
+    @writes
+    def delete_many(
+        self,
+        objects: Iterable[ObjectMeta],
+        policies: Optional[Policies] = None,
+    ) -> DeletePlan:
+        """
+        Удаление объектов разных таблиц одной транзакцией. Сначала пачкой
+        удаляются статьи расходов, затем категории и товары по политикам
+        (см. delete), поэтому товар можно удалить вместе с его статьями
+        расходов и при политике RESTRICT. Возвращает выполненный план
+        """
+        groups: Dict[str, List[Any]] = {
+            "category": [],
+            "product": [],
+            "expense": [],
+        }
+        for obj in objects:
+            groups[records.kind_of(obj)].append(obj)
+
+        with self.transaction():
+            if groups["expense"]:
+                self.delete_expenses(groups["expense"])
+            plan = self.delete(groups["category"], groups["product"], policies)
+
+        plan.expenses = groups["expense"] + plan.expenses
+        return plan
+
+    def __apply_bulk(
+        self, objects: List[Any], apply: Callable[[Any], None]
+    ) -> List[Change]:
+        # Во время применения слушатель базы данных только накапливает
+        # изменения, а индексы, агрегаты и версии обновляются после него
+        # один раз на пачку. Если применение прервано, обновляются по уже
+        # выполненным изменениям, которые затем отменит транзакция
+        expenses = [obj for obj in objects if isinstance(obj, Expense)]
+        before = []
+        if self.__aggregates is not None:
+            before = [expense_group(expense) for expense in expenses]
+
+        changes: List[Change] = []
+        self.__on_undo(lambda: revert_changes(changes))
+        self.__changes = changes
+        try:
+            with self.__batch_tables():
+                for obj in objects:
+                    apply(obj)
+        finally:
+            self.__changes = None
+            self.__apply_changes(changes, expenses, before)
+        return changes
+
+    def __batch_tables(self) -> ContextManager[None]:
+        if isinstance(self.expenses, ExpenseTable):
+            return self.expenses.batch()
+        return nullcontext()
+
+    def __apply_changes(
+        self, changes: List[Change], expenses: List[Expense], before: List
+    ):
+        for obj, field, old, new in changes:
+            self.__update_indexes(obj, field, old, new)
+
+        if self.__aggregates is not None:
+            if expenses:
+                after = [expense_group(expense) for expense in expenses]
+                self.__aggregates.move_expenses(before, after)
+            for obj, field, old, new in changes:
+                if not isinstance(obj, Expense):
+                    self.__aggregates.on_change(obj, field, old, new)
 
-    def delete_categories(self, categories: list[Category]):
-        """Удалить список категорий"""
-        for category in categories:
-            self.delete_category(category)
+        if self.__versions is not None and changes:
+            self.__versions.on_changes(changes)
+        self.__collect(
+            old for _, field, old, _ in changes if field == "product"
+        )
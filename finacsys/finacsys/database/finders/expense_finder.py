@@ -1,77 +1,90 @@
 """Модуль, содержащий класс для поиска и фильтрации расходов"""
-from typing import List
+from typing import List, Optional
 import datetime as dt
 
-from finacsys.models import Category
+from finacsys.models import Category, Expense
+from finacsys.money import Money
 from finacsys.filters import (
     FilterKind,
-    make_date_cmp,
-    make_time_cmp,
     TimeFilter,
     DateFilter,
 )
 from finacsys.database import Database
+from finacsys.database.queries import ExpenseQuery
 
 
 class ExpenseFinder:
     """
     Класс предоставляет поиск и фильтрацию списка расходов по категориям,
-    дате и времени
+    дате и времени. Запрос выполняется под блокировкой базы данных на
+    чтение, поэтому поиск можно выполнять параллельно с изменениями
     """
 
     def __init__(self, database: Database):
         self.database = database
-        self.filtered_expenses = self.database.get_expenses_list()
+        self.reset()
+
+    @property
+    def filtered_expenses(self) -> List[Expense]:
+        """Отфильтрованный список расходов"""
+        with self.database.lock.read():
+            return self.__query.fetch()
+
+    @filtered_expenses.setter
+    def filtered_expenses(self, expenses: List[Expense]):
+        self.__query = ExpenseQuery(expenses)
 
     def only_included_categories(self, categories: List[Category]):
         """
         Удаляет из поиска те статьи расхода, которые не принадлежат к хотя бы
         одной категории из переданного списка категорий
         """
-        result = []
-
-        for expense in self.filtered_expenses:
-            is_contains_category = False
-            for category in expense.get_categories():
-                is_contains_category = category in categories
-                if is_contains_category:
-                    break
-            if is_contains_category:
-                result.append(expense)
-
-        self.filtered_expenses = result
+        self.__query.only_included_categories(categories)
 
     def exclude_categories(self, categories: List[Category]):
         """
         Удаляет из поиска те статьи расхода, которые принадлежат к хотя бы
         одной категории из переданного списка категорий
         """
-        result = []
-
-        for expense in self.filtered_expenses:
-            is_contains_category = False
-            for category in expense.get_categories():
-                is_contains_category = category in categories
-                if is_contains_category:
-                    break
-            if not is_contains_category:
-                result.append(expense)
-
-        self.filtered_expenses = result
+        self.__query.exclude_categories(categories)
 
     def set_date_filter(self, filter_type: DateFilter, date: dt.date):
         """Отфильтровать список по дате. См. DateFilter"""
-        cmp = make_date_cmp(filter_type, date)
-        self.filtered_expenses = list(filter(cmp, self.filtered_expenses))
+        self.__query.set_date_filter(filter_type, date)
 
     def set_time_filter(self, filter_type: TimeFilter, time: dt.time):
         """Отфильтровать список по времени. См. TimeFilter"""
-        cmp = make_time_cmp(filter_type, time)
-        self.filtered_expenses = list(filter(cmp, self.filtered_expenses))
+        self.__query.set_time_filter(filter_type, time)
+
+    def set_datetime_range(
+        self, start: Optional[dt.datetime], end: Optional[dt.datetime]
+    ):
+        """
+        Оставить статьи расхода, дата и время которых лежат в полуинтервале
+        [start, end). None означает отсутствие границы
+        """
+        self.__query.set_datetime_range(start, end)
+
+    def total_price(self) -> Money:
+        """Суммарная стоимость отфильтрованных расходов"""
+        with self.database.lock.read():
+            return self.__query.total_price()
+
+    def explain(self) -> str:
+        """
+        Описание плана поиска расходов: порядок применения фильтров и число
+        просмотренных строк
+        """
+        with self.database.lock.read():
+            return self.__query.explain()
 
     def get_avaliable_filters(self) -> List[FilterKind]:
         """Получение списка доступных фильтров"""
-        result = [FilterKind.FILTER_BY_DATE, FilterKind.FILTER_BY_TIME]
+        result = [
+            FilterKind.FILTER_BY_DATE,
+            FilterKind.FILTER_BY_TIME,
+            FilterKind.FILTER_BY_DATETIME_RANGE,
+        ]
 
         if len(self.database.categories) > 0:
             result.append(FilterKind.FILTER_BY_CATEGORY)
@@ -83,13 +96,19 @@ class ExpenseFinder:
 
     def empty(self) -> bool:
         """Проверка отфильтрованного списка расходов на пустоту"""
-        return len(self.filtered_expenses) == 0
+        with self.database.lock.read():
+            return self.__query.empty()
 
-    def release_expenses(self):
+    def release_expenses(self) -> List[Expense]:
         """
         Возвращает отфильтрованный список, после чего удерживаемый список
         синхронизируется с данными БД
         """
         expenses = self.filtered_expenses
-        self.filtered_expenses = self.database.get_expenses_list()
+        self.reset()
         return expenses
+
+    def reset(self):
+        """Сброс фильтров и синхронизация с данными БД"""
+        with self.database.lock.read():
+            self.__query = self.database.expenses.query()
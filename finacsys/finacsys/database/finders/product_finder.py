@@ -1,53 +1,54 @@
 """Модуль, содержащий класс для поиска и фильтрации товаров"""
 from typing import List
 
-from finacsys.models import Category
+from finacsys.models import Category, Product
 from finacsys.filters import FilterKind
 from finacsys.database import Database
+from finacsys.database.queries import ProductQuery
 
 
 class ProductFinder:
-    """Класс для поиска и фильтрации товаров по категориям"""
+    """
+    Класс для поиска и фильтрации товаров по категориям. Запрос
+    выполняется под блокировкой базы данных на чтение, поэтому поиск можно
+    выполнять параллельно с изменениями
+    """
 
     def __init__(self, database: Database):
         self.database = database
-        self.filtered_products = self.database.get_products_list()
+        self.__query = self.database.products.query()
+
+    @property
+    def filtered_products(self) -> List[Product]:
+        """Отфильтрованный список товаров"""
+        with self.database.lock.read():
+            return self.__query.fetch()
+
+    @filtered_products.setter
+    def filtered_products(self, products: List[Product]):
+        self.__query = ProductQuery(products)
 
     def only_included_categories(self, categories: List[Category]):
         """
         Удаляет из поиска те товары, которые не принадлежат хотя бы к одной
         категории из переданного списка категорий
         """
-        result = []
-
-        for product in self.filtered_products:
-            is_contains_category = False
-            for category in product.get_categories():
-                is_contains_category = category in categories
-                if is_contains_category:
-                    break
-            if is_contains_category:
-                result.append(product)
-
-        self.filtered_products = result
+        self.__query.only_included_categories(categories)
 
     def exclude_categories(self, categories: List[Category]):
         """
         Удаляет из поиска те товары, которые принадлежат к хотя бы одной
         категории из переданного списка категорий
         """
-        result = []
-
-        for product in self.filtered_products:
-            is_contains_category = False
-            for category in product.get_categories():
-                is_contains_category = category in categories
-                if is_contains_category:
-                    break
-            if not is_contains_category:
-                result.append(product)
+        self.__query.exclude_categories(categories)
 
-        self.filtered_products = result
+    def explain(self) -> str:
+        """
+        Описание плана поиска товаров: порядок применения фильтров и число
+        просмотренных строк
+        """
+        with self.database.lock.read():
+            return self.__query.explain()
 
     def get_avaliable_filters(self):
         """Получение списка доступных фильтров"""
@@ -64,13 +65,18 @@ class ProductFinder:
 
     def empty(self) -> bool:
         """Проверка отфильтрованного списка товаров на пустоту"""
-        return len(self.filtered_products) == 0
+        with self.database.lock.read():
+            return self.__query.empty()
 
-    def release_products(self):
+    def release_products(self) -> List[Product]:
         """
         Возвращает отфильтрованный список, после чего удерживаемый список
         синхронизируется с данными БД
         """
         products = self.filtered_products
-        self.filtered_products = self.database.get_products_list()
+        self.reset()
         return products
+
+    def reset(self):
+        """Сброс фильтров и синхронизация с данными БД"""
+        self.__query = self.database.products.query()
@@ -0,0 +1,134 @@
+"""
+Модуль, содержащий индексы базы данных. Обратный индекс хранит для каждого
+ключа (ID категории или товара) множество ID объектов, которые на него
+ссылаются, что позволяет находить эти объекты без просмотра всей таблицы.
+Упорядоченный индекс хранит ID объектов, отсортированные по значению поля,
+и находит объекты из диапазона значений двоичным поиском
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from finacsys.models import Ident, ObjectMeta
+
+
+class ReverseIndex:
+    """
+    Обратный индекс: ID ключа -> ID ссылающихся на него объектов. Объекты
+    хранятся в порядке добавления в индекс
+    """
+
+    def __init__(self):
+        self.__entries: Dict[Ident, Dict[Ident, None]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[ObjectMeta],
+        keys_of: Callable[[ObjectMeta], Iterable[Ident]],
+    ) -> "ReverseIndex":
+        """
+        Построение индекса по объектам таблицы. Функция keys_of возвращает
+        ключи, на которые ссылается объект
+        """
+        index = cls()
+        for obj in objects:
+            for key in keys_of(obj):
+                index.add(key, obj.get_id())
+        return index
+
+    def add(self, key: Ident, ident: Ident):
+        """Добавление ссылки объекта ident на ключ key"""
+        self.__entries.setdefault(key, {})[ident] = None
+
+    def remove(self, key: Ident, ident: Ident):
+        """Удаление ссылки объекта ident на ключ key"""
+        entry = self.__entries.get(key)
+        if entry is None:
+            return
+
+        entry.pop(ident, None)
+        if len(entry) == 0:
+            del self.__entries[key]
+
+    def pop(self, key: Ident) -> List[Ident]:
+        """Удаление ключа из индекса. Возвращает ID ссылавшихся объектов"""
+        return list(self.__entries.pop(key, {}))
+
+    def get(self, key: Ident) -> List[Ident]:
+        """Получение ID объектов, ссылающихся на ключ"""
+        return list(self.__entries.get(key, {}))
+
+    def __contains__(self, key: object) -> bool:
+        """Проверка, ссылается ли на ключ хотя бы один объект"""
+        return key in self.__entries
+
+    def get_any(self, keys: Iterable[Ident]) -> List[Ident]:
+        """Получение ID объектов, ссылающихся хотя бы на один из ключей"""
+        result: Dict[Ident, None] = {}
+        for key in keys:
+            result.update(self.__entries.get(key, {}))
+        return list(result)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+class SortedIndex:
+    """
+    Упорядоченный индекс: значения поля, отсортированные по возрастанию, и
+    соответствующие им ID объектов. Добавление и удаление выполняются за
+    O(log n) сравнений, поиск диапазона возвращает непрерывный срез
+    """
+
+    def __init__(self):
+        self.__keys: List[Any] = []
+        self.__idents: List[Ident] = []
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[ObjectMeta],
+        key_of: Callable[[ObjectMeta], Any],
+    ) -> "SortedIndex":
+        """Построение индекса по объектам таблицы"""
+        pairs = sorted(
+            ((key_of(obj), obj.get_id()) for obj in objects),
+            key=lambda pair: pair[0],
+        )
+
+        index = cls()
+        index.__keys = [key for key, _ in pairs]
+        index.__idents = [ident for _, ident in pairs]
+        return index
+
+    def add(self, key: Any, ident: Ident):
+        """Добавление объекта ident со значением key"""
+        position = bisect_right(self.__keys, key)
+        self.__keys.insert(position, key)
+        self.__idents.insert(position, ident)
+
+    def remove(self, key: Any, ident: Ident):
+        """Удаление объекта ident со значением key"""
+        start = bisect_left(self.__keys, key)
+        end = bisect_right(self.__keys, key, lo=start)
+        for position in range(start, end):
+            if self.__idents[position] == ident:
+                del self.__keys[position]
+                del self.__idents[position]
+                return
+
+    def range(
+        self, lower: Optional[Any] = None, upper: Optional[Any] = None
+    ) -> List[Ident]:
+        """
+        ID объектов, значение которых лежит в полуинтервале [lower, upper).
+        None означает отсутствие границы
+        """
+        start = 0 if lower is None else bisect_left(self.__keys, lower)
+        end = len(self.__keys)
+        if upper is not None:
+            end = bisect_left(self.__keys, upper, lo=start)
+        return self.__idents[start:end]
+
+    def __len__(self) -> int:
+        return len(self.__keys)
@@ -0,0 +1,198 @@
+"""
+Модуль, содержащий политики ссылочной целостности при удалении товаров и
+категорий и планировщик удаления.
+
+На товар ссылаются статьи расходов, на категорию — товары. Что делать со
+ссылающимися объектами, определяет политика связи (см. DeletePolicy):
+запретить удаление, удалить их каскадно, убрать из них ссылку или оставить
+удаленный объект надгробием, пока на него есть ссылки. Планировщик за один
+проход по обратным индексам базы данных находит все затронутые объекты
+(см. plan_delete), а база данных выполняет план одной транзакцией (см.
+Database.delete)
+"""
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from finacsys.models import Category, Expense, Ident, Product
+
+
+class DeletePolicy(Enum):
+    """Политика удаления объекта, на который ссылаются другие объекты"""
+
+    RESTRICT = "Запретить удаление, если на объект есть ссылки"
+    CASCADE = "Удалить ссылающиеся объекты"
+    DETACH = "Убрать ссылку из ссылающихся объектов"
+    TOMBSTONE = "Оставить объект, пока на него есть ссылки"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Relation(Enum):
+    """Связь между таблицами, для которой задается политика удаления"""
+
+    EXPENSE_PRODUCT = "Статьи расходов товара"
+    PRODUCT_CATEGORY = "Товары категории"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+Policies = Dict[Relation, DeletePolicy]
+
+# Статья расхода не может существовать без товара, поэтому ссылку на товар
+# нельзя убрать, а у категории нет надгробия: товар без категории допустим
+POLICIES: Dict[Relation, Tuple[DeletePolicy, ...]] = {
+    Relation.EXPENSE_PRODUCT: (
+        DeletePolicy.RESTRICT,
+        DeletePolicy.CASCADE,
+        DeletePolicy.TOMBSTONE,
+    ),
+    Relation.PRODUCT_CATEGORY: (
+        DeletePolicy.RESTRICT,
+        DeletePolicy.CASCADE,
+        DeletePolicy.DETACH,
+    ),
+}
+
+DEFAULT_POLICIES: Policies = {
+    Relation.EXPENSE_PRODUCT: DeletePolicy.TOMBSTONE,
+    Relation.PRODUCT_CATEGORY: DeletePolicy.DETACH,
+}
+
+
+class IntegrityError(Exception):
+    """
+    Удаление запрещено политикой RESTRICT: на удаляемые объекты ссылаются
+    объекты references
+    """
+
+    def __init__(self, relation: Relation, references: List):
+        super().__init__(
+            f"Cannot delete: {len(references)} objects still reference it "
+            f"({relation.name.lower()})"
+        )
+        self.relation = relation
+        self.references = references
+
+
+def check_policy(relation: Relation, policy: DeletePolicy):
+    """Проверка, допустима ли политика для связи. Выбрасывает ValueError"""
+    if policy not in POLICIES[relation]:
+        raise ValueError(
+            f"Policy {policy.name.lower()} is not supported "
+            f"for {relation.name.lower()}"
+        )
+
+
+class DeletePlan:
+    """
+    План удаления: удаляемые категории, товары и статьи расходов, пары
+    (товар, категория), из которых убирается ссылка, и товары, которые
+    останутся надгробиями
+    """
+
+    def __init__(self):
+        self.categories: List[Category] = []
+        self.products: List[Product] = []
+        self.expenses: List[Expense] = []
+        self.detached: List[Tuple[Product, Category]] = []
+        self.tombstones: List[Product] = []
+
+    def __len__(self) -> int:
+        return len(self.categories) + len(self.products) + len(self.expenses)
+
+    def __str__(self) -> str:
+        return (
+            f"категорий: {len(self.categories)}, "
+            f"товаров: {len(self.products)}, "
+            f"статей расходов: {len(self.expenses)}"
+        )
+
+
+def plan_delete(
+    database,
+    categories: Iterable[Category],
+    products: Iterable[Product],
+    policies: Policies,
+) -> DeletePlan:
+    """
+    Составление плана удаления категорий и товаров по политикам policies.
+    Товары удаляемых категорий и статьи расходов удаляемых товаров
+    находятся по одному запросу к обратным индексам базы данных на всю
+    пачку. Выбрасывает IntegrityError, если удаление запрещено
+    """
+    plan = DeletePlan()
+    plan.categories = list(categories)
+    deleted: Dict[Ident, Product] = {
+        product.get_id(): product for product in products
+    }
+
+    if plan.categories:
+        plan_categories(database, plan, deleted, policies)
+    plan.products = list(deleted.values())
+    if plan.products:
+        plan_products(database, plan, policies)
+    return plan
+
+
+def plan_categories(
+    database,
+    plan: DeletePlan,
+    deleted: Dict[Ident, Product],
+    policies: Policies,
+):
+    """Учет товаров, принадлежащих удаляемым категориям"""
+    policy = policies[Relation.PRODUCT_CATEGORY]
+    referencing = [
+        product
+        for product in database.products_with_categories(plan.categories)
+        if product.get_id() not in deleted
+    ]
+    if not referencing:
+        return
+
+    if policy == DeletePolicy.RESTRICT:
+        raise IntegrityError(Relation.PRODUCT_CATEGORY, referencing)
+    if policy == DeletePolicy.CASCADE:
+        for product in referencing:
+            deleted[product.get_id()] = product
+        return
+
+    idents = {category.get_id() for category in plan.categories}
+    plan.detached = [
+        (product, category)
+        for product in referencing
+        for category in product.get_categories()
+        if category.get_id() in idents
+    ]
+
+
+def plan_products(database, plan: DeletePlan, policies: Policies):
+    """Учет статей расходов, основанных на удаляемых товарах"""
+    policy = policies[Relation.EXPENSE_PRODUCT]
+    expenses = database.expenses_with_products(plan.products)
+    if not expenses:
+        return
+
+    if policy == DeletePolicy.RESTRICT:
+        raise IntegrityError(Relation.EXPENSE_PRODUCT, expenses)
+    if policy == DeletePolicy.CASCADE:
+        plan.expenses = expenses
+        return
+
+    referenced = {expense.get_product_id() for expense in expenses}
+    plan.tombstones = [
+        product for product in plan.products if product.get_id() in referenced
+    ]
+
+
+def merge_policies(
+    defaults: Policies, overrides: Optional[Policies]
+) -> Policies:
+    """Политики defaults, замененные политиками overrides"""
+    policies = dict(defaults)
+    for relation, policy in (overrides or {}).items():
+        check_policy(relation, policy)
+        policies[relation] = policy
+    return policies
@@ -0,0 +1,200 @@
+"""
+Модуль, содержащий журнал упреждающей записи (write-ahead log), с помощью
+которого база данных сохраняется между запусками приложения
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+Record = Dict[str, Any]
+
+JOURNAL_FILENAME = "journal.log"
+SNAPSHOT_FILENAME = "snapshot.log"
+
+
+class Journal:
+    """
+    Журнал изменений базы данных, хранящийся в директории на диске.
+
+    Каждое изменение дописывается в конец файла журнала в виде одной строки
+    JSON. Записи сбрасываются на диск группами (group commit): fsync
+    вызывается один раз на batch_size записей и не позже чем через
+    sync_interval секунд после предыдущего сброса. Если новых записей
+    нет, оставшиеся записи сбрасывает таймер в фоновом потоке, поэтому
+    запись теряется при сбое, только если она сделана меньше чем за
+    sync_interval секунд до него. Когда журнал вырастает до snapshot_threshold
+    записей, база данных записывает снимок своего состояния, после чего
+    журнал очищается (компактизация), поэтому время запуска не зависит от
+    длины истории изменений.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 512,
+        sync_interval: float = 0.05,
+        snapshot_threshold: int = 100_000,
+    ):
+        self.path = Path(path).expanduser()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.snapshot_threshold = snapshot_threshold
+
+        self.__seq = 0
+        self.__snapshot_seq = 0
+        self.__records_since_snapshot = 0
+        self.__pending = 0
+        self.__last_sync = time.monotonic()
+        self.__file = None
+        # Запись из фонового потока таймера и из потоков базы данных
+        self.__lock = threading.RLock()
+        self.__timer: Optional[threading.Timer] = None
+
+    @property
+    def seq(self) -> int:
+        """Номер последней записи журнала"""
+        return self.__seq
+
+    @property
+    def journal_path(self) -> Path:
+        """Путь к файлу журнала"""
+        return self.path / JOURNAL_FILENAME
+
+    @property
+    def snapshot_path(self) -> Path:
+        """Путь к файлу снимка"""
+        return self.path / SNAPSHOT_FILENAME
+
+    def replay(self) -> Iterator[Record]:
+        """
+        Чтение сохраненного состояния: сначала записи из снимка, затем
+        записи журнала, сделанные после снимка. Оборванная последняя строка
+        журнала (например, после аварийного завершения) игнорируется
+        """
+        self.__snapshot_seq = 0
+        for record in self.__read(self.snapshot_path):
+            if "snapshot" in record:
+                self.__snapshot_seq = record["snapshot"]
+                continue
+            yield record
+
+        self.__seq = self.__snapshot_seq
+        for record in self.__read(self.journal_path):
+            if record["seq"] <= self.__snapshot_seq:
+                continue
+            self.__seq = record["seq"]
+            self.__records_since_snapshot += 1
+            yield record
+
+    def append(self, record: Record):
+        """Добавление записи в журнал"""
+        with self.__lock:
+            if self.__file is None:
+                self.__file = open(
+                    self.journal_path, mode="a", encoding="utf-8"
+                )
+
+            self.__seq += 1
+            record["seq"] = self.__seq
+            line = json.dumps(record, separators=(",", ":"))
+            self.__file.write(line + "\n")
+
+            self.__pending += 1
+            self.__records_since_snapshot += 1
+
+            elapsed = time.monotonic() - self.__last_sync
+            if self.__pending >= self.batch_size:
+                self.commit()
+            elif elapsed >= self.sync_interval:
+                self.commit()
+            elif self.__timer is None:
+                self.__schedule(self.sync_interval - elapsed)
+
+    def __schedule(self, delay: float):
+        """Запуск таймера, сбрасывающего записи через delay секунд"""
+        self.__timer = threading.Timer(delay, self.commit)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def commit(self):
+        """Сброс накопленных записей на диск"""
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+            if self.__file is not None and self.__pending > 0:
+                self.__file.flush()
+                os.fsync(self.__file.fileno())
+
+            self.__pending = 0
+            self.__last_sync = time.monotonic()
+
+    def needs_snapshot(self) -> bool:
+        """Проверка, не пора ли записать снимок и сжать журнал"""
+        return self.__records_since_snapshot >= self.snapshot_threshold
+
+    def write_snapshot(self, records: Iterable[Record]):
+        """
+        Запись снимка состояния базы данных и очистка журнала. Снимок
+        записывается во временный файл и атомарно подменяет предыдущий,
+        поэтому при сбое на любом шаге состояние восстанавливается
+        """
+        with self.__lock:
+            self.commit()
+
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, mode="w", encoding="utf-8") as file:
+                file.write(json.dumps({"snapshot": self.__seq}) + "\n")
+                for record in records:
+                    line = json.dumps(record, separators=(",", ":"))
+                    file.write(line + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            if self.__file is not None:
+                self.__file.close()
+            self.__file = open(self.journal_path, mode="w", encoding="utf-8")
+            os.fsync(self.__file.fileno())
+
+            self.__snapshot_seq = self.__seq
+            self.__records_since_snapshot = 0
+
+    def close(self):
+        """Сброс оставшихся записей на диск и закрытие журнала"""
+        with self.__lock:
+            self.commit()
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    @staticmethod
+    def __read(path: Path) -> Iterator[Record]:
+        """
+        Чтение записей из файла. Если файл оканчивается оборванной строкой,
+        она отрезается, чтобы новые записи не склеились с ней
+        """
+        if not path.exists():
+            return
+
+        valid_size = 0
+        with open(path, mode="rb") as file:
+            for line in file:
+                try:
+                    record: Optional[Record] = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_size += len(line)
+                if record is not None:
+                    yield record
+
+        if path.stat().st_size != valid_size:
+            os.truncate(path, valid_size)
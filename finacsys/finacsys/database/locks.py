@@ -0,0 +1,123 @@
+"""
+Модуль, содержащий блокировку читателей и писателя для базы данных.
+Чтения выполняются параллельно, изменения — монопольно
+"""
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+Method = TypeVar("Method", bound=Callable[..., Any])
+
+
+class ReadWriteLock:
+    """
+    Блокировка читателей и писателя. Ожидающий писатель не пропускает новых
+    читателей, поэтому поток изменений не голодает при постоянном чтении.
+
+    Блокировка повторно входима: поток, удерживающий запись, может снова
+    брать запись и чтение, а поток, удерживающий чтение, — снова брать
+    чтение. Повышение чтения до записи запрещено: два потока, повышающих
+    чтение одновременно, заблокировали бы друг друга
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__waiting_writers = 0
+        self.__writer: Optional[int] = None
+        self.__writes = 0
+        # Число захватов чтения текущим потоком
+        self.__local = threading.local()
+
+    def __held_reads(self) -> int:
+        return getattr(self.__local, "reads", 0)
+
+    def acquire_read(self):
+        """Захват блокировки на чтение"""
+        held = self.__held_reads()
+        with self.__condition:
+            if self.__writer != threading.get_ident() and held == 0:
+                while self.__writer is not None or self.__waiting_writers:
+                    self.__condition.wait()
+            self.__readers += 1
+        self.__local.reads = held + 1
+
+    def release_read(self):
+        """Освобождение блокировки на чтение"""
+        self.__local.reads = self.__held_reads() - 1
+        with self.__condition:
+            self.__readers -= 1
+            if self.__readers == 0:
+                self.__condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Захват блокировки на запись. Выбрасывает RuntimeError, если поток
+        удерживает блокировку только на чтение
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer == me:
+                self.__writes += 1
+                return
+            if self.__held_reads() > 0:
+                raise RuntimeError("Cannot upgrade a read lock to write")
+
+            self.__waiting_writers += 1
+            try:
+                while self.__writer is not None or self.__readers > 0:
+                    self.__condition.wait()
+            finally:
+                self.__waiting_writers -= 1
+
+            self.__writer = me
+            self.__writes = 1
+
+    def release_write(self):
+        """Освобождение блокировки на запись"""
+        with self.__condition:
+            self.__writes -= 1
+            if self.__writes == 0:
+                self.__writer = None
+                self.__condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Блокировка на чтение на время блока with"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Блокировка на запись на время блока with"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def reads(method: Method) -> Method:
+    """Выполнение метода под блокировкой self.lock на чтение"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def writes(method: Method) -> Method:
+    """Выполнение метода под блокировкой self.lock на запись"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,78 @@
+"""
+Модуль, содержащий постраничный обход объектов для списков выбора. Список
+выбора по всей таблице не строится заранее: объекты читаются страницами по
+мере прокрутки, поэтому открытие списка по таблице из миллиона строк не
+требует создания миллиона вариантов выбора. Для таблиц в памяти заранее
+запоминаются только ключи, а таблицы SQLite читаются запросом на страницу
+"""
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+PAGE_SIZE = 100
+
+
+class Pages:
+    """
+    Постраничный обход объектов objects. Если задана блокировка lock
+    (ReadWriteLock базы данных), каждая страница читается под блокировкой
+    на чтение. Между страницами таблица может изменяться, поэтому обход
+    objects не должен зависеть от ее изменений: Database.pages обходит
+    снимок ключей таблицы, а SqliteDatabase.pages читает каждую страницу
+    отдельным запросом
+    """
+
+    def __init__(
+        self,
+        objects: Iterable[Any],
+        size: int = PAGE_SIZE,
+        lock: Optional[Any] = None,
+    ):
+        self.size = size
+        self.__lock = lock
+        self.__objects: Optional[Iterator[Any]] = iter(objects)
+        self.__first: Optional[List[Any]] = self.__read()
+        self.__empty = len(self.__first) == 0
+
+    @classmethod
+    def of(cls, choices: Any) -> "Pages":
+        """Обход списка choices, если это еще не обход страницами"""
+        if isinstance(choices, Pages):
+            return choices
+        return cls(choices)
+
+    def __read(self) -> List[Any]:
+        if self.__objects is None:
+            return []
+
+        if self.__lock is None:
+            page = list(islice(self.__objects, self.size))
+        else:
+            with self.__lock.read():
+                page = list(islice(self.__objects, self.size))
+        if len(page) < self.size:
+            self.__objects = None
+        return page
+
+    def next(self) -> List[Any]:
+        """Следующая страница объектов. Пустая, если объекты закончились"""
+        if self.__first is not None:
+            page, self.__first = self.__first, None
+            return page
+        return self.__read()
+
+    def rest(self) -> List[Any]:
+        """Все еще не прочитанные объекты"""
+        objects = []
+        page = self.next()
+        while page:
+            objects += page
+            page = self.next()
+        return objects
+
+    def exhausted(self) -> bool:
+        """Проверка, что все страницы уже прочитаны"""
+        return self.__first is None and self.__objects is None
+
+    def __bool__(self) -> bool:
+        """Проверка, что есть хотя бы один объект"""
+        return not self.__empty
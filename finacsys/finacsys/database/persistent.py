@@ -0,0 +1,324 @@
+"""
+Модуль, содержащий персистентное (неизменяемое) отображение на основе
+префиксного дерева хешей (HAMT). Изменение отображения возвращает новое
+отображение, которое разделяет с исходным все узлы дерева, кроме узлов на
+пути к измененному ключу. Поэтому копия отображения бесплатна, а изменение
+выполняется за O(log32 n) и копирует не больше нескольких узлов по 32
+элемента
+"""
+from collections.abc import Mapping
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Каждый уровень дерева разбирает BITS бит хеша ключа
+BITS = 5
+MASK = (1 << BITS) - 1
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+Entry = Any
+
+
+def hash_of(key: Any) -> int:
+    """Неотрицательный хеш ключа, разбираемый деревом"""
+    return hash(key) & HASH_MASK
+
+
+def _popcount_fallback(value: int) -> int:
+    """Число единичных бит для Python без int.bit_count (до 3.10)"""
+    return bin(value).count("1")
+
+
+# Число единичных бит
+popcount: Callable[[int], int] = (
+    getattr(int, "bit_count", None) or _popcount_fallback
+)
+
+
+class BitmapNode:
+    """
+    Узел дерева. Бит i маски bitmap установлен, если в узле есть элемент,
+    очередные BITS бит хеша которого равны i. Элементы хранятся плотно, в
+    порядке номеров бит: пара (ключ, значение) или дочерний узел.
+
+    Узел, созданный массовым изменением (см. PersistentMap.update и
+    PersistentMap.discard), помнит его метку owner и изменяется им на
+    месте, так как еще не виден никому, кроме этого изменения
+    """
+
+    __slots__ = ("bitmap", "entries", "owner")
+
+    def __init__(self, bitmap: int, entries: List[Entry], owner: Any):
+        self.bitmap = bitmap
+        self.entries = entries
+        self.owner = owner
+
+    def find(self, shift: int, hashed: int, key: Any, default: Any) -> Any:
+        """Поиск значения ключа"""
+        bit = 1 << ((hashed >> shift) & MASK)
+        if not self.bitmap & bit:
+            return default
+
+        entry = self.entries[popcount(self.bitmap & (bit - 1))]
+        if isinstance(entry, tuple):
+            return entry[1] if entry[0] == key else default
+        return entry.find(shift + BITS, hashed, key, default)
+
+    def __editable(self, owner: Any) -> "BitmapNode":
+        if owner is not None and self.owner is owner:
+            return self
+        return BitmapNode(self.bitmap, list(self.entries), owner)
+
+    def assoc(
+        self, shift: int, hashed: int, key: Any, value: Any, owner: Any
+    ) -> Tuple["BitmapNode", bool]:
+        """
+        Узел, в котором ключу соответствует значение. Возвращает узел и
+        признак добавления нового ключа
+        """
+        bit = 1 << ((hashed >> shift) & MASK)
+        position = popcount(self.bitmap & (bit - 1))
+
+        if not self.bitmap & bit:
+            node = self.__editable(owner)
+            node.bitmap |= bit
+            node.entries.insert(position, (key, value))
+            return node, True
+
+        entry = self.entries[position]
+        if not isinstance(entry, tuple):
+            child, added = entry.assoc(
+                shift + BITS, hashed, key, value, owner
+            )
+            if child is entry:
+                return self, added
+        elif entry[0] == key:
+            if entry[1] is value:
+                return self, False
+            child, added = (key, value), False
+        else:
+            child, added = split(
+                shift + BITS, entry, hashed, (key, value), owner
+            ), True
+
+        node = self.__editable(owner)
+        node.entries[position] = child
+        return node, added
+
+    def without(
+        self, shift: int, hashed: int, key: Any, owner: Any
+    ) -> Optional[Entry]:
+        """
+        Узел без ключа. Возвращает сам узел, если ключа нет, и None, если
+        узел стал пустым. Узел из одной пары заменяется этой парой
+        """
+        bit = 1 << ((hashed >> shift) & MASK)
+        if not self.bitmap & bit:
+            return self
+
+        position = popcount(self.bitmap & (bit - 1))
+        entry = self.entries[position]
+        if isinstance(entry, tuple):
+            if entry[0] != key:
+                return self
+            child = None
+        else:
+            child = entry.without(shift + BITS, hashed, key, owner)
+            if child is entry:
+                return self
+
+        if child is None and len(self.entries) == 1:
+            return None
+        if child is None and len(self.entries) == 2 and shift > 0:
+            remaining = self.entries[1 - position]
+            if isinstance(remaining, tuple):
+                return remaining
+
+        node = self.__editable(owner)
+        if child is None:
+            node.bitmap &= ~bit
+            del node.entries[position]
+        else:
+            node.entries[position] = child
+        return node
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Пары (ключ, значение) узла и его потомков"""
+        for entry in self.entries:
+            if isinstance(entry, tuple):
+                yield entry
+            else:
+                yield from entry.items()
+
+
+class CollisionNode:
+    """Узел из пар, хеши ключей которых полностью совпадают"""
+
+    __slots__ = ("hashed", "pairs")
+
+    def __init__(self, hashed: int, pairs: List[Tuple[Any, Any]]):
+        self.hashed = hashed
+        self.pairs = pairs
+
+    def find(self, shift: int, hashed: int, key: Any, default: Any) -> Any:
+        """Поиск значения ключа"""
+        for pair in self.pairs:
+            if pair[0] == key:
+                return pair[1]
+        return default
+
+    def assoc(
+        self, shift: int, hashed: int, key: Any, value: Any, owner: Any
+    ) -> Tuple[Entry, bool]:
+        """См. BitmapNode.assoc"""
+        if hashed != self.hashed:
+            bit = 1 << ((self.hashed >> shift) & MASK)
+            node = BitmapNode(bit, [self], owner)
+            return node.assoc(shift, hashed, key, value, owner)
+
+        pairs = [pair for pair in self.pairs if pair[0] != key]
+        added = len(pairs) == len(self.pairs)
+        pairs.append((key, value))
+        return CollisionNode(hashed, pairs), added
+
+    def without(
+        self, shift: int, hashed: int, key: Any, owner: Any
+    ) -> Optional[Entry]:
+        """См. BitmapNode.without"""
+        pairs = [pair for pair in self.pairs if pair[0] != key]
+        if len(pairs) == len(self.pairs):
+            return self
+        if len(pairs) == 1:
+            return pairs[0]
+        return CollisionNode(hashed, pairs)
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Пары (ключ, значение) узла"""
+        return iter(self.pairs)
+
+
+def split(
+    shift: int,
+    first: Tuple[Any, Any],
+    hashed: int,
+    second: Tuple[Any, Any],
+    owner: Any,
+) -> Entry:
+    """Узел из двух пар с разными ключами, начиная с уровня shift"""
+    first_hashed = hash_of(first[0])
+    if first_hashed == hashed:
+        return CollisionNode(hashed, [first, second])
+
+    # Новый узел никому не виден, поэтому заполняется на месте
+    edit = owner if owner is not None else object()
+    node = BitmapNode(0, [], edit)
+    node, _ = node.assoc(shift, first_hashed, first[0], first[1], edit)
+    node, _ = node.assoc(shift, hashed, second[0], second[1], edit)
+    return node
+
+
+EMPTY_NODE = BitmapNode(0, [], None)
+
+
+class PersistentMap(Mapping):
+    """
+    Неизменяемое отображение. Методы set, remove, update и discard не
+    изменяют отображение, а возвращают новое, разделяющее с исходным
+    неизмененные узлы. Порядок обхода определяется хешами ключей
+    """
+
+    __slots__ = ("__root", "__size")
+
+    def __init__(self, items: Iterable[Tuple[Any, Any]] = ()):
+        self.__root: BitmapNode = EMPTY_NODE
+        self.__size = 0
+        if items:
+            self.__root, self.__size = self.__updated(items)
+
+    @classmethod
+    def __of(cls, root: BitmapNode, size: int) -> "PersistentMap":
+        result = cls()
+        result.__root = root
+        result.__size = size
+        return result
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.__root.find(0, hash_of(key), key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = self.__root.find(0, hash_of(key), key, self)
+        return default if value is self else value
+
+    def __contains__(self, key: Any) -> bool:
+        return self.__root.find(0, hash_of(key), key, self) is not self
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __iter__(self) -> Iterator[Any]:
+        for key, _ in self.__root.items():
+            yield key
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:  # type: ignore[override]
+        """Пары (ключ, значение)"""
+        return self.__root.items()
+
+    def values(self) -> Iterator[Any]:  # type: ignore[override]
+        """Значения"""
+        for _, value in self.__root.items():
+            yield value
+
+    def set(self, key: Any, value: Any) -> "PersistentMap":
+        """Отображение, в котором ключу key соответствует значение value"""
+        root, added = self.__root.assoc(0, hash_of(key), key, value, None)
+        if root is self.__root:
+            return self
+        return self.__of(root, self.__size + added)
+
+    def remove(self, key: Any) -> "PersistentMap":
+        """Отображение без ключа key. Отсутствие ключа не является ошибкой"""
+        root = self.__root.without(0, hash_of(key), key, None)
+        if root is self.__root:
+            return self
+        return self.__of(root or EMPTY_NODE, self.__size - 1)
+
+    def discard(self, keys: Iterable[Any]) -> "PersistentMap":
+        """
+        Отображение без ключей keys. Как и в update, узлы, созданные во
+        время удаления, изменяются на месте. Отсутствие ключа не является
+        ошибкой
+        """
+        owner = object()
+        root, size = self.__root, self.__size
+        for key in keys:
+            node = root.without(0, hash_of(key), key, owner)
+            if node is not root:
+                root, size = node or EMPTY_NODE, size - 1
+        return self.__of(root, size)
+
+    def update(self, items: Iterable[Tuple[Any, Any]]) -> "PersistentMap":
+        """
+        Отображение, дополненное парами items. Узлы, созданные во время
+        обновления, изменяются на месте, поэтому массовое обновление не
+        копирует узлы при каждой паре
+        """
+        root, size = self.__updated(items)
+        return self.__of(root, size)
+
+    def __updated(
+        self, items: Iterable[Tuple[Any, Any]]
+    ) -> Tuple[BitmapNode, int]:
+        # Метка известна только этому обновлению, поэтому после него
+        # созданные узлы больше никогда не изменяются на месте
+        owner = object()
+        root, size = self.__root, self.__size
+        for key, value in items:
+            root, added = root.assoc(0, hash_of(key), key, value, owner)
+            size += added
+        return root, size
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())!r})"
+
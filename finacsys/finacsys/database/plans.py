@@ -0,0 +1,172 @@
+"""
+Модуль, содержащий ленивые планы запросов к таблицам, хранящимся в памяти.
+
+Фильтры запроса не применяются сразу, а добавляются в план в виде шагов.
+Шаг может опираться на индекс таблицы (lookup возвращает подходящие объекты
+без просмотра всей таблицы) и/или проверять каждый объект предикатом. При
+выполнении плана индексный шаг с наименьшей ожидаемой долей подходящих строк
+становится источником строк, а остальные шаги проверяются предикатами в
+порядке возрастания ожидаемой доли прошедших строк. Индексный шаг без
+предиката превращается в проверку принадлежности результату поиска. Все
+проверки выполняются за один потоковый проход
+"""
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+Predicate = Callable[[Any], bool]
+Lookup = Callable[[], List[Any]]
+
+# Ожидаемая доля строк, проходящих фильтры различных видов. Используется
+# только для упорядочивания проверок
+SELECTIVITY_EQ = 0.05
+SELECTIVITY_INCLUDE = 0.3
+SELECTIVITY_RANGE = 0.5
+SELECTIVITY_EXCLUDE = 0.7
+
+
+class Step:
+    """Шаг плана запроса"""
+
+    def __init__(
+        self,
+        description: str,
+        selectivity: float,
+        predicate: Optional[Predicate] = None,
+        lookup: Optional[Lookup] = None,
+    ):
+        """
+        Args:
+            description (str): описание шага для explain
+            selectivity (float): ожидаемая доля строк, проходящих шаг
+            predicate (Optional[Predicate]): проверка одного объекта
+            lookup (Optional[Lookup]): поиск подходящих объектов по индексу
+        """
+        if predicate is None and lookup is None:
+            raise ValueError("Step needs a predicate or a lookup")
+
+        self.description = description
+        self.selectivity = selectivity
+        self.predicate = predicate
+        self.lookup = lookup
+        self.found: Optional[int] = None
+
+    def uses_index(self) -> bool:
+        """Проверка, выполняется ли шаг по индексу"""
+        return self.lookup is not None
+
+
+def contained_in(objects: List[Any]) -> Predicate:
+    """Проверка принадлежности объекта результату индексного шага"""
+    idents: Set[Any] = {obj.get_id() for obj in objects}
+    return lambda obj: obj.get_id() in idents
+
+
+def not_contained_in(lookup: Lookup) -> Predicate:
+    """
+    Проверка отсутствия объекта в результате поиска по индексу. Поиск
+    выполняется при первой проверке
+    """
+    idents: Optional[Set[Any]] = None
+
+    def predicate(obj: Any) -> bool:
+        nonlocal idents
+        if idents is None:
+            idents = {found.get_id() for found in lookup()}
+        return obj.get_id() not in idents
+
+    return predicate
+
+
+class QueryPlan:
+    """
+    Ленивый план запроса. Выполняется при обходе, после чего в плане
+    сохраняются выбранный порядок шагов и число просмотренных строк
+    """
+
+    def __init__(self, source: Iterable[Any]):
+        """
+        Args:
+            source (Iterable[Any]): все строки таблицы (например, dict.values
+            таблицы). Просматриваются, если в плане нет индексных шагов
+        """
+        self.source = source
+        self.steps: List[Step] = []
+        self.order: List[Step] = []
+        self.driver: Optional[Step] = None
+        self.scanned = 0
+        self.returned = 0
+
+    def add(self, step: Step):
+        """Добавление шага в план"""
+        self.steps.append(step)
+
+    def __prepare(self) -> Tuple[Iterable[Any], List[Predicate]]:
+        indexed = [step for step in self.steps if step.uses_index()]
+        indexed.sort(key=lambda step: step.selectivity)
+        self.driver = indexed[0] if indexed else None
+
+        self.order = [step for step in self.steps if step is not self.driver]
+        self.order.sort(key=lambda step: step.selectivity)
+
+        predicates = []
+        for step in self.order:
+            if step.predicate is not None:
+                predicates.append(step.predicate)
+                continue
+
+            found = step.lookup()
+            step.found = len(found)
+            predicates.append(contained_in(found))
+
+        if self.driver is None:
+            return self.source, predicates
+
+        rows = self.driver.lookup()
+        self.driver.found = len(rows)
+        return rows, predicates
+
+    def __iter__(self) -> Iterator[Any]:
+        rows, predicates = self.__prepare()
+        self.scanned = 0
+        self.returned = 0
+
+        for row in rows:
+            self.scanned += 1
+            if all(predicate(row) for predicate in predicates):
+                self.returned += 1
+                yield row
+
+    def explain(self) -> str:
+        """
+        Описание выбранного плана: источник строк, порядок проверок, число
+        просмотренных и возвращенных строк. Описывает последнее выполнение
+        плана
+        """
+        if self.driver is None:
+            lines = ["Источник: полный просмотр таблицы"]
+        else:
+            lines = [
+                f"Источник: {self.driver.description} "
+                f"(по индексу, найдено строк: {self.driver.found})"
+            ]
+
+        for number, step in enumerate(self.order, start=1):
+            if step.predicate is None:
+                kind = f"по индексу, найдено строк: {step.found}"
+            else:
+                kind = f"проверка, ожидаемая доля: {step.selectivity:.2f}"
+            lines.append(f"{number}. {step.description} ({kind})")
+
+        lines.append(
+            f"Просмотрено строк: {self.scanned}, "
+            f"возвращено строк: {self.returned}"
+        )
+        return "\n".join(lines)
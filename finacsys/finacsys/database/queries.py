@@ -0,0 +1,275 @@
+"""
+Модуль, содержащий запросы к таблицам базы данных. Запрос накапливает
+фильтры и возвращает подходящие объекты. Каждая таблица создает запрос,
+подходящий для способа хранения ее данных (см. Table.query)
+"""
+import datetime as dt
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+import finacsys.config as cfg
+from finacsys.models import Category, Expense, Product, category_mask
+from finacsys.money import Money, round_total
+from finacsys.filters import (
+    DateFilter,
+    TimeFilter,
+    make_bounds,
+    make_date_cmp,
+    make_range_cmp,
+    make_time_cmp,
+)
+from finacsys.timestamps import (
+    DAY,
+    date_to_timestamp,
+    time_to_micros,
+    to_timestamp,
+)
+
+from .plans import (
+    SELECTIVITY_EQ,
+    SELECTIVITY_EXCLUDE,
+    SELECTIVITY_INCLUDE,
+    SELECTIVITY_RANGE,
+    QueryPlan,
+    Step,
+    not_contained_in,
+)
+
+# Поиск объектов, принадлежащих хотя бы к одной из категорий, по обратному
+# индексу базы данных (см. Database.products_with_categories)
+CategoryLookup = Callable[[List[Category]], List]
+
+# Поиск статей расходов, значение поля которых лежит в полуинтервале
+# [нижняя граница, верхняя граница), по упорядоченному индексу таблицы
+# (см. ExpenseTable.datetime_range)
+RangeLookup = Callable[[Optional[int], Optional[int]], List[Expense]]
+
+
+def has_any_category(obj, categories: Iterable[Category]) -> bool:
+    """Проверка, принадлежит ли объект хотя бы к одной из категорий"""
+    return obj.get_category_mask() & category_mask(categories) != 0
+
+
+def match_masks(
+    masks: Sequence[int], mask: int, include: bool = True
+) -> List[int]:
+    """
+    Номера элементов столбца масок категорий, пересекающихся с маской mask
+    (include=True) или не пересекающихся с ней (include=False)
+    """
+    if include:
+        return [row for row, value in enumerate(masks) if value & mask]
+    return [row for row, value in enumerate(masks) if not value & mask]
+
+
+def category_names(categories: Iterable[Category]) -> str:
+    """Перечисление названий категорий для описания шага запроса"""
+    return ", ".join(category.get_name() for category in categories)
+
+
+class MemoryQuery:
+    """
+    Ленивый запрос к объектам, хранящимся в памяти. Фильтры добавляются в
+    план запроса (см. QueryPlan), который выполняется за один проход только
+    при получении результата. Если передан lookup, фильтры по категориям
+    используют обратный индекс вместо проверки категорий каждого объекта
+    """
+
+    def __init__(
+        self,
+        objects: Iterable[Any],
+        lookup: Optional[CategoryLookup] = None,
+    ):
+        """
+        Args:
+            objects (Iterable[Any]): объекты таблицы. Может быть
+            представлением словаря, тогда запрос видит состояние таблицы на
+            момент выполнения
+            lookup (Optional[CategoryLookup]): поиск по обратному индексу
+            категорий
+        """
+        self.plan = QueryPlan(objects)
+        self.__lookup = lookup
+        self.__result: Optional[List[Any]] = None
+
+    def add_step(self, step: Step):
+        """Добавление шага в план запроса"""
+        self.plan.add(step)
+        self.__result = None
+
+    def only_included_categories(self, categories: List[Category]):
+        """Оставить объекты, принадлежащие хотя бы к одной из категорий"""
+        description = f"Категории: только {category_names(categories)}"
+        lookup = self.__lookup
+        mask = category_mask(categories)
+        self.add_step(
+            Step(
+                description,
+                SELECTIVITY_INCLUDE,
+                predicate=lambda obj: obj.get_category_mask() & mask != 0,
+                lookup=None if lookup is None else lambda: lookup(categories),
+            )
+        )
+
+    def exclude_categories(self, categories: List[Category]):
+        """Убрать объекты, принадлежащие хотя бы к одной из категорий"""
+        description = f"Категории: кроме {category_names(categories)}"
+        lookup = self.__lookup
+        if lookup is not None:
+            predicate = not_contained_in(lambda: lookup(categories))
+        else:
+            mask = category_mask(categories)
+
+            def predicate(obj: Any) -> bool:
+                return obj.get_category_mask() & mask == 0
+
+        self.add_step(Step(description, SELECTIVITY_EXCLUDE, predicate))
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.__result is not None:
+            return iter(self.__result)
+        return iter(self.plan)
+
+    def empty(self) -> bool:
+        """Проверка результата запроса на пустоту"""
+        if self.__result is not None:
+            return len(self.__result) == 0
+        return next(iter(self.plan), None) is None
+
+    def fetch(self) -> List[Any]:
+        """Получение результата запроса"""
+        if self.__result is None:
+            self.__result = list(self.plan)
+        return self.__result
+
+    def explain(self) -> str:
+        """
+        Описание плана запроса: источник строк, порядок проверок, число
+        просмотренных строк. Если запрос еще не выполнялся, он выполняется
+        """
+        self.fetch()
+        return self.plan.explain()
+
+
+class ProductQuery(MemoryQuery):
+    """Запрос к товарам, хранящимся в памяти"""
+
+    def __init__(
+        self,
+        products: Iterable[Product],
+        lookup: Optional[CategoryLookup] = None,
+    ):
+        super().__init__(products, lookup)
+
+
+class ExpenseQuery(MemoryQuery):
+    """
+    Запрос к статьям расходов, хранящимся в памяти. Если переданы
+    datetime_range и time_range, фильтры по дате и времени выполняются
+    двоичным поиском по упорядоченным индексам таблицы
+    """
+
+    def __init__(
+        self,
+        expenses: Iterable[Expense],
+        lookup: Optional[CategoryLookup] = None,
+        datetime_range: Optional[RangeLookup] = None,
+        time_range: Optional[RangeLookup] = None,
+    ):
+        super().__init__(expenses, lookup)
+        self.__datetime_range = datetime_range
+        self.__time_range = time_range
+
+    def __add_range(
+        self,
+        description: str,
+        selectivity: float,
+        index: Optional[RangeLookup],
+        bounds: Any,
+        predicate: Callable[[Expense], bool],
+    ):
+        lower, upper = bounds
+        self.add_step(
+            Step(
+                description,
+                selectivity,
+                predicate,
+                None if index is None else lambda: index(lower, upper),
+            )
+        )
+
+    def only_products(self, product_ids: Set[Any]):
+        """Оставить расходы, основанные на переданных товарах"""
+        self.add_step(
+            Step(
+                f"Товары: {len(product_ids)} шт.",
+                SELECTIVITY_INCLUDE,
+                lambda expense: expense.get_product_id() in product_ids,
+            )
+        )
+
+    def set_date_filter(self, filter_type: DateFilter, date: dt.date):
+        """Отфильтровать расходы по дате. См. DateFilter"""
+        start = date_to_timestamp(date)
+        self.__add_range(
+            f"Дата: {filter_type} {date.strftime(cfg.DATE_FORMAT)}",
+            selectivity_of(filter_type),
+            self.__datetime_range,
+            make_bounds(filter_type, start, start + DAY),
+            make_date_cmp(filter_type, date),
+        )
+
+    def set_time_filter(self, filter_type: TimeFilter, time: dt.time):
+        """Отфильтровать расходы по времени. См. TimeFilter"""
+        start = time_to_micros(time)
+        self.__add_range(
+            f"Время: {filter_type} {time.strftime(cfg.TIME_FORMAT)}",
+            selectivity_of(filter_type),
+            self.__time_range,
+            make_bounds(filter_type, start, start + 1),
+            make_time_cmp(filter_type, time),
+        )
+
+    def set_datetime_range(
+        self, start: Optional[dt.datetime], end: Optional[dt.datetime]
+    ):
+        """
+        Оставить расходы, дата и время которых лежат в полуинтервале
+        [start, end). None означает отсутствие границы
+        """
+        self.__add_range(
+            f"Дата и время: [{start}, {end})",
+            SELECTIVITY_RANGE,
+            self.__datetime_range,
+            (
+                None if start is None else to_timestamp(start),
+                None if end is None else to_timestamp(end),
+            ),
+            make_range_cmp(start, end),
+        )
+
+    def total_price(self) -> Money:
+        """Суммарная стоимость расходов, удовлетворяющих запросу"""
+        return round_total(self.total_units())
+
+    def total_units(self) -> int:
+        """
+        Точная суммарная стоимость расходов, удовлетворяющих запросу (см.
+        Expense.get_total_units)
+        """
+        return sum(expense.get_total_units() for expense in self)
+
+
+def selectivity_of(filter_type: Any) -> float:
+    """Ожидаемая доля строк, проходящих фильтр по дате или времени"""
+    if filter_type.name == "EQ":
+        return SELECTIVITY_EQ
+    return SELECTIVITY_RANGE
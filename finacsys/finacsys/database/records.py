@@ -0,0 +1,306 @@
+"""
+Модуль, содержащий преобразование объектов базы данных и их изменений в
+записи журнала и обратно
+"""
+import datetime as dt
+from typing import Any, Iterable, List, TYPE_CHECKING
+from uuid import UUID
+
+from finacsys.models import Product, Category, Expense, Ident, ObjectMeta
+
+from .bulk import ExpenseUpdate, ProductUpdate, Retag
+from .journal import Record
+
+if TYPE_CHECKING:
+    from .database import Database
+
+
+# Длина строки и двоичного представления ID (см. encode_id, id_to_bytes)
+ID_DIGITS = 19
+ID_SIZE = 16
+INT_ID_PREFIX = bytes(ID_SIZE - 8)
+
+
+def encode_id(ident: Ident) -> str:
+    """
+    Преобразование ID объекта в строку. Целые ID дополняются нулями до
+    одинаковой длины, поэтому строки сравниваются в том же порядке, что и
+    числа (например, в индексе первичного ключа SQLite)
+    """
+    if isinstance(ident, int):
+        return str(ident).zfill(ID_DIGITS)
+    return str(ident)
+
+
+def decode_id(value: str) -> Ident:
+    """Преобразование строки в ID объекта"""
+    if value.isdigit():
+        return int(value)
+    return UUID(value)
+
+
+def id_to_bytes(ident: Ident) -> bytes:
+    """
+    Преобразование ID в 16 байт. Целый ID записывается в последние 8 байт
+    после 8 нулевых: у UUID первые 8 байт не бывают нулевыми (в седьмом
+    байте записана версия UUID), поэтому виды ID не пересекаются
+    """
+    if isinstance(ident, int):
+        return INT_ID_PREFIX + ident.to_bytes(8, "big")
+    return ident.bytes
+
+
+def id_from_bytes(value: bytes) -> Ident:
+    """Преобразование 16 байт, записанных id_to_bytes, в ID"""
+    if value.startswith(INT_ID_PREFIX):
+        return int.from_bytes(value[len(INT_ID_PREFIX) :], "big")
+    return UUID(bytes=value)
+
+
+def kind_of(obj: ObjectMeta) -> str:
+    """Получение названия таблицы, к которой относится объект"""
+    if isinstance(obj, Expense):
+        return "expense"
+    if isinstance(obj, Product):
+        return "product"
+    if isinstance(obj, Category):
+        return "category"
+    raise NotImplementedError()
+
+
+def category_to_record(category: Category) -> Record:
+    """Запись о добавлении категории"""
+    return {
+        "op": "add_category",
+        "id": encode_id(category.get_id()),
+        "name": category.get_name(),
+    }
+
+
+def product_to_record(product: Product) -> Record:
+    """Запись о добавлении товара"""
+    return {
+        "op": "add_product",
+        "id": encode_id(product.get_id()),
+        "name": product.get_name(),
+        "price": str(product.get_price()),
+        "categories": [
+            encode_id(category.get_id())
+            for category in product.get_categories()
+        ],
+    }
+
+
+def expense_to_record(expense: Expense) -> Record:
+    """Запись о добавлении статьи расхода"""
+    return {
+        "op": "add_expense",
+        "id": encode_id(expense.get_id()),
+        "product": encode_id(expense.get_product_id()),
+        "count": str(expense.get_count()),
+        "created_at": expense.get_datetime().isoformat(),
+    }
+
+
+def batch_to_record(logged: List[Record]) -> Record:
+    """Запись, объединяющая записи одной транзакции"""
+    return {"op": "batch", "records": logged}
+
+
+def delete_to_record(obj: ObjectMeta) -> Record:
+    """Запись об удалении объекта"""
+    return {"op": f"delete_{kind_of(obj)}", "id": encode_id(obj.get_id())}
+
+
+def encode_ids(objects: Iterable[ObjectMeta]) -> List[str]:
+    """ID объектов пачки для записи журнала"""
+    return [encode_id(obj.get_id()) for obj in objects]
+
+
+def delete_expenses_to_record(expenses: List[Expense]) -> Record:
+    """Запись об удалении пачки статей расходов"""
+    return {"op": "delete_expenses", "ids": encode_ids(expenses)}
+
+
+def expense_update_to_record(
+    expenses: List[Expense], update: ExpenseUpdate
+) -> Record:
+    """
+    Запись об изменении пачки статей расходов (см. ExpenseUpdate). Сдвиг
+    записывается целым числом микросекунд
+    """
+    record: Record = {"op": "update_expenses", "ids": encode_ids(expenses)}
+    if update.product is not None:
+        record["product"] = encode_id(update.product.get_id())
+    if update.count is not None:
+        record["count"] = str(update.count)
+    if update.date is not None:
+        record["date"] = update.date.isoformat()
+    if update.time is not None:
+        record["time"] = update.time.isoformat()
+    if update.shift is not None:
+        record["shift"] = update.shift // dt.timedelta(microseconds=1)
+    return record
+
+
+def product_update_to_record(
+    products: List[Product], update: ProductUpdate
+) -> Record:
+    """Запись об изменении пачки товаров (см. ProductUpdate)"""
+    record: Record = {"op": "update_products", "ids": encode_ids(products)}
+    if update.name is not None:
+        record["name"] = update.name
+    if update.price is not None:
+        record["price"] = str(update.price)
+    return record
+
+
+def retag_to_record(products: List[Product], retag: Retag) -> Record:
+    """Запись об изменении категорий пачки товаров (см. Retag)"""
+    return {
+        "op": "retag_products",
+        "ids": encode_ids(products),
+        "add": encode_ids(retag.add),
+        "remove": encode_ids(retag.remove),
+    }
+
+
+def change_to_record(
+    obj: ObjectMeta, field: str, old: Any, new: Any
+) -> Record:
+    """Запись об изменении поля объекта (см. ObjectMeta.add_listener)"""
+    record: Record = {
+        "op": "set",
+        "kind": kind_of(obj),
+        "id": encode_id(obj.get_id()),
+        "field": field,
+    }
+
+    if field == "categories":
+        record["op"] = "link" if new is not None else "unlink"
+        record["category"] = encode_id((new or old).get_id())
+        del record["field"]
+    elif field == "product":
+        record["value"] = encode_id(new.get_id())
+    elif field == "created_at":
+        record["value"] = new.isoformat()
+    elif field in ("price", "count"):
+        record["value"] = str(new)
+    else:
+        record["value"] = new
+
+    return record
+
+
+def apply_record(database: "Database", record: Record):
+    """Применение записи журнала к базе данных"""
+    op = record["op"]
+
+    if op == "add_category":
+        category = Category(record["name"], ident=decode_id(record["id"]))
+        database.add_category(category)
+    elif op == "add_product":
+        # Категории, удаленные после удаления товара, пропускаются
+        categories = [
+            database.categories[decode_id(ident)]
+            for ident in record["categories"]
+            if decode_id(ident) in database.categories
+        ]
+        product = Product(
+            record["name"],
+            record["price"],
+            categories,
+            ident=decode_id(record["id"]),
+        )
+        database.add_product(product)
+    elif op == "add_expense":
+        expense = Expense(
+            database.products[decode_id(record["product"])],
+            record["count"],
+            dt.datetime.fromisoformat(record["created_at"]),
+            ident=decode_id(record["id"]),
+        )
+        database.add_expense(expense)
+    elif op == "delete_category":
+        database.delete_category(database.categories[decode_id(record["id"])])
+    elif op == "delete_product":
+        database.delete_product(database.products[decode_id(record["id"])])
+    elif op == "delete_expense":
+        database.delete_expense(database.expenses[decode_id(record["id"])])
+    elif op == "delete_expenses":
+        database.delete_expenses(lookup(database.expenses, record["ids"]))
+    elif op == "update_expenses":
+        __apply_expense_update(database, record)
+    elif op == "update_products":
+        database.update_products(
+            lookup(database.products, record["ids"]),
+            name=record.get("name"),
+            price=record.get("price"),
+        )
+    elif op == "retag_products":
+        database.retag_products(
+            lookup(database.products, record["ids"]),
+            add=lookup(database.categories, record["add"]),
+            remove=lookup(database.categories, record["remove"]),
+        )
+    elif op in ("link", "unlink"):
+        product = database.products[decode_id(record["id"])]
+        category = database.categories[decode_id(record["category"])]
+        if op == "link":
+            product.add_category(category)
+        else:
+            product.remove_category(category)
+    elif op == "set":
+        __apply_change(database, record)
+    elif op == "batch":
+        for nested in record["records"]:
+            apply_record(database, nested)
+    else:
+        raise NotImplementedError(f"Unknown journal record: {op}")
+
+
+def lookup(table: Any, idents: List[str]) -> List:
+    """Объекты таблицы по ID из записи журнала"""
+    return [table[decode_id(ident)] for ident in idents]
+
+
+def __apply_expense_update(database: "Database", record: Record):
+    product = None
+    if "product" in record:
+        product = database.products[decode_id(record["product"])]
+    date = record.get("date")
+    time = record.get("time")
+    shift = record.get("shift")
+    database.update_expenses(
+        lookup(database.expenses, record["ids"]),
+        product=product,
+        count=record.get("count"),
+        date=dt.date.fromisoformat(date) if date else None,
+        time=dt.time.fromisoformat(time) if time else None,
+        shift=dt.timedelta(microseconds=shift) if shift else None,
+    )
+
+
+def __apply_change(database: "Database", record: Record):
+    ident = decode_id(record["id"])
+    field = record["field"]
+    value = record["value"]
+
+    if record["kind"] == "category":
+        category = database.categories[ident]
+        if field == "name":
+            category.set_name(value)
+    elif record["kind"] == "product":
+        product = database.products[ident]
+        if field == "name":
+            product.set_name(value)
+        elif field == "price":
+            product.set_price(value)
+    elif record["kind"] == "expense":
+        expense = database.expenses[ident]
+        if field == "count":
+            expense.set_count(value)
+        elif field == "created_at":
+            expense.set_datetime(dt.datetime.fromisoformat(value))
+        elif field == "product":
+            expense.set_product(database.products[decode_id(value)])
@@ -0,0 +1,248 @@
+"""
+Модуль, содержащий поиск объектов по названию. Триграммный индекс хранит
+для каждой тройки подряд идущих символов названия ID объектов, в названии
+которых она встречается. Запрос из трех и более символов проверяется только
+у объектов самого короткого списка своих триграмм, а не у всей таблицы.
+Названия также хранятся упорядоченными, поэтому лучшие совпадения —
+названия, начинающиеся с запроса, — находятся двоичным поиском без
+просмотра остальных совпадений.
+
+Сессия поиска (см. SearchSession) запоминает совпадения предыдущего
+запроса: если новый запрос содержит предыдущий (пользователь допечатал
+символ), совпадения ищутся только среди них, поэтому каждое следующее
+нажатие клавиши просматривает все меньше объектов
+"""
+import heapq
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from finacsys.models import Expense, Ident, ObjectMeta
+
+from .indexes import SortedIndex
+
+GRAM_SIZE = 3
+# Символ, больший любого символа названия: верхняя граница диапазона
+# названий, начинающихся с запроса
+MAX_CHAR = chr(sys.maxunicode)
+# Число лучших совпадений, возвращаемых поиском по умолчанию
+SEARCH_LIMIT = 50
+
+
+def normalize(text: str) -> str:
+    """Приведение текста к виду, в котором он хранится в индексе"""
+    return " ".join(text.casefold().replace("ё", "е").split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Триграммы нормализованного текста"""
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """
+    Триграммный индекс: триграмма -> ID объектов, в тексте которых она
+    встречается, и упорядоченный индекс текстов. Объект находится по
+    запросу, если его текст содержит запрос (без учета регистра и лишних
+    пробелов)
+    """
+
+    def __init__(self):
+        self.__texts: Dict[Ident, str] = {}
+        self.__grams: Dict[str, Dict[Ident, None]] = {}
+        self.__sorted = SortedIndex()
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[ObjectMeta],
+        text_of: Callable[[ObjectMeta], str],
+    ) -> "TrigramIndex":
+        """Построение индекса по объектам таблицы"""
+        index = cls()
+        objects = list(objects)
+        for obj in objects:
+            index.__add(obj.get_id(), normalize(text_of(obj)))
+        index.__sorted = SortedIndex.build(
+            objects, lambda obj: index.__texts[obj.get_id()]
+        )
+        return index
+
+    def add(self, ident: Ident, text: str):
+        """Добавление текста объекта ident. Старый текст заменяется"""
+        self.remove(ident)
+        text = normalize(text)
+        self.__add(ident, text)
+        self.__sorted.add(text, ident)
+
+    def __add(self, ident: Ident, text: str):
+        self.__texts[ident] = text
+        for gram in trigrams(text):
+            self.__grams.setdefault(gram, {})[ident] = None
+
+    def remove(self, ident: Ident):
+        """Удаление объекта ident из индекса"""
+        text = self.__texts.pop(ident, None)
+        if text is None:
+            return
+
+        self.__sorted.remove(text, ident)
+        for gram in trigrams(text):
+            entry = self.__grams[gram]
+            del entry[ident]
+            if len(entry) == 0:
+                del self.__grams[gram]
+
+    def match(
+        self, query: str, within: Optional[Iterable[Ident]] = None
+    ) -> List[Ident]:
+        """
+        ID объектов, текст которых содержит запрос. Если задан within,
+        проверяются только объекты из within, иначе — объекты самого
+        короткого списка триграмм запроса. Порядок объектов сохраняется
+        """
+        query = normalize(query)
+        candidates: Iterable[Ident] = self.__texts
+        if within is not None:
+            candidates = within
+        elif len(query) >= GRAM_SIZE:
+            candidates = min(
+                (self.__grams.get(gram, {}) for gram in trigrams(query)),
+                key=len,
+            )
+
+        texts = self.__texts
+        return [
+            ident
+            for ident in candidates
+            if ident in texts and query in texts[ident]
+        ]
+
+    def prefixed(self, query: str, limit: int) -> List[Ident]:
+        """
+        Не более limit ID объектов, текст которых начинается с запроса, в
+        порядке ранжирования (см. rank)
+        """
+        query = normalize(query)
+        return self.__sorted.range(query, query + MAX_CHAR)[:limit]
+
+    def rank(
+        self, idents: List[Ident], query: str, limit: Optional[int] = None
+    ) -> List[Ident]:
+        """
+        Упорядочивание найденных объектов: выше те, в тексте которых запрос
+        встречается раньше, при равенстве — по алфавиту. Если задан limit,
+        возвращаются только limit лучших объектов
+        """
+        query = normalize(query)
+        texts = self.__texts
+
+        def key(ident: Ident):
+            text = texts[ident]
+            return text.find(query), text
+
+        if limit is None:
+            return sorted(idents, key=key)
+        return heapq.nsmallest(limit, idents, key=key)
+
+    def __len__(self) -> int:
+        return len(self.__texts)
+
+
+class SearchSession:
+    """
+    Поиск объектов таблицы kind базы данных ("category" или "product") по
+    названию по мере ввода запроса. Если задан scope, поиск ведется только
+    среди объектов с ID из scope
+    """
+
+    def __init__(
+        self, database, kind: str, scope: Optional[Iterable[Ident]] = None
+    ):
+        self.database = database
+        self.kind = kind
+        self.__scope = None if scope is None else list(scope)
+        self.__query: Optional[str] = None
+        self.__matches: List[Ident] = []
+
+    def match(self, query: str) -> List[Ident]:
+        """ID всех объектов, название которых содержит запрос"""
+        query = normalize(query)
+        within = self.__scope
+        if self.__query is not None and self.__query in query:
+            within = self.__matches
+
+        self.__matches = self.database.match_names(self.kind, query, within)
+        self.__query = query
+        return self.__matches
+
+    def rank(self, query: str, limit: Optional[int] = None) -> List[Ident]:
+        """
+        ID не более limit объектов (по умолчанию — всех), лучше всего
+        подходящих к запросу. Если без ограничения scope названий,
+        начинающихся с запроса, не меньше limit, они находятся двоичным
+        поиском, а остальные совпадения не просматриваются
+        """
+        if limit is not None and self.__scope is None:
+            idents = self.database.prefixed_names(self.kind, query, limit)
+            if len(idents) == limit:
+                return idents
+        return self.database.rank_names(
+            self.kind, self.match(query), query, limit
+        )
+
+    def find(self, query: str, limit: int = SEARCH_LIMIT) -> List[ObjectMeta]:
+        """Не более limit объектов, лучше всего подходящих к запросу"""
+        idents = self.rank(query, limit)
+        table = self.database.products
+        if self.kind == "category":
+            table = self.database.categories
+        found = (table.get(ident) for ident in idents)
+        return [obj for obj in found if obj is not None]
+
+
+class ExpenseSearchSession(SearchSession):
+    """
+    Поиск статей расходов по названию их товара: находятся товары, а затем
+    их статьи расходов в порядке ранжирования товаров. Статьи расходов
+    удаленных товаров по названию не находятся
+    """
+
+    def __init__(self, database, scope: Optional[Iterable[Expense]] = None):
+        self.__expenses: Optional[Set[Ident]] = None
+        products: Optional[Iterable[Ident]] = None
+        if scope is not None:
+            scope = list(scope)
+            self.__expenses = {expense.get_id() for expense in scope}
+            products = dict.fromkeys(
+                expense.get_product_id() for expense in scope
+            )
+        super().__init__(database, "product", products)
+
+    def find(self, query: str, limit: int = SEARCH_LIMIT) -> List[Expense]:
+        """
+        Не более limit статей расходов, лучше всего подходящих к запросу.
+        Сначала просматриваются статьи расходов limit лучших товаров, и
+        только если их не хватило — всех найденных товаров
+        """
+        idents = self.rank(query, limit)
+        result = self.__expenses_of(idents, limit)
+        if len(result) < limit and len(idents) == limit:
+            result = self.__expenses_of(self.rank(query), limit)
+        return result
+
+    def __expenses_of(self, idents: List[Ident], limit: int) -> List[Expense]:
+        result: List[Expense] = []
+        for ident in idents:
+            product = self.database.products.get(ident)
+            if product is None:
+                continue
+
+            for expense in self.database.expenses_with_products([product]):
+                if (
+                    self.__expenses is None
+                    or expense.get_id() in self.__expenses
+                ):
+                    result.append(expense)
+                if len(result) == limit:
+                    return result
+        return result
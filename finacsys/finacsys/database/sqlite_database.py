@@ -0,0 +1,222 @@
+"""Модуль, содержащий базу данных приложения, хранящуюся в файле SQLite"""
+import datetime as dt
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from finacsys.models import Category, Expense, Ident, Product
+
+from .aggregates import Aggregates
+from .database import Database
+from .locks import reads, writes
+from .pages import PAGE_SIZE, Pages
+from .tables import (
+    SqliteCategoryTable,
+    SqliteExpenseTable,
+    SqliteProductTable,
+    SqliteStorage,
+    placeholders,
+)
+from .records import decode_id, encode_id
+
+
+class SqliteDatabase(Database):
+    """
+    База данных, таблицы которой хранятся в файле SQLite. Предоставляет тот
+    же интерфейс, что и Database, но загружает объекты в память только при
+    обращении к ним, а фильтры поиска выполняет индексированными запросами
+    """
+
+    def __init__(self, path: Path, batch_size: int = 1000):
+        super().__init__()
+        self.storage = SqliteStorage(path, batch_size=batch_size)
+        self.categories = SqliteCategoryTable(self.storage)
+        self.products = SqliteProductTable(self.storage, self.categories)
+        self.expenses = SqliteExpenseTable(self.storage, self.products)
+        # Агрегаты и номер версии хранилища, при котором они вычислены.
+        # Сбрасываются при изменении хранилища, чтобы не удерживать
+        # удаленные объекты
+        self.__aggregates: Optional[Tuple[int, Aggregates]] = None
+        self.storage.add_listener(self.__drop_aggregates)
+        for table in (self.categories, self.products, self.expenses):
+            self._watch(table)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Database]:
+        """
+        Транзакция (см. Database.transaction). Изменения внутри блока with
+        также фиксируются в SQLite одной транзакцией. Транзакция SQLite
+        охватывает транзакцию базы данных, поэтому при ошибке изменения
+        объектов отменяются до отката SQLite, пока добавленные строки еще
+        видны таблицам
+        """
+        with self.lock.write(), self.storage.transaction():
+            with super().transaction():
+                yield self
+
+    def close(self):
+        """Сохранение изменений и закрытие файла базы данных"""
+        super().close()
+        self.storage.close()
+
+    def pages(self, kind: str, size: int = PAGE_SIZE) -> Pages:
+        """
+        Постраничный обход объектов таблицы kind (см. Database.pages).
+        Каждая страница читается отдельным запросом, продолжающим обход
+        после последнего прочитанного ID, поэтому объекты, добавленные или
+        удаленные между страницами, учитываются без ошибок обхода
+        """
+        tables: Dict[str, Any] = {
+            "category": self.categories,
+            "product": self.products,
+            "expense": self.expenses,
+        }
+        return Pages(tables[kind].scan(size), size, self.lock)
+
+    @reads
+    def products_with_categories(
+        self, categories: Iterable[Category]
+    ) -> List[Product]:
+        """Товары, принадлежащие хотя бы к одной из категорий"""
+        query = self.products.query()
+        query.only_included_categories(list(categories))
+        return query.fetch()
+
+    @reads
+    def expenses_with_products(
+        self, products: Iterable[Product]
+    ) -> List[Expense]:
+        """Статьи расходов, основанные на одном из товаров"""
+        idents = [encode_id(product.get_id()) for product in products]
+        if len(idents) == 0:
+            return []
+
+        where = f"t.product_id IN ({placeholders(len(idents))})"
+        return list(self.expenses.select(where, idents))
+
+    @reads
+    def referenced_products(self, idents: Iterable[Ident]) -> Set[Ident]:
+        """ID товаров из idents, на которые ссылаются статьи расходов"""
+        params = [encode_id(ident) for ident in idents]
+        if len(params) == 0:
+            return set()
+
+        rows = self.storage.query(
+            "SELECT DISTINCT product_id FROM expenses "
+            f"WHERE product_id IN ({placeholders(len(params))})",
+            params,
+        )
+        return {decode_id(ident) for (ident,) in rows}
+
+    @reads
+    def get_tombstones(self) -> List[Product]:
+        """Надгробия: удаленные товары, на которые ссылаются расходы"""
+        rows = self.storage.query("SELECT id FROM products WHERE deleted = 1")
+        return [
+            self.products.get_any(decode_id(ident))
+            for (ident,) in rows.fetchall()
+        ]
+
+    def _bury(self, product: Product):
+        """
+        Надгробия хранятся в файле как строки товаров с флагом deleted (см.
+        SqliteProductTable), поэтому в памяти не запоминаются
+        """
+
+    def _unreferenced_tombstones(
+        self, idents: Optional[Iterable[Ident]] = None
+    ) -> List[Ident]:
+        """
+        ID надгробий из idents (по умолчанию — всех надгробий), на которые
+        больше не ссылаются статьи расходов. Выполняется одним запросом
+        """
+        sql = (
+            "SELECT t.id FROM products AS t WHERE t.deleted = 1 AND NOT "
+            "EXISTS (SELECT 1 FROM expenses AS e WHERE e.product_id = t.id)"
+        )
+        params = []
+        if idents is not None:
+            params = [encode_id(ident) for ident in idents]
+            if len(params) == 0:
+                return []
+            sql += f" AND t.id IN ({placeholders(len(params))})"
+
+        rows = self.storage.query(sql, params)
+        return [decode_id(ident) for (ident,) in rows.fetchall()]
+
+    def _reclaim(self, idents: List[Ident]):
+        """Удаление надгробий idents из файла (см. Database._reclaim)"""
+        super()._reclaim(idents)
+        params = [(encode_id(ident),) for ident in idents]
+        for param in params:
+            self.storage.execute_later(
+                "DELETE FROM product_categories WHERE product_id = ?", param
+            )
+        for param in params:
+            self.storage.execute_later(
+                "DELETE FROM products WHERE id = ? AND deleted = 1", param
+            )
+
+    @reads
+    def expenses_with_categories(
+        self, categories: Iterable[Category]
+    ) -> List[Expense]:
+        """Статьи расходов, принадлежащие хотя бы к одной из категорий"""
+        query = self.expenses.query()
+        query.only_included_categories(list(categories))
+        return query.fetch()
+
+    @writes
+    def reset_category(self, category: Category):
+        """Удалить категорию из всех товаров"""
+        for product in self.products.cached():
+            product.remove_category(category)
+
+        self.storage.execute_later(
+            "DELETE FROM product_categories WHERE category_id = ?",
+            (encode_id(category.get_id()),),
+        )
+        self._on_reset_category(category)
+
+    @writes
+    def reset_categories(self, categories: List[Category]):
+        """
+        Удалить список категорий из всех товаров. Товары не загружаются в
+        память: связи удаляются запросом на каждую категорию
+        """
+        with self.transaction():
+            for category in categories:
+                self.reset_category(category)
+
+    @reads
+    def get_aggregates(self) -> Aggregates:
+        """
+        Получение агрегатов расходов. Объекты SQLite загружаются по
+        требованию, поэтому агрегаты не обновляются при изменениях, как в
+        Database, а вычисляются одним запросом с группировкой по товару и
+        дню. Результат хранится до следующего изменения хранилища (см.
+        SqliteStorage.add_listener)
+        """
+        version = self.storage.version
+        cached = self.__aggregates
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        aggregates = Aggregates()
+        rows = self.storage.query(
+            "SELECT t.product_id, date(t.created_at), COUNT(*), "
+            "SUM(t.count_units) FROM expenses AS t "
+            "GROUP BY t.product_id, date(t.created_at)"
+        )
+        for product_id, day, count, quantity in rows.fetchall():
+            aggregates.add_group(
+                self.products.get_any(decode_id(product_id)),
+                dt.date.fromisoformat(day),
+                count,
+                quantity,
+            )
+        self.__aggregates = (version, aggregates)
+        return aggregates
+
+    def __drop_aggregates(self):
+        self.__aggregates = None
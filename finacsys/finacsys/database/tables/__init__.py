@@ -1,4 +1,24 @@
-"""Модуль, содержащий в себе реализацию таблиц базы данных"""
+"""
+Модуль, содержащий в себе реализацию таблиц базы данных. Таблицы SQLite
+импортируются при первом обращении (см. finacsys.lazy)
+"""
+from finacsys.lazy import lazy_names
+
 from .table import Table
 from .expense_table import ExpenseTable
 from .product_table import ProductTable
+from .columnar_table import ColumnarExpenseTable, write_expenses
+
+__getattr__ = lazy_names(
+    __name__,
+    {
+        name: ".sqlite_table"
+        for name in (
+            "SqliteCategoryTable",
+            "SqliteExpenseTable",
+            "SqliteProductTable",
+            "SqliteStorage",
+            "placeholders",
+        )
+    },
+)
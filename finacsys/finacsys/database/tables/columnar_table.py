@@ -0,0 +1,671 @@
+"""
+Модуль, содержащий таблицу расходов, которая хранится в колоночном бинарном
+формате и открывается через mmap.
+
+Формат файла (порядок байт совпадает с порядком байт платформы):
+
+- заголовок: сигнатура (8 байт), число строк N и число товаров P (uint64);
+- словарь товаров: P идентификаторов товаров по 16 байт;
+- столбец id: N идентификаторов расходов по 16 байт;
+- столбец product: N индексов товара в словаре (uint32);
+- столбец count: N значений количества в тысячных долях (int64, см.
+  finacsys.money);
+- столбец timestamp: N отметок времени в микросекундах с 01.01.1970 (int64).
+
+Каждый раздел выровнен по 8 байтам. Открытие файла не зависит от числа
+строк: столбцы читаются напрямую из отображенной памяти, а объекты Expense
+создаются только для тех строк, к которым обращаются
+"""
+import datetime as dt
+import mmap
+import os
+import struct
+import weakref
+from array import array
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import finacsys.config as cfg
+from finacsys.models import (
+    IDENT_TYPES,
+    Category,
+    Expense,
+    Ident,
+    Listener,
+    Product,
+    category_mask,
+)
+from finacsys.filters import DateFilter, TimeFilter, make_bounds
+from finacsys.money import Money, Quantity, round_total
+from finacsys.timestamps import (
+    DAY,
+    date_to_timestamp,
+    from_timestamp,
+    time_to_micros,
+    to_timestamp,
+)
+
+from ..plans import SELECTIVITY_EXCLUDE, SELECTIVITY_INCLUDE, SELECTIVITY_RANGE
+from ..queries import (
+    ExpenseQuery,
+    category_names,
+    match_masks,
+    selectivity_of,
+)
+from ..records import ID_SIZE, id_from_bytes, id_to_bytes
+
+MAGIC = b"FNCSLDG2"
+# Файлы первой версии хранили количество в float64. Такой столбец при
+# открытии переводится в тысячные доли и хранится в памяти
+MAGIC_FLOAT_COUNT = b"FNCSLDG1"
+HEADER = struct.Struct("=8sQQ")
+
+
+def align(offset: int) -> int:
+    """Выравнивание смещения по 8 байтам"""
+    return (offset + 7) // 8 * 8
+
+
+def scan(
+    column: Sequence[Any],
+    rows: Optional[Iterable[int]],
+    lower: Optional[Any],
+    upper: Optional[Any],
+    modulo: Optional[int] = None,
+) -> List[int]:
+    """Поиск строк, значение столбца в которых лежит в [lower, upper).
+
+    Args:
+        column (Sequence[Any]): столбец значений
+        rows (Optional[Iterable[int]]): номера просматриваемых строк. None
+        означает просмотр всех строк столбца
+        lower (Optional[Any]): нижняя граница, None — без границы
+        upper (Optional[Any]): верхняя граница, None — без границы
+        modulo (Optional[int]): если передан, сравнивается остаток от
+        деления значения на modulo
+
+    Returns:
+        List[int]: номера подходящих строк
+    """
+    if rows is None:
+        pairs: Iterable = enumerate(column)
+    else:
+        pairs = ((row, column[row]) for row in rows)
+
+    if modulo is not None:
+        pairs = ((row, value % modulo) for row, value in pairs)
+
+    if lower is None and upper is None:
+        return [row for row, _ in pairs]
+    if lower is None:
+        return [row for row, value in pairs if value < upper]
+    if upper is None:
+        return [row for row, value in pairs if value >= lower]
+    return [row for row, value in pairs if lower <= value < upper]
+
+
+class Ledger:
+    """Файл колоночного формата, отображенный в память"""
+
+    def __init__(self, path: Path):
+        with open(path, mode="rb") as file:
+            # Изменения страниц остаются в памяти процесса и не попадают в
+            # файл: файл перезаписывается только целиком, при снимке
+            self.__mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_COPY
+            )
+
+        view = memoryview(self.__mmap)
+        magic, rows, products = HEADER.unpack_from(view)
+        if magic not in (MAGIC, MAGIC_FLOAT_COUNT):
+            raise ValueError(f"{path} is not a finacsys ledger")
+
+        self.rows = rows
+        offset = HEADER.size
+
+        self.product_ids = view[offset : offset + products * ID_SIZE]
+        offset = align(offset + products * ID_SIZE)
+
+        self.ids = view[offset : offset + rows * ID_SIZE]
+        offset = align(offset + rows * ID_SIZE)
+
+        self.product = view[offset : offset + rows * 4].cast("I")
+        offset = align(offset + rows * 4)
+
+        if magic == MAGIC:
+            self.count = view[offset : offset + rows * 8].cast("q")
+        else:
+            self.count = array(
+                "q",
+                (
+                    Quantity.of(value).get_units()
+                    for value in view[offset : offset + rows * 8].cast("d")
+                ),
+            )
+        offset = align(offset + rows * 8)
+
+        self.timestamp = view[offset : offset + rows * 8].cast("q")
+
+    def get_product_id(self, index: int) -> Ident:
+        """Получение ID товара по его индексу в словаре"""
+        start = index * ID_SIZE
+        return id_from_bytes(bytes(self.product_ids[start : start + ID_SIZE]))
+
+    def get_id(self, row: int) -> Ident:
+        """Получение ID статьи расхода по номеру строки"""
+        start = row * ID_SIZE
+        return id_from_bytes(bytes(self.ids[start : start + ID_SIZE]))
+
+    @staticmethod
+    def write(
+        path: Path,
+        product_ids: Sequence[Ident],
+        ids: bytes,
+        product: array,
+        count: array,
+        timestamp: array,
+    ):
+        """Запись столбцов в файл. Файл записывается во временный файл,
+        который затем атомарно подменяет path, поэтому уже отображенные в
+        память файлы не изменяются
+        """
+        tmp_path = Path(f"{path}.tmp")
+        rows = len(product)
+
+        with open(tmp_path, mode="wb") as file:
+            file.write(HEADER.pack(MAGIC, rows, len(product_ids)))
+            file.write(b"".join(id_to_bytes(ident) for ident in product_ids))
+            for chunk in (ids, product, count, timestamp):
+                file.write(b"\0" * (align(file.tell()) - file.tell()))
+                file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tmp_path, path)
+
+
+class ColumnarExpenseTable(MutableMapping):
+    """
+    Таблица расходов, основная часть которой хранится в файле колоночного
+    формата (см. Ledger). Изменения строк файла записываются в отображенную
+    память, удаленные строки помечаются, а добавленные статьи расходов
+    хранятся в памяти до следующего снимка базы данных
+    """
+
+    def __init__(self, ledger: Ledger, products: Mapping[Ident, Product]):
+        self.ledger = ledger
+        self.products: List[Product] = []
+        self.__product_index: Dict[Ident, int] = {}
+        for index in range(len(ledger.product_ids) // ID_SIZE):
+            self.index_of_product(products[ledger.get_product_id(index)])
+
+        self.deleted = bytearray(ledger.rows)
+        self.deleted_count = 0
+        self.added: Dict[Ident, Expense] = {}
+
+        self.__cache: weakref.WeakValueDictionary = (
+            weakref.WeakValueDictionary()
+        )
+        self.__rows_by_id: Optional[Dict[bytes, int]] = None
+        self.__listeners: List[Listener] = []
+
+    @classmethod
+    def open(
+        cls, path: Path, products: Mapping[Ident, Product]
+    ) -> "ColumnarExpenseTable":
+        """Открытие таблицы из файла колоночного формата"""
+        return cls(Ledger(path), products)
+
+    def add_listener(self, listener: Listener):
+        """
+        Подписка на изменения статей расходов, создаваемых из строк файла
+        (см. ObjectMeta.add_listener)
+        """
+        self.__listeners.append(listener)
+
+    def index_of_product(self, product: Product) -> int:
+        """Получение индекса товара в словаре товаров таблицы"""
+        index = self.__product_index.get(product.get_id())
+        if index is None:
+            index = len(self.products)
+            self.products.append(product)
+            self.__product_index[product.get_id()] = index
+        return index
+
+    def live_rows(self) -> Iterable[int]:
+        """Номера неудаленных строк файла"""
+        if self.deleted_count == 0:
+            return range(self.ledger.rows)
+        return [row for row, gone in enumerate(self.deleted) if not gone]
+
+    def load(self, row: int) -> Expense:
+        """Получение статьи расхода по номеру строки файла"""
+        expense = self.__cache.get(row)
+        if expense is not None:
+            return expense
+
+        ledger = self.ledger
+        expense = Expense(
+            self.products[ledger.product[row]],
+            Quantity(ledger.count[row]),
+            from_timestamp(ledger.timestamp[row]),
+            ident=ledger.get_id(row),
+        )
+        expense.add_listener(self.__make_writer(row))
+        for listener in self.__listeners:
+            expense.add_listener(listener)
+
+        self.__cache[row] = expense
+        return expense
+
+    def __make_writer(self, row: int) -> Listener:
+        def write(_expense: Any, field: str, _old: Any, new: Any):
+            if field == "count":
+                self.ledger.count[row] = new.get_units()
+            elif field == "created_at":
+                self.ledger.timestamp[row] = to_timestamp(new)
+            elif field == "product":
+                self.ledger.product[row] = self.index_of_product(new)
+
+        return write
+
+    def __find_row(self, ident: Ident) -> Optional[int]:
+        if self.__rows_by_id is None:
+            ids = self.ledger.ids
+            self.__rows_by_id = {
+                bytes(ids[start : start + ID_SIZE]): start // ID_SIZE
+                for start in range(0, len(ids), ID_SIZE)
+            }
+
+        row = self.__rows_by_id.get(id_to_bytes(ident))
+        if row is None or self.deleted[row]:
+            return None
+        return row
+
+    def __getitem__(self, ident: Ident) -> Expense:
+        if ident in self.added:
+            return self.added[ident]
+
+        row = self.__find_row(ident)
+        if row is None:
+            raise KeyError(ident)
+        return self.load(row)
+
+    def __setitem__(self, ident: Ident, expense: Expense):
+        if ident not in self.added:
+            row = self.__find_row(ident)
+            if row is not None:
+                self.__delete_row(row)
+        self.added[ident] = expense
+
+    def __delitem__(self, ident: Ident):
+        if ident in self.added:
+            del self.added[ident]
+            return
+
+        row = self.__find_row(ident)
+        if row is None:
+            raise KeyError(ident)
+        self.__delete_row(row)
+
+    def __delete_row(self, row: int):
+        self.deleted[row] = 1
+        self.deleted_count += 1
+        self.__cache.pop(row, None)
+
+    def __contains__(self, ident: object) -> bool:
+        if not isinstance(ident, IDENT_TYPES):
+            return False
+        return ident in self.added or self.__find_row(ident) is not None
+
+    def __iter__(self) -> Iterator[Ident]:
+        for row in self.live_rows():
+            yield self.ledger.get_id(row)
+        yield from list(self.added)
+
+    def __len__(self) -> int:
+        return self.ledger.rows - self.deleted_count + len(self.added)
+
+    def values(self) -> Iterator[Expense]:  # type: ignore[override]
+        """Ленивый обход всех статей расходов таблицы"""
+        for row in self.live_rows():
+            yield self.load(row)
+        yield from list(self.added.values())
+
+    def to_list(self) -> List[Expense]:
+        """Получение значений таблицы в виде списка"""
+        return list(self.values())
+
+    def query(self) -> "ColumnarExpenseQuery":
+        """Создание запроса ко всем статьям расходов таблицы"""
+        return ColumnarExpenseQuery(self)
+
+    def products_in_use(self) -> List[Product]:
+        """Получение товаров, на которых основаны статьи расходов"""
+        column = self.ledger.product
+        if self.deleted_count == 0:
+            indices = set(column)
+        else:
+            indices = {column[row] for row in self.live_rows()}
+        result = {self.products[index] for index in indices}
+        result.update(expense.get_product() for expense in self.added.values())
+        return list(result)
+
+    def pop_rows(self, rows: List[int]) -> List[Expense]:
+        """Удаление строк файла по их номерам"""
+        removed = [self.load(row) for row in rows]
+        for row in rows:
+            self.__delete_row(row)
+        return removed
+
+    def pop_by(self, func: Callable[[Expense], bool]) -> List[Expense]:
+        """Удаление элементов по предикативной функции"""
+        removed = [expense for expense in self.values() if func(expense)]
+        for expense in removed:
+            del self[expense.get_id()]
+        return removed
+
+    def pop_by_name(self, name: str) -> List[Expense]:
+        """Удаление элементов, имя которых совпадает с переданным именем"""
+        return self.pop_by(lambda expense: expense.get_name() == name)
+
+    def pop_by_category(self, category: Category) -> List[Expense]:
+        """Удаление статей расходов, принадлежащих к переданной категории"""
+        query = self.query()
+        query.only_included_categories([category])
+        return self.__pop_query(query)
+
+    def pop_by_product(self, product: Product) -> List[Expense]:
+        """Удаление статей расходов, основанных на переданном товаре"""
+        query = self.query()
+        query.only_products({product.get_id()})
+        return self.__pop_query(query)
+
+    def __pop_query(self, query: "ColumnarExpenseQuery") -> List[Expense]:
+        removed = self.pop_rows(query.get_rows())
+        for expense in query.added.fetch():
+            del self.added[expense.get_id()]
+            removed.append(expense)
+        return removed
+
+    def write(self, path: Path, products: Sequence[Product]):
+        """
+        Запись таблицы в новый файл колоночного формата со словарем товаров
+        products. Строки файла копируются по столбцам без создания объектов
+        """
+        ledger = self.ledger
+        position = {product.get_id(): i for i, product in enumerate(products)}
+        # Товары словаря таблицы, на которые не ссылается ни одна живая
+        # строка, могли быть удалены из базы данных вместе с надгробиями
+        remap = [position.get(product.get_id()) for product in self.products]
+
+        if self.deleted_count == 0:
+            ids = bytes(ledger.ids)
+            product = array("I", [remap[index] for index in ledger.product])
+            count = array("q", ledger.count)
+            timestamp = array("q", ledger.timestamp)
+        else:
+            rows = self.live_rows()
+            ids = b"".join(
+                ledger.ids[row * ID_SIZE : (row + 1) * ID_SIZE] for row in rows
+            )
+            product = array("I", [remap[ledger.product[row]] for row in rows])
+            count = array("q", [ledger.count[row] for row in rows])
+            timestamp = array("q", [ledger.timestamp[row] for row in rows])
+
+        added = list(self.added.values())
+        ids += b"".join(id_to_bytes(expense.get_id()) for expense in added)
+        product.extend(position[expense.get_product_id()] for expense in added)
+        count.extend(expense.get_count_units() for expense in added)
+        timestamp.extend(e.get_timestamp() for e in added)
+
+        Ledger.write(
+            path,
+            [product.get_id() for product in products],
+            ids,
+            product,
+            count,
+            timestamp,
+        )
+
+
+def write_expenses(
+    path: Path,
+    products: Sequence[Product],
+    table: Mapping[Ident, Expense],
+):
+    """Запись таблицы расходов в файл колоночного формата.
+
+    Args:
+        path (Path): путь к файлу
+        products (Sequence[Product]): словарь товаров файла. Должен включать
+        все товары, на которых основаны статьи расходов
+        table (Mapping[Ident, Expense]): таблица статей расходов
+    """
+    if isinstance(table, ColumnarExpenseTable):
+        table.write(path, products)
+        return
+
+    position = {product.get_id(): i for i, product in enumerate(products)}
+    expenses = list(table.values())
+
+    Ledger.write(
+        path,
+        [product.get_id() for product in products],
+        b"".join(id_to_bytes(expense.get_id()) for expense in expenses),
+        array("I", [position[e.get_product_id()] for e in expenses]),
+        array("q", [expense.get_count_units() for expense in expenses]),
+        array("q", [e.get_timestamp() for e in expenses]),
+    )
+
+
+class ColumnarExpenseQuery:
+    """
+    Запрос к таблице ColumnarExpenseTable. Фильтры по дате, времени,
+    категориям и суммарная стоимость вычисляются просмотром столбцов файла,
+    без создания объектов Expense. Просмотры откладываются до получения
+    результата и выполняются в порядке возрастания ожидаемой доли строк,
+    проходящих фильтр (см. plans.QueryPlan)
+    """
+
+    def __init__(self, table: ColumnarExpenseTable):
+        self.table = table
+        self.rows: Optional[List[int]] = None
+        self.added = ExpenseQuery(list(table.added.values()))
+        self.__pending: List[Tuple[str, float, Callable[[], None]]] = []
+        self.__log: List[Tuple[str, int, int]] = []
+
+    def __add(self, description: str, selectivity: float, apply: Callable):
+        self.__pending.append((description, selectivity, apply))
+
+    def __execute(self):
+        self.__pending.sort(key=lambda pending: pending[1])
+        for description, _, apply in self.__pending:
+            scanned = self.__count()
+            apply()
+            self.__log.append((description, scanned, self.__count()))
+        self.__pending.clear()
+
+    def __count(self) -> int:
+        if self.rows is None:
+            return self.table.ledger.rows - self.table.deleted_count
+        return len(self.rows)
+
+    def get_rows(self) -> List[int]:
+        """Номера строк файла, удовлетворяющих запросу"""
+        self.__execute()
+        if self.rows is None:
+            return list(self.table.live_rows())
+        return self.rows
+
+    def __source(self) -> Optional[List[int]]:
+        if self.rows is None and self.table.deleted_count > 0:
+            return list(self.table.live_rows())
+        return self.rows
+
+    def __scan(
+        self,
+        column: Sequence[Any],
+        lower: Optional[int],
+        upper: Optional[int],
+        modulo: Optional[int] = None,
+    ):
+        self.rows = scan(column, self.__source(), lower, upper, modulo)
+
+    def __filter_products(self, allowed: Set[int], include: bool):
+        column = self.table.ledger.product
+        rows = self.__source()
+        if rows is None:
+            rows = range(len(column))
+
+        self.rows = [
+            row for row in rows if (column[row] in allowed) is include
+        ]
+
+    def __products_with_categories(
+        self, categories: List[Category]
+    ) -> Set[int]:
+        products = self.table.products
+        masks = [product.get_category_mask() for product in products]
+        return set(match_masks(masks, category_mask(categories)))
+
+    def only_products(self, product_ids: Set[Ident]):
+        """Оставить расходы, основанные на переданных товарах"""
+        allowed = {
+            index
+            for index, product in enumerate(self.table.products)
+            if product.get_id() in product_ids
+        }
+        self.__add(
+            f"Товары: {len(product_ids)} шт.",
+            SELECTIVITY_INCLUDE,
+            lambda: self.__filter_products(allowed, include=True),
+        )
+        self.added.only_products(product_ids)
+
+    def only_included_categories(self, categories: List[Category]):
+        """Оставить расходы, принадлежащие хотя бы к одной из категорий"""
+        self.__add(
+            f"Категории: только {category_names(categories)}",
+            SELECTIVITY_INCLUDE,
+            lambda: self.__filter_products(
+                self.__products_with_categories(categories), include=True
+            ),
+        )
+        self.added.only_included_categories(categories)
+
+    def exclude_categories(self, categories: List[Category]):
+        """Убрать расходы, принадлежащие хотя бы к одной из категорий"""
+        self.__add(
+            f"Категории: кроме {category_names(categories)}",
+            SELECTIVITY_EXCLUDE,
+            lambda: self.__filter_products(
+                self.__products_with_categories(categories), include=False
+            ),
+        )
+        self.added.exclude_categories(categories)
+
+    def set_date_filter(self, filter_type: DateFilter, date: dt.date):
+        """Отфильтровать расходы по дате. См. DateFilter"""
+        start = date_to_timestamp(date)
+        lower, upper = make_bounds(filter_type, start, start + DAY)
+        self.__add(
+            f"Дата: {filter_type} {date.strftime(cfg.DATE_FORMAT)}",
+            selectivity_of(filter_type),
+            lambda: self.__scan(self.table.ledger.timestamp, lower, upper),
+        )
+        self.added.set_date_filter(filter_type, date)
+
+    def set_time_filter(self, filter_type: TimeFilter, time: dt.time):
+        """Отфильтровать расходы по времени. См. TimeFilter"""
+        start = time_to_micros(time)
+        lower, upper = make_bounds(filter_type, start, start + 1)
+        self.__add(
+            f"Время: {filter_type} {time.strftime(cfg.TIME_FORMAT)}",
+            selectivity_of(filter_type),
+            lambda: self.__scan(
+                self.table.ledger.timestamp, lower, upper, modulo=DAY
+            ),
+        )
+        self.added.set_time_filter(filter_type, time)
+
+    def set_datetime_range(
+        self, start: Optional[dt.datetime], end: Optional[dt.datetime]
+    ):
+        """
+        Оставить расходы, дата и время которых лежат в полуинтервале
+        [start, end). None означает отсутствие границы
+        """
+        lower = None if start is None else to_timestamp(start)
+        upper = None if end is None else to_timestamp(end)
+        self.__add(
+            f"Дата и время: [{start}, {end})",
+            SELECTIVITY_RANGE,
+            lambda: self.__scan(self.table.ledger.timestamp, lower, upper),
+        )
+        self.added.set_datetime_range(start, end)
+
+    def explain(self) -> str:
+        """
+        Описание выполненных просмотров столбцов и плана запроса к
+        расходам, добавленным после записи файла
+        """
+        self.__execute()
+        lines = ["Файл: просмотр столбцов"]
+        for number, (description, scanned, found) in enumerate(
+            self.__log, start=1
+        ):
+            lines.append(
+                f"{number}. {description} (просмотрено строк: {scanned}, "
+                f"осталось строк: {found})"
+            )
+        lines.append("Добавленные расходы:")
+        lines.append(self.added.explain())
+        return "\n".join(lines)
+
+    def total_price(self) -> Money:
+        """Суммарная стоимость расходов, удовлетворяющих запросу"""
+        self.__execute()
+        ledger = self.table.ledger
+        prices = [product.get_price_units() for product in self.table.products]
+        rows = self.__source()
+
+        if rows is None:
+            total = sum(
+                count * prices[index]
+                for count, index in zip(ledger.count, ledger.product)
+            )
+        else:
+            total = sum(
+                ledger.count[row] * prices[ledger.product[row]]
+                for row in rows
+            )
+
+        return round_total(total + self.added.total_units())
+
+    def empty(self) -> bool:
+        """Проверка результата запроса на пустоту"""
+        self.__execute()
+        if self.rows is None:
+            rows_empty = self.table.ledger.rows == self.table.deleted_count
+        else:
+            rows_empty = len(self.rows) == 0
+        return rows_empty and self.added.empty()
+
+    def fetch(self) -> List[Expense]:
+        """Получение результата запроса"""
+        result = [self.table.load(row) for row in self.get_rows()]
+        return result + self.added.fetch()
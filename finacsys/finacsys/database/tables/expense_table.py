@@ -1,24 +1,219 @@
 """Модуль, включающий в себя реализацию таблицы расходов"""
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
-from finacsys.models import Expense, Category, Product
+from finacsys.models import Expense, Category, Ident, Product
+from finacsys.timestamps import DAY, to_timestamp
 
+from .. import arrays
+from ..arrays import ArrayExpenseQuery, ExpenseArrays
+from ..indexes import SortedIndex
+from ..queries import CategoryLookup, ExpenseQuery
 from .table import Table
 
+# Число изменений даты и времени в пачке (см. ExpenseTable.batch), начиная с
+# которого упорядоченные индексы дешевле перестроить, чем обновить: каждое
+# обновление сдвигает элементы списков индекса
+REBUILD_CHANGES = 512
+
+
+def datetime_key(expense: Expense) -> int:
+    """Ключ упорядоченного индекса по дате и времени"""
+    return expense.get_timestamp()
+
+
+def time_key(expense: Expense) -> int:
+    """Ключ упорядоченного индекса по времени суток"""
+    return expense.get_time_micros()
+
 
 class ExpenseTable(Table[Expense]):
-    """Класс, представляющий таблицу расходов"""
+    """
+    Класс, представляющий таблицу расходов. Таблица поддерживает
+    упорядоченные индексы по дате и времени и по времени суток, которые
+    строятся при первом фильтре по дате или времени и далее обновляются при
+    добавлении, удалении и изменении статей расходов. Если для аналитики
+    выбран NumPy (см. arrays.enabled), запросы выполняются по колоночному
+    представлению таблицы, которое строится при первом запросе и далее так
+    же обновляется при изменениях
+    """
+
+    def __init__(self, lookup: Optional[CategoryLookup] = None):
+        """
+        Args:
+            lookup (Optional[CategoryLookup]): поиск по обратному индексу
+            категорий, используемый запросами (см. ExpenseQuery)
+        """
+        super().__init__()
+        self.__lookup = lookup
+        self.__datetime_index: Optional[SortedIndex] = None
+        self.__time_index: Optional[SortedIndex] = None
+        self.__arrays: Optional[ExpenseArrays] = None
+        # Изменения даты и времени внутри batch: ID, старая и новая отметки
+        # времени
+        self.__pending: Optional[List[Tuple[Ident, int, int]]] = None
+
+    def __index(self, expense: Expense):
+        if self.__datetime_index is not None:
+            self.__datetime_index.add(datetime_key(expense), expense.get_id())
+        if self.__time_index is not None:
+            self.__time_index.add(time_key(expense), expense.get_id())
+
+    def __unindex(self, expense: Expense):
+        if self.__datetime_index is not None:
+            self.__datetime_index.remove(
+                datetime_key(expense), expense.get_id()
+            )
+        if self.__time_index is not None:
+            self.__time_index.remove(time_key(expense), expense.get_id())
+
+    def __on_change(self, expense: Any, field: str, old: Any, new: Any):
+        if self.__arrays is not None:
+            self.__arrays.update(expense)
+        if field != "created_at":
+            return
+
+        change = (expense.get_id(), to_timestamp(old), to_timestamp(new))
+        if self.__pending is not None:
+            self.__pending.append(change)
+        else:
+            self.__move(*change)
+
+    def __move(self, ident: Ident, old: int, new: int):
+        if self.__datetime_index is not None:
+            self.__datetime_index.remove(old, ident)
+            self.__datetime_index.add(new, ident)
+        if self.__time_index is not None:
+            self.__time_index.remove(old % DAY, ident)
+            self.__time_index.add(new % DAY, ident)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Пакетное изменение статей расходов: упорядоченные индексы
+        обновляются один раз после блока with. Если даты и время изменены
+        не меньше чем у REBUILD_CHANGES статей, индексы сбрасываются и
+        перестраиваются при следующем фильтре. Внутри блока статьи расходов
+        можно только изменять, но не добавлять и не удалять
+        """
+        if self.__pending is not None:
+            yield
+            return
+
+        pending = self.__pending = []
+        try:
+            yield
+        finally:
+            self.__pending = None
+            if len(pending) >= REBUILD_CHANGES:
+                self.__datetime_index = None
+                self.__time_index = None
+            else:
+                for change in pending:
+                    self.__move(*change)
+
+    def __setitem__(self, ident: Ident, expense: Expense):
+        old = self.get(ident)
+        if old is expense:
+            return
+        if old is not None:
+            self.__detach(old)
+
+        super().__setitem__(ident, expense)
+        expense.add_listener(self.__on_change)
+        self.__index(expense)
+        if self.__arrays is not None:
+            if old is None:
+                self.__arrays.append(expense)
+            else:
+                self.__arrays.update(expense)
+
+    def __delitem__(self, ident: Ident):
+        self.__remove(self[ident])
+        super().__delitem__(ident)
+
+    def pop(self, ident: Ident, *default: Any) -> Any:
+        if ident in self:
+            self.__remove(self[ident])
+        return super().pop(ident, *default)
+
+    def __detach(self, expense: Expense):
+        expense.remove_listener(self.__on_change)
+        self.__unindex(expense)
+
+    def __remove(self, expense: Expense):
+        self.__detach(expense)
+        if self.__arrays is not None:
+            self.__arrays.remove(expense)
+
+    def datetime_range(
+        self, lower: Optional[int], upper: Optional[int]
+    ) -> List[Expense]:
+        """
+        Статьи расходов, отметка времени которых (см. timestamps.to_timestamp)
+        лежит в полуинтервале [lower, upper), в порядке возрастания
+        """
+        if self.__datetime_index is None:
+            self.__datetime_index = SortedIndex.build(
+                self.values(), datetime_key
+            )
+        idents = self.__datetime_index.range(lower, upper)
+        return [self[ident] for ident in idents]
+
+    def time_range(
+        self, lower: Optional[int], upper: Optional[int]
+    ) -> List[Expense]:
+        """
+        Статьи расходов, время суток которых в микросекундах лежит в
+        полуинтервале [lower, upper), в порядке возрастания времени суток
+        """
+        if self.__time_index is None:
+            self.__time_index = SortedIndex.build(self.values(), time_key)
+        idents = self.__time_index.range(lower, upper)
+        return [self[ident] for ident in idents]
+
+    def get_arrays(self) -> ExpenseArrays:
+        """
+        Колоночное представление статей расходов таблицы. Строится при
+        первом обращении и далее обновляется при добавлении, удалении и
+        изменении статей расходов
+        """
+        if self.__arrays is None:
+            self.__arrays = ExpenseArrays(list(self.values()))
+        return self.__arrays
+
+    def query(self) -> Union[ExpenseQuery, ArrayExpenseQuery]:
+        """Создание запроса ко всем статьям расходов таблицы"""
+        if arrays.enabled():
+            return ArrayExpenseQuery(self.get_arrays())
+        return ExpenseQuery(
+            self.values(),
+            self.__lookup,
+            self.datetime_range,
+            self.time_range,
+        )
+
+    def products_in_use(self) -> List[Product]:
+        """Получение товаров, на которых основаны статьи расходов"""
+        products = {expense.get_product() for expense in self.values()}
+        return list(products)
 
     def pop_by_category(self, category: Category) -> List[Expense]:
         """Удаление статей расходов, принадлежащих к переданной категории"""
-        removed = super().pop_by(
-            lambda expense: category in expense.get_categories(),
-        )
+        if self.__lookup is None:
+            return super().pop_by(
+                lambda expense: category in expense.get_categories(),
+            )
+
+        removed = self.__lookup([category])
+        for expense in removed:
+            self.pop(expense.get_id())
         return removed
 
     def pop_by_product(self, product: Product) -> List[Expense]:
         """Удаление статей расходов, основанных на переданном товаре"""
+        ident = product.get_id()
         removed = super().pop_by(
-            lambda expense: product == expense.get_product_id(),
+            lambda expense: expense.get_product_id() == ident,
         )
         return removed
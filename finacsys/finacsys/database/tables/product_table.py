@@ -1,17 +1,36 @@
 """Модуль, содержащий в себе реализацию таблицы товаров"""
-from typing import List
+from typing import List, Optional
 
 from finacsys.models import Product, Category
 
+from ..queries import CategoryLookup, ProductQuery
 from .table import Table
 
 
 class ProductTable(Table[Product]):
     """Класс, представляющий таблицу товаров"""
 
+    def __init__(self, lookup: Optional[CategoryLookup] = None):
+        """
+        Args:
+            lookup (Optional[CategoryLookup]): поиск по обратному индексу
+            категорий, используемый запросами (см. ProductQuery)
+        """
+        super().__init__()
+        self.__lookup = lookup
+
+    def query(self) -> ProductQuery:
+        """Создание запроса ко всем товарам таблицы"""
+        return ProductQuery(self.values(), self.__lookup)
+
     def pop_by_category(self, category: Category) -> List[Product]:
         """Удаление товаров, принадлежащих к переданной категории"""
-        removed = self.pop_by(
-            lambda product: category in product.get_categories(),
-        )
+        if self.__lookup is None:
+            return self.pop_by(
+                lambda product: category in product.get_categories(),
+            )
+
+        removed = self.__lookup([category])
+        for product in removed:
+            self.pop(product.get_id())
         return removed
@@ -0,0 +1,728 @@
+"""
+Модуль, содержащий реализацию таблиц базы данных, хранящихся в файле SQLite.
+
+Объекты создаются из строк SQLite только при обращении к ним и хранятся в
+кэше, пока на них есть ссылки, поэтому таблица не обязана целиком
+помещаться в памяти. Изменения объектов записываются обратно в SQLite
+через механизм слушателей (см. ObjectMeta.add_listener)
+"""
+import datetime as dt
+import sqlite3
+import threading
+import weakref
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from finacsys.models import (
+    IDENT_TYPES,
+    Category,
+    Expense,
+    Ident,
+    Listener,
+    ObjectMeta,
+    Product,
+)
+from finacsys.filters import DateFilter, TimeFilter
+from finacsys.money import (
+    MONEY_SCALE,
+    QUANTITY_SCALE,
+    Money,
+    Quantity,
+    round_total,
+)
+
+from ..records import decode_id, encode_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price_units INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS product_categories (
+    product_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    PRIMARY KEY (product_id, category_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS expenses (
+    id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    count_units INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS categories_name ON categories (name);
+CREATE INDEX IF NOT EXISTS products_name ON products (name);
+CREATE INDEX IF NOT EXISTS product_categories_category
+    ON product_categories (category_id, product_id);
+CREATE INDEX IF NOT EXISTS expenses_product ON expenses (product_id);
+CREATE INDEX IF NOT EXISTS expenses_date ON expenses (date(created_at));
+CREATE INDEX IF NOT EXISTS expenses_time ON expenses (time(created_at));
+CREATE INDEX IF NOT EXISTS expenses_created_at ON expenses (created_at);
+"""
+
+# Цены и количества хранятся целыми долями (см. finacsys.money). Прежние
+# версии хранили их в рублях и единицах товара в столбцах REAL, которые
+# переносятся при открытии файла (см. SqliteStorage.migrate): таблица,
+# прежний столбец, новый столбец и число долей в единице
+REAL_COLUMNS = (
+    ("products", "price", "price_units", MONEY_SCALE),
+    ("expenses", "count", "count_units", QUANTITY_SCALE),
+)
+
+SQL_OPERATORS = {"LT": "<", "LE": "<=", "EQ": "=", "GE": ">=", "GT": ">"}
+
+
+def encode_datetime(value: dt.datetime) -> str:
+    """Преобразование даты и времени в строку, понятную SQLite"""
+    return value.isoformat(sep=" ")
+
+
+def placeholders(count: int) -> str:
+    """Создание списка параметров запроса вида ?, ?, ?"""
+    return ", ".join("?" * count)
+
+
+class SqliteStorage:
+    """
+    Соединение с файлом SQLite. Файл открывается в режиме WAL, а
+    изменения накапливаются и выполняются пачками через executemany перед
+    каждым чтением либо при накоплении batch_size изменений. Соединение
+    может использоваться из нескольких потоков: накопление и выполнение
+    изменений защищены блокировкой. При каждом изменении и откате
+    транзакции увеличивается номер version и вызываются слушатели (см.
+    add_listener): так сбрасываются результаты запросов, сохраненные между
+    обращениями
+    """
+
+    def __init__(self, path: Path, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(
+            Path(path).expanduser(), check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+
+        self.__batches: List[Tuple[str, List[Sequence[Any]]]] = []
+        self.__pending = 0
+        self.version = 0
+        self.__listeners: Tuple[Callable[[], None], ...] = ()
+        self.__lock = threading.RLock()
+        # Глубина вложенности transaction: внутри транзакции изменения
+        # выполняются, но не фиксируются
+        self.__depth = 0
+
+    def __create_schema(self):
+        """Создание недостающих таблиц и индексов внутри транзакции"""
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                self.connection.execute(statement)
+
+    def migrate(self):
+        """
+        Перенос цен и количеств из столбцов REAL прежних версий в столбцы
+        целых долей (см. REAL_COLUMNS). Таблица перестраивается по текущей
+        схеме одной транзакцией, значения округляются до долей
+        """
+        for table, old, new, scale in REAL_COLUMNS:
+            info = self.connection.execute(f"PRAGMA table_info({table})")
+            columns = [row[1] for row in info.fetchall()]
+            if old not in columns:
+                continue
+
+            values = ", ".join(
+                f"CAST(ROUND({name} * {scale}) AS INTEGER)"
+                if name == old
+                else name
+                for name in columns
+            )
+            names = ", ".join(new if name == old else name for name in columns)
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.execute(
+                    f"ALTER TABLE {table} RENAME TO {table}_real"
+                )
+                self.__create_schema()
+                self.connection.execute(
+                    f"INSERT INTO {table} ({names}) "
+                    f"SELECT {values} FROM {table}_real"
+                )
+                self.connection.execute(f"DROP TABLE {table}_real")
+                # Индексы удаляются вместе с прежней таблицей
+                self.__create_schema()
+
+    def add_listener(self, listener: Callable[[], None]):
+        """
+        Подписка на изменения хранилища. Слушатель вызывается без
+        аргументов при каждом изменении и откате транзакции
+        """
+        self.__listeners += (listener,)
+
+    def __changed(self):
+        self.version += 1
+        for listener in self.__listeners:
+            listener()
+
+    def execute_later(self, sql: str, params: Sequence[Any]):
+        """Отложенное выполнение изменяющего запроса"""
+        with self.__lock:
+            self.__changed()
+            if len(self.__batches) > 0 and self.__batches[-1][0] == sql:
+                self.__batches[-1][1].append(params)
+            else:
+                self.__batches.append((sql, [params]))
+
+            self.__pending += 1
+            if self.__pending >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Выполнение накопленных изменений одной транзакцией. Внутри блока
+        transaction изменения выполняются без фиксации
+        """
+        with self.__lock:
+            if self.__pending == 0:
+                return
+
+            if self.__depth > 0:
+                self.__execute_batches()
+            else:
+                with self.connection:
+                    self.__execute_batches()
+
+    def __execute_batches(self):
+        for sql, params in self.__batches:
+            self.connection.executemany(sql, params)
+
+        self.__batches = []
+        self.__pending = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Фиксация всех изменений внутри блока with одной транзакцией SQLite.
+        Если блок завершается исключением, изменения отменяются
+        """
+        with self.__lock:
+            # Изменения, накопленные до транзакции, не должны откатываться
+            if self.__depth == 0:
+                self.flush()
+            self.__depth += 1
+            try:
+                yield
+            except BaseException:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.__batches = []
+                    self.__pending = 0
+                    self.__changed()
+                    self.connection.rollback()
+                raise
+
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.flush()
+                self.connection.commit()
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Выполнение читающего запроса с учетом накопленных изменений"""
+        with self.__lock:
+            self.flush()
+            return self.connection.execute(sql, params)
+
+    def close(self):
+        """Сохранение накопленных изменений и закрытие соединения"""
+        with self.__lock:
+            self.flush()
+            self.connection.close()
+
+
+class SqliteTable(MutableMapping):
+    """
+    Основа таблиц, хранящихся в SQLite. Наследник задает название таблицы,
+    запрос выборки строк и способ превращения строки в объект
+    """
+
+    name = ""
+    columns = ""
+
+    def __init__(self, storage: SqliteStorage):
+        self.storage = storage
+        self.cache: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.__listeners: Tuple[Listener, ...] = ()
+
+    def add_listener(self, listener: Listener):
+        """
+        Подписка на изменения объектов, загружаемых из SQLite (см.
+        ObjectMeta.add_listener)
+        """
+        self.__listeners += (listener,)
+
+    def select_sql(self) -> str:
+        """Запрос выборки строк таблицы, к которому дописываются условия"""
+        return f"SELECT {self.columns} FROM {self.name} AS t WHERE 1"
+
+    def _insert(self, obj: ObjectMeta):
+        raise NotImplementedError()
+
+    def _delete(self, ident: Ident):
+        self.storage.execute_later(
+            f"DELETE FROM {self.name} WHERE id = ?",
+            (encode_id(ident),),
+        )
+
+    def _materialize(self, row: Tuple[Any, ...]) -> ObjectMeta:
+        raise NotImplementedError()
+
+    def _on_change(self, obj: ObjectMeta, field: str, old: Any, new: Any):
+        raise NotImplementedError()
+
+    def _load(self, row: Tuple[Any, ...]) -> ObjectMeta:
+        ident = decode_id(row[0])
+        obj = self.cache.get(ident)
+        if obj is None:
+            obj = self._materialize(row)
+            obj.add_listener(self._on_change)
+            for listener in self.__listeners:
+                obj.add_listener(listener)
+            self.cache[ident] = obj
+        return obj
+
+    def select(self, where: str = "", params: Sequence[Any] = ()) -> Iterator:
+        """Ленивая выборка объектов, удовлетворяющих SQL-условию"""
+        sql = self.select_sql()
+        if where:
+            sql += f" AND ({where})"
+
+        for row in self.storage.query(sql, params):
+            yield self._load(row)
+
+    def scan(self, size: int) -> Iterator:
+        """
+        Ленивый обход всех объектов таблицы в порядке ID, при котором
+        каждые size объектов читаются отдельным запросом. Между запросами
+        таблицу можно изменять: следующий запрос продолжает обход после
+        последнего прочитанного ID
+        """
+        sql = self.select_sql() + " AND t.id > ? ORDER BY t.id LIMIT ?"
+        last = ""
+        while True:
+            rows = self.storage.query(sql, (last, size)).fetchall()
+            yield from map(self._load, rows)
+            if len(rows) < size:
+                return
+            last = rows[-1][0]
+
+    def __getitem__(self, ident: Ident) -> ObjectMeta:
+        obj = self.cache.get(ident)
+        if obj is not None:
+            return obj
+
+        for obj in self.select("t.id = ?", (encode_id(ident),)):
+            return obj
+        raise KeyError(ident)
+
+    def __setitem__(self, ident: Ident, obj: ObjectMeta):
+        self._insert(obj)
+        if self.cache.get(ident) is not obj:
+            obj.add_listener(self._on_change)
+            self.cache[ident] = obj
+
+    def __delitem__(self, ident: Ident):
+        if ident not in self:
+            raise KeyError(ident)
+
+        obj = self.cache.pop(ident, None)
+        if obj is not None:
+            obj.remove_listener(self._on_change)
+        self._delete(ident)
+
+    def __contains__(self, ident: object) -> bool:
+        if not isinstance(ident, IDENT_TYPES):
+            return False
+
+        cursor = self.storage.query(
+            f"SELECT EXISTS ({self.select_sql()} AND t.id = ?)",
+            (encode_id(ident),),
+        )
+        return bool(cursor.fetchone()[0])
+
+    def __iter__(self) -> Iterator[Ident]:
+        sql = f"SELECT t.id FROM ({self.select_sql()}) AS t"
+        for (ident,) in self.storage.query(sql):
+            yield decode_id(ident)
+
+    def __len__(self) -> int:
+        sql = f"SELECT COUNT(*) FROM ({self.select_sql()})"
+        return self.storage.query(sql).fetchone()[0]
+
+    def values(self) -> Iterator:  # type: ignore[override]
+        """Ленивый обход всех объектов таблицы"""
+        return self.select()
+
+    def cached(self) -> List[ObjectMeta]:
+        """Объекты таблицы, уже находящиеся в памяти"""
+        return list(self.cache.values())
+
+    def to_list(self) -> List[ObjectMeta]:
+        """Получение значений таблицы в виде списка"""
+        return list(self.values())
+
+    def pop_where(self, where: str, params: Sequence[Any]) -> List:
+        """Удаление объектов, удовлетворяющих SQL-условию"""
+        removed = list(self.select(where, params))
+        for obj in removed:
+            del self[obj.get_id()]
+        return removed
+
+    def pop_by(self, func: Callable[[ObjectMeta], bool]) -> List:
+        """Удаление элементов по предикативной функции"""
+        removed = [obj for obj in self.values() if func(obj)]
+        for obj in removed:
+            del self[obj.get_id()]
+        return removed
+
+    def pop_by_name(self, name: str) -> List:
+        """Удаление элементов, имя которых совпадает с переданным именем"""
+        return self.pop_where("t.name = ?", (name,))
+
+
+class SqliteCategoryTable(SqliteTable):
+    """Таблица категорий, хранящаяся в SQLite"""
+
+    name = "categories"
+    columns = "t.id, t.name"
+
+    def _insert(self, obj: Category):
+        self.storage.execute_later(
+            "INSERT OR REPLACE INTO categories (id, name) VALUES (?, ?)",
+            (encode_id(obj.get_id()), obj.get_name()),
+        )
+
+    def _delete(self, ident: Ident):
+        super()._delete(ident)
+        self.storage.execute_later(
+            "DELETE FROM product_categories WHERE category_id = ?",
+            (encode_id(ident),),
+        )
+
+    def _materialize(self, row: Tuple[Any, ...]) -> Category:
+        return Category(row[1], ident=decode_id(row[0]))
+
+    def _on_change(self, obj: Category, field: str, old: Any, new: Any):
+        if field == "name":
+            self.storage.execute_later(
+                "UPDATE categories SET name = ? WHERE id = ?",
+                (new, encode_id(obj.get_id())),
+            )
+
+
+class SqliteProductTable(SqliteTable):
+    """
+    Таблица товаров, хранящаяся в SQLite. Удаленные товары помечаются
+    флагом deleted и остаются доступны статьям расходов, которые на них
+    ссылаются (см. get_any)
+    """
+
+    name = "products"
+    columns = (
+        "t.id, t.name, t.price_units, "
+        "(SELECT group_concat(category_id) FROM product_categories "
+        "WHERE product_id = t.id)"
+    )
+
+    def __init__(
+        self, storage: SqliteStorage, categories: SqliteCategoryTable
+    ):
+        super().__init__(storage)
+        self.categories = categories
+
+    def select_sql(self) -> str:
+        """Запрос выборки неудаленных товаров"""
+        return super().select_sql() + " AND t.deleted = 0"
+
+    def get_any(self, ident: Ident) -> Product:
+        """Получение товара, в том числе удаленного из таблицы"""
+        obj = self.cache.get(ident)
+        if obj is not None:
+            return obj
+
+        sql = f"SELECT {self.columns} FROM products AS t WHERE t.id = ?"
+        row = self.storage.query(sql, (encode_id(ident),)).fetchone()
+        if row is None:
+            raise KeyError(ident)
+        return self._load(row)
+
+    def _insert(self, obj: Product):
+        ident = encode_id(obj.get_id())
+        self.storage.execute_later(
+            "INSERT OR REPLACE INTO products "
+            "(id, name, price_units, deleted) VALUES (?, ?, ?, 0)",
+            (ident, obj.get_name(), obj.get_price_units()),
+        )
+        for category in obj.get_categories():
+            self.__link(ident, category)
+
+    def _delete(self, ident: Ident):
+        self.storage.execute_later(
+            "UPDATE products SET deleted = 1 WHERE id = ?",
+            (encode_id(ident),),
+        )
+
+    def __link(self, ident: str, category: Category):
+        self.storage.execute_later(
+            "INSERT OR IGNORE INTO product_categories "
+            "(product_id, category_id) VALUES (?, ?)",
+            (ident, encode_id(category.get_id())),
+        )
+
+    def _materialize(self, row: Tuple[Any, ...]) -> Product:
+        categories = []
+        if row[3] is not None:
+            for category_id in row[3].split(","):
+                category = self.categories.get(decode_id(category_id))
+                if category is not None:
+                    categories.append(category)
+
+        return Product(
+            row[1], Money(row[2]), categories, ident=decode_id(row[0])
+        )
+
+    def _on_change(self, obj: Product, field: str, old: Any, new: Any):
+        ident = encode_id(obj.get_id())
+        if field == "name":
+            self.storage.execute_later(
+                "UPDATE products SET name = ? WHERE id = ?", (new, ident)
+            )
+        elif field == "price":
+            self.storage.execute_later(
+                "UPDATE products SET price_units = ? WHERE id = ?",
+                (new.get_units(), ident),
+            )
+        elif field == "categories" and new is not None:
+            self.__link(ident, new)
+        elif field == "categories":
+            self.storage.execute_later(
+                "DELETE FROM product_categories "
+                "WHERE product_id = ? AND category_id = ?",
+                (ident, encode_id(old.get_id())),
+            )
+
+    def query(self) -> "SqliteProductQuery":
+        """Создание запроса ко всем товарам таблицы"""
+        return SqliteProductQuery(self)
+
+    def pop_by_category(self, category: Category) -> List[Product]:
+        """Удаление товаров, принадлежащих к переданной категории"""
+        return self.pop_where(
+            "t.id IN (SELECT product_id FROM product_categories "
+            "WHERE category_id = ?)",
+            (encode_id(category.get_id()),),
+        )
+
+
+class SqliteExpenseTable(SqliteTable):
+    """Таблица статей расходов, хранящаяся в SQLite"""
+
+    name = "expenses"
+    columns = "t.id, t.product_id, t.count_units, t.created_at"
+
+    def __init__(self, storage: SqliteStorage, products: SqliteProductTable):
+        super().__init__(storage)
+        self.products = products
+
+    def _insert(self, obj: Expense):
+        self.storage.execute_later(
+            "INSERT OR REPLACE INTO expenses "
+            "(id, product_id, count_units, created_at) VALUES (?, ?, ?, ?)",
+            (
+                encode_id(obj.get_id()),
+                encode_id(obj.get_product_id()),
+                obj.get_count_units(),
+                encode_datetime(obj.get_datetime()),
+            ),
+        )
+
+    def _materialize(self, row: Tuple[Any, ...]) -> Expense:
+        return Expense(
+            self.products.get_any(decode_id(row[1])),
+            Quantity(row[2]),
+            dt.datetime.fromisoformat(row[3]),
+            ident=decode_id(row[0]),
+        )
+
+    def _on_change(self, obj: Expense, field: str, old: Any, new: Any):
+        if field == "count":
+            column, value = "count_units", new.get_units()
+        elif field == "created_at":
+            column, value = "created_at", encode_datetime(new)
+        elif field == "product":
+            column, value = "product_id", encode_id(new.get_id())
+        else:
+            return
+
+        self.storage.execute_later(
+            f"UPDATE expenses SET {column} = ? WHERE id = ?",
+            (value, encode_id(obj.get_id())),
+        )
+
+    def query(self) -> "SqliteExpenseQuery":
+        """Создание запроса ко всем статьям расходов таблицы"""
+        return SqliteExpenseQuery(self)
+
+    def pop_by_category(self, category: Category) -> List[Expense]:
+        """Удаление статей расходов, принадлежащих к переданной категории"""
+        return self.pop_where(
+            "t.product_id IN (SELECT product_id FROM product_categories "
+            "WHERE category_id = ?)",
+            (encode_id(category.get_id()),),
+        )
+
+    def pop_by_product(self, product: Product) -> List[Expense]:
+        """Удаление статей расходов, основанных на переданном товаре"""
+        return self.pop_where(
+            "t.product_id = ?",
+            (encode_id(product.get_id()),),
+        )
+
+
+class SqliteQuery:
+    """
+    Запрос к таблице SQLite. Фильтры превращаются в условия WHERE, которые
+    выполняются с использованием индексов только при получении результата
+    """
+
+    def __init__(self, table: SqliteTable):
+        self.table = table
+        self.conditions: List[str] = []
+        self.params: List[Any] = []
+        self.__result: Optional[List] = None
+
+    def where(self, condition: str, params: Sequence[Any]):
+        """Добавление SQL-условия к запросу"""
+        self.conditions.append(condition)
+        self.params.extend(params)
+        self.__result = None
+
+    def _where_categories(
+        self, column: str, categories: List[Category], include: bool
+    ):
+        ids = [encode_id(category.get_id()) for category in categories]
+        operator = "IN" if include else "NOT IN"
+        self.where(
+            f"{column} {operator} (SELECT product_id FROM product_categories "
+            f"WHERE category_id IN ({placeholders(len(ids))}))",
+            ids,
+        )
+
+    def empty(self) -> bool:
+        """Проверка результата запроса на пустоту"""
+        if self.__result is not None:
+            return len(self.__result) == 0
+
+        where = " AND ".join(self.conditions) or "1"
+        cursor = self.table.storage.query(
+            f"SELECT NOT EXISTS ({self.table.select_sql()} AND ({where}))",
+            self.params,
+        )
+        return bool(cursor.fetchone()[0])
+
+    def explain(self) -> str:
+        """План выполнения запроса, выбранный SQLite (EXPLAIN QUERY PLAN)"""
+        where = " AND ".join(self.conditions)
+        sql = self.table.select_sql()
+        if where:
+            sql += f" AND ({where})"
+
+        cursor = self.table.storage.query(
+            f"EXPLAIN QUERY PLAN {sql}", self.params
+        )
+        lines = [row[-1] for row in cursor]
+        lines.append(f"Возвращено строк: {len(self.fetch())}")
+        return "\n".join(lines)
+
+    def fetch(self) -> List:
+        """Получение результата запроса"""
+        if self.__result is None:
+            where = " AND ".join(self.conditions)
+            self.__result = list(self.table.select(where, self.params))
+        return self.__result
+
+
+class SqliteProductQuery(SqliteQuery):
+    """Запрос к таблице товаров, хранящейся в SQLite"""
+
+    def only_included_categories(self, categories: List[Category]):
+        """Оставить товары, принадлежащие хотя бы к одной из категорий"""
+        self._where_categories("t.id", categories, include=True)
+
+    def exclude_categories(self, categories: List[Category]):
+        """Убрать товары, принадлежащие хотя бы к одной из категорий"""
+        self._where_categories("t.id", categories, include=False)
+
+
+class SqliteExpenseQuery(SqliteQuery):
+    """Запрос к таблице статей расходов, хранящейся в SQLite"""
+
+    def only_included_categories(self, categories: List[Category]):
+        """Оставить расходы, принадлежащие хотя бы к одной из категорий"""
+        self._where_categories("t.product_id", categories, include=True)
+
+    def exclude_categories(self, categories: List[Category]):
+        """Убрать расходы, принадлежащие хотя бы к одной из категорий"""
+        self._where_categories("t.product_id", categories, include=False)
+
+    def set_date_filter(self, filter_type: DateFilter, date: dt.date):
+        """Отфильтровать расходы по дате. См. DateFilter"""
+        operator = SQL_OPERATORS[filter_type.name]
+        self.where(f"date(t.created_at) {operator} ?", (date.isoformat(),))
+
+    def set_time_filter(self, filter_type: TimeFilter, time: dt.time):
+        """Отфильтровать расходы по времени. См. TimeFilter"""
+        operator = SQL_OPERATORS[filter_type.name]
+        value = time.strftime("%H:%M:%S")
+        self.where(f"time(t.created_at) {operator} ?", (value,))
+
+    def set_datetime_range(
+        self, start: Optional[dt.datetime], end: Optional[dt.datetime]
+    ):
+        """
+        Оставить расходы, дата и время которых лежат в полуинтервале
+        [start, end). None означает отсутствие границы
+        """
+        if start is not None:
+            self.where("t.created_at >= ?", (encode_datetime(start),))
+        if end is not None:
+            self.where("t.created_at < ?", (encode_datetime(end),))
+
+    def total_price(self) -> Money:
+        """
+        Суммарная стоимость расходов, удовлетворяющих запросу. Количества и
+        цены хранятся целыми долями (см. finacsys.money), поэтому сумма
+        вычисляется в SQLite точно
+        """
+        where = " AND ".join(self.conditions) or "1"
+        cursor = self.table.storage.query(
+            "SELECT SUM(t.count_units * p.price_units) "
+            "FROM expenses AS t "
+            f"JOIN products AS p ON p.id = t.product_id WHERE {where}",
+            self.params,
+        )
+        return round_total(cursor.fetchone()[0] or 0)
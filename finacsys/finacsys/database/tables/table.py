@@ -1,11 +1,10 @@
 """Модуль, содержащий реализацию основной структуры данных для БД"""
 from typing import Dict, Callable, List
-from uuid import UUID
 
-from finacsys.models import Object
+from finacsys.models import Ident, Object
 
 
-class Table(Dict[UUID, Object]):
+class Table(Dict[Ident, Object]):
     """Класс, реализующий основную функциональность таблиц базы данных"""
 
     def to_list(self) -> List[Object]:
@@ -0,0 +1,84 @@
+"""
+Модуль, содержащий транзакции базы данных (см. Database.transaction).
+Транзакция накапливает записи журнала до завершения и действия отмены для
+каждого изменения, которые при ошибке выполняются в обратном порядке
+"""
+from typing import Any, Callable, List, Tuple
+
+from finacsys.models import Category, Expense, ObjectMeta, Product
+
+from .journal import Record
+
+# Изменение поля объекта: объект, поле, старое и новое значения (см.
+# ObjectMeta.add_listener)
+Change = Tuple[ObjectMeta, str, Any, Any]
+
+
+class Transaction:
+    """Записи журнала и действия отмены одной транзакции"""
+
+    def __init__(self):
+        self.records: List[Record] = []
+        self.__undo: List[Callable[[], None]] = []
+        # Во время отката изменения не записываются и не отменяются
+        self.__active = True
+
+    def log(self, record: Record):
+        """Отложенная запись в журнал до завершения транзакции"""
+        if self.__active:
+            self.records.append(record)
+
+    def on_undo(self, action: Callable[[], None]):
+        """Добавление действия, отменяющего последнее изменение"""
+        if self.__active:
+            self.__undo.append(action)
+
+    def rollback(self):
+        """
+        Отмена изменений в обратном порядке. Отложенные записи журнала
+        отбрасываются
+        """
+        self.__active = False
+        for action in reversed(self.__undo):
+            action()
+        self.__undo.clear()
+        self.records.clear()
+
+
+def revert_change(obj: ObjectMeta, field: str, old: Any, new: Any):
+    """
+    Отмена изменения поля объекта (см. ObjectMeta.add_listener): поле
+    возвращается к старому значению
+    """
+    if isinstance(obj, Category) and field == "name":
+        obj.set_name(old)
+    elif isinstance(obj, Product):
+        __revert_product(obj, field, old, new)
+    elif isinstance(obj, Expense):
+        __revert_expense(obj, field, old)
+
+
+def revert_changes(changes: List[Change]):
+    """Отмена пачки изменений в обратном порядке"""
+    for obj, field, old, new in reversed(changes):
+        revert_change(obj, field, old, new)
+
+
+def __revert_product(product: Product, field: str, old: Any, new: Any):
+    if field == "name":
+        product.set_name(old)
+    elif field == "price":
+        product.set_price(old)
+    elif field == "categories" and new is not None:
+        product.remove_category(new)
+    elif field == "categories":
+        product.add_category(old)
+
+
+def __revert_expense(expense: Expense, field: str, old: Any):
+    if field == "count":
+        expense.set_count(old)
+    elif field == "created_at":
+        expense.set_datetime(old)
+    elif field == "product":
+        expense.set_product(old)
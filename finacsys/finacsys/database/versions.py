@@ -0,0 +1,352 @@
+"""
+Модуль, содержащий версии состояния базы данных и представления для чтения.
+
+Состояние базы данных хранится в персистентных отображениях (см.
+PersistentMap) ID -> неизменяемая строка объекта. Каждое изменение базы
+данных заменяет отображения новыми, разделяющими с прежними почти все узлы,
+поэтому представление (DatabaseView) лишь запоминает текущие отображения и
+создается за O(1). Представление не изменяется при последующих изменениях
+базы данных и не блокирует их, сколько бы его ни читали
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from finacsys.models import Category, Expense, Ident, ObjectMeta, Product
+from finacsys.money import Money, Quantity
+from finacsys.timestamps import from_timestamp
+
+from .aggregates import Aggregates
+from .persistent import PersistentMap
+from .transaction import Change
+
+# Строки объектов: название, цена в копейках и ID категорий товара; ID
+# товара, количество в тысячных долях и отметка времени статьи расхода.
+# Строка категории — ее название
+ProductRow = Tuple[str, int, Tuple[Ident, ...]]
+ExpenseRow = Tuple[Ident, int, int]
+
+
+def product_row(product: Product) -> ProductRow:
+    """Строка товара"""
+    return (
+        product.get_name(),
+        product.get_price_units(),
+        tuple(category.get_id() for category in product.get_categories()),
+    )
+
+
+def expense_row(expense: Expense) -> ExpenseRow:
+    """Строка статьи расхода"""
+    return (
+        expense.get_product_id(),
+        expense.get_count_units(),
+        expense.get_timestamp(),
+    )
+
+
+class Versions:
+    """
+    Текущая версия состояния базы данных. База данных сообщает версиям о
+    каждом изменении, а версии заменяют строки измененных объектов.
+
+    Товары, удаленные из базы данных, переносятся в retired: статьи
+    расходов могут ссылаться на них и после удаления. Когда ссылки
+    пропадают, база данных убирает товар и из retired (см.
+    Database.collect_garbage)
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.categories = PersistentMap()
+        self.products = PersistentMap()
+        self.retired = PersistentMap()
+        self.expenses = PersistentMap()
+
+    @classmethod
+    def build(
+        cls,
+        categories: Iterable[Category],
+        products: Iterable[Product],
+        expenses: Iterable[Expense],
+    ) -> "Versions":
+        """Построение версий по объектам таблиц базы данных"""
+        versions = cls()
+        versions.categories = PersistentMap(
+            (category.get_id(), category.get_name())
+            for category in categories
+        )
+        versions.products = PersistentMap(
+            (product.get_id(), product_row(product)) for product in products
+        )
+
+        retired: Dict[Ident, ProductRow] = {}
+
+        def rows() -> Iterator[Tuple[Ident, ExpenseRow]]:
+            for expense in expenses:
+                product = expense.get_product()
+                if product.get_id() not in versions.products:
+                    retired[product.get_id()] = product_row(product)
+                yield expense.get_id(), expense_row(expense)
+
+        versions.expenses = PersistentMap(rows())
+        versions.retired = PersistentMap(retired.items())
+        return versions
+
+    def view(self) -> "DatabaseView":
+        """Представление текущей версии"""
+        return DatabaseView(
+            self.version,
+            self.categories,
+            self.products,
+            self.retired,
+            self.expenses,
+        )
+
+    def put_category(self, category: Category):
+        """Добавление или изменение категории"""
+        self.categories = self.categories.set(
+            category.get_id(), category.get_name()
+        )
+        self.version += 1
+
+    def remove_category(self, category: Category):
+        """Удаление категории, в том числе из строк товаров"""
+        self.categories = self.categories.remove(category.get_id())
+        self.reset_category(category)
+
+    def reset_category(self, category: Category):
+        """Удаление категории из строк товаров, которые на нее ссылаются"""
+        ident = category.get_id()
+        self.products = self.products.update(
+            (
+                product_id,
+                (name, price, tuple(c for c in categories if c != ident)),
+            )
+            for product_id, (name, price, categories) in self.products.items()
+            if ident in categories
+        )
+        self.version += 1
+
+    def put_product(self, product: Product):
+        """Добавление или изменение товара"""
+        ident = product.get_id()
+        if ident in self.retired:
+            self.retired = self.retired.set(ident, product_row(product))
+        else:
+            self.products = self.products.set(ident, product_row(product))
+        self.version += 1
+
+    def put_products(self, products: Iterable[Product]):
+        """Добавление или изменение пачки товаров (см. put_expenses)"""
+        live = []
+        retired = []
+        for product in products:
+            row = (product.get_id(), product_row(product))
+            (retired if row[0] in self.retired else live).append(row)
+
+        self.products = self.products.update(live)
+        self.retired = self.retired.update(retired)
+        self.version += 1
+
+    def restore_product(self, product: Product):
+        """Возвращение удаленного товара в базу данных"""
+        self.retired = self.retired.remove(product.get_id())
+        self.products = self.products.set(
+            product.get_id(), product_row(product)
+        )
+        self.version += 1
+
+    def retire_product(self, product: Product):
+        """Удаление товара"""
+        self.products = self.products.remove(product.get_id())
+        self.retired = self.retired.set(
+            product.get_id(), product_row(product)
+        )
+        self.version += 1
+
+    def reclaim_products(self, idents: Iterable[Ident]):
+        """Удаление строк удаленных товаров, на которые больше нет ссылок"""
+        self.retired = self.retired.discard(idents)
+        self.version += 1
+
+    def put_expenses(self, expenses: Iterable[Expense]):
+        """
+        Добавление или изменение статей расходов. Неизвестный товар статьи
+        расхода добавляется в удаленные товары, чтобы представления могли
+        его найти
+        """
+        self.expenses = self.expenses.update(
+            (expense.get_id(), self.__expense_row(expense))
+            for expense in expenses
+        )
+        self.version += 1
+
+    def put_expense(self, expense: Expense):
+        """Добавление или изменение статьи расхода (см. put_expenses)"""
+        self.expenses = self.expenses.set(
+            expense.get_id(), self.__expense_row(expense)
+        )
+        self.version += 1
+
+    def __expense_row(self, expense: Expense) -> ExpenseRow:
+        product = expense.get_product()
+        ident = product.get_id()
+        if ident not in self.products and ident not in self.retired:
+            self.retired = self.retired.set(ident, product_row(product))
+        return expense_row(expense)
+
+    def remove_expense(self, expense: Expense):
+        """Удаление статьи расхода"""
+        self.expenses = self.expenses.remove(expense.get_id())
+        self.version += 1
+
+    def remove_expenses(self, expenses: Iterable[Expense]):
+        """Удаление пачки статей расходов"""
+        self.expenses = self.expenses.discard(
+            expense.get_id() for expense in expenses
+        )
+        self.version += 1
+
+    def on_change(self, obj: ObjectMeta, field: str, old: Any, new: Any):
+        """Обработка изменения поля объекта (см. ObjectMeta.add_listener)"""
+        if isinstance(obj, Category):
+            self.put_category(obj)
+        elif isinstance(obj, Product):
+            self.put_product(obj)
+        elif isinstance(obj, Expense):
+            self.put_expense(obj)
+
+    def on_changes(self, changes: Iterable[Change]):
+        """
+        Обработка пачки изменений (см. on_change). Строка каждого
+        измененного объекта заменяется один раз, а каждое отображение
+        обновляется одним массовым обновлением
+        """
+        objects: Dict[int, ObjectMeta] = {}
+        for obj, _, _, _ in changes:
+            objects[id(obj)] = obj
+
+        categories = []
+        products = []
+        expenses = []
+        for obj in objects.values():
+            if isinstance(obj, Category):
+                categories.append(obj)
+            elif isinstance(obj, Product):
+                products.append(obj)
+            elif isinstance(obj, Expense):
+                expenses.append(obj)
+
+        for category in categories:
+            self.put_category(category)
+        if products:
+            self.put_products(products)
+        if expenses:
+            self.put_expenses(expenses)
+
+
+class DatabaseView:
+    """
+    Представление базы данных для чтения: состояние базы данных на момент
+    создания представления. Представление предоставляет те же методы
+    чтения, что и Database, а объекты создает из строк версии при
+    обращении. Эти объекты не связаны с базой данных: их изменение не
+    изменяет ни базу данных, ни представление.
+
+    Категории и товары создаются один раз на представление, статьи
+    расходов — при каждом обращении, поэтому долгоживущее представление не
+    хранит копию всех расходов
+    """
+
+    def __init__(
+        self,
+        version: int,
+        categories: PersistentMap,
+        products: PersistentMap,
+        retired: PersistentMap,
+        expenses: PersistentMap,
+    ):
+        self.version = version
+        self.__categories = categories
+        self.__products = products
+        self.__retired = retired
+        self.__expenses = expenses
+        self.__category_objects: Dict[Ident, Category] = {}
+        self.__product_objects: Dict[Ident, Product] = {}
+        self.__aggregates: Optional[Aggregates] = None
+
+    def get_category(self, ident: Ident) -> Category:
+        """Получение категории по ID. Выбрасывает KeyError"""
+        category = self.__category_objects.get(ident)
+        if category is None:
+            name = self.__categories[ident]
+            category = self.__category_objects[ident] = Category(name, ident)
+        return category
+
+    def get_product(self, ident: Ident) -> Product:
+        """
+        Получение товара по ID, в том числе удаленного, на который ссылаются
+        статьи расходов. Выбрасывает KeyError
+        """
+        product = self.__product_objects.get(ident)
+        if product is not None:
+            return product
+
+        row = self.__products.get(ident)
+        if row is None:
+            row = self.__retired[ident]
+        name, price, categories = row
+        product = Product(
+            name,
+            Money(price),
+            [
+                self.get_category(category)
+                for category in categories
+                if category in self.__categories
+            ],
+            ident,
+        )
+        self.__product_objects[ident] = product
+        return product
+
+    def get_expense(self, ident: Ident) -> Expense:
+        """Получение статьи расхода по ID. Выбрасывает KeyError"""
+        return self.__expense(ident, self.__expenses[ident])
+
+    def __expense(self, ident: Ident, row: ExpenseRow) -> Expense:
+        product_id, count, timestamp = row
+        return Expense(
+            self.get_product(product_id),
+            Quantity(count),
+            from_timestamp(timestamp),
+            ident,
+        )
+
+    def get_categories_list(self) -> List[Category]:
+        """Получение списка категорий"""
+        return [self.get_category(ident) for ident in self.__categories]
+
+    def get_products_list(self) -> List[Product]:
+        """Получение списка товаров"""
+        return [self.get_product(ident) for ident in self.__products]
+
+    def iter_expenses(self) -> Iterator[Expense]:
+        """
+        Статьи расходов по одной. В отличие от get_expenses_list, не
+        создает все объекты сразу, поэтому подходит для потоковой выгрузки
+        (см. finacsys.export)
+        """
+        for ident, row in self.__expenses.items():
+            yield self.__expense(ident, row)
+
+    def get_expenses_list(self) -> List[Expense]:
+        """Получение списка расходов"""
+        return list(self.iter_expenses())
+
+    def get_aggregates(self) -> Aggregates:
+        """
+        Получение агрегатов расходов представления. Агрегаты вычисляются при
+        первом обращении и далее не изменяются
+        """
+        if self.__aggregates is None:
+            self.__aggregates = Aggregates.build(self.iter_expenses())
+        return self.__aggregates
@@ -0,0 +1,164 @@
+"""
+Модуль, содержащий потоковую выгрузку объектов в форматах CSV, JSON Lines и
+текстовой таблицы.
+
+Строки формируются лениво из генератора и записываются в файл частями, поэтому
+потребление памяти не зависит от числа выгружаемых объектов. Набор столбцов
+задается списком Column: у каждого столбца есть ключ (заголовок в CSV и
+JSON Lines), название (заголовок текстовой таблицы), ширина в текстовой
+таблице и функция получения значения из объекта
+"""
+import csv
+import io
+import json
+import textwrap
+from enum import Enum
+from itertools import zip_longest
+from typing import Any, Callable, Iterable, Iterator, List, TextIO
+
+# Число строк, накапливаемых перед записью в файл
+CHUNK_SIZE = 1000
+
+
+class ExportFormat(Enum):
+    """Форматы выгрузки"""
+
+    TABLE = "Текстовая таблица"
+    CSV = "CSV"
+    JSON_LINES = "JSON Lines"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Column:
+    """Столбец выгрузки"""
+
+    def __init__(
+        self,
+        key: str,
+        title: str,
+        width: int,
+        getter: Callable[[Any], Any],
+    ):
+        """
+        Args:
+            key (str): ключ столбца в CSV и JSON Lines
+            title (str): название столбца в текстовой таблице
+            width (int): ширина столбца в текстовой таблице
+            getter (Callable[[Any], Any]): получение значения из объекта
+        """
+        self.key = key
+        self.title = title
+        self.width = width
+        self.getter = getter
+
+    def get(self, obj: Any) -> Any:
+        """Получение значения столбца для объекта"""
+        return self.getter(obj)
+
+
+def format_csv(columns: List[Column], objects: Iterable) -> Iterator[str]:
+    """Формирование строк CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def pop_line(values: List[Any]) -> str:
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield pop_line([column.key for column in columns])
+    for obj in objects:
+        yield pop_line([column.get(obj) for column in columns])
+
+
+def format_json_lines(
+    columns: List[Column], objects: Iterable
+) -> Iterator[str]:
+    """Формирование строк JSON Lines"""
+    for obj in objects:
+        row = {column.key: column.get(obj) for column in columns}
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def __table_border(columns: List[Column], fill: str) -> str:
+    cells = (fill * (column.width + 2) for column in columns)
+    return "+" + "+".join(cells) + "+\n"
+
+
+def __table_row(columns: List[Column], values: List[Any]) -> str:
+    cells = [
+        textwrap.wrap(str(value), column.width) or [""]
+        for column, value in zip(columns, values)
+    ]
+    lines = []
+    for parts in zip_longest(*cells, fillvalue=""):
+        padded = (
+            part.ljust(column.width) for column, part in zip(columns, parts)
+        )
+        lines.append("| " + " | ".join(padded) + " |\n")
+    return "".join(lines)
+
+
+def format_table(columns: List[Column], objects: Iterable) -> Iterator[str]:
+    """
+    Формирование текстовой таблицы. Ширина столбцов фиксирована, поэтому
+    таблицу можно выводить по мере формирования строк. Значения, не
+    помещающиеся в столбец, переносятся на следующие строки
+    """
+    border = __table_border(columns, "-")
+
+    yield border
+    yield __table_row(columns, [column.title for column in columns])
+    yield __table_border(columns, "=")
+    for obj in objects:
+        yield __table_row(columns, [column.get(obj) for column in columns])
+        yield border
+
+
+FORMATTERS = {
+    ExportFormat.TABLE: format_table,
+    ExportFormat.CSV: format_csv,
+    ExportFormat.JSON_LINES: format_json_lines,
+}
+
+
+def export(
+    file: TextIO,
+    columns: List[Column],
+    objects: Iterable,
+    export_format: ExportFormat = ExportFormat.TABLE,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """
+    Выгрузка объектов в файл. Строки записываются частями по chunk_size
+    строк. Возвращает число выгруженных объектов
+
+    Args:
+        file (TextIO): файл, открытый для записи
+        columns (List[Column]): столбцы выгрузки
+        objects (Iterable): выгружаемые объекты
+        export_format (ExportFormat): формат выгрузки
+        chunk_size (int): число строк в одной записи
+    """
+    count = 0
+
+    def counted() -> Iterator:
+        nonlocal count
+        for obj in objects:
+            count += 1
+            yield obj
+
+    chunk: List[str] = []
+    for line in FORMATTERS[export_format](columns, counted()):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            file.write("".join(chunk))
+            chunk.clear()
+
+    file.write("".join(chunk))
+    file.flush()
+    return count
@@ -1,15 +1,18 @@
 """Модуль, содержащий различные виды фильтров"""
 
 from enum import Enum
-from typing import Callable, Any
+from typing import Callable, Any, Optional, Tuple, Union
 import datetime as dt
 
+from finacsys.timestamps import date_to_day, time_to_micros, to_timestamp
+
 
 class FilterKind(Enum):
     """Тип фильтра"""
 
     FILTER_BY_DATE = "Отфильтровать по дате"
     FILTER_BY_TIME = "Отфильтровать по времени"
+    FILTER_BY_DATETIME_RANGE = "Отфильтровать по промежутку даты и времени"
     FILTER_BY_CATEGORY = "Отфильтровать по категориям"
 
     def __str__(self) -> str:
@@ -32,18 +35,22 @@ class DateFilter(Enum):
 def make_date_cmp(
     filter_type: DateFilter, date: dt.date
 ) -> Callable[[Any], bool]:
-    """Создание компаратора в соответствии с типом фильтра"""
+    """
+    Создание компаратора в соответствии с типом фильтра. Сравниваются
+    номера дней (см. Expense.get_day), объекты date не создаются
+    """
+    day = date_to_day(date)
 
     if filter_type == DateFilter.LT:
-        return lambda x: x.get_date() < date
+        return lambda x: x.get_day() < day
     if filter_type == DateFilter.LE:
-        return lambda x: x.get_date() <= date
+        return lambda x: x.get_day() <= day
     if filter_type == DateFilter.EQ:
-        return lambda x: x.get_date() == date
+        return lambda x: x.get_day() == day
     if filter_type == DateFilter.GE:
-        return lambda x: x.get_date() >= date
+        return lambda x: x.get_day() >= day
     if filter_type == DateFilter.GT:
-        return lambda x: x.get_date() > date
+        return lambda x: x.get_day() > day
     raise NotImplementedError()
 
 
@@ -63,18 +70,71 @@ class TimeFilter(Enum):
 def make_time_cmp(
     filter_type: TimeFilter, time: dt.time
 ) -> Callable[[Any], bool]:
-    """Создание компаратора в соответствии с типом фильтра"""
+    """
+    Создание компаратора в соответствии с типом фильтра. Сравнивается время
+    суток в микросекундах (см. Expense.get_time_micros)
+    """
+    micros = time_to_micros(time)
 
     if filter_type == TimeFilter.LT:
-        return lambda x: x.get_time() < time
+        return lambda x: x.get_time_micros() < micros
     if filter_type == TimeFilter.LE:
-        return lambda x: x.get_time() <= time
+        return lambda x: x.get_time_micros() <= micros
     if filter_type == TimeFilter.EQ:
-        return lambda x: x.get_time() == time
+        return lambda x: x.get_time_micros() == micros
     if filter_type == TimeFilter.GE:
-        return lambda x: x.get_time() >= time
+        return lambda x: x.get_time_micros() >= micros
     if filter_type == TimeFilter.GT:
-        return lambda x: x.get_time() > time
+        return lambda x: x.get_time_micros() > micros
+    raise NotImplementedError()
+
+
+def make_range_cmp(
+    start: Optional[dt.datetime], end: Optional[dt.datetime]
+) -> Callable[[Any], bool]:
+    """
+    Создание компаратора, проверяющего попадание даты и времени в
+    полуинтервал [start, end). None означает отсутствие границы.
+    Сравниваются отметки времени (см. Expense.get_timestamp)
+    """
+    lower = None if start is None else to_timestamp(start)
+    upper = None if end is None else to_timestamp(end)
+
+    if lower is None and upper is None:
+        return lambda x: True
+    if lower is None:
+        return lambda x: x.get_timestamp() < upper
+    if upper is None:
+        return lambda x: x.get_timestamp() >= lower
+    return lambda x: lower <= x.get_timestamp() < upper
+
+
+def make_bounds(
+    filter_type: Union[DateFilter, TimeFilter], start: Any, end: Any
+) -> Tuple[Optional[Any], Optional[Any]]:
+    """Преобразование фильтра в полуинтервал [нижняя граница, верхняя граница).
+
+    Args:
+        filter_type (DateFilter | TimeFilter): тип фильтра
+        start (Any): начало значения, указанного в фильтре (например, начало
+        дня для даты)
+        end (Any): первое значение, следующее за указанным в фильтре
+        (например, начало следующего дня для даты)
+
+    Returns:
+        Tuple[Optional[Any], Optional[Any]]: границы полуинтервала. None
+        означает отсутствие границы
+    """
+    if filter_type.name == "LT":
+        return None, start
+    if filter_type.name == "LE":
+        return None, end
+    if filter_type.name == "EQ":
+        return start, end
+    if filter_type.name == "GE":
+        return start, None
+    if filter_type.name == "GT":
+        return end, None
     raise NotImplementedError()
 
 
@@ -0,0 +1,350 @@
+"""
+Модуль, содержащий потоковый импорт статей расходов из файлов CSV и JSON
+Lines.
+
+Каждая строка файла описывает одну статью расхода и содержит поля:
+
+- date — дата в формате finacsys.config.DATE_FORMAT;
+- time — время в формате finacsys.config.TIME_FORMAT;
+- product — название товара;
+- price — цена товара, не больше двух знаков после запятой;
+- count — количество, не больше трех знаков после запятой;
+- categories — необязательный список категорий через ";" (в JSON Lines
+  также можно передать массив строк).
+
+Файл читается частями по chunk_size строк. Части разбираются и проверяются
+в пуле процессов, при этом одновременно в обработке находится не больше
+max_pending частей, поэтому потребление памяти не зависит от размера
+файла. Товары и категории ищутся по названию в кэше и создаются при
+отсутствии, после чего статьи расходов добавляются в базу данных пачками
+"""
+
+import csv
+import datetime as dt
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Type,
+)
+
+from finacsys.database import Database
+from finacsys.models import Category, Expense, Product
+from finacsys.money import FixedPoint, Money, Quantity
+from finacsys.timestamps import parse_date, parse_time
+
+# Номер строки в файле и ее содержимое
+RawRow = Tuple[int, Dict[str, Any]]
+# Номер строки, дата и время, товар, цена, количество, категории
+ParsedRow = Tuple[int, dt.datetime, str, Money, Quantity, Tuple[str, ...]]
+# Номер строки, причина отклонения и исходное содержимое
+RejectedRow = Tuple[int, str, Dict[str, Any]]
+
+
+def csv_rows(file: TextIO) -> Iterator[RawRow]:
+    """Чтение строк CSV с заголовком из открытого файла"""
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def json_lines_rows(file: TextIO) -> Iterator[RawRow]:
+    """Чтение строк JSON Lines из открытого файла. Некорректные строки
+    передаются дальше в виде словаря с ключом "__error__", чтобы попасть в
+    отчет"""
+    for line_num, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Line is not a JSON object")
+        except ValueError as error:
+            row = {"__error__": str(error), "line": line.rstrip("\n")}
+        yield line_num, row
+
+
+def read_csv(path: Path) -> Iterator[RawRow]:
+    """Чтение строк CSV-файла с заголовком"""
+    with open(path, mode="r", encoding="utf-8", newline="") as file:
+        yield from csv_rows(file)
+
+
+def read_json_lines(path: Path) -> Iterator[RawRow]:
+    """Чтение файла JSON Lines (см. json_lines_rows)"""
+    with open(path, mode="r", encoding="utf-8") as file:
+        yield from json_lines_rows(file)
+
+
+def read_rows(path: Path) -> Iterator[RawRow]:
+    """Выбор способа чтения по расширению файла"""
+    if path.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+        return read_json_lines(path)
+    return read_csv(path)
+
+
+def chunked(rows: Iterator[RawRow], size: int) -> Iterator[List[RawRow]]:
+    """Разбиение потока строк на части по size строк"""
+    chunk: List[RawRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_categories(value: Any) -> Tuple[str, ...]:
+    """Разбор списка категорий"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.split(";")
+    names = (str(name).strip() for name in value)
+    return tuple(name for name in names if name)
+
+
+def required(row: Dict[str, Any], field: str) -> Any:
+    """
+    Значение обязательного поля. Выбрасывает ValueError, если поля нет в
+    строке (в том числе в короткой строке CSV) или оно равно null
+    """
+    value = row.get(field)
+    if value is None:
+        raise ValueError(f"missing field {field}")
+    return value
+
+
+def parse_positive(
+    value: Any, field: str, kind: Type[FixedPoint]
+) -> FixedPoint:
+    """
+    Разбор положительного числа с фиксированной точкой. Числа JSON
+    разбираются по их десятичной записи так же, как строки CSV (см.
+    FixedPoint.parse), поэтому значение с лишними знаками после запятой
+    отклоняется, а не округляется
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    if not isinstance(value, str):
+        value = repr(value)
+    number = kind.parse(value)
+    if number.get_units() <= 0:
+        raise ValueError(f"{field} must be greater than zero")
+    return number
+
+
+def parse_row(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Разбор и проверка одной строки. Выбрасывает ValueError при
+    некорректных данных"""
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+
+    date = parse_date(str(required(row, "date")))
+    row_time = parse_time(str(required(row, "time")))
+
+    name = str(required(row, "product")).strip()
+    if len(name) == 0:
+        raise ValueError("Product name cannot be an empty string")
+
+    return (
+        dt.datetime.combine(date, row_time),
+        name,
+        parse_positive(required(row, "price"), "price", Money),
+        parse_positive(required(row, "count"), "count", Quantity),
+        parse_categories(row.get("categories")),
+    )
+
+
+def parse_chunk(
+    chunk: List[RawRow],
+) -> Tuple[List[ParsedRow], List[RejectedRow]]:
+    """Разбор части файла. Выполняется в процессах пула"""
+    parsed: List[ParsedRow] = []
+    rejected: List[RejectedRow] = []
+
+    for line_num, row in chunk:
+        try:
+            parsed.append((line_num, *parse_row(row)))
+        except (TypeError, ValueError) as error:
+            rejected.append((line_num, str(error), row))
+
+    return parsed, rejected
+
+
+class ImportReport:
+    """Результат импорта: счетчики, скорость и отклоненные строки"""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.created_products = 0
+        self.created_categories = 0
+        self.rejected: List[RejectedRow] = []
+        self.elapsed = 0.0
+
+    def throughput(self) -> float:
+        """Число обработанных строк в секунду"""
+        if self.elapsed == 0:
+            return 0.0
+        return self.read / self.elapsed
+
+    def write_rejected(self, path: Path):
+        """Запись отклоненных строк в CSV-файл"""
+        with open(path, mode="w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["line", "reason", "row"])
+            for line_num, reason, row in self.rejected:
+                writer.writerow([line_num, reason, json.dumps(row)])
+
+    def __str__(self) -> str:
+        return (
+            f"Прочитано строк: {self.read}, импортировано: {self.imported}, "
+            f"отклонено: {len(self.rejected)}, "
+            f"создано товаров: {self.created_products}, "
+            f"создано категорий: {self.created_categories}, "
+            f"время: {self.elapsed:.2f} с "
+            f"({self.throughput():.0f} строк/с)"
+        )
+
+
+class NameCache:
+    """
+    Кэш товаров и категорий по названию. Товары различаются по паре
+    (название, цена), отсутствующие объекты создаются и добавляются в базу
+    данных
+    """
+
+    def __init__(self, database: Database, report: ImportReport):
+        self.database = database
+        self.report = report
+        self.categories: Dict[str, Category] = {
+            category.get_name(): category
+            for category in database.get_categories_list()
+        }
+        self.products: Dict[Tuple[str, Money], Product] = {
+            (product.get_name(), product.get_price()): product
+            for product in database.get_products_list()
+        }
+
+    def get_category(self, name: str) -> Category:
+        """Получение категории по названию"""
+        category = self.categories.get(name)
+        if category is None:
+            category = Category(name)
+            self.database.add_category(category)
+            self.categories[name] = category
+            self.report.created_categories += 1
+        return category
+
+    def get_product(
+        self, name: str, price: Money, categories: Sequence[str]
+    ) -> Product:
+        """Получение товара по названию и цене"""
+        product = self.products.get((name, price))
+        if product is None:
+            product = Product(name, price, [])
+            self.database.add_product(product)
+            self.products[(name, price)] = product
+            self.report.created_products += 1
+
+        for name in categories:
+            product.add_category(self.get_category(name))
+        return product
+
+
+class ExpenseImporter:
+    """Потоковый импорт статей расходов в базу данных"""
+
+    def __init__(
+        self,
+        database: Database,
+        chunk_size: int = 5000,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Args:
+            database (Database): база данных, в которую импортируются расходы
+            chunk_size (int): число строк в одной части файла
+            workers (Optional[int]): число процессов для разбора. 0 — разбор
+            в текущем процессе, None — по числу процессоров
+            max_pending (Optional[int]): максимальное число частей в
+            обработке. По умолчанию — удвоенное число процессов
+        """
+        self.database = database
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_pending = max_pending
+
+    def import_file(self, path: Path) -> ImportReport:
+        """Импорт файла CSV или JSON Lines"""
+        return self.import_rows(read_rows(Path(path).expanduser()))
+
+    def import_rows(self, rows: Iterator[RawRow]) -> ImportReport:
+        """Импорт потока строк"""
+        report = ImportReport()
+        cache = NameCache(self.database, report)
+        start = time.perf_counter()
+
+        for parsed, rejected in self.__parse(chunked(rows, self.chunk_size)):
+            report.read += len(parsed) + len(rejected)
+            report.rejected.extend(rejected)
+            self.__write(parsed, cache, report)
+
+        report.rejected.sort(key=lambda rejected: rejected[0])
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def __parse(self, chunks: Iterator[List[RawRow]]) -> Iterator[Tuple]:
+        if self.workers == 0:
+            for chunk in chunks:
+                yield parse_chunk(chunk)
+            return
+
+        # Пул процессов загружает multiprocessing, поэтому импортируется,
+        # только если нужен
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from self.__parse_in_pool(executor, chunks)
+
+    def __parse_in_pool(
+        self, executor: Executor, chunks: Iterator[List[RawRow]]
+    ) -> Iterator[Tuple]:
+        max_pending = self.max_pending
+        if max_pending is None:
+            max_pending = 2 * getattr(executor, "_max_workers", 1)
+
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(parse_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    def __write(
+        self, parsed: List[ParsedRow], cache: NameCache, report: ImportReport
+    ):
+        expenses = []
+        for _, created_at, name, price, count, categories in parsed:
+            product = cache.get_product(name, price, categories)
+            expenses.append(Expense(product, count, created_at))
+
+        self.database.add_expenses(expenses)
+        report.imported += len(expenses)
@@ -0,0 +1,36 @@
+"""
+Модуль, содержащий отложенный импорт имен пакета (PEP 562). Пакет
+объявляет имена, которые импортируются только при первом обращении к ним,
+чтобы импорт пакета не загружал тяжелые зависимости, не нужные вызывающему
+коду. После первого обращения имя записывается в пакет и далее находится
+без вызова __getattr__
+"""
+import importlib
+import sys
+from typing import Any, Callable, Dict
+
+
+def lazy_names(package: str, names: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Создание функции __getattr__ пакета
+
+    Args:
+        package (str): имя пакета (__name__)
+        names (Dict[str, str]): имя -> модуль, из которого оно
+        импортируется; относительные модули отсчитываются от пакета
+
+    Returns:
+        Callable[[str], Any]: функция __getattr__ пакета
+    """
+
+    def getattr_(name: str) -> Any:
+        module = names.get(name)
+        if module is None:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            )
+        value = getattr(importlib.import_module(module, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return getattr_
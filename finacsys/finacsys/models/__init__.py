@@ -1,5 +1,14 @@
 """Модуль. включающий в себя модели базы данных"""
 from .product import Product
-from .category import Category
+from .category import Category, category_mask
 from .expense import Expense
-from .object import ObjectMeta, Object
+from .object import ObjectMeta, Object, Listener
+from .display import DISPLAY_STATS, DisplayStats
+from .ids import (
+    IDENT_TYPES,
+    IDS,
+    Ident,
+    IdGenerator,
+    TimeOrderedIds,
+    random_uuid,
+)
@@ -1,25 +1,77 @@
 """Модуль, содержащий в себе модель категорий"""
-import uuid
+import heapq
+import sys
+import weakref
+from typing import Iterable, List, Optional
+
+from .ids import IDS, Ident
 from .object import ObjectMeta
 
 
+class SlotAllocator:
+    """
+    Выдача категориям плотных целочисленных номеров (слотов). Номер слота
+    задает бит категории в маске категорий товара (см. category_mask).
+    Освобожденные слоты выдаются повторно, начиная с наименьшего, поэтому
+    маски остаются короткими
+    """
+
+    def __init__(self):
+        self.__free: List[int] = []
+        self.__next = 0
+
+    def acquire(self) -> int:
+        """Получение свободного слота"""
+        if self.__free:
+            return heapq.heappop(self.__free)
+
+        slot = self.__next
+        self.__next += 1
+        return slot
+
+    def release(self, slot: int):
+        """Освобождение слота"""
+        heapq.heappush(self.__free, slot)
+
+
+SLOTS = SlotAllocator()
+
+
 class Category(ObjectMeta):
-    """Модель категории"""
+    """
+    Модель категории. Каждой категории выдается слот, который
+    освобождается, когда объект категории удаляется сборщиком мусора. Пока
+    категория принадлежит товару, товар удерживает ссылку на нее, поэтому
+    бит категории в маске товара не может достаться другой категории
+    """
 
-    def __init__(self, name: str):
-        self.__name = name
-        self.__id = uuid.uuid4()
+    __slots__ = ("__name", "__id", "__slot")
 
-    def __str__(self) -> str:
+    def __init__(self, name: str, ident: Optional[Ident] = None):
+        super().__init__()
+        self.__name = sys.intern(name)
+        self.__id = ident if ident is not None else IDS.new_id()
+        self.__slot = SLOTS.acquire()
+        weakref.finalize(self, SLOTS.release, self.__slot)
+
+    def _format(self) -> str:
         return f"ID: {self.__id}, название: {self.__name}"
 
     def __repr__(self) -> str:
         return self.__str__()
 
-    def get_id(self) -> uuid.UUID:
+    def get_id(self) -> Ident:
         """Получение ID категории"""
         return self.__id
 
+    def get_slot(self) -> int:
+        """Получение номера слота категории"""
+        return self.__slot
+
+    def get_mask(self) -> int:
+        """Получение маски, в которой установлен только бит категории"""
+        return 1 << self.__slot
+
     def get_name(self) -> str:
         """Получение имени категории"""
         return self.__name
@@ -31,4 +83,18 @@ class Category(ObjectMeta):
         if len(value) == 0:
             raise ValueError("Name cannot be an empty string")
 
-        self.__name = value
+        old = self.__name
+        self.__name = sys.intern(value)
+        self._notify("name", old, self.__name)
+
+
+def category_mask(categories: Iterable[Category]) -> int:
+    """
+    Маска категорий: целое число, в котором установлены биты всех
+    переданных категорий. Целые числа Python не ограничены по длине, поэтому
+    маска работает при любом числе категорий
+    """
+    mask = 0
+    for category in categories:
+        mask |= category.get_mask()
+    return mask
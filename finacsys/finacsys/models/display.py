@@ -0,0 +1,36 @@
+"""
+Модуль, содержащий счетчики кэша строк представления моделей. Строка
+представления объекта (str) строится при первом обращении и хранится в
+объекте до изменения его полей (см. ObjectMeta.__str__). Счетчики
+показывают, какая доля обращений обошлась без построения строки
+"""
+
+
+class DisplayStats:
+    """Счетчики попаданий и промахов кэша строк представления"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        """Доля обращений, для которых строка взята из кэша"""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def reset(self):
+        """Обнуление счетчиков"""
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self) -> str:
+        return (
+            f"Строки представления: попаданий: {self.hits}, "
+            f"промахов: {self.misses}, "
+            f"доля попаданий: {self.hit_rate():.1%}"
+        )
+
+
+DISPLAY_STATS = DisplayStats()
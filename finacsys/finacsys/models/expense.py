@@ -1,25 +1,59 @@
 """Модуль, включающий в себя модель расходов"""
 import datetime as dt
-import uuid
-from typing import Set
+from typing import Any, Optional, Set
+
+from finacsys.money import Money, Quantity, round_total, total_units
+from finacsys.timestamps import (
+    DAY,
+    date_to_timestamp,
+    day_to_date,
+    from_timestamp,
+    micros_to_time,
+    time_to_micros,
+    to_timestamp,
+)
 
 from .product import Product
 from .category import Category
+from .ids import IDS, Ident
 from .object import ObjectMeta
 
 
 class Expense(ObjectMeta):
-    """Модель расходов"""
+    """
+    Модель расходов. Дата и время создания хранятся целым числом
+    микросекунд (см. finacsys.timestamps), а количество — целым числом
+    тысячных долей (см. finacsys.money). Фильтры и сортировки сравнивают
+    целые числа (get_timestamp, get_day, get_time_micros), а объекты
+    datetime, date, time и Quantity создаются только при обращении к ним.
+    Строка представления зависит от названия и цены товара, поэтому вместе
+    с ней запоминается ревизия товара (см. Product.get_revision)
+    """
+
+    __slots__ = (
+        "__id",
+        "__product",
+        "__count",
+        "__timestamp",
+        "__product_revision",
+    )
 
     def __init__(
-        self, product: Product, count: float, created_at: dt.datetime
+        self,
+        product: Product,
+        count: Any,
+        created_at: dt.datetime,
+        ident: Optional[Ident] = None,
     ):
-        self.__id = uuid.uuid4()
+        super().__init__()
+        self.__id = ident if ident is not None else IDS.new_id()
         self.__product = product
-        self.__count = count
-        self.__created_at = created_at
+        self.__count = Quantity.of(count).get_units()
+        self.__timestamp = to_timestamp(created_at)
+        self.__product_revision = -1
 
-    def __str__(self):
+    def _format(self) -> str:
+        self.__product_revision = self.__product.get_revision()
         name = self.get_name()
         price = self.get_price()
         total_price = self.get_total_price()
@@ -29,81 +63,141 @@ class Expense(ObjectMeta):
             + f"общая цена: {total_price}, дата: {date}"
         )
 
+    def _display_valid(self) -> bool:
+        return self.__product_revision == self.__product.get_revision()
+
     def get_datetime(self) -> dt.datetime:
         """Получение даты и времени создания статьи расхода"""
-        return self.__created_at
+        return from_timestamp(self.__timestamp)
+
+    def get_timestamp(self) -> int:
+        """
+        Получение отметки времени создания статьи расхода (см.
+        finacsys.timestamps.to_timestamp)
+        """
+        return self.__timestamp
+
+    def set_datetime(self, datetime: dt.datetime):
+        """Изменение даты и времени создания статьи расхода"""
+        self.__set_timestamp(to_timestamp(datetime))
+
+    def __set_timestamp(self, timestamp: int):
+        # Слушатели получают старые и новые дату и время (см.
+        # ObjectMeta.add_listener)
+        old = self.__timestamp
+        self.__timestamp = timestamp
+        self._notify(
+            "created_at", from_timestamp(old), from_timestamp(timestamp)
+        )
+
+    def get_day(self) -> int:
+        """Получение номера дня создания статьи расхода с 01.01.1970"""
+        return self.__timestamp // DAY
 
     def get_date(self) -> dt.date:
         """Получение даты создания статьи расхода"""
-        return self.__created_at.date()
+        return day_to_date(self.__timestamp // DAY)
 
     def set_date(self, date: dt.date):
-        """Изменение даты создания статьи расхода"""
-        new_datetime = dt.datetime.combine(date, self.__created_at.time())
-        self.__created_at = new_datetime
+        """
+        Изменение даты создания статьи расхода. Время суток не изменяется
+        """
+        time = self.__timestamp % DAY
+        self.__set_timestamp(date_to_timestamp(date) + time)
+
+    def get_time_micros(self) -> int:
+        """
+        Получение времени создания статьи расхода в микросекундах с начала
+        суток
+        """
+        return self.__timestamp % DAY
 
     def get_time(self) -> dt.time:
         """Получение времени создания статьи расхода"""
-        return self.__created_at.time()
+        return micros_to_time(self.__timestamp % DAY)
 
     def set_time(self, time: dt.time):
-        """Изменение времени создания статьи расхода"""
-        new_datetime = dt.datetime.combine(self.__created_at.date(), time)
-        self.__created_at = new_datetime
+        """Изменение времени создания статьи расхода. Дата не изменяется"""
+        start = self.__timestamp - self.__timestamp % DAY
+        self.__set_timestamp(start + time_to_micros(time))
 
-    def get_price(self) -> float:
+    def get_price(self) -> Money:
         """Получение стоимости товара"""
         return self.__product.get_price()
 
-    def set_price(self, value: float):
+    def set_price(self, value: Any):
         """
         Изменение стоимости товара, в том числе в базе данных. Новое значение
         стоимости не может быть меньше или равно нулю
         """
-        if value <= 0:
-            raise ValueError("Price cannot be less than or equal to zero")
-
         self.__product.set_price(value)
 
     def get_name(self) -> str:
         """Получение названия товара"""
         return self.__product.get_name()
 
-    def get_count(self) -> float:
+    def get_count(self) -> Quantity:
         """Получение количества товара"""
+        return Quantity(self.__count)
+
+    def get_count_units(self) -> int:
+        """Получение количества товара в тысячных долях"""
         return self.__count
 
-    def set_count(self, value: float):
+    def set_count(self, value: Any):
         """
         Изменение количества товара. Новое значение стоимости не может быть
-        меньше или равно нулю
+        меньше или равно нулю. Значение приводится к Quantity (см.
+        Quantity.of)
         """
-        if value <= 0:
+        count = Quantity.of(value)
+        if count.get_units() <= 0:
             raise ValueError("Count cannot be less than or equal to zero")
-        self.__count = value
 
-    def get_product_id(self) -> uuid.UUID:
+        old = self.get_count()
+        self.__count = count.get_units()
+        self._notify("count", old, count)
+
+    def get_product_id(self) -> Ident:
         """Получение ID товара"""
         return self.__product.get_id()
 
+    def get_product(self) -> Product:
+        """Получение товара, на котором основана статья расхода"""
+        return self.__product
+
     def set_product(self, product: Product):
         """Замена с одного товара на другой"""
+        old = self.__product
         self.__product = product
+        self._notify("product", old, product)
 
     def get_categories(self) -> Set[Category]:
         """Получение категорий товара"""
         return self.__product.get_categories()
 
-    def get_id(self) -> uuid.UUID:
+    def get_category_mask(self) -> int:
+        """Получение маски категорий товара (см. category_mask)"""
+        return self.__product.get_category_mask()
+
+    def get_id(self) -> Ident:
         """Получение ID статьи расхода"""
         return self.__id
 
-    def get_total_price(self):
+    def get_total_price(self) -> Money:
         """
         Вычисление итоговой цены. Итоговая цена вычисляется по формуле:
-        TOTAL PRICE = COUNT * PRICE
+        TOTAL PRICE = COUNT * PRICE и округляется до копеек
+        """
+        return round_total(self.get_total_units())
+
+    def get_total_units(self) -> int:
+        """
+        Точная итоговая цена в стотысячных долях рубля (см.
+        finacsys.money.total_units). Суммы итоговых цен следует вычислять по
+        этим значениям и округлять один раз
         """
-        return self.get_count() * self.get_price()
+        return total_units(self.__count, self.__product.get_price_units())
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -0,0 +1,67 @@
+"""
+Модуль, содержащий генераторы ID объектов базы данных.
+
+По умолчанию ID — 63-битное целое число: старшие 43 бита содержат число
+миллисекунд с 01.01.2020, младшие 20 бит — номер ID внутри миллисекунды.
+Такие ID создаются без обращения к системному источнику случайных чисел,
+возрастают в порядке создания объектов (поэтому индекс по ID упорядочен по
+времени добавления и дописывается в конец) и быстрее хешируются, чем UUID.
+Генератор UUID оставлен для совместимости (см. IdSource.set_generator)
+"""
+import threading
+import time
+import uuid
+from typing import Callable, Union
+
+Ident = Union[int, uuid.UUID]
+IdGenerator = Callable[[], Ident]
+
+# Типы ID, для проверок isinstance
+IDENT_TYPES = (int, uuid.UUID)
+
+ID_EPOCH_MS = 1_577_836_800_000  # 01.01.2020 00:00:00 UTC
+SEQUENCE_BITS = 20
+
+
+class TimeOrderedIds:
+    """
+    Генератор монотонно возрастающих ID, упорядоченных по времени создания.
+    Если в одну миллисекунду создается больше 2^20 ID или системные часы
+    переводятся назад, генератор продолжает счет от последнего выданного ID
+    """
+
+    def __init__(self):
+        self.__last = 0
+        self.__lock = threading.Lock()
+
+    def __call__(self) -> int:
+        now = int(time.time() * 1000) - ID_EPOCH_MS
+        with self.__lock:
+            self.__last = max(now << SEQUENCE_BITS, self.__last + 1)
+            return self.__last
+
+
+def random_uuid() -> uuid.UUID:
+    """Генератор случайных UUID (uuid4)"""
+    return uuid.uuid4()
+
+
+class IdSource:
+    """Источник ID новых объектов с заменяемым генератором"""
+
+    def __init__(self, generator: IdGenerator):
+        self.__generator = generator
+
+    def set_generator(self, generator: IdGenerator):
+        """
+        Замена генератора ID новых объектов, например на random_uuid.
+        Объекты с ID разных видов могут храниться в одной базе данных
+        """
+        self.__generator = generator
+
+    def new_id(self) -> Ident:
+        """Получение ID для нового объекта"""
+        return self.__generator()
+
+
+IDS = IdSource(TimeOrderedIds())
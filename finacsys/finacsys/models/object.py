@@ -1,12 +1,54 @@
 """Модуль, содержащий в себе абстрактный класс модели объектов"""
-from uuid import UUID
-from typing import TypeVar
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from .display import DISPLAY_STATS
+from .ids import Ident
 
 
 class ObjectMeta:
-    """Абстрактный класс объекта базы данных"""
+    """
+    Абстрактный класс объекта базы данных. Модели хранят поля в __slots__,
+    а не в словаре экземпляра, поэтому наследник должен объявить __slots__
+    со своими полями. Слушатели хранятся в кортеже: у большинства объектов
+    один слушатель или ни одного, и пустой кортеж общий для всех объектов.
+
+    Строка представления (str) строится методом _format при первом
+    обращении и хранится до изменения любого поля объекта (см. _notify).
+    Если строка зависит от других объектов, наследник переопределяет
+    _display_valid
+    """
+
+    __slots__ = ("__listeners", "__display", "__weakref__")
+
+    def __init__(self):
+        self.__listeners: Tuple[Listener, ...] = ()
+        self.__display: Optional[str] = None
+
+    def __str__(self) -> str:
+        display = self.__display
+        if display is not None and self._display_valid():
+            DISPLAY_STATS.hits += 1
+            return display
+
+        DISPLAY_STATS.misses += 1
+        display = self.__display = self._format()
+        return display
+
+    def _format(self) -> str:
+        """
+        Построение строки представления. Класс-наследник должен
+        переопределить этот метод
+        """
+        raise NotImplementedError()
 
-    def get_id(self) -> UUID:
+    def _display_valid(self) -> bool:
+        """
+        Проверка, что сохраненная строка представления не устарела из-за
+        изменения других объектов
+        """
+        return True
+
+    def get_id(self) -> Ident:
         """Получение ID. Класс-наследник должен переопределить этот метод"""
         raise NotImplementedError()
 
@@ -16,5 +58,30 @@ class ObjectMeta:
         """
         raise NotImplementedError()
 
+    def add_listener(self, listener: "Listener"):
+        """Подписка на изменения объекта.
+
+        Слушатель вызывается после каждого изменения поля объекта с
+        аргументами (объект, название поля, старое значение, новое значение)
+        """
+        self.__listeners += (listener,)
+
+    def remove_listener(self, listener: "Listener"):
+        """Отписка от изменений объекта"""
+        if listener in self.__listeners:
+            listeners = list(self.__listeners)
+            listeners.remove(listener)
+            self.__listeners = tuple(listeners)
+
+    def _notify(self, field: str, old: Any, new: Any):
+        """
+        Оповещение слушателей об изменении поля объекта. Строка
+        представления строится заново при следующем обращении
+        """
+        self.__display = None
+        for listener in self.__listeners:
+            listener(self, field, old, new)
+
 
 Object = TypeVar("Object", bound=ObjectMeta)
+Listener = Callable[[ObjectMeta, str, Any, Any], None]
@@ -1,19 +1,47 @@
 """Модуль, содержащий в себе модель товара"""
-import uuid
-from typing import Set, List
+import sys
+from typing import Any, Optional, Set, List
 
-from .category import Category
+from finacsys.money import Money
+
+from .category import Category, category_mask
+from .ids import IDS, Ident
 from .object import ObjectMeta
 
 
 class Product(ObjectMeta):
-    """Класс, реализующий модель товара"""
-
-    def __init__(self, name: str, price: float, categories: list[Category]):
-        self.__name = name
-        self.__price = price
+    """
+    Класс, реализующий модель товара. Названия товаров интернируются, поэтому
+    одинаковые названия, загруженные из разных строк файла или базы данных,
+    хранятся в памяти один раз. Цена хранится целым числом копеек (см.
+    finacsys.money). Номер ревизии увеличивается при изменении названия или
+    цены, по нему статьи расходов товара узнают, что их строки
+    представления устарели
+    """
+
+    __slots__ = (
+        "__name",
+        "__price",
+        "__categories",
+        "__category_mask",
+        "__id",
+        "__revision",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        price: Any,
+        categories: list[Category],
+        ident: Optional[Ident] = None,
+    ):
+        super().__init__()
+        self.__name = sys.intern(name)
+        self.__price = Money.of(price).get_units()
         self.__categories = set(categories)
-        self.__id = uuid.uuid4()
+        self.__category_mask = category_mask(self.__categories)
+        self.__id = ident if ident is not None else IDS.new_id()
+        self.__revision = 0
 
     def get_name(self) -> str:
         """Получение имени товара"""
@@ -24,32 +52,57 @@ class Product(ObjectMeta):
         if len(name) == 0:
             raise ValueError("Name cannot be an empty string")
 
-        self.__name = name
+        old = self.__name
+        self.__name = sys.intern(name)
+        self.__revision += 1
+        self._notify("name", old, self.__name)
 
-    def get_price(self) -> float:
+    def get_price(self) -> Money:
         """Получение стоимости товара"""
+        return Money(self.__price)
+
+    def get_price_units(self) -> int:
+        """Получение стоимости товара в копейках"""
         return self.__price
 
-    def set_price(self, value: float):
+    def set_price(self, value: Any):
         """
-        Изменение стоимости товара. Новая стоимость не может быть меньше или равна нулю
+        Изменение стоимости товара. Новая стоимость не может быть меньше или
+        равна нулю. Значение приводится к Money (см. Money.of)
         """
-        if value <= 0:
+        price = Money.of(value)
+        if price.get_units() <= 0:
             raise ValueError("Price cannot be less than or equal to zero")
 
-        self.__price = value
+        old = self.get_price()
+        self.__price = price.get_units()
+        self.__revision += 1
+        self._notify("price", old, price)
 
-    def get_id(self) -> uuid.UUID:
+    def get_id(self) -> Ident:
         """Получение ID товара"""
         return self.__id
 
+    def get_revision(self) -> int:
+        """Получение номера ревизии названия и цены товара"""
+        return self.__revision
+
     def get_categories(self) -> Set[Category]:
         """Получение категорий товара"""
         return self.__categories
 
+    def get_category_mask(self) -> int:
+        """Получение маски категорий товара (см. category_mask)"""
+        return self.__category_mask
+
     def add_category(self, category: Category):
         """Добавление одной категории к категориям товара"""
+        if category in self.__categories:
+            return
+
         self.__categories.add(category)
+        self.__category_mask |= category.get_mask()
+        self._notify("categories", None, category)
 
     def add_categories(self, categories: List[Category]):
         """Добавление списка категорий к категориям товара"""
@@ -59,12 +112,17 @@ class Product(ObjectMeta):
 
     def remove_category(self, category: Category):
         """Удаление категории из категорий товара"""
+        if category not in self.__categories:
+            return
+
         self.__categories.discard(category)
+        self.__category_mask &= ~category.get_mask()
+        self._notify("categories", category, None)
 
     def remove_categories(self, categories: List[Category]):
         """Удаление списка категорий из категорий товара"""
         for category in categories:
             self.remove_category(category)
 
-    def __str__(self):
-        return f"{self.__id} | {self.__name} | {self.__price}"
+    def _format(self) -> str:
+        return f"{self.__id} | {self.__name} | {self.get_price()}"
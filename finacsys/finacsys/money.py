@@ -0,0 +1,180 @@
+"""
+Модуль, содержащий денежные суммы и количества товара с фиксированной
+точкой. Цена хранится целым числом копеек, количество — целым числом
+тысячных долей единицы товара.
+
+Стоимость статьи расхода — произведение этих чисел, то есть целое число
+стотысячных долей рубля. Суммы по любому числу статей расходов (в том числе
+в массивах NumPy) вычисляются точным целочисленным сложением таких
+произведений и округляются до копеек один раз, при выводе (см. round_total)
+"""
+import functools
+import math
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, TypeVar
+
+MONEY_SCALE = 100
+QUANTITY_SCALE = 1000
+
+Fixed = TypeVar("Fixed", bound="FixedPoint")
+
+
+@functools.total_ordering
+class FixedPoint:
+    """
+    Неизменяемое число с фиксированной точкой: целое число долей, SCALE
+    долей составляют единицу. Складываются и упорядочиваются только числа
+    одного типа. На равенство число также проверяется с int и float: float
+    сравнивается по своей десятичной записи, как в методе of, но без
+    округления, поэтому Money.parse("0.10") == 0.1, а Money.parse("1.00")
+    не равно 1.004
+    """
+
+    __slots__ = ("__units",)
+
+    SCALE = 1
+    # Число знаков после запятой и удаление незначащих нулей при выводе
+    DIGITS = 0
+    STRIP_ZEROS = False
+
+    def __init__(self, units: int):
+        self.__units = units
+
+    @classmethod
+    def parse(cls: type[Fixed], text: str) -> Fixed:
+        """
+        Разбор десятичной записи числа, в качестве разделителя допускается
+        запятая. Выбрасывает ValueError, если строка не является числом или
+        содержит больше знаков после запятой, чем позволяет SCALE
+        """
+        value = to_decimal(text)
+        units = value * cls.SCALE
+        if units != units.to_integral_value():
+            raise ValueError(f"{text!r} has too many decimal places")
+        return cls(int(units))
+
+    @classmethod
+    def of(cls: type[Fixed], value: Any) -> Fixed:
+        """
+        Приведение значения к числу с фиксированной точкой. Целые числа
+        задают число единиц, дробные округляются до долей, строки
+        разбираются методом parse
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, int):
+            return cls(value * cls.SCALE)
+        if isinstance(value, float):
+            units = to_decimal(repr(value)) * cls.SCALE
+            return cls(int(units.quantize(Decimal(1), ROUND_HALF_UP)))
+        return cls.parse(value)
+
+    def get_units(self) -> int:
+        """Получение числа долей"""
+        return self.__units
+
+    def __add__(self: Fixed, other: Any) -> Fixed:
+        if type(other) is not type(self):
+            return NotImplemented
+        return type(self)(self.__units + other.get_units())
+
+    def __radd__(self: Fixed, other: Any) -> Fixed:
+        # Начальное значение 0 функции sum
+        if isinstance(other, int) and other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self: Fixed, other: Any) -> Fixed:
+        if type(other) is not type(self):
+            return NotImplemented
+        return type(self)(self.__units - other.get_units())
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is type(self):
+            return self.__units == other.get_units()
+        if isinstance(other, bool):
+            return NotImplemented
+        if isinstance(other, int):
+            return self.__units == other * self.SCALE
+        if isinstance(other, float):
+            if not math.isfinite(other):
+                return False
+            return self.__units == to_decimal(repr(other)) * self.SCALE
+        return NotImplemented
+
+    def __lt__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.__units < other.get_units()
+
+    def __hash__(self) -> int:
+        # Хеш равных чисел int и float: частное — ближайший к числу float
+        return hash(self.__units / self.SCALE)
+
+    def __float__(self) -> float:
+        return self.__units / self.SCALE
+
+    def __str__(self) -> str:
+        whole, part = divmod(abs(self.__units), self.SCALE)
+        sign = "-" if self.__units < 0 else ""
+        digits = f"{part:0{self.DIGITS}}" if self.DIGITS else ""
+        if self.STRIP_ZEROS:
+            digits = digits.rstrip("0")
+        if digits:
+            return f"{sign}{whole}.{digits}"
+        return f"{sign}{whole}"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}('{self}')"
+
+
+class Money(FixedPoint):
+    """Денежная сумма в копейках. Выводится с двумя знаками после запятой"""
+
+    __slots__ = ()
+
+    SCALE = MONEY_SCALE
+    DIGITS = 2
+
+
+class Quantity(FixedPoint):
+    """
+    Количество товара в тысячных долях. Выводится без незначащих нулей
+    """
+
+    __slots__ = ()
+
+    SCALE = QUANTITY_SCALE
+    DIGITS = 3
+    STRIP_ZEROS = True
+
+
+def to_decimal(text: Any) -> Decimal:
+    """
+    Разбор конечного десятичного числа. Выбрасывает ValueError при
+    некорректной записи
+    """
+    try:
+        value = Decimal(str(text).replace(",", ".").strip())
+    except InvalidOperation as error:
+        raise ValueError(f"{text!r} is not a number") from error
+    if not value.is_finite():
+        raise ValueError(f"{text!r} is not a finite number")
+    return value
+
+
+def total_units(count: int, price: int) -> int:
+    """
+    Точная стоимость в стотысячных долях рубля по количеству в тысячных
+    долях и цене в копейках
+    """
+    return count * price
+
+
+def round_total(units: int) -> Money:
+    """
+    Округление стоимости в стотысячных долях рубля (см. total_units) до
+    копеек, половина округляется вверх
+    """
+    whole, rest = divmod(units, QUANTITY_SCALE)
+    return Money(whole + (1 if 2 * rest >= QUANTITY_SCALE else 0))
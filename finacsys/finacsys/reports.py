@@ -0,0 +1,76 @@
+"""
+Модуль, содержащий строки отчетов о расходах. Отчеты строятся по агрегатам
+базы данных (см. Database.get_aggregates), поэтому не требуют просмотра
+всех статей расходов
+"""
+from enum import Enum
+from typing import Any, List, Tuple
+
+import finacsys.config as cfg
+from finacsys.database import Database
+from finacsys.database.aggregates import Totals
+
+# Строка отчета: название группы и агрегат по ней
+Row = Tuple[str, Totals]
+
+
+class Grouping(Enum):
+    """Группировки статей расходов в отчете"""
+
+    OVERALL = "overall"
+    BY_CATEGORY = "category"
+    BY_PRODUCT = "product"
+    BY_DAY = "day"
+    BY_MONTH = "month"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+def category_name(database: Database, ident: Any) -> str:
+    """Название категории отчета. Категория могла быть удалена"""
+    category = database.categories.get(ident)
+    if category is None:
+        return "Удаленная категория"
+    return category.get_name()
+
+
+def product_name(database: Database, ident: Any) -> str:
+    """Название и цена товара отчета"""
+    product = database.get_aggregates().get_product(ident)
+    return f"{product.get_name()} ({product.get_price()})"
+
+
+def report_rows(database: Database, grouping: Grouping) -> List[Row]:
+    """
+    Строки отчета. Категории и товары упорядочены по убыванию суммы, дни и
+    месяцы — по возрастанию
+    """
+    aggregates = database.get_aggregates()
+
+    if grouping == Grouping.OVERALL:
+        return [("Все расходы", aggregates.overall)]
+    if grouping == Grouping.BY_CATEGORY:
+        rows = [
+            (category_name(database, ident), totals)
+            for ident, totals in aggregates.categories.items()
+        ]
+        return sorted(rows, key=lambda row: -row[1].total)
+    if grouping == Grouping.BY_PRODUCT:
+        rows = [
+            (product_name(database, ident), totals)
+            for ident, totals in aggregates.products.items()
+        ]
+        return sorted(rows, key=lambda row: -row[1].total)
+    if grouping == Grouping.BY_DAY:
+        return [
+            (day.strftime(cfg.DATE_FORMAT), aggregates.days[day])
+            for day in sorted(aggregates.days)
+        ]
+    if grouping == Grouping.BY_MONTH:
+        return [
+            (f"{month:02}.{year}", aggregates.months[(year, month)])
+            for year, month in sorted(aggregates.months)
+        ]
+
+    raise NotImplementedError()
@@ -0,0 +1,7 @@
+"""
+Модуль, содержащий локальный HTTP-сервер JSON API базы данных (см.
+finacsys.server.api). Запуск: python -m finacsys.server [хост] [порт]
+"""
+from .api import Api
+from .protocol import HttpError, Request, start_server
+from .server import run
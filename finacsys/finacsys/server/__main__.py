@@ -0,0 +1,25 @@
+"""
+Запуск сервера JSON API для базы данных из настроек (см. finacsys.app).
+
+Запуск: python -m finacsys.server [хост] [порт]
+"""
+import sys
+
+import finacsys.config as cfg
+from finacsys.app import configure_ids, open_database
+
+from .server import run
+
+
+def main():
+    """Запуск сервера"""
+    host = sys.argv[1] if len(sys.argv) > 1 else cfg.SERVER_HOST
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else cfg.SERVER_PORT
+
+    configure_ids()
+    print(f"Сервер запущен: http://{host}:{port}")
+    run(open_database(), host, port)
+
+
+if __name__ == "__main__":
+    main()
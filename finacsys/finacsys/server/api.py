@@ -0,0 +1,559 @@
+"""
+Модуль, содержащий JSON API базы данных:
+
+- GET /categories, /products, /expenses — списки с фильтрами, сортировкой и
+  постраничной выдачей;
+- POST /categories, /products, /expenses — добавление (в /expenses можно
+  передать список статей расходов);
+- GET, PATCH, DELETE /<таблица>/<ID> — получение, изменение и удаление
+  одного объекта. Удаление категории или товара выполняется по политике
+  базы данных или по политике из параметра policy (restrict, cascade,
+  detach, tombstone, см. finacsys.database.integrity); если удаление
+  запрещено, возвращается 409 Conflict;
+- GET /aggregates?by=overall|category|product|day|month — отчеты.
+
+Список выдается страницами по limit объектов. Первая страница запоминает
+найденные ID и представление базы данных (см. Database.view) и возвращает
+метку next, по которой выдаются следующие страницы. Поэтому все страницы
+одного списка согласованы между собой, даже если база данных изменилась.
+Деньги и количества передаются строками, дата и время — в формате ISO 8601
+"""
+import datetime as dt
+import itertools
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from finacsys.database import (
+    Database,
+    DatabaseView,
+    DeletePlan,
+    DeletePolicy,
+    ExpenseFinder,
+    IntegrityError,
+    ProductFinder,
+)
+from finacsys.database.records import decode_id
+from finacsys.filters import DateFilter, TimeFilter
+from finacsys.models import Category, Expense, Ident, ObjectMeta, Product
+from finacsys.money import Money, Quantity, round_total
+from finacsys.sorting import (
+    CATEGORY_SORT_KEYS,
+    EXPENSE_SORT_KEYS,
+    PRODUCT_SORT_KEYS,
+    parse_sort,
+    sort_objects,
+)
+
+from .protocol import HttpError, Request, Response
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Число списков, страницы которых можно запросить по метке next
+CURSORS_COUNT = 256
+
+Json = Dict[str, Any]
+
+
+def category_to_json(category: Category) -> Json:
+    """Представление категории в JSON"""
+    return {"id": str(category.get_id()), "name": category.get_name()}
+
+
+def product_to_json(product: Product) -> Json:
+    """Представление товара в JSON"""
+    return {
+        "id": str(product.get_id()),
+        "name": product.get_name(),
+        "price": str(product.get_price()),
+        "categories": [
+            str(category.get_id()) for category in product.get_categories()
+        ],
+    }
+
+
+def expense_to_json(expense: Expense) -> Json:
+    """Представление статьи расхода в JSON"""
+    return {
+        "id": str(expense.get_id()),
+        "product": str(expense.get_product_id()),
+        "name": expense.get_name(),
+        "count": str(expense.get_count()),
+        "price": str(expense.get_price()),
+        "total": str(expense.get_total_price()),
+        "created_at": expense.get_datetime().isoformat(),
+    }
+
+
+def parse_id(value: Any) -> Ident:
+    """Разбор ID из строки запроса или тела"""
+    try:
+        return decode_id(str(value))
+    except ValueError as error:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Bad ID: {value}") from error
+
+
+def parse_name(value: Any) -> str:
+    """Разбор непустого названия"""
+    name = str(value)
+    if len(name) == 0:
+        raise ValueError("Name cannot be an empty string")
+    return name
+
+
+def parse_positive(value: Any, kind: Any, field: str) -> Any:
+    """Разбор положительной цены (kind=Money) или количества (Quantity)"""
+    number = kind.parse(str(value))
+    if number.get_units() <= 0:
+        raise ValueError(f"{field} must be positive")
+    return number
+
+
+class Cursor:
+    """Найденные ID списка и представление, из которого выдаются страницы"""
+
+    def __init__(
+        self,
+        view: DatabaseView,
+        idents: List[Ident],
+        load: Callable[[DatabaseView, Ident], ObjectMeta],
+        to_json: Callable[[Any], Json],
+        extra: Json,
+    ):
+        self.view = view
+        self.idents = idents
+        self.load = load
+        self.to_json = to_json
+        self.extra = extra
+
+
+class Cursors:
+    """
+    Метки следующих страниц: метка -> список и номер первого объекта
+    страницы. Хранятся последние CURSORS_COUNT меток
+    """
+
+    def __init__(self, capacity: int = CURSORS_COUNT):
+        self.__capacity = capacity
+        self.__pages: "OrderedDict[str, Tuple[Cursor, int]]" = OrderedDict()
+        self.__tokens = itertools.count(1)
+        self.__lock = threading.Lock()
+
+    def add(self, cursor: Cursor, offset: int) -> str:
+        """Сохранение страницы списка. Возвращает ее метку"""
+        with self.__lock:
+            token = f"p{next(self.__tokens)}"
+            self.__pages[token] = (cursor, offset)
+            if len(self.__pages) > self.__capacity:
+                self.__pages.popitem(last=False)
+        return token
+
+    def get(self, token: str) -> Tuple[Cursor, int]:
+        """
+        Получение страницы списка по метке. Выбрасывает HttpError (410
+        Gone), если метка забыта
+        """
+        with self.__lock:
+            page = self.__pages.get(token)
+            if page is None:
+                raise HttpError(HTTPStatus.GONE, "Cursor has expired")
+        return page
+
+
+class Api:
+    """
+    Обработчик запросов JSON API (см. finacsys.server.protocol.Handler).
+    Чтения выполняются под блокировкой базы данных на чтение, изменения —
+    в транзакции, поэтому запросы можно обрабатывать в нескольких потоках
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.cursors = Cursors()
+
+    def __call__(self, request: Request) -> Response:
+        parts = [part for part in request.path.split("/") if part]
+        if parts == ["aggregates"] and request.method == "GET":
+            return HTTPStatus.OK, self.__aggregates(request)
+        if not parts or parts[0] not in ("categories", "products", "expenses"):
+            raise HttpError(HTTPStatus.NOT_FOUND, "Unknown resource")
+        if len(parts) > 2:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Unknown resource")
+
+        resource = parts[0]
+        if len(parts) == 1:
+            if request.method == "GET":
+                return HTTPStatus.OK, self.__list(resource, request)
+            if request.method == "POST":
+                return HTTPStatus.CREATED, self.__create(resource, request)
+        else:
+            ident = parse_id(parts[1])
+            if request.method == "GET":
+                return HTTPStatus.OK, self.__get(resource, ident)
+            if request.method == "PATCH":
+                return HTTPStatus.OK, self.__change(resource, ident, request)
+            if request.method == "DELETE":
+                return HTTPStatus.OK, self.__delete(resource, ident, request)
+
+        raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed")
+
+    def __lookup(self, table: Any, ident: Ident, status: HTTPStatus) -> Any:
+        obj = table.get(ident)
+        if obj is None:
+            raise HttpError(status, f"Object not found: {ident}")
+        return obj
+
+    def __category(self, ident: Any) -> Category:
+        return self.__lookup(
+            self.database.categories,
+            parse_id(ident),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    def __product(self, ident: Any) -> Product:
+        return self.__lookup(
+            self.database.products, parse_id(ident), HTTPStatus.BAD_REQUEST
+        )
+
+    def __table(self, resource: str) -> Any:
+        if resource == "categories":
+            return self.database.categories
+        if resource == "products":
+            return self.database.products
+        return self.database.expenses
+
+    # Чтение
+
+    def __get(self, resource: str, ident: Ident) -> Json:
+        with self.database.lock.read():
+            obj = self.__lookup(
+                self.__table(resource), ident, HTTPStatus.NOT_FOUND
+            )
+            return self.__to_json(resource, obj)
+
+    def __to_json(self, resource: str, obj: Any) -> Json:
+        if resource == "categories":
+            return category_to_json(obj)
+        if resource == "products":
+            return product_to_json(obj)
+        return expense_to_json(obj)
+
+    def __list(self, resource: str, request: Request) -> Json:
+        limit = self.__limit(request)
+        token = request.param("next")
+        if token:
+            return self.__page(*self.cursors.get(token), limit)
+
+        with self.database.lock.read():
+            view = self.database.view()
+            extra: Json = {}
+            if resource == "categories":
+                objects: List[Any] = self.database.get_categories_list()
+                sort_objects(
+                    objects,
+                    parse_sort(request.param("sort"), CATEGORY_SORT_KEYS),
+                )
+                cursor = Cursor(
+                    view,
+                    [obj.get_id() for obj in objects],
+                    DatabaseView.get_category,
+                    category_to_json,
+                    extra,
+                )
+            elif resource == "products":
+                objects = self.__find_products(request)
+                sort_objects(
+                    objects,
+                    parse_sort(request.param("sort"), PRODUCT_SORT_KEYS),
+                )
+                cursor = Cursor(
+                    view,
+                    [obj.get_id() for obj in objects],
+                    DatabaseView.get_product,
+                    product_to_json,
+                    extra,
+                )
+            else:
+                objects, total = self.__find_expenses(request)
+                sort_objects(
+                    objects,
+                    parse_sort(request.param("sort"), EXPENSE_SORT_KEYS),
+                )
+                extra["total_price"] = str(total)
+                cursor = Cursor(
+                    view,
+                    [obj.get_id() for obj in objects],
+                    DatabaseView.get_expense,
+                    expense_to_json,
+                    extra,
+                )
+
+        return self.__page(cursor, 0, limit)
+
+    def __limit(self, request: Request) -> int:
+        try:
+            limit = int(request.param("limit") or PAGE_SIZE)
+        except ValueError as error:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Bad limit") from error
+        return max(1, min(limit, MAX_PAGE_SIZE))
+
+    def __page(self, cursor: Cursor, offset: int, limit: int) -> Json:
+        end = offset + limit
+        next_token = None
+        if end < len(cursor.idents):
+            next_token = self.cursors.add(cursor, end)
+
+        result = {
+            "items": [
+                cursor.to_json(cursor.load(cursor.view, ident))
+                for ident in cursor.idents[offset:end]
+            ],
+            "count": len(cursor.idents),
+            "offset": offset,
+            "next": next_token,
+        }
+        result.update(cursor.extra)
+        return result
+
+    def __find_products(self, request: Request) -> List[Product]:
+        finder = ProductFinder(self.database)
+        included = request.params("category")
+        if included:
+            finder.only_included_categories(
+                [self.__category(ident) for ident in included]
+            )
+        excluded = request.params("exclude_category")
+        if excluded:
+            finder.exclude_categories(
+                [self.__category(ident) for ident in excluded]
+            )
+        return list(finder.filtered_products)
+
+    def __find_expenses(self, request: Request) -> Tuple[List[Expense], Money]:
+        finder = ExpenseFinder(self.database)
+
+        products = request.params("product")
+        if products:
+            finder.filtered_expenses = self.database.expenses_with_products(
+                [self.__product(ident) for ident in products]
+            )
+
+        included = request.params("category")
+        if included:
+            finder.only_included_categories(
+                [self.__category(ident) for ident in included]
+            )
+        excluded = request.params("exclude_category")
+        if excluded:
+            finder.exclude_categories(
+                [self.__category(ident) for ident in excluded]
+            )
+
+        date = request.param("date")
+        if date:
+            finder.set_date_filter(
+                self.__filter(DateFilter, request.param("date_filter")),
+                dt.date.fromisoformat(date),
+            )
+        time = request.param("time")
+        if time:
+            finder.set_time_filter(
+                self.__filter(TimeFilter, request.param("time_filter")),
+                dt.time.fromisoformat(time),
+            )
+
+        start, end = request.param("from"), request.param("to")
+        if start or end:
+            finder.set_datetime_range(
+                dt.datetime.fromisoformat(start) if start else None,
+                dt.datetime.fromisoformat(end) if end else None,
+            )
+
+        return list(finder.filtered_expenses), finder.total_price()
+
+    def __filter(self, kind: Any, value: Optional[str]) -> Any:
+        try:
+            return kind[(value or "eq").upper()]
+        except KeyError as error:
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST, f"Unknown filter: {value}"
+            ) from error
+
+    def __aggregates(self, request: Request) -> Json:
+        by = request.param("by", "overall")
+        with self.database.lock.read():
+            aggregates = self.database.get_aggregates()
+            if by == "overall":
+                rows = [("Все расходы", aggregates.overall)]
+            elif by == "category":
+                rows = [
+                    (self.__category_name(ident), totals)
+                    for ident, totals in aggregates.categories.items()
+                ]
+            elif by == "product":
+                rows = [
+                    (aggregates.get_product(ident).get_name(), totals)
+                    for ident, totals in aggregates.products.items()
+                ]
+            elif by == "day":
+                rows = [
+                    (day.isoformat(), aggregates.days[day])
+                    for day in sorted(aggregates.days)
+                ]
+            elif by == "month":
+                rows = [
+                    (f"{year}-{month:02}", aggregates.months[(year, month)])
+                    for year, month in sorted(aggregates.months)
+                ]
+            else:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown by: {by}")
+
+            items = [
+                {
+                    "name": name,
+                    "count": totals.count,
+                    "total": str(round_total(totals.total)),
+                }
+                for name, totals in rows
+            ]
+        return {"items": items, "count": len(items)}
+
+    def __category_name(self, ident: Ident) -> str:
+        category = self.database.categories.get(ident)
+        if category is None:
+            return "Удаленная категория"
+        return category.get_name()
+
+    # Изменение
+
+    def __body(self, request: Request) -> Json:
+        body = request.json()
+        if not isinstance(body, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Expected JSON object")
+        return body
+
+    def __field(self, body: Json, name: str) -> Any:
+        if name not in body:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Missing field: {name}")
+        return body[name]
+
+    def __create(self, resource: str, request: Request) -> Any:
+        with self.database.transaction():
+            if resource == "categories":
+                body = self.__body(request)
+                category = Category(parse_name(self.__field(body, "name")))
+                self.database.add_category(category)
+                return category_to_json(category)
+
+            if resource == "products":
+                body = self.__body(request)
+                product = Product(
+                    parse_name(self.__field(body, "name")),
+                    parse_positive(
+                        self.__field(body, "price"), Money, "price"
+                    ),
+                    [
+                        self.__category(ident)
+                        for ident in body.get("categories", [])
+                    ],
+                )
+                self.database.add_product(product)
+                return product_to_json(product)
+
+            body = request.json()
+            batch = body if isinstance(body, list) else [body]
+            expenses = [self.__new_expense(item) for item in batch]
+            self.database.add_expenses(expenses)
+            if isinstance(body, list):
+                return {"items": [expense_to_json(e) for e in expenses]}
+            return expense_to_json(expenses[0])
+
+    def __new_expense(self, body: Any) -> Expense:
+        if not isinstance(body, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Expected JSON object")
+
+        created_at = body.get("created_at")
+        return Expense(
+            self.__product(self.__field(body, "product")),
+            parse_positive(self.__field(body, "count"), Quantity, "count"),
+            dt.datetime.fromisoformat(created_at)
+            if created_at
+            else dt.datetime.now(),
+        )
+
+    def __change(self, resource: str, ident: Ident, request: Request) -> Json:
+        body = self.__body(request)
+        with self.database.transaction():
+            obj = self.__lookup(
+                self.__table(resource), ident, HTTPStatus.NOT_FOUND
+            )
+            if resource == "categories":
+                self.__change_category(obj, body)
+            elif resource == "products":
+                self.__change_product(obj, body)
+            else:
+                self.__change_expense(obj, body)
+            return self.__to_json(resource, obj)
+
+    def __change_category(self, category: Category, body: Json):
+        if "name" in body:
+            category.set_name(str(body["name"]))
+
+    def __change_product(self, product: Product, body: Json):
+        if "name" in body:
+            product.set_name(str(body["name"]))
+        if "price" in body:
+            product.set_price(parse_positive(body["price"], Money, "price"))
+        if "categories" in body:
+            categories = [
+                self.__category(ident) for ident in body["categories"]
+            ]
+            product.remove_categories(
+                [c for c in product.get_categories() if c not in categories]
+            )
+            product.add_categories(categories)
+
+    def __change_expense(self, expense: Expense, body: Json):
+        if "count" in body:
+            expense.set_count(parse_positive(body["count"], Quantity, "count"))
+        if "created_at" in body:
+            expense.set_datetime(dt.datetime.fromisoformat(body["created_at"]))
+        if "product" in body:
+            expense.set_product(self.__product(body["product"]))
+
+    def __delete(self, resource: str, ident: Ident, request: Request) -> Json:
+        policy = self.__policy(request.param("policy"))
+        plan = DeletePlan()
+        try:
+            with self.database.transaction():
+                obj = self.__lookup(
+                    self.__table(resource), ident, HTTPStatus.NOT_FOUND
+                )
+                if resource == "categories":
+                    plan = self.database.delete_categories([obj], policy)
+                elif resource == "products":
+                    plan = self.database.delete_products([obj], policy)
+                else:
+                    self.database.delete_expense(obj)
+        except IntegrityError as error:
+            raise HttpError(HTTPStatus.CONFLICT, str(error)) from error
+        except ValueError as error:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(error)) from error
+
+        return {
+            "id": str(ident),
+            "products": len(plan.products),
+            "expenses": len(plan.expenses),
+            "tombstones": len(plan.tombstones),
+        }
+
+    def __policy(self, value: Optional[str]) -> Optional[DeletePolicy]:
+        if value is None:
+            return None
+        try:
+            return DeletePolicy[value.upper()]
+        except KeyError as error:
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST, f"Unknown policy: {value}"
+            ) from error
@@ -0,0 +1,250 @@
+"""
+Модуль, содержащий минимальный сервер HTTP/1.1 на asyncio для JSON API.
+
+Соединения поддерживаются открытыми (keep-alive), пока клиент не попросит
+закрыть соединение или не будет молчать дольше KEEP_ALIVE_TIMEOUT. Запросы
+одного соединения читаются и выполняются по порядку, а ответы записываются
+без ожидания следующего запроса, поэтому клиент может отправлять запросы
+конвейером (pipelining), не дожидаясь ответов. Обработчик вызывается в пуле
+потоков, чтобы долгий запрос не останавливал остальные соединения
+"""
+import asyncio
+import json
+import logging
+from concurrent.futures import Executor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Ограничения размера запроса в байтах
+MAX_HEAD_SIZE = 64 * 1024
+MAX_BODY_SIZE = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0
+
+logger = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    """Ошибка запроса, которая возвращается клиенту с кодом status"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """Запрос HTTP: метод, путь, параметры строки запроса и тело"""
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        headers: Dict[str, str],
+        body: bytes,
+    ):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def param(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Последнее значение параметра строки запроса"""
+        values = self.query.get(name)
+        return values[-1] if values else default
+
+    def params(self, name: str) -> List[str]:
+        """Все значения параметра строки запроса"""
+        return self.query.get(name, [])
+
+    def json(self) -> Any:
+        """Тело запроса в формате JSON. Пустое тело равно None"""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError as error:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(error)) from error
+
+
+Response = Tuple[HTTPStatus, Any]
+Handler = Callable[[Request], Response]
+
+
+def parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """
+    Разбор строки запроса и заголовков. Возвращает метод, цель запроса,
+    версию протокола и заголовки с именами в нижнем регистре
+    """
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+    except ValueError as error:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Bad request line") from error
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Bad header line")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def keep_alive(version: str, headers: Dict[str, str]) -> bool:
+    """
+    Проверка, остается ли соединение открытым после ответа. В HTTP/1.1
+    соединение по умолчанию открыто, в HTTP/1.0 — закрыто
+    """
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.1":
+        return connection != "close"
+    return connection == "keep-alive"
+
+
+async def read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[Request, bool]]:
+    """
+    Чтение одного запроса. Возвращает запрос и признак keep-alive или None,
+    если клиент закрыл соединение между запросами
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as error:
+        if error.partial.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Truncated request")
+        return None
+    except asyncio.LimitOverrunError as error:
+        raise HttpError(
+            HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Head is too large"
+        ) from error
+
+    method, target, version, headers = parse_head(head)
+    if "transfer-encoding" in headers:
+        raise HttpError(
+            HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding is not supported"
+        )
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError as error:
+        raise HttpError(
+            HTTPStatus.BAD_REQUEST, "Bad Content-Length"
+        ) from error
+    if length < 0 or length > MAX_BODY_SIZE:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Bad body size")
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError as error:
+        # Клиент закрыл соединение, не передав тело целиком
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Truncated request") from error
+
+    parts = urlsplit(target)
+    request = Request(
+        method.upper(),
+        unquote(parts.path),
+        parse_qs(parts.query, keep_blank_values=True),
+        headers,
+        body,
+    )
+    return request, keep_alive(version, headers)
+
+
+def encode_response(status: HTTPStatus, payload: Any, alive: bool) -> bytes:
+    """Ответ HTTP с телом в формате JSON"""
+    body = b""
+    if payload is not None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode()
+
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if alive else 'close'}",
+    ]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+def error_payload(message: str) -> Dict[str, str]:
+    """Тело ответа с ошибкой"""
+    return {"error": message}
+
+
+def call(handler: Handler, request: Request) -> Response:
+    """
+    Вызов обработчика. Ошибки превращаются в ответы: HttpError — в ответ с
+    ее кодом, ValueError (например, отрицательная цена) — в 400, остальные
+    исключения — в 500
+    """
+    try:
+        return handler(request)
+    except HttpError as error:
+        return error.status, error_payload(error.message)
+    except ValueError as error:
+        return HTTPStatus.BAD_REQUEST, error_payload(str(error))
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed %s %s", request.method, request.path)
+        return HTTPStatus.INTERNAL_SERVER_ERROR, error_payload("Server error")
+
+
+async def serve_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    handler: Handler,
+    executor: Optional[Executor] = None,
+):
+    """Обслуживание одного соединения до его закрытия"""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                parsed = await asyncio.wait_for(
+                    read_request(reader), KEEP_ALIVE_TIMEOUT
+                )
+            except HttpError as error:
+                payload = error_payload(error.message)
+                writer.write(encode_response(error.status, payload, False))
+                break
+            if parsed is None:
+                break
+
+            request, alive = parsed
+            status, payload = await loop.run_in_executor(
+                executor, call, handler, request
+            )
+            writer.write(encode_response(status, payload, alive))
+            # Буфер записи опустошается, только если он переполнен, поэтому
+            # ответы на запросы конвейера не ждут друг друга
+            await writer.drain()
+            if not alive:
+                break
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(
+    handler: Handler,
+    host: str,
+    port: int,
+    executor: Optional[Executor] = None,
+) -> asyncio.AbstractServer:
+    """
+    Запуск сервера. Запросы передаются обработчику handler, который
+    вызывается в пуле потоков executor (по умолчанию — пуле цикла событий)
+    """
+
+    async def on_connection(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        await serve_connection(reader, writer, handler, executor)
+
+    return await asyncio.start_server(
+        on_connection, host, port, limit=MAX_HEAD_SIZE
+    )
@@ -0,0 +1,33 @@
+"""Модуль, содержащий запуск сервера JSON API"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from finacsys.database import Database
+
+from .api import Api
+from .protocol import start_server
+
+# Число потоков, выполняющих запросы. Чтения выполняются параллельно,
+# изменения — по одному (см. Database.lock)
+WORKERS_COUNT = 8
+
+
+async def serve(database: Database, host: str, port: int):
+    """Обслуживание запросов к базе данных до отмены задачи"""
+    with ThreadPoolExecutor(WORKERS_COUNT) as executor:
+        server = await start_server(Api(database), host, port, executor)
+        async with server:
+            await server.serve_forever()
+
+
+def run(database: Database, host: str, port: int):
+    """
+    Запуск сервера в текущем потоке до прерывания (Ctrl+C). База данных
+    закрывается после остановки сервера
+    """
+    try:
+        asyncio.run(serve(database, host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.close()
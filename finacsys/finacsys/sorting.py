@@ -0,0 +1,57 @@
+"""
+Модуль, содержащий сортировку списков по ключам, заданным строкой вида
+"-total,name": ключи через запятую, первый ключ главный, минус перед
+ключом означает сортировку по убыванию. Используется JSON API и командной
+строкой
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from finacsys.models import Category, Expense, Product
+
+SortKey = Callable[[Any], Any]
+
+EXPENSE_SORT_KEYS: Dict[str, Callable[[Expense], Any]] = {
+    "date": lambda expense: expense.get_day(),
+    "time": lambda expense: expense.get_time_micros(),
+    "datetime": lambda expense: expense.get_timestamp(),
+    "price": lambda expense: expense.get_product().get_price_units(),
+    "total": lambda expense: expense.get_total_units(),
+    "count": lambda expense: expense.get_count_units(),
+    "name": lambda expense: expense.get_name(),
+}
+PRODUCT_SORT_KEYS: Dict[str, Callable[[Product], Any]] = {
+    "price": lambda product: product.get_price_units(),
+    "name": lambda product: product.get_name(),
+}
+CATEGORY_SORT_KEYS: Dict[str, Callable[[Category], Any]] = {
+    "name": lambda category: category.get_name(),
+}
+
+
+def parse_sort(
+    value: Optional[str], keys: Dict[str, SortKey]
+) -> List[Tuple[SortKey, bool]]:
+    """
+    Разбор строки сортировки в список пар (ключ, по убыванию).
+    Выбрасывает ValueError, если ключ неизвестен
+    """
+    if not value:
+        return []
+
+    order = []
+    for name in value.split(","):
+        reverse = name.startswith("-")
+        key = keys.get(name.lstrip("-"))
+        if key is None:
+            raise ValueError(f"Unknown sort: {name}")
+        order.append((key, reverse))
+    return order
+
+
+def sort_objects(objects: List[Any], order: List[Tuple[SortKey, bool]]):
+    """
+    Сортировка по ключам order. Сортировки устойчивы, поэтому ключи
+    применяются от последнего к главному
+    """
+    for key, reverse in reversed(order):
+        objects.sort(key=key, reverse=reverse)
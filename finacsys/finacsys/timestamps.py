@@ -0,0 +1,70 @@
+"""
+Модуль, содержащий преобразования даты и времени в целые числа. Целые
+отметки времени дешевле сравнивать и хранить, чем объекты datetime, поэтому
+они используются в моделях, фильтрах, индексах и колоночных файлах. Дата
+отметки — номер дня с 01.01.1970 (value // DAY), время суток — число
+микросекунд с начала суток (value % DAY)
+"""
+import datetime as dt
+
+import finacsys.config as cfg
+
+EPOCH = dt.datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+MICROSECOND = dt.timedelta(microseconds=1)
+DAY = 24 * 60 * 60 * 1_000_000
+
+
+def to_timestamp(value: dt.datetime) -> int:
+    """Преобразование даты и времени в число микросекунд с 01.01.1970"""
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_timestamp(value: int) -> dt.datetime:
+    """Преобразование числа микросекунд с 01.01.1970 в дату и время"""
+    return EPOCH + dt.timedelta(microseconds=value)
+
+
+def time_to_micros(value: dt.time) -> int:
+    """Преобразование времени суток в число микросекунд с начала суток"""
+    seconds = value.hour * 3600 + value.minute * 60 + value.second
+    return seconds * 1_000_000 + value.microsecond
+
+
+def micros_to_time(value: int) -> dt.time:
+    """Преобразование числа микросекунд с начала суток во время суток"""
+    seconds, microsecond = divmod(value, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return dt.time(hour, minute, second, microsecond)
+
+
+def date_to_day(value: dt.date) -> int:
+    """Преобразование даты в номер дня с 01.01.1970"""
+    return (value - EPOCH_DATE).days
+
+
+def day_to_date(value: int) -> dt.date:
+    """Преобразование номера дня с 01.01.1970 в дату"""
+    return EPOCH_DATE + dt.timedelta(days=value)
+
+
+def date_to_timestamp(value: dt.date) -> int:
+    """Отметка времени начала суток"""
+    return date_to_day(value) * DAY
+
+
+def parse_date(text: str) -> dt.date:
+    """
+    Разбор даты в формате, указанном в finacsys.config. Выбрасывает
+    ValueError, если строка не соответствует формату
+    """
+    return dt.datetime.strptime(text.strip(), cfg.DATE_FORMAT).date()
+
+
+def parse_time(text: str) -> dt.time:
+    """
+    Разбор времени в формате, указанном в finacsys.config. Выбрасывает
+    ValueError, если строка не соответствует формату
+    """
+    return dt.datetime.strptime(text.strip(), cfg.TIME_FORMAT).time()
@@ -1,10 +1,11 @@
 """Модуль, содержащий в себе различные валидаторы"""
 from pathlib import Path
-import datetime as dt
+from typing import Callable
 from InquirerPy.validator import Validator, ValidationError
 from prompt_toolkit.document import Document
 
-import finacsys.config as cfg
+from finacsys.money import FixedPoint, Money
+from finacsys.timestamps import parse_date, parse_time
 
 
 class DateValidator(Validator):
@@ -19,7 +20,7 @@ class DateValidator(Validator):
 
     def validate(self, document: Document):
         try:
-            dt.datetime.strptime(document.text.strip(), cfg.DATE_FORMAT)
+            parse_date(document.text)
         except ValueError as error:
             raise ValidationError(
                 message=self.message, cursor_position=document.cursor_position
@@ -38,7 +39,7 @@ class TimeValidator(Validator):
 
     def validate(self, document: Document) -> None:
         try:
-            dt.datetime.strptime(document.text.strip(), cfg.TIME_FORMAT)
+            parse_time(document.text)
         except ValueError as error:
             raise ValidationError(
                 message=self.message,
@@ -72,16 +73,23 @@ class FileValidator(Validator):
 
 class NumberValidator(Validator):
     """Проверяет число на натуральность. Число может быть как целым, так и
-    дробным. Число может равняться нулю.
+    дробным. Число может равняться нулю. Число разбирается функцией parse
+    (Money.parse или Quantity.parse, см. finacsys.money), поэтому число
+    знаков после запятой не может превышать точность значения
     """
 
-    def __init__(self, message: str = "Цена должна быть натуральным числом"):
+    def __init__(
+        self,
+        message: str = "Цена должна быть натуральным числом",
+        parse: Callable[[str], FixedPoint] = Money.parse,
+    ):
         self.message = message
+        self.parse = parse
 
     def validate(self, document: Document):
         try:
-            number = float(document.text)
-            if number < 0:
+            number = self.parse(document.text)
+            if number.get_units() < 0:
                 raise ValueError()
         except ValueError as error:
             raise ValidationError(
@@ -1,5 +1,16 @@
-"""Модуль, содержащий в себе реализиции CLI-фронтендов"""
-from .category import CategoryViewer
-from .database import DatabaseViewer
-from .product import ProductViewer
-from .expense import ExpenseViewer
+"""
+Модуль, содержащий в себе реализиции CLI-фронтендов. Фронтенды
+импортируются при первом обращении (см. finacsys.lazy), поэтому импорт
+одного фронтенда не загружает остальные
+"""
+from finacsys.lazy import lazy_names
+
+__getattr__ = lazy_names(
+    __name__,
+    {
+        "CategoryViewer": ".category",
+        "DatabaseViewer": ".database",
+        "ProductViewer": ".product",
+        "ExpenseViewer": ".expense",
+    },
+)
@@ -3,6 +3,7 @@
 from enum import Enum
 from typing import List
 
+from finacsys.database import DeletePolicy
 from finacsys.models import Category
 
 from ..viewer import Viewer
@@ -14,6 +15,7 @@ class Action(Enum):
     EXIT = "Назад"
     CLEAR = "Убрать категорию из всех товаров"
     FULL = "Убрать категорию из всех товаров и удалить"
+    CASCADE = "Удалить категорию вместе с ее товарами"
 
     def __str__(self) -> str:
         return self.value
@@ -44,4 +46,9 @@ class CategoryDeleterViewer(Viewer):
         if action == Action.CLEAR:
             self.database.reset_categories(categories)
         elif action == Action.FULL:
-            self.database.delete_categories(categories)
+            self.database.delete_categories(categories, DeletePolicy.DETACH)
+        elif action == Action.CASCADE:
+            plan = self.database.delete_categories(
+                categories, DeletePolicy.CASCADE
+            )
+            print(f"Удалено {plan}")
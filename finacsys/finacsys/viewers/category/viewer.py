@@ -3,19 +3,21 @@
 для взаимодействия с категориям
 """
 
+import sys
 from enum import Enum
 from typing import List
 
 from finacsys.database import Database
 from finacsys.models import Category
 from finacsys.viewers.utils import confirm_sort
-from finacsys.viewers.fs import write_to_file, confirm_write_to_file
+from finacsys.export import export
+from finacsys.viewers.fs import export_to_file, confirm_write_to_file
 
 from ..viewer import Viewer
 from .changer import CategoryChangerViewer
 from .deleter import CategoryDeleterViewer
 from .sorter import CategorySorterViewer
-from .utils import make_table
+from .utils import COLUMNS
 
 
 class Command(Enum):
@@ -63,10 +65,9 @@ class CategoryViewer(Viewer):
         if confirm_sort():
             categories = self.__sorter.attach(categories)
 
-        table = make_table(categories)
         if confirm_write_to_file():
-            write_to_file(table)
-        print(table)
+            export_to_file(COLUMNS, categories)
+        export(sys.stdout, COLUMNS, categories)
 
     def __print_categories(self, categories: List[Category]):
         if len(categories) == 0:
@@ -3,11 +3,14 @@ from enum import Enum
 from typing import List
 
 from finacsys.database import Database
+from finacsys.importer import ExpenseImporter
 
 from .viewer import Viewer
+from . import fs
 from .product import ProductViewer
 from .category import CategoryViewer
 from .expense import ExpenseViewer
+from .report import ReportViewer
 
 
 class Command(Enum):
@@ -17,6 +20,8 @@ class Command(Enum):
     PRODUCTS = "Товары"
     CATEGORIES = "Категории"
     EXPENSES = "Статьи расходов"
+    REPORTS = "Отчеты"
+    IMPORT = "Импортировать расходы из файла"
 
     def __str__(self) -> str:
         return self.value
@@ -30,12 +35,16 @@ class DatabaseViewer(Viewer):
         self.product_viewer = ProductViewer(db)
         self.category_viewer = CategoryViewer(db)
         self.expenses_viewer = ExpenseViewer(db)
+        self.report_viewer = ReportViewer(db)
 
     def __gen_commands(self) -> List[Command]:
         commands = [Command.EXIT, Command.PRODUCTS, Command.CATEGORIES]
 
         if len(self.database.products) > 0:
             commands.append(Command.EXPENSES)
+            commands.append(Command.REPORTS)
+
+        commands.append(Command.IMPORT)
 
         return commands
 
@@ -60,3 +69,20 @@ class DatabaseViewer(Viewer):
                 self.category_viewer.attach()
             elif command == Command.EXPENSES:
                 self.expenses_viewer.attach()
+            elif command == Command.REPORTS:
+                self.report_viewer.attach()
+            elif command == Command.IMPORT:
+                self.__import_expenses()
+
+    def __import_expenses(self):
+        filename = fs.read_filename()
+        if not filename.is_file():
+            print("Файл не найден")
+            return
+
+        report = ExpenseImporter(self.database).import_file(filename)
+        print(report)
+
+        if len(report.rejected) > 0:
+            if fs.confirm_write_to_file():
+                report.write_rejected(fs.read_filename())
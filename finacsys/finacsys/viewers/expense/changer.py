@@ -1,5 +1,5 @@
 """Модуль, содержащий CLI-фронтенд для изменения расходов"""
-from typing import Callable, List
+from typing import Any, Dict, List
 from enum import Enum
 
 from finacsys.models import Expense
@@ -21,7 +21,10 @@ class Action(Enum):
 
 
 class ExpenseChangerViewer(Viewer):
-    """CLI-фронтенд для предоставления изменения расходов"""
+    """
+    CLI-фронтенд для предоставления изменения расходов. Выбранные статьи
+    расходов изменяются одной пачкой (см. Database.update_expenses)
+    """
 
     def __select_action(self) -> Action:
         message = "Выберите действие"
@@ -29,30 +32,26 @@ class ExpenseChangerViewer(Viewer):
         action: Action = super().select(message=message, choices=choices)
         return action
 
-    def __change_product(self, expenses: Expense):
+    def __change_product(self) -> Dict[str, Any]:
         message = "Выберите товар"
-        product = self.select_product(message=message)
-        expenses.set_product(product)
+        return {"product": self.select_product(message=message)}
 
-    def __change_count(self):
-        count = super().read_count()
-        return lambda expense: expense.set_count(count)
+    def __change_count(self) -> Dict[str, Any]:
+        return {"count": super().read_count()}
 
-    def __change_time(self):
-        time = super().read_time()
-        return lambda expense: expense.set_time(time)
+    def __change_time(self) -> Dict[str, Any]:
+        return {"time": super().read_time()}
 
-    def __change_date(self):
-        date = super().read_date()
-        return lambda expense: expense.set_date(date)
+    def __change_date(self) -> Dict[str, Any]:
+        return {"date": super().read_date()}
 
-    def __dispact_action(self, action: Action) -> Callable[[Expense], None]:
+    def __dispact_action(self, action: Action) -> Dict[str, Any]:
         if action == Action.CHANGE_DATE:
             return self.__change_date()
         if action == Action.CHANGE_TIME:
             return self.__change_time()
         if action == Action.CHANGE_PRODUCT:
-            return self.__change_product
+            return self.__change_product()
         if action == Action.CHANGE_COUNT:
             return self.__change_count()
         raise NotImplementedError()
@@ -61,10 +60,9 @@ class ExpenseChangerViewer(Viewer):
         """Присоединение CLI-фронтенда к консоли"""
         while True:
             action = self.__select_action()
-            action = self.__dispact_action(action)
 
             if action == Action.EXIT:
                 break
 
-            for expense in expenses:
-                action(expense)
+            changes = self.__dispact_action(action)
+            self.database.update_expenses(expenses, **changes)
@@ -21,6 +21,7 @@ class Action(Enum):
     STOP_SEARCHING = "Завершить поиск"
     FIND_BY_TEXT = "Поиск текстом"
     ADD_FILTERS = "Добавить фильтры"
+    EXPLAIN = "Показать план поиска"
 
     def __str__(self) -> str:
         return self.value
@@ -37,7 +38,8 @@ class ExpenseFinderViewer(Viewer):
         message = "Выберите позиции"
         choices = self.finder.filtered_expenses
 
-        expenses = super().multiselect(message=message, choices=choices)
+        search = self.database.search("expense", choices)
+        expenses = super().multiselect(message, choices, search)
 
         self.finder.filtered_expenses = expenses
         return expenses
@@ -66,6 +68,13 @@ class ExpenseFinderViewer(Viewer):
         date = super().read_date()
         self.finder.set_date_filter(filter_type, date)
 
+    def __set_datetime_range(self):
+        print("Введите начало промежутка")
+        start = super().read_datetime()
+        print("Введите конец промежутка (не включается в результат)")
+        end = super().read_datetime()
+        self.finder.set_datetime_range(start, end)
+
     def __read_category_filter(self) -> CategoriesFilter:
         message = "Выберите тип фильтра"
         choices = list(CategoriesFilter)
@@ -94,6 +103,7 @@ class ExpenseFinderViewer(Viewer):
             result.append(Action.ADD_FILTERS)
         if not self.finder.empty():
             result.append(Action.FIND_BY_TEXT)
+        result.append(Action.EXPLAIN)
 
         return result
 
@@ -117,6 +127,8 @@ class ExpenseFinderViewer(Viewer):
             return self.__set_date_filter()
         if filter_kind == FilterKind.FILTER_BY_TIME:
             return self.__set_time_filter()
+        if filter_kind == FilterKind.FILTER_BY_DATETIME_RANGE:
+            return self.__set_datetime_range()
         if filter_kind == FilterKind.FILTER_BY_CATEGORY:
             return self.__set_category_filter()
 
@@ -125,17 +137,19 @@ class ExpenseFinderViewer(Viewer):
     def attach(self) -> List[Expense]:
         """Присоединение CLI-фронтенда к консоли"""
 
-        self.finder.filtered_expenses = self.database.get_expenses_list()
+        self.finder.reset()
 
         while True:
             action = self.__read_action()
 
-            if len(self.finder.filtered_expenses) == 0:
+            if self.finder.empty():
                 return self.__stop_searching()
 
             if action == Action.ADD_FILTERS:
                 self.__add_filters()
             elif action == Action.FIND_BY_TEXT:
                 self.__find_by_text()
+            elif action == Action.EXPLAIN:
+                print(self.finder.explain())
             elif action == Action.STOP_SEARCHING:
                 return self.__stop_searching()
@@ -1,10 +1,11 @@
 """Модуль с CLI-фронтендом для сортировки списка расходов"""
-
-from typing import List
+from typing import Any, Callable, List, Optional
 from enum import Enum
 
 from finacsys.models import Expense
 from finacsys.database import Database
+from finacsys.database import arrays
+from finacsys.database.arrays import ExpenseArrays
 from finacsys.viewers.utils import confirm_reverse_sort
 
 from ..viewer import Viewer
@@ -25,11 +26,17 @@ class Action(Enum):
 
 
 class ExpenseSorterViewer(Viewer):
-    """Класс, предоставляющий CLI-фронтенд"""
+    """
+    Класс, предоставляющий CLI-фронтенд. Если доступен NumPy (см.
+    arrays.enabled), список расходов один раз переводится в колоночное
+    представление, и все сортировки выполняются над массивами
+    """
 
     def __init__(self, database: Database):
         super().__init__(database)
         self.sorted_expenses = []
+        self.__arrays: Optional[ExpenseArrays] = None
+        self.__order: Any = None
 
     def __read_action(self):
         message = "Выберите действие"
@@ -37,45 +44,59 @@ class ExpenseSorterViewer(Viewer):
         action = super().select(message=message, choices=choices)
         return action
 
+    def __sort(
+        self,
+        key: Callable[[Expense], Any],
+        column: Callable[[ExpenseArrays], Any],
+        reverse: bool,
+    ):
+        if self.__arrays is None:
+            self.sorted_expenses.sort(key=key, reverse=reverse)
+            return
+
+        keys = column(self.__arrays)[self.__order]
+        self.__order = self.__order[self.__arrays.argsort(keys, reverse)]
+
+    def __release(self) -> List[Expense]:
+        if self.__arrays is not None:
+            self.sorted_expenses = self.__arrays.take(self.__order)
+            self.__arrays = None
+        return self.sorted_expenses
+
     def __sort_by_date(self, reverse):
-        self.sorted_expenses.sort(
-            key=lambda exp: exp.get_date(),
-            reverse=reverse,
-        )
+        self.__sort(lambda exp: exp.get_day(), ExpenseArrays.dates, reverse)
 
     def __sort_by_time(self, reverse):
-        self.sorted_expenses.sort(
-            key=lambda exp: exp.get_time(),
-            reverse=reverse,
+        self.__sort(
+            lambda exp: exp.get_time_micros(), ExpenseArrays.times, reverse
         )
 
     def __sort_by_product_price(self, reverse):
-        self.sorted_expenses.sort(
-            key=lambda exp: exp.get_price(),
-            reverse=reverse,
+        self.__sort(
+            lambda exp: exp.get_price(), ExpenseArrays.unit_prices, reverse
         )
 
     def __sort_by_total_price(self, reverse):
-        self.sorted_expenses.sort(
-            key=lambda exp: exp.get_total_price(),
-            reverse=reverse,
+        self.__sort(
+            lambda exp: exp.get_total_units(), ExpenseArrays.totals, reverse
         )
 
     def __sort_by_name(self, reverse):
-        self.sorted_expenses.sort(
-            key=lambda exp: exp.get_name(),
-            reverse=reverse,
-        )
+        self.__sort(lambda exp: exp.get_name(), ExpenseArrays.names, reverse)
 
     def attach(self, expenses: List[Expense]) -> List[Expense]:
         """Присоединение CLI-фронтенда к консоли"""
         self.sorted_expenses = expenses
+        self.__arrays = None
+        if arrays.enabled():
+            self.__arrays = ExpenseArrays(expenses)
+            self.__order = self.__arrays.rows()
 
         while True:
             action = self.__read_action()
 
             if action == Action.STOP_SORTING:
-                return self.sorted_expenses
+                return self.__release()
 
             is_reverse = confirm_reverse_sort()
 
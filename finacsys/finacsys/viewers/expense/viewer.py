@@ -1,4 +1,5 @@
 """Модуль, реализующий основную функциональность CLI-фронтенда"""
+import sys
 from typing import List
 from enum import Enum
 from InquirerPy import inquirer
@@ -6,13 +7,14 @@ from InquirerPy import inquirer
 from finacsys.database import Database
 from finacsys.models import Expense
 from finacsys.viewers.utils import confirm_sort
-from finacsys.viewers.fs import write_to_file, confirm_write_to_file
+from finacsys.export import export
+from finacsys.viewers.fs import export_to_file, confirm_write_to_file
 
 from ..viewer import Viewer
 from .finder import ExpenseFinderViewer
 from .changer import ExpenseChangerViewer
 from .sorter import ExpenseSorterViewer
-from .utils import make_table
+from .utils import COLUMNS
 
 
 class Command(Enum):
@@ -81,8 +83,7 @@ class ExpenseViewer(Viewer):
         confirm = inquirer.confirm(message).execute()
 
         if confirm:
-            for expense in expenses:
-                self.database.expenses.pop(expense.get_id())
+            self.database.delete_expenses(expenses)
 
     def __view_all(self):
         expenses = self.database.get_expenses_list()
@@ -92,10 +93,9 @@ class ExpenseViewer(Viewer):
         if confirm_sort():
             expenses = self.__sorter.attach(expenses)
 
-        table = make_table(expenses)
         if confirm_write_to_file():
-            write_to_file(table)
-        print(table)
+            export_to_file(COLUMNS, expenses)
+        export(sys.stdout, COLUMNS, expenses)
 
     def __find_expenses(self):
         expenses = self.__finder.attach()
@@ -1,7 +1,9 @@
 """Модуль, включающий в себя CLI-фронтенд для запросов к файловой системе"""
 from pathlib import Path
+from typing import Iterable, List
 from InquirerPy import inquirer
 
+from finacsys.export import Column, ExportFormat, export
 from finacsys.validator import FileValidator
 
 
@@ -20,16 +22,6 @@ def read_filename() -> Path:
     return filename
 
 
-def write_to_file(value: str):
-    """
-    Запись строки в файл. Перед записью запрашивать у пользователя имя файла,
-    после чего считывает имя файла с консоли
-    """
-    filename = read_filename()
-    with open(filename, mode="w", encoding="utf-8") as file:
-        file.write(value)
-
-
 def confirm_write_to_file() -> bool:
     """
     Подтверждение записи в файл. Ответ возвращается в виде булевого значения
@@ -37,3 +29,22 @@ def confirm_write_to_file() -> bool:
     message = "Записать результат в файл?"
     result = inquirer.confirm(message=message).execute()
     return result
+
+
+def read_export_format() -> ExportFormat:
+    """Чтение формата выгрузки с консоли"""
+    message = "Выберите формат файла"
+    choices = list(ExportFormat)
+    result = inquirer.select(message=message, choices=choices).execute()
+    return result
+
+
+def export_to_file(columns: List[Column], objects: Iterable):
+    """
+    Потоковая выгрузка объектов в файл. Перед записью запрашивает у
+    пользователя формат и имя файла
+    """
+    export_format = read_export_format()
+    filename = read_filename()
+    with open(filename, mode="w", encoding="utf-8", newline="") as file:
+        export(file, columns, objects, export_format)
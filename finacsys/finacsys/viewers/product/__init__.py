@@ -3,4 +3,3 @@
 товарами
 """
 from .viewer import ProductViewer
-from .utils import make_table
@@ -21,31 +21,29 @@ class Action(Enum):
 
 
 class ProductChangerViewer(Viewer):
-    """Класс, представляющий CLI-фронтенд для изменения товаров"""
+    """
+    Класс, представляющий CLI-фронтенд для изменения товаров. Выбранные
+    товары изменяются одной пачкой (см. Database.update_products и
+    retag_products)
+    """
 
     def __change_name(self, products: List[Product]):
         new_name = super().read_name()
-        for product in products:
-            product.set_name(new_name)
+        self.database.update_products(products, name=new_name)
 
     def __change_price(self, products: List[Product]):
         new_price = super().read_price()
-        for product in products:
-            product.set_price(new_price)
+        self.database.update_products(products, price=new_price)
 
     def __add_categories(self, products: List[Product]):
         message = "Выберите категории для добавления в товары"
         categories = super().select_category(message=message, multiselect=True)
-
-        for product in products:
-            product.add_categories(categories)
+        self.database.retag_products(products, add=categories)
 
     def __remove_categories(self, products: List[Product]):
         message = "Выберите категории для удаления из товаров"
         categories = super().select_category(message=message, multiselect=True)
-
-        for product in products:
-            product.remove_categories(categories)
+        self.database.retag_products(products, remove=categories)
 
     def __read_action(self) -> Action:
         choices = list(Action)
@@ -15,6 +15,7 @@ class Action(Enum):
     STOP_SEARCHING = "Завершить поиск"
     FIND_BY_TEXT = "Поиск текстом"
     ADD_FILTERS = "Добавить фильтры"
+    EXPLAIN = "Показать план поиска"
 
     def __str__(self) -> str:
         return self.value
@@ -31,7 +32,8 @@ class ProductFinderViewer(Viewer):
         message = "Выберите позиции"
         choices = self.finder.filtered_products
 
-        products = super().multiselect(message=message, choices=choices)
+        search = self.database.search("product", choices)
+        products = super().multiselect(message, choices, search)
 
         self.finder.filtered_products = products
 
@@ -65,6 +67,7 @@ class ProductFinderViewer(Viewer):
             actions.append(Action.FIND_BY_TEXT)
         if self.finder.has_avaliable_filters():
             actions.append(Action.ADD_FILTERS)
+        actions.append(Action.EXPLAIN)
         return actions
 
     def __stop_searching(self):
@@ -95,7 +98,7 @@ class ProductFinderViewer(Viewer):
 
     def attach(self):
         """Присоединение CLI-фронтенда к терминалу"""
-        self.finder.filtered_products = self.database.get_products_list()
+        self.finder.reset()
 
         while True:
             action = self.__read_action()
@@ -107,3 +110,5 @@ class ProductFinderViewer(Viewer):
                 self.__add_filters()
             elif action == Action.FIND_BY_TEXT:
                 self.__find_by_text()
+            elif action == Action.EXPLAIN:
+                print(self.finder.explain())
@@ -1,20 +1,22 @@
 """Модуль с CLI-фронтендом для взаимодействия с товарами"""
 
+import sys
 from enum import Enum
 from typing import List
 from InquirerPy import inquirer
 
-from finacsys.database import Database
+from finacsys.database import Database, DeletePolicy
 from finacsys.models import Product
 from finacsys.viewers.utils import confirm_sort
-from finacsys.viewers.fs import write_to_file, confirm_write_to_file
+from finacsys.export import export
+from finacsys.viewers.fs import export_to_file, confirm_write_to_file
 
 from ..viewer import Viewer
 from .creator import ProductCreatorViewer
 from .finder import ProductFinderViewer
 from .changer import ProductChangerViewer
 from .sorter import ProductSorterViewer
-from .utils import make_table
+from .utils import COLUMNS
 
 
 class Command(Enum):
@@ -70,10 +72,9 @@ class ProductViewer(Viewer):
         if confirm_sort():
             products = self.__sorter.attach(products)
 
-        table = make_table(products)
         if confirm_write_to_file():
-            write_to_file(table)
-        print(table)
+            export_to_file(COLUMNS, products)
+        export(sys.stdout, COLUMNS, products)
 
     def __print_products(self, products: List[Product]):
         if len(products) == 0:
@@ -87,6 +88,17 @@ class ProductViewer(Viewer):
 
         if len(products) == 0:
             print("Ничего не нашлось")
+            return
+
+        policy = None
+        expenses = self.database.expenses_with_products(products)
+        if len(expenses) > 0:
+            message = (
+                "На товары ссылаются статьи расходов в количестве "
+                f"{len(expenses)} шт. Что с ними сделать?"
+            )
+            choices = [DeletePolicy.TOMBSTONE, DeletePolicy.CASCADE]
+            policy = self.select(message=message, choices=choices)
 
         message = (
             "Вы действительно хотите удалить товаров в количестве "
@@ -95,8 +107,8 @@ class ProductViewer(Viewer):
         confirm = inquirer.confirm(message).execute()
 
         if confirm:
-            for product in products:
-                self.database.products.pop(product.get_id())
+            plan = self.database.delete_products(products, policy)
+            print(f"Удалено {plan}")
 
     def attach(self):
         """Присоединение CLI-фронтенда к терминалу"""
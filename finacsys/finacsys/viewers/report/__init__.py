@@ -0,0 +1,4 @@
+"""
+Модуль, включающий в себя реализацию CLI-фронтенда для отчетов о расходах
+"""
+from .viewer import ReportViewer
@@ -0,0 +1,2 @@
+"""Утилиты для реализации CLI-представления отчетов"""
+from finacsys.columns import REPORT_COLUMNS as COLUMNS
@@ -0,0 +1,66 @@
+"""
+Модуль, включающий в себя CLI-фронтенд отчетов о расходах (см.
+finacsys.reports)
+"""
+import sys
+from enum import Enum
+
+from finacsys.export import export
+from finacsys.reports import Grouping, report_rows
+from finacsys.viewers.fs import export_to_file, confirm_write_to_file
+
+from ..viewer import Viewer
+from .utils import COLUMNS
+
+
+class Command(Enum):
+    """Отчеты, доступные пользователю"""
+
+    OVERALL = "Итого"
+    BY_CATEGORY = "По категориям"
+    BY_PRODUCT = "По товарам"
+    BY_DAY = "По дням"
+    BY_MONTH = "По месяцам"
+    EXIT = "Назад"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+GROUPINGS = {
+    Command.OVERALL: Grouping.OVERALL,
+    Command.BY_CATEGORY: Grouping.BY_CATEGORY,
+    Command.BY_PRODUCT: Grouping.BY_PRODUCT,
+    Command.BY_DAY: Grouping.BY_DAY,
+    Command.BY_MONTH: Grouping.BY_MONTH,
+}
+
+
+class ReportViewer(Viewer):
+    """Класс, реализующий CLI-фронтенд отчетов о расходах"""
+
+    def __read_command(self) -> Command:
+        message = "Выберите отчет"
+        choices = list(Command)
+        command = super().select(message=message, choices=choices)
+        return command
+
+    def __print_report(self, command: Command):
+        rows = report_rows(self.database, GROUPINGS[command])
+        if len(rows) == 0:
+            print("Нет статей расходов")
+            return
+
+        if confirm_write_to_file():
+            export_to_file(COLUMNS, rows)
+        export(sys.stdout, COLUMNS, rows)
+
+    def attach(self):
+        """Присоединение CLI-фронтенда к консоли"""
+        while True:
+            command = self.__read_command()
+
+            if command == Command.EXIT:
+                break
+
+            self.__print_report(command)
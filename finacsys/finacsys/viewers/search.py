@@ -0,0 +1,149 @@
+"""
+Модуль, содержащий подсказку выбора с поиском по индексу базы данных.
+Обычная подсказка InquirerPy заранее строит строки всех вариантов и при
+каждом нажатии клавиши оценивает их все, что на больших таблицах
+останавливает терминал. Подсказка SearchPrompt получает варианты
+страницами (см. finacsys.database.pages) и подгружает следующую страницу
+при прокрутке к концу списка, а при вводе текста берет лучшие варианты из
+сессии поиска базы данных (см. finacsys.database.search). Строка варианта
+строится только для прочитанных и найденных объектов.
+
+SearchPrompt переопределяет внутренние методы FuzzyPrompt (_handle_down,
+_on_text_changed, _toggle_all, _get_current_text, _filtered_choices),
+которые в других версиях InquirerPy устроены иначе, поэтому подсказка
+работает только с версией InquirerPy из requirements.txt
+(INQUIRERPY_VERSION). С другой версией списки выбора используют обычную
+подсказку InquirerPy (см. search_supported и finacsys.viewers.viewer.fuzzy)
+"""
+import functools
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, List, Optional
+
+from InquirerPy.prompts import FuzzyPrompt
+
+from finacsys.database.pages import Pages
+from finacsys.database.search import SEARCH_LIMIT, SearchSession, normalize
+from finacsys.models import Ident
+
+INQUIRERPY_VERSION = "0.2.4"
+
+
+@functools.lru_cache(maxsize=None)
+def search_supported() -> bool:
+    """
+    Проверка, что установлена версия InquirerPy, внутренние методы которой
+    переопределяет SearchPrompt (INQUIRERPY_VERSION)
+    """
+    try:
+        return version("inquirerpy") == INQUIRERPY_VERSION
+    except PackageNotFoundError:
+        return False
+
+
+class SearchPrompt(FuzzyPrompt):
+    """
+    Подсказка нечеткого выбора объектов базы данных из страниц pages,
+    варианты которой при вводе текста находятся сессией поиска search.
+    Выбор всех вариантов в множественном выборе сначала читает оставшиеся
+    страницы, поэтому относится ко всем объектам, а не только к показанным
+    """
+
+    def __init__(
+        self,
+        search: SearchSession,
+        pages: Pages,
+        limit: int = SEARCH_LIMIT,
+        **kwargs,
+    ):
+        if not search_supported():
+            raise RuntimeError(
+                f"SearchPrompt requires InquirerPy {INQUIRERPY_VERSION}"
+            )
+        self.__search = search
+        self.__pages = pages
+        self.__limit = limit
+        super().__init__(choices=pages.next(), **kwargs)
+        self.__choices: Dict[Ident, Dict[str, Any]] = {
+            choice["value"].get_id(): choice
+            for choice in self.content_control.choices
+        }
+
+    def __choice(self, obj: Any) -> Dict[str, Any]:
+        """Вариант объекта. Создается при первом обращении"""
+        choice = self.__choices.get(obj.get_id())
+        if choice is None:
+            choices = self.content_control.choices
+            choice = {
+                "name": str(obj),
+                "value": obj,
+                "enabled": False,
+                "index": len(choices),
+                "indices": [],
+            }
+            choices.append(choice)
+            self.__choices[obj.get_id()] = choice
+        return choice
+
+    def __find(self, text: str) -> List[Dict[str, Any]]:
+        query = normalize(text)
+        found = []
+        for obj in self.__search.find(text, self.__limit):
+            choice = self.__choice(obj)
+            # Подсветка найденного запроса в строке варианта
+            start = choice["name"].casefold().find(query)
+            choice["indices"] = []
+            if start >= 0:
+                choice["indices"] = list(range(start, start + len(query)))
+            found.append(choice)
+        return found
+
+    def __load_more(self):
+        """Подгрузка следующей страницы, если выбран последний вариант"""
+        control = self.content_control
+        if self._get_current_text() or self.__pages.exhausted():
+            return
+        if control.selected_choice_index < control.choice_count - 1:
+            return
+
+        for obj in self.__pages.next():
+            self.__choice(obj)
+        control._filtered_choices = control.choices
+
+    def _toggle_all(self, value: Optional[bool] = None) -> None:
+        """
+        Выбор всех вариантов. Оставшиеся страницы читаются до выбора, иначе
+        он не затронул бы еще не прочитанные объекты
+        """
+        control = self.content_control
+        if not self.__pages.exhausted():
+            for obj in self.__pages.rest():
+                self.__choice(obj)
+            if not self._get_current_text():
+                control._filtered_choices = control.choices
+        super()._toggle_all(value)
+
+    def _handle_down(self) -> bool:
+        """Переход к следующему варианту с подгрузкой страницы"""
+        self.__load_more()
+        return super()._handle_down()
+
+    def _on_text_changed(self, _) -> None:
+        """
+        Обработка изменения текста: варианты находятся сразу, без фоновой
+        задачи и задержки, так как поиск по индексу не зависит от числа
+        вариантов
+        """
+        if self._invalid:
+            self._invalid = False
+
+        text = self._get_current_text()
+        control = self.content_control
+        if text:
+            control._filtered_choices = self.__find(text)
+        else:
+            for choice in control.choices:
+                choice["indices"] = []
+            control._filtered_choices = control.choices
+        # Лучшее совпадение — первое, поэтому выбор возвращается к нему
+        control.selected_choice_index = 0
+        self._application.invalidate()
@@ -1,13 +1,33 @@
 """Модуль, содержащий в себе общий класс для создания Viewer-ов"""
-from typing import Any
+from typing import Any, Optional
 import datetime as dt
 from InquirerPy import inquirer
 from InquirerPy.validator import EmptyInputValidator
 
 from finacsys.database import Database
+from finacsys.database.pages import Pages
+from finacsys.database.search import SearchSession
+from finacsys.money import Money, Quantity
 from finacsys.validator import DateValidator, TimeValidator, NumberValidator
 import finacsys.config as cfg
 
+from .search import SearchPrompt, search_supported
+
+
+def fuzzy(choices: Any, search: Optional[SearchSession], **kwargs) -> Any:
+    """
+    Подсказка нечеткого выбора из choices. Если задана сессия поиска
+    search, варианты показываются страницами и находятся по индексу базы
+    данных (см. SearchPrompt). Если установлена версия InquirerPy, с которой
+    SearchPrompt не работает (см. search_supported), используется обычная
+    подсказка InquirerPy по всем вариантам
+    """
+    if search is not None and search_supported():
+        return SearchPrompt(search, Pages.of(choices), **kwargs)
+    if isinstance(choices, Pages):
+        choices = choices.rest()
+    return inquirer.fuzzy(choices=choices, **kwargs)
+
 
 class Viewer:
     """Класс с основной функциональностью CLI-интерфейса"""
@@ -15,43 +35,60 @@ class Viewer:
     def __init__(self, database: Database):
         self.database = database
 
-    def select(self, message: str, choices: Any) -> Any:
+    def select(
+        self,
+        message: str,
+        choices: Any,
+        search: Optional[SearchSession] = None,
+    ) -> Any:
         """Выбор единственного элемента из переданного списка
 
         Args:
             message (str): сообщение, выводимое на экран
-            choices (Any): список, предлагаемый пользователю для выбора
+            choices (Any): список или страницы (Pages), предлагаемые
+            пользователю для выбора
+            search (SearchSession, optional): сессия поиска по объектам
+            списка. По умолчанию варианты оцениваются InquirerPy
 
         Returns:
             Any: единственный элемент из переданного списка
         """
-        assert len(choices) > 0
+        assert choices
 
         message = f"{message}\nДля выбора используйте Enter"
 
-        result = inquirer.fuzzy(message=message, choices=choices).execute()
+        result = fuzzy(choices, search, message=message).execute()
         return result
 
-    def multiselect(self, message: str, choices: Any) -> Any:
+    def multiselect(
+        self,
+        message: str,
+        choices: Any,
+        search: Optional[SearchSession] = None,
+    ) -> Any:
         """Выбор одного или нескольких элементов из переданного списка
 
         Args:
             message (str): сообщение, выводимое на экран
-            choices (Any): список, предлагаемый пользователю для выбора
+            choices (Any): список или страницы (Pages), предлагаемые
+            пользователю для выбора
+            search (SearchSession, optional): сессия поиска по объектам
+            списка. По умолчанию варианты оцениваются InquirerPy
 
         Returns:
             Any: Список элементов, выбранных пользователем
         """
-        assert len(choices) > 0
+        assert choices
 
         message = (
             f"{message}\nДля выбора используйте пробел, "
             "а для подтверждения — Enter"
         )
 
-        result = inquirer.fuzzy(
+        result = fuzzy(
+            choices,
+            search,
             message=message,
-            choices=choices,
             multiselect=True,
             validate=lambda res: len(res) > 0,
             invalid_message="Необходимо выбрать хотя бы 1 позицию",
@@ -71,12 +108,13 @@ class Viewer:
         Returns:
             Товар или список товаров (в зависимости от опции multiselect)
         """
-        choices = self.database.get_products_list()
+        choices = self.database.pages("product")
+        search = self.database.search("product")
 
         if multiselect:
-            return self.multiselect(message=message, choices=choices)
+            return self.multiselect(message, choices, search)
 
-        return self.select(message=message, choices=choices)
+        return self.select(message, choices, search)
 
     def select_category(self, message: str, multiselect: bool = False):
         """Выбор категории, находящейся в базе данных.
@@ -90,12 +128,13 @@ class Viewer:
         Returns:
             Категория или список категорий (в зависимости от опции multiselect)
         """
-        choices = self.database.get_categories_list()
+        choices = self.database.pages("category")
+        search = self.database.search("category")
 
         if multiselect:
-            return self.multiselect(message=message, choices=choices)
+            return self.multiselect(message, choices, search)
 
-        return self.select(message=message, choices=choices)
+        return self.select(message, choices, search)
 
     def select_expense(self, message: str, multiselect: bool = False):
         """Выбор статьи расхода, находящегося в базе данных.
@@ -110,12 +149,13 @@ class Viewer:
             Статья расхода или список расходов
             (в зависимости от опции multiselect)
         """
-        choices = self.database.get_expenses_list()
+        choices = self.database.pages("expense")
+        search = self.database.search("expense")
 
         if multiselect:
-            return self.multiselect(message=message, choices=choices)
+            return self.multiselect(message, choices, search)
 
-        return self.select(message=message, choices=choices)
+        return self.select(message, choices, search)
 
     def read_name(self) -> str:
         """Чтение имени. Вводимое имя не может быть пустым"""
@@ -124,7 +164,7 @@ class Viewer:
         name = inquirer.text(message=message, validate=validate).execute()
         return name
 
-    def read_price(self) -> float:
+    def read_price(self) -> Money:
         """Чтение значения цены. Цена не может быть меньше или равна нулю"""
         message = "Введите значение цены:"
 
@@ -132,16 +172,18 @@ class Viewer:
             message=message,
             validate=NumberValidator(),
         ).execute()
-        return float(price)
+        return Money.parse(price)
 
-    def read_count(self) -> float:
+    def read_count(self) -> Quantity:
         """Чтение количества. Количество не может быть меньше или равно нулю"""
         message = "Введите количество:"
         price = inquirer.text(
             message=message,
-            validate=NumberValidator(),
+            validate=NumberValidator(
+                "Количество должно быть натуральным числом", Quantity.parse
+            ),
         ).execute()
-        return float(price)
+        return Quantity.parse(price)
 
     def read_date(self) -> dt.date:
         """
@@ -1,13 +1,17 @@
 """Основной модуль, запускающий приложение"""
+from finacsys.app import configure_ids, open_database
 from finacsys.viewers import DatabaseViewer
-from finacsys.database import Database
 
 
 def main():
     """Функция запуска приложения"""
-    database = Database()
-    database_viewer = DatabaseViewer(database)
-    database_viewer.attach()
+    configure_ids()
+    database = open_database()
+    try:
+        database_viewer = DatabaseViewer(database)
+        database_viewer.attach()
+    finally:
+        database.close()
 
 
 if __name__ == "__main__":
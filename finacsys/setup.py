@@ -7,6 +7,7 @@ setup(
     author="Danil Shvalov",
     author_email="daniil.shvalov@gmail.com",
     packages=["finacsys"],
+    entry_points={"console_scripts": ["finacsys = finacsys.cli:main"]},
     # TODO добавить requires
     requires=[],
 )
@@ -0,0 +1,156 @@
+"""
+Тесты способов выполнения запросов к расходам (см. ANALYTICS_BACKEND):
+запросы к объектам с упорядоченными индексами и запросы к массивам NumPy
+(см. finacsys.database.arrays) должны возвращать одинаковые результаты, в
+том числе после добавления, изменения и удаления статей расходов, которые
+обновляют массивы без их перестроения.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import unittest
+from typing import Callable, List, Tuple
+
+import finacsys.config as cfg
+from finacsys.database import Database
+from finacsys.database import arrays
+from finacsys.database.aggregates import Aggregates
+from finacsys.database.finders import ExpenseFinder
+from finacsys.filters import DateFilter, TimeFilter
+from finacsys.models import Category, Expense, Product
+
+from .test_integrity import plain_totals
+
+START = dt.datetime(2020, 1, 1)
+
+Query = Callable[[ExpenseFinder], None]
+
+
+def by_date(finder: ExpenseFinder):
+    """Фильтр по дате"""
+    finder.set_date_filter(DateFilter.LT, dt.date(2020, 1, 5))
+
+
+def by_time(finder: ExpenseFinder):
+    """Фильтр по времени"""
+    finder.set_time_filter(TimeFilter.GE, dt.time(12))
+
+
+def by_range(finder: ExpenseFinder):
+    """Фильтр по интервалу даты и времени"""
+    finder.set_datetime_range(START + dt.timedelta(days=2), None)
+
+
+class BackendsTest(unittest.TestCase):
+    """
+    Сравнение запросов через ExpenseFinder при ANALYTICS_BACKEND, равном
+    "python" и "numpy"
+    """
+
+    def setUp(self):
+        if not arrays.load_numpy():
+            self.skipTest("NumPy is not installed")
+        self.addCleanup(setattr, cfg, "ANALYTICS_BACKEND", "python")
+
+        self.database = Database()
+        self.categories = [Category(f"Категория {i}") for i in range(3)]
+        for category in self.categories:
+            self.database.add_category(category)
+        self.products = [
+            Product(f"Товар {i}", 10 + i, [self.categories[i % 3]])
+            for i in range(6)
+        ]
+        for product in self.products:
+            self.database.add_product(product)
+        self.database.add_expenses(
+            [
+                Expense(
+                    self.products[i % 6],
+                    1 + i % 4,
+                    START + dt.timedelta(hours=5 * i),
+                )
+                for i in range(60)
+            ]
+        )
+
+    def queries(self) -> List[Tuple[str, List[Query]]]:
+        """Проверяемые запросы: название и фильтры"""
+        food, drinks, _ = self.categories
+        return [
+            ("без фильтров", []),
+            ("дата", [by_date]),
+            ("время", [by_time]),
+            ("интервал", [by_range]),
+            (
+                "категории",
+                [lambda finder: finder.only_included_categories([food])],
+            ),
+            (
+                "кроме категорий и время",
+                [
+                    lambda finder: finder.exclude_categories([drinks]),
+                    by_time,
+                ],
+            ),
+        ]
+
+    def run_query(self, backend: str, filters: List[Query]):
+        """Результат запроса: ID статей расходов, сумма и пустота"""
+        cfg.ANALYTICS_BACKEND = backend
+        finder = ExpenseFinder(self.database)
+        for apply in filters:
+            apply(finder)
+        idents = sorted(exp.get_id() for exp in finder.filtered_expenses)
+        return idents, finder.total_price(), finder.empty()
+
+    def assert_same(self):
+        for name, filters in self.queries():
+            with self.subTest(query=name):
+                self.assertEqual(
+                    self.run_query("python", filters),
+                    self.run_query("numpy", filters),
+                )
+
+    def test_queries(self):
+        self.assert_same()
+
+    def test_added_expenses(self):
+        self.assert_same()
+        self.database.add_expenses(
+            [
+                Expense(product, 7, START + dt.timedelta(minutes=i))
+                for i, product in enumerate(self.products * 10)
+            ]
+        )
+        self.assert_same()
+
+    def test_changed_expenses(self):
+        self.assert_same()
+        expenses = self.database.get_expenses_list()
+        expenses[0].set_count(100)
+        expenses[1].set_datetime(START + dt.timedelta(days=30))
+        expenses[2].set_product(self.products[1])
+        self.products[3].set_price(1000)
+        self.products[4].add_category(self.categories[0])
+        self.assert_same()
+
+    def test_deleted_expenses(self):
+        self.assert_same()
+        expenses = self.database.get_expenses_list()
+        self.database.delete_expense(expenses[0])
+        self.assert_same()
+        # Больше половины строк удалено: массивы уплотняются
+        self.database.delete_expenses(expenses[1::2])
+        self.database.delete_expenses(expenses[2:10:2])
+        self.assert_same()
+
+    def test_aggregates(self):
+        table = self.database.expenses
+        table.get_arrays()
+        expenses = self.database.get_expenses_list()
+        self.database.delete_expenses(expenses[:10])
+        expenses[20].set_count(9)
+        self.assertEqual(
+            plain_totals(Aggregates.from_arrays(table.get_arrays())),
+            plain_totals(Aggregates.build(table.values())),
+        )
@@ -0,0 +1,64 @@
+"""
+Тесты кэша строк представления моделей (см. ObjectMeta.__str__ и
+finacsys.models.display): строка статьи расхода строится заново после
+изменения ее полей и полей ее товара, а счетчики DISPLAY_STATS учитывают
+попадания и промахи.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import unittest
+
+from finacsys.models import DISPLAY_STATS, Expense, Product
+
+
+class DisplayCacheTest(unittest.TestCase):
+    """Строки представления товара и статьи расхода"""
+
+    def setUp(self):
+        self.product = Product("Хлеб", "1.50", [])
+        self.expense = Expense(self.product, 2, dt.datetime(2020, 1, 1, 12))
+        DISPLAY_STATS.reset()
+        self.addCleanup(DISPLAY_STATS.reset)
+
+    def assert_stats(self, hits: int, misses: int):
+        self.assertEqual(
+            (DISPLAY_STATS.hits, DISPLAY_STATS.misses), (hits, misses)
+        )
+
+    def test_cached(self):
+        first = str(self.expense)
+        self.assertIs(str(self.expense), first)
+        self.assert_stats(hits=1, misses=1)
+        self.assertEqual(DISPLAY_STATS.hit_rate(), 0.5)
+
+    def test_own_field(self):
+        str(self.expense)
+        self.expense.set_count(3)
+        self.assertIn("общая цена: 4.50", str(self.expense))
+        self.assert_stats(hits=0, misses=2)
+
+    def test_product_rename(self):
+        self.assertIn("название: Хлеб", str(self.expense))
+        self.product.set_name("Батон")
+        self.assertIn("название: Батон", str(self.expense))
+        self.assertIn("| Батон |", str(self.product))
+        self.assert_stats(hits=0, misses=3)
+        str(self.expense)
+        self.assert_stats(hits=1, misses=3)
+
+    def test_product_price(self):
+        self.assertIn("общая цена: 3.00", str(self.expense))
+        self.product.set_price("2.25")
+        self.assertIn("общая цена: 4.50", str(self.expense))
+        self.assert_stats(hits=0, misses=2)
+
+    def test_other_product(self):
+        str(self.expense)
+        other = Product("Сыр", "10.00", [])
+        self.expense.set_product(other)
+        self.assertIn("название: Сыр", str(self.expense))
+        # Изменение прежнего товара не затрагивает строку статьи расхода
+        self.product.set_name("Батон")
+        self.assertIn("название: Сыр", str(self.expense))
+        self.assert_stats(hits=1, misses=2)
@@ -0,0 +1,264 @@
+"""
+Тесты поиска расходов и товаров (см. finacsys.database.finders) для всех
+видов хранения: таблиц в памяти с упорядоченными индексами, таблиц SQLite
+и колоночной таблицы расходов, открытой из снимка журнала. Результаты
+запросов сравниваются с отбором перебором всех статей расходов, в том
+числе после изменения и удаления статей расходов.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from finacsys.database import Database, SqliteDatabase
+from finacsys.database.finders import ExpenseFinder, ProductFinder
+from finacsys.database.tables import ColumnarExpenseTable
+from finacsys.filters import DateFilter, TimeFilter
+from finacsys.models import Category, Expense, Product
+from finacsys.money import Money
+
+START = dt.datetime(2020, 1, 1)
+
+CATEGORIES = ["Еда", "Напитки", "Бытовая химия"]
+
+# Товары: название, цена и номера категорий
+PRODUCTS = [
+    ("Хлеб", "40.50", [0]),
+    ("Молоко", "80", [0, 1]),
+    ("Сок", "120.99", [1]),
+    ("Мыло", "55", [2]),
+    ("Соль", "20", []),
+]
+
+Filter = Callable[[ExpenseFinder], None]
+Predicate = Callable[[Expense], bool]
+
+
+def fill(database: Database):
+    """
+    Заполнение базы данных одинаковыми для всех видов хранения объектами с
+    заданными ID
+    """
+    categories = [
+        Category(name, ident=i + 1) for i, name in enumerate(CATEGORIES)
+    ]
+    for category in categories:
+        database.add_category(category)
+
+    products = [
+        Product(name, price, [categories[i] for i in kinds], ident=j + 100)
+        for j, (name, price, kinds) in enumerate(PRODUCTS)
+    ]
+    for product in products:
+        database.add_product(product)
+
+    database.add_expenses(
+        [
+            Expense(
+                products[i % len(products)],
+                1 + i % 3,
+                START + dt.timedelta(hours=5 * i, minutes=7 * i),
+                ident=i + 1000,
+            )
+            for i in range(120)
+        ]
+    )
+
+
+class FinderTest(unittest.TestCase):
+    """Поиск в базе данных в памяти"""
+
+    def make_database(self) -> Database:
+        """Создание заполненной базы данных проверяемого вида"""
+        database = Database()
+        fill(database)
+        return database
+
+    def setUp(self):
+        self.database = self.make_database()
+        self.categories = {
+            category.get_name(): category
+            for category in self.database.get_categories_list()
+        }
+
+    def cases(self) -> List[Tuple[str, List[Filter], Predicate]]:
+        """Проверяемые запросы: название, фильтры и условие отбора"""
+        food = self.categories["Еда"]
+        drinks = self.categories["Напитки"]
+        day = dt.date(2020, 1, 5)
+        noon = dt.time(12, 0)
+        start = START + dt.timedelta(days=3, hours=6)
+        end = START + dt.timedelta(days=8)
+
+        def categories(expense: Expense) -> List[Category]:
+            return expense.get_product().get_categories()
+
+        cases = [("без фильтров", [], lambda e: True)]
+        dates: Dict[DateFilter, Predicate] = {
+            DateFilter.LT: lambda e: e.get_datetime().date() < day,
+            DateFilter.LE: lambda e: e.get_datetime().date() <= day,
+            DateFilter.EQ: lambda e: e.get_datetime().date() == day,
+            DateFilter.GE: lambda e: e.get_datetime().date() >= day,
+            DateFilter.GT: lambda e: e.get_datetime().date() > day,
+        }
+        for kind, predicate in dates.items():
+            cases.append(
+                (
+                    f"дата {kind.name}",
+                    [lambda f, kind=kind: f.set_date_filter(kind, day)],
+                    predicate,
+                )
+            )
+        times: Dict[TimeFilter, Predicate] = {
+            TimeFilter.LT: lambda e: e.get_datetime().time() < noon,
+            TimeFilter.LE: lambda e: e.get_datetime().time() <= noon,
+            TimeFilter.EQ: lambda e: e.get_datetime().time() == noon,
+            TimeFilter.GE: lambda e: e.get_datetime().time() >= noon,
+            TimeFilter.GT: lambda e: e.get_datetime().time() > noon,
+        }
+        for kind, predicate in times.items():
+            cases.append(
+                (
+                    f"время {kind.name}",
+                    [lambda f, kind=kind: f.set_time_filter(kind, noon)],
+                    predicate,
+                )
+            )
+        return cases + [
+            (
+                "интервал",
+                [lambda f: f.set_datetime_range(start, end)],
+                lambda e: start <= e.get_datetime() < end,
+            ),
+            (
+                "интервал без начала",
+                [lambda f: f.set_datetime_range(None, end)],
+                lambda e: e.get_datetime() < end,
+            ),
+            (
+                "категории",
+                [lambda f: f.only_included_categories([drinks])],
+                lambda e: drinks in categories(e),
+            ),
+            (
+                "кроме категорий",
+                [lambda f: f.exclude_categories([food])],
+                lambda e: food not in categories(e),
+            ),
+            (
+                "категории, дата и время",
+                [
+                    lambda f: f.only_included_categories([food, drinks]),
+                    lambda f: f.set_date_filter(DateFilter.GE, day),
+                    lambda f: f.set_time_filter(TimeFilter.LT, noon),
+                ],
+                lambda e: (
+                    bool({food, drinks} & set(categories(e)))
+                    and e.get_datetime().date() >= day
+                    and e.get_datetime().time() < noon
+                ),
+            ),
+            (
+                "пустой результат",
+                [
+                    lambda f: f.set_date_filter(DateFilter.LT, day),
+                    lambda f: f.set_date_filter(DateFilter.GT, day),
+                ],
+                lambda e: False,
+            ),
+        ]
+
+    def assert_queries(self):
+        expenses = self.database.get_expenses_list()
+        for name, filters, predicate in self.cases():
+            with self.subTest(query=name):
+                finder = ExpenseFinder(self.database)
+                for apply in filters:
+                    apply(finder)
+                expected = [e for e in expenses if predicate(e)]
+
+                found = finder.filtered_expenses
+                self.assertEqual(
+                    sorted(e.get_id() for e in found),
+                    sorted(e.get_id() for e in expected),
+                )
+                total = sum(
+                    (e.get_total_price() for e in expected), Money(0)
+                )
+                self.assertEqual(finder.total_price(), total)
+                self.assertEqual(finder.empty(), not expected)
+                self.assertIsInstance(finder.explain(), str)
+
+    def test_queries(self):
+        self.assert_queries()
+
+    def test_changed_expenses(self):
+        expenses = sorted(
+            self.database.get_expenses_list(), key=Expense.get_id
+        )
+        # Запросы до изменений строят индексы, которые затем обновляются
+        self.assert_queries()
+        expenses[0].set_datetime(START + dt.timedelta(days=4, hours=12))
+        expenses[1].set_count(10)
+        expenses[2].set_product(expenses[3].get_product())
+        self.database.delete_expenses(expenses[10:20])
+        self.assert_queries()
+
+    def test_products(self):
+        food = self.categories["Еда"]
+        drinks = self.categories["Напитки"]
+        products = self.database.get_products_list()
+
+        finder = ProductFinder(self.database)
+        finder.only_included_categories([drinks])
+        self.assertEqual(
+            sorted(p.get_name() for p in finder.filtered_products),
+            ["Молоко", "Сок"],
+        )
+
+        finder = ProductFinder(self.database)
+        finder.exclude_categories([food])
+        self.assertEqual(
+            sorted(p.get_name() for p in finder.filtered_products),
+            sorted(
+                p.get_name()
+                for p in products
+                if food not in p.get_categories()
+            ),
+        )
+        self.assertFalse(finder.empty())
+
+
+class SqliteFinderTest(FinderTest):
+    """Поиск в базе данных SQLite"""
+
+    def make_database(self) -> Database:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = SqliteDatabase(Path(directory.name) / "finacsys.sqlite3")
+        self.addCleanup(database.close)
+        fill(database)
+        return database
+
+
+class ColumnarFinderTest(FinderTest):
+    """
+    Поиск в базе данных, статьи расходов которой открыты из колоночного
+    файла снимка (см. Database.snapshot)
+    """
+
+    def make_database(self) -> Database:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = Database.open(Path(directory.name))
+        fill(database)
+        database.snapshot()
+        database.close()
+
+        database = Database.open(Path(directory.name))
+        self.addCleanup(database.close)
+        self.assertIsInstance(database.expenses, ColumnarExpenseTable)
+        return database
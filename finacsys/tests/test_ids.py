@@ -0,0 +1,162 @@
+"""
+Тесты генераторов ID (см. finacsys.models.ids): ID возрастают в порядке
+создания объектов, в том числе при переводе часов назад и из нескольких
+потоков, сохраняют порядок в текстовом виде SQLite, а базы данных хранят
+ID разных видов вместе.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import tempfile
+import threading
+import unittest
+import uuid
+from pathlib import Path
+from typing import List
+from unittest import mock
+
+from finacsys.database import Database, SqliteDatabase
+from finacsys.database.records import (
+    decode_id,
+    encode_id,
+    id_from_bytes,
+    id_to_bytes,
+)
+from finacsys.models import (
+    IDS,
+    Category,
+    Expense,
+    Product,
+    TimeOrderedIds,
+    random_uuid,
+)
+from finacsys.models.ids import ID_EPOCH_MS, SEQUENCE_BITS
+
+START = dt.datetime(2020, 1, 1)
+
+
+class TimeOrderedIdsTest(unittest.TestCase):
+    """Порядок и уникальность ID, упорядоченных по времени"""
+
+    def test_increasing(self):
+        generate = TimeOrderedIds()
+        idents = [generate() for _ in range(10_000)]
+        self.assertEqual(idents, sorted(set(idents)))
+        self.assertTrue(all(0 < ident < 2**63 for ident in idents))
+
+    def test_time_order(self):
+        generate = TimeOrderedIds()
+        with mock.patch("time.time", return_value=1_700_000_000.0):
+            first = generate()
+        with mock.patch("time.time", return_value=1_700_000_001.0):
+            second = generate()
+        millis = 1_700_000_000_000 - ID_EPOCH_MS
+        self.assertEqual(first, millis << SEQUENCE_BITS)
+        self.assertEqual(second >> SEQUENCE_BITS, millis + 1000)
+
+    def test_clock_goes_back(self):
+        generate = TimeOrderedIds()
+        with mock.patch("time.time", return_value=1_700_000_000.0):
+            before = [generate() for _ in range(3)]
+        with mock.patch("time.time", return_value=1_600_000_000.0):
+            after = [generate() for _ in range(3)]
+        idents = before + after
+        self.assertEqual(idents, list(range(idents[0], idents[0] + 6)))
+
+    def test_threads(self):
+        generate = TimeOrderedIds()
+        results: List[List[int]] = [[] for _ in range(4)]
+
+        def run(result: List[int]):
+            for _ in range(5_000):
+                result.append(generate())
+
+        threads = [
+            threading.Thread(target=run, args=(result,)) for result in results
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        idents = [ident for result in results for ident in result]
+        self.assertEqual(len(set(idents)), len(idents))
+        for result in results:
+            self.assertEqual(result, sorted(result))
+
+    def test_encoding_keeps_order(self):
+        generate = TimeOrderedIds()
+        idents = [5, 2**40, generate(), generate(), 2**63 - 1]
+        encoded = [encode_id(ident) for ident in idents]
+        self.assertEqual(encoded, sorted(encoded))
+        self.assertEqual([decode_id(text) for text in encoded], idents)
+        for ident in (idents[2], random_uuid()):
+            self.assertEqual(decode_id(encode_id(ident)), ident)
+            self.assertEqual(id_from_bytes(id_to_bytes(ident)), ident)
+
+
+class MixedIdsTest(unittest.TestCase):
+    """Объекты с UUID и с ID, упорядоченными по времени, в одной базе"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name)
+        self.addCleanup(IDS.set_generator, TimeOrderedIds())
+
+    def fill(self, database: Database, count: int) -> Category:
+        """Категория, товар и count статей расходов"""
+        category = Category("Еда")
+        database.add_category(category)
+        product = Product("Хлеб", 2, [category])
+        database.add_product(product)
+        for i in range(count):
+            database.add_expense(
+                Expense(product, 1, START + dt.timedelta(hours=i))
+            )
+        return category
+
+    def check(self, open_database, snapshot: bool):
+        IDS.set_generator(random_uuid)
+        database = open_database()
+        self.fill(database, 3)
+        if snapshot:
+            database.snapshot()
+        database.close()
+
+        IDS.set_generator(TimeOrderedIds())
+        database = open_database()
+        category = self.fill(database, 4)
+        idents = sorted(map(str, database.expenses))
+        # Порядок обхода ID, упорядоченных по времени, — порядок создания
+        ordered = [
+            ident for ident in database.expenses if isinstance(ident, int)
+        ]
+        self.assertEqual(ordered, sorted(ordered))
+        if snapshot:
+            database.snapshot()
+        database.close()
+
+        database = open_database()
+        self.addCleanup(database.close)
+        self.assertEqual(
+            {type(ident) for ident in database.expenses},
+            {int, uuid.UUID},
+        )
+        self.assertEqual(sorted(map(str, database.expenses)), idents)
+        (category,) = [
+            c
+            for c in database.get_categories_list()
+            if c.get_id() == category.get_id()
+        ]
+        self.assertEqual(len(database.expenses_with_categories([category])), 4)
+
+    def test_journal(self):
+        self.check(lambda: Database.open(self.path), snapshot=False)
+
+    def test_snapshot(self):
+        self.check(lambda: Database.open(self.path), snapshot=True)
+
+    def test_sqlite(self):
+        path = self.path / "finacsys.sqlite3"
+        self.check(lambda: SqliteDatabase(path), snapshot=False)
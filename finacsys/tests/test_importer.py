@@ -0,0 +1,100 @@
+"""
+Тесты проверки строк при импорте статей расходов (см. finacsys.importer):
+числа в CSV и JSON Lines разбираются по одному правилу, а отсутствующие
+поля называются в причине отклонения.
+
+Запуск: python -m unittest discover tests
+"""
+import io
+import unittest
+from typing import List, Tuple
+
+from finacsys.database import Database
+from finacsys.importer import ExpenseImporter, csv_rows, json_lines_rows
+from finacsys.money import Money, Quantity
+
+HEADER = "date,time,product,price,count,categories\n"
+
+
+class ImportRowsTest(unittest.TestCase):
+    """Импорт строк в базу данных в памяти без пула процессов"""
+
+    def setUp(self):
+        self.database = Database()
+        self.importer = ExpenseImporter(self.database, workers=0)
+
+    def import_csv(self, lines: str) -> List[Tuple[int, str]]:
+        """Импорт строк CSV. Возвращает отклоненные строки и причины"""
+        report = self.importer.import_rows(csv_rows(io.StringIO(lines)))
+        return [(line, reason) for line, reason, _ in report.rejected]
+
+    def import_json(self, lines: str) -> List[Tuple[int, str]]:
+        """Импорт строк JSON Lines. Возвращает отклоненные строки и причины"""
+        report = self.importer.import_rows(json_lines_rows(io.StringIO(lines)))
+        return [(line, reason) for line, reason, _ in report.rejected]
+
+    def test_csv(self):
+        rejected = self.import_csv(
+            HEADER + "01.01.2020,12:00:00,Хлеб,1.24,0.5,Еда\n"
+        )
+        self.assertEqual(rejected, [])
+        (expense,) = self.database.get_expenses_list()
+        self.assertEqual(expense.get_price(), Money.parse("1.24"))
+        self.assertEqual(expense.get_count(), Quantity.parse("0.5"))
+
+    def test_json_numbers(self):
+        rejected = self.import_json(
+            '{"date": "01.01.2020", "time": "12:00:00", "product": "Хлеб", '
+            '"price": 1.24, "count": 2}\n'
+        )
+        self.assertEqual(rejected, [])
+        (expense,) = self.database.get_expenses_list()
+        self.assertEqual(expense.get_price(), Money.parse("1.24"))
+        self.assertEqual(expense.get_count(), Quantity.parse("2"))
+
+    def test_too_many_decimal_places(self):
+        csv_rejected = self.import_csv(
+            HEADER + "01.01.2020,12:00:00,Хлеб,1.239,1,\n"
+        )
+        json_rejected = self.import_json(
+            '{"date": "01.01.2020", "time": "12:00:00", "product": "Хлеб", '
+            '"price": 1.239, "count": 1}\n'
+        )
+        self.assertEqual(
+            csv_rejected, [(2, "'1.239' has too many decimal places")]
+        )
+        self.assertEqual(
+            json_rejected, [(1, "'1.239' has too many decimal places")]
+        )
+        self.assertEqual(self.database.get_expenses_list(), [])
+
+    def test_boolean_is_not_a_number(self):
+        rejected = self.import_json(
+            '{"date": "01.01.2020", "time": "12:00:00", "product": "Хлеб", '
+            '"price": true, "count": 1}\n'
+        )
+        self.assertEqual(rejected, [(1, "price must be a number")])
+
+    def test_short_csv_row(self):
+        rejected = self.import_csv(
+            HEADER
+            + "01.01.2020,12:00:00,Хлеб,1.24\n"
+            + "01.01.2020,12:00:00\n"
+        )
+        self.assertEqual(
+            rejected,
+            [(2, "missing field count"), (3, "missing field product")],
+        )
+        self.assertEqual(self.database.get_products_list(), [])
+
+    def test_missing_json_field(self):
+        rejected = self.import_json(
+            '{"date": "01.01.2020", "time": "12:00:00", "price": 1, '
+            '"count": 1}\n'
+            '{"date": "01.01.2020", "time": "12:00:00", "product": null, '
+            '"price": 1, "count": 1}\n'
+        )
+        self.assertEqual(
+            rejected,
+            [(1, "missing field product"), (2, "missing field product")],
+        )
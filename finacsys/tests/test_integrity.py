@@ -0,0 +1,367 @@
+"""
+Тесты удаления товаров и категорий по политикам ссылочной целостности (см.
+finacsys.database.integrity): каждая политика, откат удаления, запрещенного
+политикой RESTRICT, удаление надгробий и освобождение удаленных объектов.
+Тесты выполняются для базы данных в памяти и для SQLite.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import gc
+import tempfile
+import unittest
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from finacsys.database import (
+    Database,
+    DeletePolicy,
+    IntegrityError,
+    Relation,
+    SqliteDatabase,
+)
+from finacsys.database.aggregates import Aggregates
+from finacsys.database.records import encode_id
+from finacsys.database.tables.expense_table import ExpenseTable
+from finacsys.models import Category, Expense, Product
+
+START = dt.datetime(2020, 1, 1)
+
+
+def plain_totals(aggregates: Aggregates) -> Tuple[Any, ...]:
+    """Агрегаты в виде, пригодном для сравнения"""
+
+    def plain(rollup: Dict[Any, Any]) -> Dict[Any, Tuple[int, int]]:
+        return {
+            key: (value.count, value.total) for key, value in rollup.items()
+        }
+
+    return (
+        (aggregates.overall.count, aggregates.overall.total),
+        plain(aggregates.categories),
+        plain(aggregates.products),
+        plain(aggregates.days),
+        plain(aggregates.months),
+    )
+
+
+class DeleteTest(unittest.TestCase):
+    """
+    Удаление в базе данных в памяти. В базе две категории, три товара (у
+    третьего нет статей расходов) и по две статьи расходов на первые два
+    товара
+    """
+
+    def make_database(self) -> Database:
+        """Создание пустой базы данных проверяемого типа"""
+        return Database()
+
+    def setUp(self):
+        self.database = self.make_database()
+        self.food = Category("Еда")
+        self.drinks = Category("Напитки")
+        self.database.add_category(self.food)
+        self.database.add_category(self.drinks)
+
+        self.bread = Product("Хлеб", 40, [self.food])
+        self.milk = Product("Молоко", 80, [self.food, self.drinks])
+        self.salt = Product("Соль", 20, [self.food])
+        for product in (self.bread, self.milk, self.salt):
+            self.database.add_product(product)
+
+        self.expenses = [
+            Expense(product, 1 + i, START + dt.timedelta(days=i))
+            for product in (self.bread, self.milk)
+            for i in range(2)
+        ]
+        self.database.add_expenses(self.expenses)
+        # Агрегаты строятся до удаления, чтобы удаление их обновляло
+        self.database.get_aggregates()
+
+    def state(self) -> Tuple[Any, ...]:
+        """Содержимое таблиц и агрегаты базы данных"""
+        database = self.database
+        return (
+            sorted(c.get_id() for c in database.get_categories_list()),
+            sorted(p.get_id() for p in database.get_products_list()),
+            sorted(e.get_id() for e in database.get_expenses_list()),
+            sorted(p.get_id() for p in database.get_tombstones()),
+            {
+                p.get_id(): sorted(c.get_id() for c in p.get_categories())
+                for p in database.get_products_list()
+            },
+            plain_totals(database.get_aggregates()),
+        )
+
+    def assert_aggregates_consistent(self):
+        """Агрегаты совпадают с вычисленными заново по статьям расходов"""
+        expected = Aggregates.build(self.database.get_expenses_list())
+        self.assertEqual(
+            plain_totals(self.database.get_aggregates()),
+            plain_totals(expected),
+        )
+
+    def ids(self, objects: List[Any]) -> List[Any]:
+        """Отсортированные ID объектов"""
+        return sorted(obj.get_id() for obj in objects)
+
+    def test_restrict_products(self):
+        """RESTRICT запрещает удаление товара, на который есть ссылки"""
+        before = self.state()
+        with self.assertRaises(IntegrityError) as context:
+            self.database.delete_products(
+                [self.salt, self.bread], DeletePolicy.RESTRICT
+            )
+
+        self.assertEqual(context.exception.relation, Relation.EXPENSE_PRODUCT)
+        self.assertEqual(
+            self.ids(context.exception.references), self.ids(self.expenses[:2])
+        )
+        self.assertEqual(self.state(), before)
+
+    def test_restrict_allows_unreferenced(self):
+        """RESTRICT не мешает удалить товар без статей расходов"""
+        self.database.delete_products([self.salt], DeletePolicy.RESTRICT)
+
+        self.assertNotIn(self.salt.get_id(), self.database.products)
+        self.assertEqual(self.database.get_tombstones(), [])
+
+    def test_cascade_products(self):
+        """CASCADE удаляет статьи расходов вместе с товаром"""
+        plan = self.database.delete_products(
+            [self.bread], DeletePolicy.CASCADE
+        )
+
+        self.assertEqual(self.ids(plan.expenses), self.ids(self.expenses[:2]))
+        self.assertNotIn(self.bread.get_id(), self.database.products)
+        self.assertEqual(
+            self.ids(self.database.get_expenses_list()),
+            self.ids(self.expenses[2:]),
+        )
+        self.assertEqual(self.database.get_tombstones(), [])
+        self.assertEqual(
+            self.database.expenses_with_products([self.bread]), []
+        )
+        self.assert_aggregates_consistent()
+
+    def test_tombstone_products(self):
+        """TOMBSTONE оставляет товар надгробием, пока на него есть ссылки"""
+        plan = self.database.delete_products(
+            [self.bread, self.salt], DeletePolicy.TOMBSTONE
+        )
+
+        self.assertEqual(self.ids(plan.tombstones), [self.bread.get_id()])
+        self.assertNotIn(self.bread.get_id(), self.database.products)
+        self.assertEqual(
+            self.ids(self.database.get_tombstones()), [self.bread.get_id()]
+        )
+        self.assertEqual(len(self.database.get_expenses_list()), 4)
+        self.assert_aggregates_consistent()
+
+    def test_detach_categories(self):
+        """DETACH убирает удаляемую категорию из товаров"""
+        plan = self.database.delete_categories(
+            [self.drinks], DeletePolicy.DETACH
+        )
+
+        self.assertEqual(plan.detached, [(self.milk, self.drinks)])
+        self.assertNotIn(self.drinks.get_id(), self.database.categories)
+        self.assertEqual(self.milk.get_categories(), {self.food})
+        self.assertEqual(
+            self.database.products_with_categories([self.drinks]), []
+        )
+        self.assertEqual(len(self.database.get_products_list()), 3)
+        self.assert_aggregates_consistent()
+
+    def test_cascade_categories(self):
+        """CASCADE удаляет товары категории по политике их статей расходов"""
+        self.database.delete(
+            categories=[self.drinks],
+            policies={
+                Relation.PRODUCT_CATEGORY: DeletePolicy.CASCADE,
+                Relation.EXPENSE_PRODUCT: DeletePolicy.CASCADE,
+            },
+        )
+
+        self.assertNotIn(self.drinks.get_id(), self.database.categories)
+        self.assertNotIn(self.milk.get_id(), self.database.products)
+        self.assertEqual(
+            self.ids(self.database.get_expenses_list()),
+            self.ids(self.expenses[:2]),
+        )
+        self.assertEqual(self.database.get_tombstones(), [])
+        self.assert_aggregates_consistent()
+
+    def test_restrict_categories(self):
+        """RESTRICT запрещает удаление категории, у которой есть товары"""
+        before = self.state()
+        with self.assertRaises(IntegrityError) as context:
+            self.database.delete_categories(
+                [self.drinks], DeletePolicy.RESTRICT
+            )
+
+        self.assertEqual(context.exception.relation, Relation.PRODUCT_CATEGORY)
+        self.assertEqual(self.state(), before)
+
+    def test_unsupported_policy(self):
+        """Недопустимая для связи политика отклоняется до удаления"""
+        before = self.state()
+        with self.assertRaises(ValueError):
+            self.database.delete_products([self.bread], DeletePolicy.DETACH)
+        with self.assertRaises(ValueError):
+            self.database.delete_categories(
+                [self.food], DeletePolicy.TOMBSTONE
+            )
+        with self.assertRaises(ValueError):
+            self.database.set_policy(
+                Relation.EXPENSE_PRODUCT, DeletePolicy.DETACH
+            )
+        self.assertEqual(self.state(), before)
+
+    def test_restrict_rolls_back_transaction(self):
+        """
+        IntegrityError внутри транзакции откатывает все ее изменения,
+        включая агрегаты
+        """
+        before = self.state()
+        with self.assertRaises(IntegrityError):
+            with self.database.transaction():
+                self.database.add_product(Product("Сыр", 300, [self.food]))
+                self.database.delete_expense(self.expenses[3])
+                self.bread.set_price(50)
+                self.database.delete_products(
+                    [self.bread], DeletePolicy.RESTRICT
+                )
+
+        self.assertEqual(self.state(), before)
+        self.assert_aggregates_consistent()
+
+    def test_cascade_rolls_back_transaction(self):
+        """Откат транзакции восстанавливает каскадно удаленные объекты"""
+        before = self.state()
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction():
+                self.database.delete(
+                    categories=[self.drinks],
+                    policies={
+                        Relation.PRODUCT_CATEGORY: DeletePolicy.CASCADE,
+                        Relation.EXPENSE_PRODUCT: DeletePolicy.TOMBSTONE,
+                    },
+                )
+                raise RuntimeError("rollback")
+
+        self.assertEqual(self.state(), before)
+        self.assert_aggregates_consistent()
+
+    def test_reclaim_after_last_expense(self):
+        """Надгробие удаляется вместе с последней статьей расхода"""
+        self.database.delete_product(self.bread)
+        self.database.delete_expense(self.expenses[0])
+        self.assertEqual(
+            self.ids(self.database.get_tombstones()), [self.bread.get_id()]
+        )
+
+        self.database.delete_expenses([self.expenses[1]])
+        self.assertEqual(self.database.get_tombstones(), [])
+        self.assertEqual(self.database.collect_garbage(), 0)
+
+    def test_reclaim_after_repoint(self):
+        """Надгробие удаляется, когда статьи расходов переходят к товару"""
+        self.database.delete_product(self.bread)
+        self.database.update_expenses(self.expenses[:2], product=self.salt)
+
+        self.assertEqual(self.database.get_tombstones(), [])
+        self.assert_aggregates_consistent()
+
+    def leave_tombstone(self):
+        """
+        Создание надгробия без ссылок, как оставленного прежними версиями
+        приложения: соль удаляется, а затем снова становится надгробием
+        """
+        self.database.delete_product(self.salt)
+        self.database._bury(self.salt)
+
+    def test_collect_garbage(self):
+        """Сборка мусора удаляет надгробия, на которые нет ссылок"""
+        self.leave_tombstone()
+        self.database.delete_product(self.milk)
+
+        self.assertEqual(self.database.collect_garbage(), 1)
+        self.assertEqual(
+            self.ids(self.database.get_tombstones()), [self.milk.get_id()]
+        )
+        self.assertEqual(self.database.collect_garbage(), 0)
+
+    def test_deleted_objects_are_freed(self):
+        """Удаленные товары, категории и статьи расходов освобождаются"""
+        refs = [
+            weakref.ref(obj)
+            for obj in [self.drinks, self.milk, self.bread, *self.expenses]
+        ]
+        self.database.delete(
+            categories=[self.drinks],
+            policies={
+                Relation.PRODUCT_CATEGORY: DeletePolicy.CASCADE,
+                Relation.EXPENSE_PRODUCT: DeletePolicy.CASCADE,
+            },
+        )
+        self.database.delete_products([self.bread], DeletePolicy.TOMBSTONE)
+        self.database.delete_expenses(self.database.get_expenses_list())
+
+        del self.drinks, self.milk, self.bread, self.expenses
+        gc.collect()
+        self.assertEqual([ref() for ref in refs if ref() is not None], [])
+
+
+class SqliteDeleteTest(DeleteTest):
+    """Удаление в базе данных SQLite"""
+
+    def make_database(self) -> Database:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = SqliteDatabase(Path(directory.name) / "test.sqlite3")
+        self.addCleanup(database.close)
+        return database
+
+    def leave_tombstone(self):
+        """
+        Надгробия SQLite хранятся в файле, поэтому надгробие без ссылок
+        создается удалением строк статей расходов хлеба в обход базы данных
+        """
+        self.database.delete_product(self.bread)
+        storage = self.database.storage
+        storage.execute_later(
+            "DELETE FROM expenses WHERE product_id = ?",
+            (encode_id(self.bread.get_id()),),
+        )
+        storage.flush()
+
+
+class PopByProductTest(unittest.TestCase):
+    """Удаление статей расходов товара из таблицы (ExpenseTable)"""
+
+    def test_pop_by_product(self):
+        """Удаляются статьи расходов товара, и только они"""
+        table = ExpenseTable()
+        bread = Product("Хлеб", 40, [])
+        milk = Product("Молоко", 80, [])
+        expenses = [
+            Expense(product, 1, START + dt.timedelta(days=i))
+            for i, product in enumerate([bread, milk, bread])
+        ]
+        for expense in expenses:
+            table[expense.get_id()] = expense
+
+        removed = table.pop_by_product(bread)
+
+        self.assertEqual(
+            sorted(e.get_id() for e in removed),
+            sorted([expenses[0].get_id(), expenses[2].get_id()]),
+        )
+        self.assertEqual(list(table.values()), [expenses[1]])
+        self.assertEqual(table.pop_by_product(bread), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Тесты журнала упреждающей записи (см. finacsys.database.journal): сброс
+записей на диск, восстановление базы данных из журнала и из снимка.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Any, Tuple
+
+from finacsys.database import Database, DeletePolicy
+from finacsys.database.journal import Journal
+from finacsys.database.tables import ColumnarExpenseTable
+from finacsys.models import Category, Expense, Product
+
+from .test_integrity import plain_totals
+
+START = dt.datetime(2020, 1, 1)
+
+
+class JournalSyncTest(unittest.TestCase):
+    """Сброс записей журнала на диск группами и по таймеру"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name)
+
+    def make_journal(self, **options) -> Journal:
+        """Журнал во временной директории, закрываемый после теста"""
+        journal = Journal(self.path, **options)
+        self.addCleanup(journal.close)
+        return journal
+
+    def saved(self, journal: Journal) -> int:
+        """Число записей, дошедших до файла журнала"""
+        return len(journal.journal_path.read_text(encoding="utf-8").split())
+
+    def test_batch(self):
+        journal = self.make_journal(batch_size=3, sync_interval=60)
+        journal.append({"op": "a"})
+        journal.append({"op": "b"})
+        self.assertEqual(self.saved(journal), 0)
+        journal.append({"op": "c"})
+        self.assertEqual(self.saved(journal), 3)
+
+    def test_timer(self):
+        journal = self.make_journal(batch_size=1000, sync_interval=0.05)
+        journal.append({"op": "a"})
+        journal.append({"op": "b"})
+        deadline = time.monotonic() + 5
+        while self.saved(journal) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.saved(journal), 2)
+
+    def test_close(self):
+        journal = self.make_journal(batch_size=1000, sync_interval=60)
+        journal.append({"op": "a"})
+        journal.close()
+        self.assertEqual(self.saved(journal), 1)
+
+
+class ReplayTest(unittest.TestCase):
+    """Восстановление базы данных из журнала и снимка при открытии"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name)
+
+    def open(self, **options) -> Database:
+        """База данных в директории теста, закрываемая после теста"""
+        database = Database.open(self.path, **options)
+        self.addCleanup(database.close)
+        return database
+
+    def state(self, database: Database) -> Tuple[Any, ...]:
+        """Содержимое таблиц и агрегаты базы данных"""
+        return (
+            sorted(
+                (c.get_id(), c.get_name())
+                for c in database.get_categories_list()
+            ),
+            sorted(
+                (
+                    p.get_id(),
+                    p.get_name(),
+                    p.get_price(),
+                    sorted(c.get_id() for c in p.get_categories()),
+                )
+                for p in database.get_products_list()
+            ),
+            sorted(
+                (
+                    e.get_id(),
+                    e.get_product_id(),
+                    e.get_count(),
+                    e.get_timestamp(),
+                )
+                for e in database.get_expenses_list()
+            ),
+            sorted(p.get_id() for p in database.get_tombstones()),
+            plain_totals(database.get_aggregates()),
+        )
+
+    def fill(self, database: Database):
+        """Изменения всех видов: добавление, изменение, удаление"""
+        food, drinks = Category("Еда"), Category("Напитки")
+        database.add_category(food)
+        database.add_category(drinks)
+        bread = Product("Хлеб", "40.50", [food])
+        milk = Product("Молоко", 80, [food, drinks])
+        salt = Product("Соль", 20, [food])
+        for product in (bread, milk, salt):
+            database.add_product(product)
+        expenses = [
+            Expense(product, 1 + i, START + dt.timedelta(hours=7 * i))
+            for i, product in enumerate([bread, milk, salt] * 4)
+        ]
+        database.add_expenses(expenses)
+
+        milk.set_name("Кефир")
+        bread.set_price("41.25")
+        salt.add_category(drinks)
+        expenses[0].set_count("0.5")
+        expenses[1].set_datetime(START + dt.timedelta(days=9))
+        expenses[2].set_product(milk)
+        database.delete_expense(expenses[3])
+        database.delete_products([salt], DeletePolicy.TOMBSTONE)
+        with database.transaction():
+            database.add_category(Category("Бытовая химия"))
+            bread.set_name("Батон")
+
+    def test_replay_journal(self):
+        database = self.open()
+        self.fill(database)
+        expected = self.state(database)
+        database.close()
+
+        self.assertEqual(self.state(self.open()), expected)
+
+    def test_rolled_back_transaction(self):
+        database = self.open()
+        self.fill(database)
+        expected = self.state(database)
+        (product, *_) = database.get_products_list()
+        try:
+            with database.transaction():
+                product.set_price(1000)
+                database.add_category(Category("Лишняя"))
+                raise KeyError()
+        except KeyError:
+            pass
+        database.close()
+
+        self.assertEqual(self.state(self.open()), expected)
+
+    def test_torn_last_line(self):
+        database = self.open()
+        self.fill(database)
+        expected = self.state(database)
+        database.close()
+        with open(self.path / "journal.log", mode="a") as file:
+            file.write('{"op":"add_category","na')
+
+        database = self.open()
+        self.assertEqual(self.state(database), expected)
+        # Новые записи не склеиваются с оборванной строкой
+        database.add_category(Category("Новая"))
+        expected = self.state(database)
+        database.close()
+        self.assertEqual(self.state(self.open()), expected)
+
+    def test_snapshot(self):
+        database = self.open(snapshot_threshold=10)
+        self.fill(database)
+        expected = self.state(database)
+        database.close()
+
+        self.assertTrue(database.journal.snapshot_path.exists())
+        database = self.open(snapshot_threshold=10)
+        self.assertIsInstance(database.expenses, ColumnarExpenseTable)
+        self.assertEqual(self.state(database), expected)
+
+        # Изменения после снимка дописываются в журнал
+        (expense, *_) = database.get_expenses_list()
+        expense.set_count(7)
+        database.delete_expense(database.get_expenses_list()[-1])
+        expected = self.state(database)
+        database.close()
+        self.assertEqual(self.state(self.open()), expected)
@@ -0,0 +1,51 @@
+"""
+Тесты чисел с фиксированной точкой (см. finacsys.money): сравнение сумм и
+количеств с числами int и float и согласованный с ним хеш.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import unittest
+
+from finacsys.models import Expense, Product
+from finacsys.money import Money, Quantity
+
+
+class FixedPointEqualityTest(unittest.TestCase):
+    """Равенство Money и Quantity числам"""
+
+    def test_numbers(self):
+        cases = [
+            (Money.parse("0.10"), 0.1),
+            (Money.parse("12.50"), 12.5),
+            (Money.parse("3.00"), 3),
+            (Quantity.parse("0.003"), 0.003),
+            (Quantity.parse("2"), 2),
+        ]
+        for number, other in cases:
+            with self.subTest(number=number, other=other):
+                self.assertEqual(number, other)
+                self.assertEqual(other, number)
+                self.assertEqual(hash(number), hash(other))
+
+    def test_not_equal(self):
+        # Дробное число не округляется до долей, как в методе of
+        self.assertNotEqual(Money.parse("1.00"), 1.004)
+        self.assertNotEqual(Money.parse("1.00"), 100)
+        self.assertNotEqual(Money.parse("1.00"), True)
+        self.assertNotEqual(Money.parse("1.00"), float("inf"))
+        self.assertNotEqual(Money.parse("1.00"), float("nan"))
+        self.assertNotEqual(Money.parse("1.00"), "1.00")
+        self.assertNotEqual(Money.parse("1.00"), Quantity.parse("1"))
+
+    def test_model_getters(self):
+        product = Product("Хлеб", 12.5, [])
+        expense = Expense(product, 0.5, dt.datetime(2020, 1, 1))
+        self.assertEqual(product.get_price(), 12.5)
+        self.assertEqual(expense.get_count(), 0.5)
+        self.assertEqual(expense.get_total_price(), Money.parse("6.25"))
+
+    def test_ordering_needs_same_type(self):
+        self.assertLess(Money.parse("1.00"), Money.parse("1.01"))
+        with self.assertRaises(TypeError):
+            _ = Money.parse("1.00") < 2
@@ -0,0 +1,125 @@
+"""
+Тесты постраничного обхода объектов для списков выбора (см.
+finacsys.database.pages): границы страниц и изменения таблиц между чтением
+страниц в памяти и в SQLite, а также выбор всех вариантов подсказки
+SearchPrompt (см. finacsys.viewers.search).
+
+Запуск: python -m unittest discover tests
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from finacsys.database import Database, SqliteDatabase
+from finacsys.database.pages import Pages
+from finacsys.models import Product
+
+
+class PagesTest(unittest.TestCase):
+    """Обход страницами товаров базы данных"""
+
+    def make_database(self) -> Database:
+        """База данных с 25 товарами"""
+        database = Database()
+        for i in range(25):
+            database.add_product(Product(f"Товар {i:02}", 1, []))
+        return database
+
+    def names(self, objects) -> list:
+        """Названия объектов"""
+        return [obj.get_name() for obj in objects]
+
+    def test_page_boundaries(self):
+        database = self.make_database()
+        for size, lengths in ((10, [10, 10, 5]), (5, [5] * 5), (25, [25])):
+            with self.subTest(size=size):
+                pages = database.pages("product", size)
+                self.assertTrue(pages)
+                read = [len(pages.next()) for _ in lengths]
+                self.assertEqual(read, lengths)
+                # Последняя полная страница не означает конец обхода, пока
+                # следующая страница не прочитана
+                self.assertEqual(pages.next(), [])
+                self.assertTrue(pages.exhausted())
+                self.assertEqual(pages.next(), [])
+
+    def test_rest(self):
+        database = self.make_database()
+        pages = database.pages("product", 10)
+        first = pages.next()
+        rest = pages.rest()
+        self.assertEqual(len(first) + len(rest), 25)
+        self.assertEqual(
+            sorted(self.names(first + rest)),
+            sorted(self.names(database.get_products_list())),
+        )
+        self.assertTrue(pages.exhausted())
+
+    def test_empty(self):
+        self.assertFalse(Pages([]))
+        self.assertFalse(Database().pages("product"))
+
+    def check_mutation(self, database: Database):
+        pages = database.pages("product", 10)
+        first = pages.next()
+        products = database.get_products_list()
+        unread = [p for p in products if p not in first]
+        database.delete_products(unread[:3])
+        database.add_product(Product("Новый товар", 1, []))
+        rest = pages.rest()
+
+        self.assertTrue(pages.exhausted())
+        self.assertFalse(set(rest) & set(unread[:3]))
+        self.assertFalse(set(rest) & set(first))
+        self.assertTrue(set(unread[3:]) <= set(rest))
+
+    def test_mutation_between_pages(self):
+        self.check_mutation(self.make_database())
+
+    def test_sqlite_mutation_between_pages(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = SqliteDatabase(Path(directory.name) / "finacsys.sqlite3")
+        self.addCleanup(database.close)
+        for i in range(25):
+            database.add_product(Product(f"Товар {i:02}", 1, []))
+        self.check_mutation(database)
+
+
+class ToggleAllTest(unittest.TestCase):
+    """Выбор всех вариантов подсказки, варианты которой читаются страницами"""
+
+    def setUp(self):
+        try:
+            from finacsys.viewers.search import search_supported
+        except ImportError:
+            self.skipTest("InquirerPy is not installed")
+        if not search_supported():
+            self.skipTest("SearchPrompt does not support this InquirerPy")
+
+    def test_toggle_all(self):
+        from prompt_toolkit.application import create_app_session
+        from prompt_toolkit.input import create_pipe_input
+        from prompt_toolkit.output import DummyOutput
+
+        from finacsys.viewers.viewer import fuzzy
+
+        database = Database()
+        for i in range(250):
+            database.add_product(Product(f"Товар {i:03}", 1, []))
+
+        with create_pipe_input() as keys, create_app_session(
+            input=keys, output=DummyOutput()
+        ):
+            # Alt+R — выбор всех вариантов, затем Enter
+            keys.send_text("\x1br\r")
+            prompt = fuzzy(
+                database.pages("product", 100),
+                database.search("product"),
+                message="Товары",
+                multiselect=True,
+            )
+            selected = prompt.execute()
+
+        self.assertEqual(len(selected), 250)
+        self.assertEqual(set(selected), set(database.get_products_list()))
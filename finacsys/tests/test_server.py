@@ -0,0 +1,78 @@
+"""
+Тесты протокола HTTP-сервера (см. finacsys.server.protocol): чтение
+запросов и ответы на оборванные запросы.
+
+Запуск: python -m unittest discover tests
+"""
+import asyncio
+import json
+import unittest
+from http import HTTPStatus
+
+from finacsys.database import Database
+from finacsys.server import Api, HttpError, start_server
+from finacsys.server.protocol import read_request
+
+HEAD = b"POST /categories HTTP/1.1\r\nHost: x\r\nContent-Length: 20\r\n\r\n"
+
+
+async def read(data: bytes):
+    """
+    Чтение запроса из потока с данными data, после которых соединение
+    закрыто
+    """
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return await read_request(reader)
+
+
+class ReadRequestTest(unittest.TestCase):
+    """Чтение одного запроса из потока"""
+
+    def assert_truncated(self, data: bytes):
+        with self.assertRaises(HttpError) as raised:
+            asyncio.run(read(data))
+        self.assertEqual(raised.exception.status, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(raised.exception.message, "Truncated request")
+
+    def test_request(self):
+        body = b'{"name": "Food"}'
+        data = HEAD.replace(b"20", str(len(body)).encode()) + body
+        request, alive = asyncio.run(read(data))
+        self.assertEqual(request.method, "POST")
+        self.assertEqual(request.path, "/categories")
+        self.assertEqual(request.json(), {"name": "Food"})
+        self.assertTrue(alive)
+
+    def test_closed_between_requests(self):
+        self.assertIsNone(asyncio.run(read(b"")))
+
+    def test_truncated_head(self):
+        self.assert_truncated(HEAD[:20])
+
+    def test_truncated_body(self):
+        self.assert_truncated(HEAD + b'{"name": ')
+
+
+class TruncatedRequestTest(unittest.TestCase):
+    """Ответ сервера на запрос, тело которого оборвано"""
+
+    async def send(self, data: bytes) -> bytes:
+        server = await start_server(Api(Database()), "127.0.0.1", 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(data)
+            writer.write_eof()
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+        return response
+
+    def test_truncated_body(self):
+        response = asyncio.run(self.send(HEAD + b'{"name": '))
+        head, body = response.split(b"\r\n\r\n", 1)
+        self.assertTrue(head.startswith(b"HTTP/1.1 400 "))
+        self.assertIn(b"Connection: close", head)
+        self.assertEqual(json.loads(body), {"error": "Truncated request"})
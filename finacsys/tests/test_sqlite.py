@@ -0,0 +1,184 @@
+"""
+Тесты хранения цен и количеств в SQLite (см.
+finacsys.database.tables.sqlite_table): целые доли в столбцах INTEGER,
+перенос столбцов REAL, записанных прежними версиями, и агрегаты расходов,
+сохраненные до изменения хранилища.
+
+Запуск: python -m unittest discover tests
+"""
+import datetime as dt
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from finacsys.database import SqliteDatabase
+from finacsys.database.aggregates import Aggregates
+from finacsys.database.records import encode_id
+from finacsys.models import Expense, Product
+from finacsys.money import Money, Quantity
+
+from .test_integrity import plain_totals
+
+# Схема прежних версий: цены в рублях и количества в единицах товара
+REAL_SCHEMA = """
+CREATE TABLE categories (id TEXT PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE products (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE product_categories (
+    product_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    PRIMARY KEY (product_id, category_id)
+) WITHOUT ROWID;
+CREATE TABLE expenses (
+    id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    count REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX products_name ON products (name);
+CREATE INDEX expenses_product ON expenses (product_id);
+"""
+
+
+class SqliteUnitsTest(unittest.TestCase):
+    """Цены и количества в файле SQLite"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "finacsys.sqlite3"
+
+    def columns(self, table: str):
+        """Столбцы таблицы файла и их типы"""
+        with closing(sqlite3.connect(self.path)) as connection:
+            info = connection.execute(f"PRAGMA table_info({table})")
+            return {row[1]: row[2] for row in info.fetchall()}
+
+    def test_integer_units(self):
+        database = SqliteDatabase(self.path)
+        product = Product("Сыр", "0.10", [])
+        database.add_product(product)
+        expense = Expense(product, "0.003", dt.datetime(2020, 1, 1))
+        database.add_expense(expense)
+        product.set_price("0.20")
+        expense.set_count("0.007")
+        database.close()
+
+        with closing(sqlite3.connect(self.path)) as connection:
+            price = connection.execute("SELECT price_units FROM products")
+            count = connection.execute("SELECT count_units FROM expenses")
+            self.assertEqual(price.fetchall(), [(20,)])
+            self.assertEqual(count.fetchall(), [(7,)])
+
+        database = SqliteDatabase(self.path)
+        self.addCleanup(database.close)
+        (expense,) = database.get_expenses_list()
+        self.assertEqual(expense.get_price(), Money.parse("0.20"))
+        self.assertEqual(expense.get_count(), Quantity.parse("0.007"))
+
+    def test_migrate_real_columns(self):
+        product_id = encode_id(1)
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.executescript(REAL_SCHEMA)
+            connection.execute(
+                "INSERT INTO products VALUES (?, 'Хлеб', 1.1, 0)",
+                (product_id,),
+            )
+            connection.executemany(
+                "INSERT INTO expenses VALUES (?, ?, ?, '2020-01-01 12:00:00')",
+                [
+                    (encode_id(2), product_id, 0.3),
+                    (encode_id(3), product_id, 2),
+                ],
+            )
+
+        database = SqliteDatabase(self.path)
+        self.addCleanup(database.close)
+        self.assertNotIn("price", self.columns("products"))
+        self.assertEqual(self.columns("products")["price_units"], "INTEGER")
+        self.assertEqual(self.columns("expenses")["count_units"], "INTEGER")
+
+        (product,) = database.get_products_list()
+        self.assertEqual(product.get_price(), Money.parse("1.10"))
+        counts = sorted(e.get_count() for e in database.get_expenses_list())
+        self.assertEqual(counts, [Quantity.parse("0.3"), Quantity.parse("2")])
+        self.assertEqual(
+            database.expenses.query().total_price(), Money.parse("2.53")
+        )
+
+        with closing(sqlite3.connect(self.path)) as connection:
+            indexes = connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'expenses' AND name NOT LIKE 'sqlite_%'"
+            )
+            self.assertIn(("expenses_product",), indexes.fetchall())
+
+
+class SqliteAggregatesTest(unittest.TestCase):
+    """Агрегаты расходов, сохраненные до изменения хранилища"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = SqliteDatabase(
+            Path(directory.name) / "finacsys.sqlite3"
+        )
+        self.addCleanup(self.database.close)
+        self.product = Product("Хлеб", "1.50", [])
+        self.database.add_product(self.product)
+        self.database.add_expense(
+            Expense(self.product, 2, dt.datetime(2020, 1, 1))
+        )
+
+    def assert_actual(self):
+        self.assertEqual(
+            plain_totals(self.database.get_aggregates()),
+            plain_totals(Aggregates.build(self.database.expenses.values())),
+        )
+
+    def test_cached(self):
+        aggregates = self.database.get_aggregates()
+        self.assertIs(self.database.get_aggregates(), aggregates)
+        self.database.get_expenses_list()
+        self.assertIs(self.database.get_aggregates(), aggregates)
+
+    def test_invalidated_by_writes(self):
+        first = self.database.get_aggregates()
+        self.database.add_expense(
+            Expense(self.product, 1, dt.datetime(2020, 1, 2))
+        )
+        self.assertIsNot(self.database.get_aggregates(), first)
+        self.assertEqual(self.database.get_aggregates().overall.count, 2)
+        self.assert_actual()
+
+        total = self.database.get_aggregates().overall.total
+        self.product.set_price("3.00")
+        self.assertEqual(
+            self.database.get_aggregates().overall.total, 2 * total
+        )
+        self.assert_actual()
+
+        (expense, _) = self.database.get_expenses_list()
+        self.database.delete_expense(expense)
+        self.assert_actual()
+
+    def test_invalidated_by_rollback(self):
+        try:
+            with self.database.transaction():
+                self.database.add_expense(
+                    Expense(self.product, 5, dt.datetime(2020, 1, 3))
+                )
+                self.assertEqual(
+                    self.database.get_aggregates().overall.count, 2
+                )
+                raise KeyError()
+        except KeyError:
+            pass
+        self.assertEqual(self.database.get_aggregates().overall.count, 1)
+        self.assert_actual()